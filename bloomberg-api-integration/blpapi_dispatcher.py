@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Bloomberg blpapi Request Dispatcher
+Runs a blpapi session on its own thread and answers requests with asyncio futures
+
+The discovery handlers used to call session.sendRequest() and then spin on
+session.nextEvent(timeout) inside an `async` FastAPI handler, blocking the
+VM API's event loop for up to 10 seconds per call and handling one request
+at a time. A BlpapiDispatcher owns the session instead:
+
+- callers submit (service, operation, configure, parse) and await a future
+- the dispatcher thread creates and sends the request with a fresh
+  CorrelationId, then keeps pumping nextEvent()
+- PARTIAL_RESPONSE / RESPONSE messages are routed back to the request by
+  CorrelationId and parsed on the dispatcher thread (blpapi elements are
+  not touched anywhere else)
+- the final RESPONSE (or a RequestFailure / deadline) resolves the future
+  on the caller's event loop
+
+so any number of instrumentList / ReferenceData requests can be in flight
+at once without the event loop ever blocking.
+
+blpapi is only needed for connect(); any object with the session methods
+used here (see FakeSession in test_blpapi_dispatcher.py) can be driven
+without a Bloomberg terminal.
+
+Usage:
+    dispatcher = BlpapiDispatcher.connect()          # or BlpapiDispatcher(session).start()
+    rows = await dispatcher.request(
+        "//blp/refdata", "ReferenceDataRequest",
+        configure=lambda request: request.append("securities", "USSO1 BGN Curncy"),
+        parse=parse_security_data
+    )
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import blpapi
+except ImportError:  # Fake sessions and tests run without the SDK
+    blpapi = None
+
+logger = logging.getLogger(__name__)
+
+# blpapi.Event type values, for sessions driven without the SDK
+REQUEST_STATUS = blpapi.Event.REQUEST_STATUS if blpapi else 4
+RESPONSE = blpapi.Event.RESPONSE if blpapi else 5
+PARTIAL_RESPONSE = blpapi.Event.PARTIAL_RESPONSE if blpapi else 6
+
+BLPAPI_HOST = os.getenv("BLPAPI_HOST", "localhost")
+BLPAPI_PORT = int(os.getenv("BLPAPI_PORT", "8194"))
+
+
+def correlation_value(correlation_id: Any) -> Any:
+    """blpapi.CorrelationId -> the integer it was created with"""
+    return correlation_id.value() if hasattr(correlation_id, "value") else correlation_id
+
+
+@dataclass
+class PendingRequest:
+    service: str
+    operation: str
+    configure: Callable[[Any], None]
+    parse: Callable[[Any], List[Any]]
+    future: asyncio.Future
+    loop: asyncio.AbstractEventLoop
+    deadline: float
+    results: List[Any] = field(default_factory=list)
+    # Streaming requests hand each message's rows to this (on the caller's loop) instead
+    on_rows: Optional[Callable[[List[Any]], None]] = None
+
+
+class BlpapiDispatcher:
+    """One thread owns the session; requests are correlated by CorrelationId"""
+
+    def __init__(self, session: Any, poll_timeout_ms: int = 100, max_errors: int = 10, error_backoff: float = 0.05):
+        self.session = session
+        self.poll_timeout_ms = poll_timeout_ms
+        # Consecutive pump errors back off (doubling up to 2s); after max_errors the session is taken as dead
+        self.max_errors = max_errors
+        self.error_backoff = error_backoff
+        self._submissions: "queue.Queue[PendingRequest]" = queue.Queue()
+        self._pending: Dict[Any, PendingRequest] = {}
+        self._services: Dict[str, Any] = {}
+        self._ids = itertools.count(1)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"sent": 0, "completed": 0, "failed": 0, "timed_out": 0, "errors": 0}
+
+    @classmethod
+    def connect(cls, host: str = BLPAPI_HOST, port: int = BLPAPI_PORT) -> "BlpapiDispatcher":
+        """Start a dedicated blpapi session and a dispatcher thread for it"""
+        if blpapi is None:
+            raise RuntimeError("blpapi is not installed")
+        options = blpapi.SessionOptions()
+        options.setServerHost(host)
+        options.setServerPort(port)
+        session = blpapi.Session(options)
+        if not session.start():
+            raise RuntimeError(f"Failed to start Bloomberg session on {host}:{port}")
+        return cls(session).start()
+
+    def start(self) -> "BlpapiDispatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="blpapi-dispatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the thread; anything still in flight fails with ConnectionError"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending) + self._submissions.qsize()
+
+    def _submit(
+        self,
+        service: str,
+        operation: str,
+        configure: Callable[[Any], None],
+        parse: Callable[[Any], List[Any]],
+        timeout: float,
+        on_rows: Optional[Callable[[List[Any]], None]] = None
+    ) -> PendingRequest:
+        if self._thread is None or self._stop.is_set():
+            raise ConnectionError("Bloomberg dispatcher is not running")
+        loop = asyncio.get_running_loop()
+        pending = PendingRequest(
+            service=service,
+            operation=operation,
+            configure=configure,
+            parse=parse,
+            future=loop.create_future(),
+            loop=loop,
+            deadline=time.monotonic() + timeout,
+            on_rows=on_rows
+        )
+        self._submissions.put(pending)
+        return pending
+
+    async def request(
+        self,
+        service: str,
+        operation: str,
+        configure: Callable[[Any], None],
+        parse: Callable[[Any], List[Any]],
+        timeout: float = 10.0
+    ) -> List[Any]:
+        """
+        Send one request and await everything parse() extracted from its responses
+
+        configure(request) fills in the request; parse(message) runs on the
+        dispatcher thread for every response message and returns rows.
+        """
+        return await self._submit(service, operation, configure, parse, timeout).future
+
+    async def stream(
+        self,
+        service: str,
+        operation: str,
+        configure: Callable[[Any], None],
+        parse: Callable[[Any], List[Any]],
+        timeout: float = 10.0
+    ) -> AsyncIterator[List[Any]]:
+        """Like request(), but yields each message's rows as its (partial) response arrives"""
+        rows: asyncio.Queue = asyncio.Queue()
+        pending = self._submit(service, operation, configure, parse, timeout, on_rows=rows.put_nowait)
+        # Scheduled after every on_rows call, so the sentinel always comes last
+        pending.future.add_done_callback(lambda _: rows.put_nowait(None))
+        while True:
+            batch = await rows.get()
+            if batch is None:
+                break
+            yield batch
+        pending.future.result()  # Re-raise a failure or timeout
+
+    async def stream_many(
+        self,
+        requests: Iterable[Tuple[Any, Tuple]]
+    ) -> AsyncIterator[Tuple[Any, List[Any], Optional[Exception]]]:
+        """
+        Pipeline several requests at once and merge their streams
+
+        requests is [(key, (service, operation, configure, parse, timeout))];
+        yields (key, rows, None) as partials arrive and (key, [], error) for a
+        request that failed. All requests are submitted up front, each with its
+        own correlation ID, rather than one after another.
+        """
+        merged: asyncio.Queue = asyncio.Queue()
+        streams = [(key, self.stream(*args)) for key, args in requests]
+
+        async def pump(key, rows_stream):
+            try:
+                async for rows in rows_stream:
+                    merged.put_nowait((key, rows, None))
+            except Exception as e:
+                merged.put_nowait((key, [], e))
+
+        tasks = [asyncio.create_task(pump(key, rows_stream)) for key, rows_stream in streams]
+        done = asyncio.gather(*tasks)
+        done.add_done_callback(lambda _: merged.put_nowait(None))
+        try:
+            while True:
+                item = await merged.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # Everything below runs on the dispatcher thread
+
+    def _run(self):
+        errors = 0
+        stopped = ConnectionError("Bloomberg dispatcher stopped")
+        while not self._stop.is_set():
+            try:
+                self._send_submissions()
+                event = self.session.nextEvent(self.poll_timeout_ms)
+                self._dispatch(event)
+                self._expire()
+                errors = 0
+            except Exception as e:
+                errors += 1
+                self.stats["errors"] += 1
+                logger.error(f"Bloomberg dispatcher error ({errors} in a row): {e}")
+                if errors >= self.max_errors:
+                    logger.error(f"Bloomberg session looks dead after {errors} errors - stopping the dispatcher")
+                    stopped = ConnectionError(f"Bloomberg dispatcher stopped after repeated errors: {e}")
+                    self._stop.set()
+                    break
+                # Wakes early on stop()
+                self._stop.wait(min(self.error_backoff * 2 ** (errors - 1), 2.0))
+        for pending in list(self._pending.values()) + self._drain_submissions():
+            self._resolve(pending, error=stopped)
+        self._pending.clear()
+
+    def _drain_submissions(self) -> List[PendingRequest]:
+        drained = []
+        while True:
+            try:
+                drained.append(self._submissions.get_nowait())
+            except queue.Empty:
+                return drained
+
+    def _service(self, name: str) -> Any:
+        if name not in self._services:
+            if not self.session.openService(name):
+                raise ConnectionError(f"Failed to open {name}")
+            self._services[name] = self.session.getService(name)
+        return self._services[name]
+
+    def _send_submissions(self):
+        for pending in self._drain_submissions():
+            if pending.future.cancelled():
+                continue
+            correlation_id = next(self._ids)
+            try:
+                request = self._service(pending.service).createRequest(pending.operation)
+                pending.configure(request)
+                # Registered before sending so an immediate response finds it
+                self._pending[correlation_id] = pending
+                self.session.sendRequest(
+                    request,
+                    correlationId=blpapi.CorrelationId(correlation_id) if blpapi else correlation_id
+                )
+                self.stats["sent"] += 1
+            except Exception as e:
+                self._pending.pop(correlation_id, None)
+                self._resolve(pending, error=e)
+
+    def _dispatch(self, event: Any):
+        event_type = event.eventType()
+        if event_type not in (PARTIAL_RESPONSE, RESPONSE, REQUEST_STATUS):
+            return
+        for message in event:
+            for correlation_id in message.correlationIds():
+                key = correlation_value(correlation_id)
+                pending = self._pending.get(key)
+                if pending is None:
+                    continue
+                if event_type == REQUEST_STATUS:
+                    # RequestFailure - the request will get no RESPONSE
+                    del self._pending[key]
+                    self._resolve(pending, error=RuntimeError(f"{pending.operation} failed: {message}"))
+                    continue
+                try:
+                    rows = pending.parse(message)
+                    if pending.on_rows is not None:
+                        pending.loop.call_soon_threadsafe(pending.on_rows, rows)
+                    else:
+                        pending.results.extend(rows)
+                except Exception as e:
+                    del self._pending[key]
+                    self._resolve(pending, error=e)
+                    continue
+                if event_type == RESPONSE:
+                    del self._pending[key]
+                    self._resolve(pending, results=pending.results)
+
+    def _expire(self):
+        now = time.monotonic()
+        for key, pending in list(self._pending.items()):
+            if now >= pending.deadline:
+                del self._pending[key]
+                self._resolve(pending, error=TimeoutError(f"{pending.operation} timed out"), outcome="timed_out")
+
+    def _resolve(
+        self,
+        pending: PendingRequest,
+        results: Optional[List[Any]] = None,
+        error: Optional[Exception] = None,
+        outcome: Optional[str] = None
+    ):
+        """Complete the caller's future on its own loop; outcome is the stats counter (default failed/completed)"""
+        self.stats[outcome or ("failed" if error else "completed")] += 1
+
+        def complete():
+            if pending.future.done():
+                return
+            if error is not None:
+                pending.future.set_exception(error)
+            else:
+                pending.future.set_result(results)
+
+        try:
+            pending.loop.call_soon_threadsafe(complete)
+        except RuntimeError:
+            pass  # The caller's loop is already closed
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Persistent instrumentListRequest Result Cache
+Remembers ticker-discovery search results across requests and restarts
+
+The SEARCH_PATTERNS queries ("USD OIS", "EUR swap", ...) return the same
+instruments day after day, but every discovery script re-issues them. The
+cache keeps one SQLite row per (search_type, currency, query, max_results)
+with the tickers found and when they were fetched. Concurrent requests for
+the same key share one in-flight search, so a multi-currency sweep hits the
+instruments service at most once per query per TTL.
+
+Usage:
+    cache = SearchCache()
+    tickers, fetched_at = await cache.get_or_fetch(key, fetch, force_refresh=False)
+
+Environment Variables:
+- SEARCH_CACHE_FILE: SQLite file (default: ~/.cache/bloomberg_search_cache.sqlite)
+- SEARCH_CACHE_TTL: Seconds a search result is trusted (default: 86400 - 1 day)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = Path(os.getenv(
+    "SEARCH_CACHE_FILE",
+    str(Path.home() / ".cache" / "bloomberg_search_cache.sqlite")
+))
+SEARCH_TTL = int(os.getenv("SEARCH_CACHE_TTL", "86400"))
+
+SearchKey = Tuple[str, str, str, int]
+
+
+class SearchCache:
+    """SQLite-backed (search_type, currency, query, max_results) -> tickers with a TTL"""
+
+    def __init__(self, path: Path = CACHE_FILE, ttl: int = SEARCH_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "shared": 0, "refreshed": 0}
+        self._lock = threading.Lock()
+        self._inflight: Dict[SearchKey, asyncio.Future] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS searches (
+                    search_type TEXT NOT NULL,
+                    currency TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    max_results INTEGER NOT NULL,
+                    tickers TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (search_type, currency, query, max_results)
+                )
+            """)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            # Without a cache every search simply goes to Bloomberg
+            logger.warning(f"Search cache unavailable at {self.path}: {e}")
+            self._conn = None
+
+    def lookup(self, key: SearchKey) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        """Fresh cached (tickers, fetched_at) for a search, or None"""
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tickers, fetched_at FROM searches "
+                "WHERE search_type = ? AND currency = ? AND query = ? AND max_results = ?",
+                key
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def store(self, key: SearchKey, tickers: List[Dict[str, Any]], fetched_at: Optional[float] = None):
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, json.dumps(tickers), fetched_at or time.time())
+            )
+            self._conn.commit()
+
+    async def get_or_fetch(
+        self,
+        key: SearchKey,
+        fetch: Callable[[], Awaitable[List[Dict[str, Any]]]],
+        force_refresh: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Cached tickers for a search, fetching (once, even when called concurrently) if stale
+
+        Returns (tickers, cached_at) - cached_at is None when Bloomberg was just asked.
+        A failed fetch raises and is not cached; callers sharing it see the same error.
+        """
+        if not force_refresh:
+            cached = self.lookup(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return cached[0], datetime.fromtimestamp(cached[1]).isoformat()
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["shared"] += 1
+            return await asyncio.shield(inflight), None
+
+        self.stats["refreshed" if force_refresh else "misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            tickers = await fetch()
+            self.store(key, tickers)
+            future.set_result(tickers)
+            return tickers, None
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieved here so waiters-less failures are not logged as unhandled
+            future.exception()
+            raise
+        except BaseException:
+            # The caller running the fetch was cancelled; its waiters see a failed search
+            # rather than a cancellation of their own
+            future.set_exception(RuntimeError(f"Search {key} was cancelled before it completed"))
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def summary(self) -> Dict[str, Any]:
+        entries = 0
+        if self._conn is not None:
+            with self._lock:
+                entries = self._conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+        return {"entries": entries, "ttl": self.ttl, **self.stats}
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Tests for the blpapi dispatcher and the discovery handlers, without a terminal
+
+FakeSession implements the slice of blpapi.Session the dispatcher uses
+(openService / getService / sendRequest / nextEvent). Each request is
+answered from a responder callback after a configurable delay, as one or
+more PARTIAL_RESPONSE events followed by a RESPONSE.
+
+Run: python -m pytest test_blpapi_dispatcher.py -q
+"""
+
+import asyncio
+import json
+import queue
+import threading
+import time
+
+import pytest
+
+import ticker_discovery_fixed
+from blpapi_dispatcher import PARTIAL_RESPONSE, REQUEST_STATUS, RESPONSE, BlpapiDispatcher
+from search_cache import SearchCache
+
+TIMEOUT = 10
+
+
+class FakeElement:
+    """Dicts, lists and scalars behind the blpapi Element accessors"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def hasElement(self, name):
+        return isinstance(self.value, dict) and name in self.value
+
+    def getElement(self, name):
+        return FakeElement(self.value[name])
+
+    def numValues(self):
+        return len(self.value)
+
+    def getValue(self, i):
+        return FakeElement(self.value[i])
+
+    def getElementAsString(self, name):
+        return str(self.value[name])
+
+    def getElementAsFloat(self, name):
+        return float(self.value[name])
+
+
+class FakeMessage(FakeElement):
+    def __init__(self, correlation_id, value):
+        super().__init__(value)
+        self.correlation_id = correlation_id
+
+    def correlationIds(self):
+        return [self.correlation_id]
+
+
+class FakeEvent:
+    def __init__(self, event_type, messages=()):
+        self.event_type = event_type
+        self.messages = list(messages)
+
+    def eventType(self):
+        return self.event_type
+
+    def __iter__(self):
+        return iter(self.messages)
+
+
+class FakeRequest:
+    def __init__(self, operation):
+        self.operation = operation
+        self.values = {}
+
+    def set(self, name, value):
+        self.values[name] = value
+
+    def append(self, name, value):
+        self.values.setdefault(name, []).append(value)
+
+
+class FakeService:
+    def createRequest(self, operation):
+        return FakeRequest(operation)
+
+
+class FakeSession:
+    """
+    responder(request) -> list of message bodies (one event each, the last
+    one is the RESPONSE), or None to fail the request with REQUEST_STATUS
+    """
+
+    def __init__(self, responder, delay=0.0):
+        self.responder = responder
+        self.delay = delay
+        self.events = queue.Queue()
+        self.sent = []
+        self.threads = set()
+
+    def openService(self, name):
+        return True
+
+    def getService(self, name):
+        return FakeService()
+
+    def sendRequest(self, request, correlationId=None):
+        self.threads.add(threading.current_thread().name)
+        self.sent.append(request)
+        bodies = self.responder(request)
+
+        def respond():
+            time.sleep(self.delay)
+            if bodies is None:
+                self.events.put(FakeEvent(REQUEST_STATUS, [FakeMessage(correlationId, {"reason": "RequestFailure"})]))
+                return
+            for i, body in enumerate(bodies):
+                event_type = RESPONSE if i == len(bodies) - 1 else PARTIAL_RESPONSE
+                self.events.put(FakeEvent(event_type, [FakeMessage(correlationId, body)]))
+
+        threading.Thread(target=respond, daemon=True).start()
+
+    def nextEvent(self, timeout=0):
+        self.threads.add(threading.current_thread().name)
+        try:
+            return self.events.get(timeout=timeout / 1000)
+        except queue.Empty:
+            return FakeEvent(TIMEOUT)
+
+
+def reference_responder(request):
+    """One securityData entry per security, split into one partial per security"""
+    bodies = []
+    for ticker in request.values.get("securities", []):
+        if ticker.startswith("BAD"):
+            entry = {"security": ticker, "securityError": {"message": "Unknown"}}
+        else:
+            entry = {"security": ticker, "fieldData": {"NAME": f"{ticker} name", "PX_LAST": len(ticker)}}
+        bodies.append({"securityData": [entry]})
+    return bodies
+
+
+def echo(message):
+    return [message.value]
+
+
+@pytest.fixture
+def dispatcher_for():
+    started = []
+
+    def start(session):
+        dispatcher = BlpapiDispatcher(session, poll_timeout_ms=10).start()
+        started.append(dispatcher)
+        return dispatcher
+
+    yield start
+    for dispatcher in started:
+        dispatcher.stop()
+
+
+def test_concurrent_requests_are_correlated(dispatcher_for):
+    session = FakeSession(lambda request: [{"query": request.values["query"]}], delay=0.2)
+    dispatcher = dispatcher_for(session)
+
+    async def run():
+        queries = [f"query {i}" for i in range(20)]
+        started = time.monotonic()
+        results = await asyncio.gather(*[
+            dispatcher.request("//blp/instruments", "instrumentListRequest",
+                               lambda request, q=q: request.set("query", q), echo)
+            for q in queries
+        ])
+        return queries, results, time.monotonic() - started
+
+    queries, results, elapsed = asyncio.run(run())
+    assert results == [[{"query": q}] for q in queries]
+    # 20 requests at 0.2s each overlap instead of taking 4s back to back
+    assert elapsed < 1.5
+    assert session.threads == {"blpapi-dispatcher"}
+
+
+def test_partial_responses_are_accumulated(dispatcher_for):
+    session = FakeSession(lambda request: [{"part": 1}, {"part": 2}, {"part": 3}])
+    dispatcher = dispatcher_for(session)
+
+    async def run():
+        return await dispatcher.request("//blp/refdata", "ReferenceDataRequest", lambda request: None, echo)
+
+    assert asyncio.run(run()) == [{"part": 1}, {"part": 2}, {"part": 3}]
+
+
+def test_request_failure_and_timeout(dispatcher_for):
+    dispatcher = dispatcher_for(FakeSession(lambda request: None if request.values.get("fail") else [{}], delay=0.5))
+
+    async def run():
+        failed = dispatcher.request("//blp/refdata", "ReferenceDataRequest",
+                                    lambda request: request.set("fail", True), echo)
+        slow = dispatcher.request("//blp/refdata", "ReferenceDataRequest", lambda request: None, echo, timeout=0.1)
+        return await asyncio.gather(failed, slow, return_exceptions=True)
+
+    failed, slow = asyncio.run(run())
+    assert isinstance(failed, RuntimeError)
+    assert isinstance(slow, TimeoutError)
+    assert dispatcher.in_flight == 0
+    # A timeout is counted once, as timed_out
+    assert (dispatcher.stats["failed"], dispatcher.stats["timed_out"]) == (1, 1)
+
+
+class BrokenSession(FakeSession):
+    """nextEvent raises for the first `failures` calls (forever if None)"""
+
+    def __init__(self, failures=None):
+        super().__init__(lambda request: [{"ok": True}])
+        self.failures = failures
+        self.polls = 0
+
+    def nextEvent(self, timeout=0):
+        self.polls += 1
+        if self.failures is None or self.polls <= self.failures:
+            raise RuntimeError("session down")
+        return super().nextEvent(timeout)
+
+
+def test_dead_session_backs_off_then_stops():
+    session = BrokenSession()
+    dispatcher = BlpapiDispatcher(session, poll_timeout_ms=10, max_errors=5, error_backoff=0.01).start()
+
+    async def run():
+        return await asyncio.gather(
+            dispatcher.request("//blp/refdata", "ReferenceDataRequest", lambda request: None, echo),
+            return_exceptions=True
+        )
+
+    started = time.monotonic()
+    error, = asyncio.run(run())
+    assert isinstance(error, ConnectionError) and "repeated errors" in str(error)
+    # 0.01 + 0.02 + 0.04 + 0.08s of backoff between five errors, not a tight loop
+    assert session.polls == 5 and time.monotonic() - started >= 0.15
+    assert dispatcher.stats["errors"] == 5 and dispatcher.stats["failed"] == 1
+    error, = asyncio.run(run())
+    assert isinstance(error, ConnectionError) and "not running" in str(error)
+    dispatcher.stop()
+
+
+def test_transient_errors_recover(dispatcher_for):
+    dispatcher = dispatcher_for(BrokenSession(failures=3))
+
+    async def run():
+        return await dispatcher.request("//blp/refdata", "ReferenceDataRequest", lambda request: None, echo)
+
+    assert asyncio.run(run()) == [{"ok": True}]
+    assert dispatcher.stats["errors"] == 3
+
+
+def test_validate_tickers_does_not_block_event_loop(dispatcher_for, monkeypatch):
+    dispatcher = dispatcher_for(FakeSession(reference_responder, delay=0.3))
+    monkeypatch.setattr(ticker_discovery_fixed, "dispatcher", dispatcher)
+
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        response = await ticker_discovery_fixed.validate_tickers(["USSO1 BGN Curncy", "BAD1 Curncy"])
+        beat.cancel()
+        return response, ticks
+
+    response, ticks = asyncio.run(run())
+    assert response["success"] and response["validated_count"] == 2
+    assert response["results"][0] == {
+        "ticker": "USSO1 BGN Curncy", "valid": True, "name": "USSO1 BGN Curncy name", "last_price": 16.0
+    }
+    assert response["results"][1]["valid"] is False
+    # The loop kept running while Bloomberg "answered"
+    assert ticks >= 10
+
+
+def test_validate_3000_tickers_in_one_pipelined_round(dispatcher_for, monkeypatch):
+    session = FakeSession(reference_responder, delay=0.3)
+    monkeypatch.setattr(ticker_discovery_fixed, "dispatcher", dispatcher_for(session))
+    tickers = [f"TICK{i} Curncy" for i in range(3000)] + ["BAD1 Curncy", "TICK0 Curncy"]
+
+    started = time.monotonic()
+    response = asyncio.run(ticker_discovery_fixed.validate_tickers(tickers))
+    elapsed = time.monotonic() - started
+
+    assert response["success"] and response["validated_count"] == 3001
+    assert response["chunks"] == len(session.sent) == 31
+    assert max(len(request.values["securities"]) for request in session.sent) == 100
+    # 31 chunks at 0.3s each overlap into one round
+    assert elapsed < 1.5
+
+
+def test_validate_tickers_streams_ndjson(dispatcher_for, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(ticker_discovery_fixed, "dispatcher", dispatcher_for(FakeSession(reference_responder)))
+    monkeypatch.setattr(ticker_discovery_fixed, "VALIDATE_CHUNK_SIZE", 2)
+    app = FastAPI()
+    app.include_router(ticker_discovery_fixed.ticker_discovery_router)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/bloomberg/validate-tickers?stream=true",
+            json=["A Curncy", "B Curncy", "BAD Curncy", "C Curncy", "D Curncy"]
+        )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert sorted(line["ticker"] for line in lines[:-1]) == ["A Curncy", "B Curncy", "BAD Curncy", "C Curncy", "D Curncy"]
+    assert lines[-1] == {"done": True, "validated_count": 5}
+
+
+def test_failed_chunk_reports_unknown_tickers(dispatcher_for, monkeypatch):
+    def responder(request):
+        return None if "X1 Curncy" in request.values["securities"] else reference_responder(request)
+
+    monkeypatch.setattr(ticker_discovery_fixed, "dispatcher", dispatcher_for(FakeSession(responder)))
+    monkeypatch.setattr(ticker_discovery_fixed, "VALIDATE_CHUNK_SIZE", 2)
+
+    response = asyncio.run(ticker_discovery_fixed.validate_tickers(["A Curncy", "B Curncy", "X1 Curncy", "X2 Curncy"]))
+    by_ticker = {row["ticker"]: row["valid"] for row in response["results"]}
+
+    assert by_ticker == {"A Curncy": True, "B Curncy": True, "X1 Curncy": None, "X2 Curncy": None}
+
+
+def instrument_responder(request):
+    return [{"results": [{"security": "USSO1 BGN Curncy", "description": request.values["query"]}]}]
+
+
+def test_search_results_are_cached(dispatcher_for, monkeypatch, tmp_path):
+    session = FakeSession(instrument_responder, delay=0.2)
+    monkeypatch.setattr(ticker_discovery_fixed, "dispatcher", dispatcher_for(session))
+    monkeypatch.setattr(ticker_discovery_fixed, "search_cache", SearchCache(tmp_path / "searches.sqlite"))
+    search = ticker_discovery_fixed.TickerSearchRequest
+
+    async def run():
+        first = await asyncio.gather(*[
+            ticker_discovery_fixed.discover_tickers(search(search_type="ois", currency="USD")) for _ in range(5)
+        ])
+        repeat = await ticker_discovery_fixed.discover_tickers(search(search_type="ois", currency="USD"))
+        refreshed = await ticker_discovery_fixed.discover_tickers(
+            search(search_type="ois", currency="USD", force_refresh=True)
+        )
+        return first, repeat, refreshed
+
+    first, repeat, refreshed = asyncio.run(run())
+
+    # Five concurrent searches, one repeat, one forced refresh -> two requests
+    assert len(session.sent) == 2
+    assert all(response.success and response.tickers_found == 1 for response in first)
+    assert not first[0].cached
+    assert repeat.cached and repeat.cached_at and repeat.tickers == first[0].tickers
+    assert not refreshed.cached
+    assert ticker_discovery_fixed.search_cache.summary()["entries"] == 1
+
+
+def test_cached_search_survives_restart_and_expires(tmp_path):
+    key = ("ois", "USD", "USD OIS", 100)
+    SearchCache(tmp_path / "searches.sqlite").store(key, [{"ticker": "USSO1 BGN Curncy"}])
+
+    assert SearchCache(tmp_path / "searches.sqlite").lookup(key)[0] == [{"ticker": "USSO1 BGN Curncy"}]
+    assert SearchCache(tmp_path / "searches.sqlite", ttl=-1).lookup(key) is None
+
+
+def test_cancelled_search_fails_shared_waiters(tmp_path):
+    cache = SearchCache(tmp_path / "searches.sqlite")
+    key = ("ois", "USD", "USD OIS", 100)
+
+    async def stall():
+        await asyncio.sleep(10)
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_fetch(key, stall))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_fetch(key, stall))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.wait_for(asyncio.gather(leader, waiter, return_exceptions=True), 1)
+
+    leader, waiter = asyncio.run(run())
+    assert isinstance(leader, asyncio.CancelledError)
+    assert isinstance(waiter, RuntimeError)
+    assert cache.stats["shared"] == 1 and cache.lookup(key) is None
@@ -5,10 +5,18 @@ Adds ticker discovery capability using Bloomberg's instrumentListRequest
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
+import asyncio
+import json
 import logging
-import blpapi
+import math
+import os
+import re
+
+from blpapi_dispatcher import BlpapiDispatcher
+from search_cache import SearchCache
 
 # Create router for ticker discovery endpoints
 ticker_discovery_router = APIRouter(prefix="/api/bloomberg", tags=["ticker-discovery"])
@@ -19,6 +27,7 @@ class TickerSearchRequest(BaseModel):
     currency: str  # 'USD', 'EUR', 'GBP', etc.
     asset_class: Optional[str] = "Curncy"
     max_results: Optional[int] = 100
+    force_refresh: Optional[bool] = False  # Bypass the search result cache
 
 class TickerSearchResponse(BaseModel):
     success: bool
@@ -26,6 +35,8 @@ class TickerSearchResponse(BaseModel):
     tickers_found: int
     tickers: List[Dict[str, Any]]
     error: Optional[str] = None
+    cached: bool = False
+    cached_at: Optional[str] = None
 
 # Bloomberg query patterns for different instrument types
 # Updated to use text-based search instead of wildcard patterns
@@ -61,8 +72,68 @@ SEARCH_PATTERNS = {
     }
 }
 
+# validate-tickers splits large lists into chunks that are all in flight at once
+VALIDATE_CHUNK_SIZE = int(os.getenv("VALIDATE_CHUNK_SIZE", "100"))
+VALIDATE_MAX_IN_FLIGHT = int(os.getenv("VALIDATE_MAX_IN_FLIGHT", "32"))
+
+# Search results rarely change - one instrumentListRequest per query per day
+search_cache = SearchCache()
+
+# Dedicated session + dispatcher thread, so handlers never block on nextEvent()
+dispatcher: Optional[BlpapiDispatcher] = None
+
+def get_dispatcher() -> Optional[BlpapiDispatcher]:
+    """Start the shared dispatcher on first use; None if Bloomberg is unreachable"""
+    global dispatcher
+    if dispatcher is None:
+        try:
+            dispatcher = BlpapiDispatcher.connect()
+        except Exception as e:
+            logging.error(f"Bloomberg dispatcher unavailable: {str(e)}")
+    return dispatcher
+
+def parse_instrument_results(msg) -> List[Dict[str, str]]:
+    """instrumentListRequest response message -> [{security, description}]"""
+    if not msg.hasElement("results"):
+        return []
+    results = msg.getElement("results")
+    rows = []
+    for i in range(results.numValues()):
+        result = results.getValue(i)
+        rows.append({
+            "security": result.getElementAsString("security"),
+            "description": result.getElementAsString("description") if result.hasElement("description") else ""
+        })
+    return rows
+
+def parse_security_data(msg) -> List[Dict[str, Any]]:
+    """ReferenceDataRequest response message -> one validation result per security"""
+    if not msg.hasElement("securityData"):
+        return []
+    secDataArray = msg.getElement("securityData")
+    results = []
+    for i in range(secDataArray.numValues()):
+        secData = secDataArray.getValue(i)
+        ticker = secData.getElementAsString("security")
+        
+        if secData.hasElement("securityError"):
+            results.append({
+                "ticker": ticker,
+                "valid": False,
+                "error": "Security not found"
+            })
+        else:
+            fieldData = secData.getElement("fieldData")
+            results.append({
+                "ticker": ticker,
+                "valid": True,
+                "name": fieldData.getElementAsString("NAME") if fieldData.hasElement("NAME") else "",
+                "last_price": fieldData.getElementAsFloat("PX_LAST") if fieldData.hasElement("PX_LAST") else None
+            })
+    return results
+
 @ticker_discovery_router.post("/ticker-discovery", response_model=TickerSearchResponse)
-async def discover_tickers(request: TickerSearchRequest, bloomberg_service=None):
+async def discover_tickers(request: TickerSearchRequest):
     """
     Discover Bloomberg tickers using instrumentListRequest
     """
@@ -81,84 +152,55 @@ async def discover_tickers(request: TickerSearchRequest, bloomberg_service=None)
                 error=f"No search pattern defined for {request.search_type} {request.currency}"
             )
 
-        # Use Bloomberg service from main app if available
-        if not bloomberg_service or not bloomberg_service.session:
-            return TickerSearchResponse(
-                success=False,
-                search_criteria={"search_type": request.search_type, "currency": request.currency},
-                tickers_found=0,
-                tickers=[],
-                error="Bloomberg service not available"
-            )
-
-        session = bloomberg_service.session
+        async def search() -> List[Dict[str, Any]]:
+            # Session start can block, so it never runs on the event loop
+            bloomberg = await asyncio.to_thread(get_dispatcher)
+            if bloomberg is None:
+                raise ConnectionError("Bloomberg service not available")
         
-        # Get instruments service
-        if not session.openService("//blp/instruments"):
-            return TickerSearchResponse(
-                success=False,
-                search_criteria={"search_type": request.search_type, "currency": request.currency},
-                tickers_found=0,
-                tickers=[],
-                error="Failed to open instruments service"
-            )
-
-        instruments_service = session.getService("//blp/instruments")
-        
-        # Create and send request
-        request_obj = instruments_service.createRequest("instrumentListRequest")
-        request_obj.set("query", query_string)
-        request_obj.set("maxResults", request.max_results)
+            def configure(request_obj):
+                request_obj.set("query", query_string)
+                request_obj.set("maxResults", request.max_results)
         
-        logging.info(f"Sending instrumentListRequest with query: {query_string}")
-        session.sendRequest(request_obj)
-        
-        # Process response
-        tickers = []
-        timeout = 10000  # 10 seconds
+            logging.info(f"Sending instrumentListRequest with query: {query_string}")
+            results = await bloomberg.request(
+                "//blp/instruments", "instrumentListRequest", configure, parse_instrument_results, timeout=10.0
+            )
         
-        while True:
-            event = session.nextEvent(timeout)
+            tickers = []
+            for result in results:
+                ticker = result["security"]
+            
+                # Parse tenor from ticker if OIS
+                tenor = None
+                if request.search_type == "ois":
+                    if "USSO" in ticker:
+                        # Extract tenor from USSO1, USSO2Y, etc
+                        match = re.search(r'USSO(\d+[MY]?)', ticker)
+                        if match:
+                            tenor = match.group(1)
+                    elif "JYSO" in ticker:
+                        match = re.search(r'JYSO(\d+[MY]?)', ticker)
+                        if match:
+                            tenor = match.group(1)
+            
+                ticker_info = {
+                    "ticker": ticker,
+                    "description": result["description"],
+                    "instrument_type": request.search_type,
+                    "currency": request.currency,
+                    "tenor": tenor
+                }
             
-            for msg in event:
-                if msg.hasElement("results"):
-                    results = msg.getElement("results")
-                    
-                    for i in range(results.numValues()):
-                        result = results.getValue(i)
-                        ticker = result.getElementAsString("security")
-                        description = result.getElementAsString("description") if result.hasElement("description") else ""
-                        
-                        # Parse tenor from ticker if OIS
-                        tenor = None
-                        if request.search_type == "ois":
-                            if "USSO" in ticker:
-                                # Extract tenor from USSO1, USSO2Y, etc
-                                import re
-                                match = re.search(r'USSO(\d+[MY]?)', ticker)
-                                if match:
-                                    tenor = match.group(1)
-                            elif "JYSO" in ticker:
-                                match = re.search(r'JYSO(\d+[MY]?)', ticker)
-                                if match:
-                                    tenor = match.group(1)
-                        
-                        ticker_info = {
-                            "ticker": ticker,
-                            "description": description,
-                            "instrument_type": request.search_type,
-                            "currency": request.currency,
-                            "tenor": tenor
-                        }
-                        
-                        # Add curve membership for OIS
-                        if request.search_type == "ois":
-                            ticker_info["curve_membership"] = f"{request.currency}_OIS"
-                        
-                        tickers.append(ticker_info)
+                # Add curve membership for OIS
+                if request.search_type == "ois":
+                    ticker_info["curve_membership"] = f"{request.currency}_OIS"
             
-            if event.eventType() == blpapi.Event.RESPONSE:
-                break
+                tickers.append(ticker_info)
+            return tickers
+        
+        cache_key = (request.search_type, request.currency, query_string, request.max_results)
+        tickers, cached_at = await search_cache.get_or_fetch(cache_key, search, request.force_refresh)
         
         logging.info(f"Found {len(tickers)} tickers for {request.currency} {request.search_type}")
         
@@ -170,7 +212,9 @@ async def discover_tickers(request: TickerSearchRequest, bloomberg_service=None)
                 "query_used": query_string
             },
             tickers_found=len(tickers),
-            tickers=tickers
+            tickers=tickers,
+            cached=cached_at is not None,
+            cached_at=cached_at
         )
         
     except Exception as e:
@@ -186,76 +230,90 @@ async def discover_tickers(request: TickerSearchRequest, bloomberg_service=None)
             error=str(e)
         )
 
+@ticker_discovery_router.get("/ticker-discovery/cache")
+async def search_cache_status():
+    """Search result cache size, TTL and hit counts"""
+    return search_cache.summary()
+
+def chunk_tickers(tickers: List[str]) -> List[List[str]]:
+    """
+    Split a ticker list for one pipelined round
+    
+    Chunks hold VALIDATE_CHUNK_SIZE tickers; lists longer than
+    VALIDATE_CHUNK_SIZE x VALIDATE_MAX_IN_FLIGHT get bigger chunks rather than
+    a second round.
+    """
+    size = max(VALIDATE_CHUNK_SIZE, math.ceil(len(tickers) / VALIDATE_MAX_IN_FLIGHT))
+    return [tickers[i:i + size] for i in range(0, len(tickers), size)]
+
+def reference_request(tickers: List[str]):
+    def configure(request):
+        for ticker in tickers:
+            request.append("securities", ticker)
+        # Request basic fields
+        request.append("fields", "NAME")
+        request.append("fields", "PX_LAST")
+    return configure
+
+async def validation_results(bloomberg: BlpapiDispatcher, tickers: List[str]) -> AsyncIterator[Dict[str, Any]]:
+    """Validate every chunk at once, yielding results as each partial response arrives"""
+    chunks = chunk_tickers(tickers)
+    requests = [
+        # Bloomberg needs longer for bigger requests
+        (i, ("//blp/refdata", "ReferenceDataRequest", reference_request(chunk), parse_security_data,
+             5.0 + 0.02 * len(chunk)))
+        for i, chunk in enumerate(chunks)
+    ]
+    answered = set()
+    async for i, rows, error in bloomberg.stream_many(requests):
+        if error is not None:
+            # valid=None: the chunk failed, nothing is known about these tickers
+            logging.error(f"Validation chunk {i} failed: {str(error)}")
+            rows = [
+                {"ticker": ticker, "valid": None, "error": str(error)}
+                for ticker in chunks[i] if ticker not in answered
+            ]
+        for row in rows:
+            answered.add(row["ticker"])
+            yield row
+
+async def ndjson_lines(results: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    count = 0
+    async for row in results:
+        count += 1
+        yield json.dumps(row) + "\n"
+    yield json.dumps({"done": True, "validated_count": count}) + "\n"
+
 @ticker_discovery_router.post("/validate-tickers")
-async def validate_tickers(tickers: List[str], bloomberg_service=None):
+async def validate_tickers(tickers: List[str], stream: bool = False):
     """
     Validate if tickers exist in Bloomberg
+    
+    Large lists are chunked and every chunk is sent at once with its own
+    correlation ID. With ?stream=true results come back as NDJSON lines as
+    each partial response arrives, followed by a {"done": true} line.
     """
     try:
-        if not bloomberg_service or not bloomberg_service.session:
+        bloomberg = await asyncio.to_thread(get_dispatcher)
+        if bloomberg is None:
             return {
                 "success": False,
                 "error": "Bloomberg service not available"
             }
-
-        session = bloomberg_service.session
-        
-        # Use reference data service for validation
-        if not session.openService("//blp/refdata"):
-            return {
-                "success": False,
-                "error": "Failed to open refdata service"
-            }
-
-        refdata_service = session.getService("//blp/refdata")
-        request = refdata_service.createRequest("ReferenceDataRequest")
-        
-        # Add securities
-        for ticker in tickers:
-            request.append("securities", ticker)
-        
-        # Request basic fields
-        request.append("fields", "NAME")
-        request.append("fields", "PX_LAST")
         
-        session.sendRequest(request)
+        unique_tickers = list(dict.fromkeys(tickers))
+        if stream:
+            return StreamingResponse(
+                ndjson_lines(validation_results(bloomberg, unique_tickers)),
+                media_type="application/x-ndjson"
+            )
         
-        # Process response
-        results = []
-        timeout = 5000  # 5 seconds
-        
-        while True:
-            event = session.nextEvent(timeout)
-            
-            for msg in event:
-                if msg.hasElement("securityData"):
-                    secDataArray = msg.getElement("securityData")
-                    
-                    for i in range(secDataArray.numValues()):
-                        secData = secDataArray.getValue(i)
-                        ticker = secData.getElementAsString("security")
-                        
-                        if secData.hasElement("securityError"):
-                            results.append({
-                                "ticker": ticker,
-                                "valid": False,
-                                "error": "Security not found"
-                            })
-                        else:
-                            fieldData = secData.getElement("fieldData")
-                            results.append({
-                                "ticker": ticker,
-                                "valid": True,
-                                "name": fieldData.getElementAsString("NAME") if fieldData.hasElement("NAME") else "",
-                                "last_price": fieldData.getElementAsFloat("PX_LAST") if fieldData.hasElement("PX_LAST") else None
-                            })
-            
-            if event.eventType() == blpapi.Event.RESPONSE:
-                break
+        results = [row async for row in validation_results(bloomberg, unique_tickers)]
         
         return {
             "success": True,
             "validated_count": len(results),
+            "chunks": len(chunk_tickers(unique_tickers)),
             "results": results
         }
         
@@ -264,4 +322,4 @@ async def validate_tickers(tickers: List[str], bloomberg_service=None):
         return {
             "success": False,
             "error": str(e)
-        }
\ No newline at end of file
+        }
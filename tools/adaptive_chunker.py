@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Adaptive Chunk Sizing for Bloomberg VM Requests
+AIMD control of chunk size and concurrency from observed latency and errors
+
+Scripts used to hard-code batch sizes (10, 15, 20, 50) for
+/api/bloomberg/reference. An AdaptiveChunker instead grows the chunk size
+additively while chunks come back fast and clean, and halves it (and the
+concurrency) on an error, timeout or slow response. Failed chunks are split
+and retried once at the smaller size. Learned settings are persisted per
+endpoint so the next run starts where the last one left off.
+
+Usage:
+    chunker = AdaptiveChunker.for_endpoint("reference")
+    results = await chunker.run(tickers, fetch_chunk)      # async callers
+    results = chunker.run_sync(tickers, fetch_chunk)       # requests-based scripts
+    chunker.save()
+
+Environment Variables:
+- CHUNKER_STATE_FILE: Where learned sizes are kept (default: ~/.cache/bloomberg_adaptive_chunker.json)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = Path(os.getenv(
+    "CHUNKER_STATE_FILE",
+    str(Path.home() / ".cache" / "bloomberg_adaptive_chunker.json")
+))
+
+
+def default_is_error(result: Any) -> bool:
+    """A chunk failed if it returned nothing or an {"error": ...} dict"""
+    return result is None or (isinstance(result, dict) and "error" in result)
+
+
+class AdaptiveChunker:
+    """Additive-increase / multiplicative-decrease chunk size and concurrency"""
+
+    def __init__(
+        self,
+        name: str = "reference",
+        initial_size: int = 20,
+        min_size: int = 5,
+        max_size: int = 200,
+        initial_concurrency: int = 2,
+        max_concurrency: int = 8,
+        target_latency: float = 5.0,
+        increase: int = 5,
+        decrease: float = 0.5,
+        is_error: Callable[[Any], bool] = default_is_error
+    ):
+        self.name = name
+        self.size = initial_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.is_error = is_error
+        self._successes = 0
+        # Chunks in flight across every run() sharing this chunker, and the callers waiting for a slot
+        self._active = 0
+        self._waiters: List[asyncio.Future] = []
+        self.stats = {"chunks": 0, "errors": 0, "items": 0, "seconds": 0.0}
+
+    @classmethod
+    def for_endpoint(cls, name: str, **kwargs) -> "AdaptiveChunker":
+        """Create a chunker for an endpoint, resuming any learned size and concurrency"""
+        chunker = cls(name=name, **kwargs)
+        try:
+            state = json.loads(STATE_FILE.read_text()).get(name, {})
+            chunker.size = min(max(int(state.get("size", chunker.size)), chunker.min_size), chunker.max_size)
+            chunker.concurrency = min(max(int(state.get("concurrency", chunker.concurrency)), 1), chunker.max_concurrency)
+        except (OSError, ValueError):
+            pass
+        return chunker
+
+    def save(self):
+        """Persist the learned size and concurrency for the next run"""
+        try:
+            state = json.loads(STATE_FILE.read_text()) if STATE_FILE.exists() else {}
+        except (OSError, ValueError):
+            state = {}
+        state[self.name] = {
+            "size": self.size,
+            "concurrency": self.concurrency,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        try:
+            STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            STATE_FILE.write_text(json.dumps(state, indent=2))
+        except OSError as e:
+            logger.warning(f"Could not save chunker state: {e}")
+
+    def record(self, items: int, latency: float, ok: bool):
+        """Feed one chunk's outcome back into the controller"""
+        self.stats["chunks"] += 1
+        self.stats["items"] += items
+        self.stats["seconds"] += latency
+
+        if ok and latency <= self.target_latency:
+            self._successes += 1
+            # Only grow once a full-sized chunk proved fast - short tail chunks say nothing
+            if items >= self.size:
+                self.size = min(self.size + self.increase, self.max_size)
+            if self._successes % 4 == 0:
+                self.concurrency = min(self.concurrency + 1, self.max_concurrency)
+                self._wake()
+        else:
+            if not ok:
+                self.stats["errors"] += 1
+            self._successes = 0
+            self.size = max(int(self.size * self.decrease), self.min_size)
+            self.concurrency = max(self.concurrency // 2, 1)
+            logger.info(
+                f"[{self.name}] {'error' if not ok else f'slow chunk ({latency:.1f}s)'} - "
+                f"chunk size {self.size}, concurrency {self.concurrency}"
+            )
+
+    def _wake(self):
+        # Every waiter re-checks against the current concurrency, so a cancelled one loses no slot
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def _slot(self):
+        """One of `concurrency` upstream slots shared by all concurrent runs"""
+        while self._active >= self.concurrency:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                self._waiters.remove(waiter)
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._wake()
+
+    def _retry_chunks(self, chunk: List[Any]) -> List[List[Any]]:
+        """Split a failed chunk at the (already reduced) size for one retry"""
+        size = max(min(self.size, len(chunk) // 2), 1)
+        return [chunk[i:i + size] for i in range(0, len(chunk), size)]
+
+    async def run(self, items: Sequence[Any], call: Callable[[List[Any]], Awaitable[Any]]) -> List[Any]:
+        """
+        Process items in adaptive chunks with adaptive concurrency
+
+        Returns chunk results in completion order. A chunk that fails
+        (exception or is_error) is split and retried once; if the retry still
+        raises, the exception propagates. Concurrency is shared: concurrent
+        runs on one chunker together keep at most `concurrency` chunks in flight.
+        """
+        remaining = list(items)
+        queue: List[tuple] = []  # (chunk, retried) waiting to be re-sent
+        results: List[Any] = []
+        in_flight = {}
+
+        async def timed(chunk):
+            async with self._slot():
+                start = time.perf_counter()
+                try:
+                    return await call(chunk), None, time.perf_counter() - start
+                except Exception as e:
+                    return None, e, time.perf_counter() - start
+
+        try:
+            while remaining or queue or in_flight:
+                while (queue or remaining) and len(in_flight) < self.concurrency:
+                    if queue:
+                        chunk, retried = queue.pop(0)
+                    else:
+                        chunk, remaining = remaining[:self.size], remaining[self.size:]
+                        retried = False
+                    in_flight[asyncio.create_task(timed(chunk))] = (chunk, retried)
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    chunk, retried = in_flight.pop(task)
+                    result, error, latency = task.result()
+                    ok = error is None and not self.is_error(result)
+                    self.record(len(chunk), latency, ok)
+
+                    if ok:
+                        results.append(result)
+                    elif not retried:
+                        queue.extend((part, True) for part in self._retry_chunks(chunk))
+                    elif error is not None:
+                        raise error
+                    else:
+                        results.append(result)
+        except BaseException:
+            # A failed or cancelled run must not leave chunks holding shared slots
+            for pending in in_flight:
+                pending.cancel()
+            raise
+
+        return results
+
+    def run_sync(self, items: Sequence[Any], call: Callable[[List[Any]], Any]) -> List[Any]:
+        """Blocking variant for requests-based scripts - one chunk at a time"""
+        remaining = list(items)
+        queue: List[List[Any]] = []
+        results: List[Any] = []
+
+        while remaining or queue:
+            if queue:
+                chunk, retried = queue.pop(0), True
+            else:
+                chunk, remaining = remaining[:self.size], remaining[self.size:]
+                retried = False
+
+            start = time.perf_counter()
+            try:
+                result, error = call(chunk), None
+            except Exception as e:
+                result, error = None, e
+            latency = time.perf_counter() - start
+            ok = error is None and not self.is_error(result)
+            self.record(len(chunk), latency, ok)
+
+            if ok:
+                results.append(result)
+            elif not retried:
+                queue.extend(self._retry_chunks(chunk))
+            elif error is not None:
+                raise error
+            else:
+                results.append(result)
+
+        return results
@@ -3,20 +3,17 @@
 Fast IRS ticker discovery for main G10 currencies
 """
 
-import requests
+import asyncio
 import json
-import time
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from yield_curve_db_endpoint import get_database_connection
+from comprehensive_swap_discovery import SwapDiscoveryConfig
+from discovery_engine import DiscoveryEngine, PatternGenerator, insert_ticker_reference
 
 BLOOMBERG_API_URL = "http://20.172.249.92:8080"
-HEADERS = {
-    "Authorization": "Bearer test",
-    "Content-Type": "application/json"
-}
 
 # Known working IRS patterns for major currencies
 IRS_PATTERNS = {
@@ -62,72 +59,18 @@ IRS_PATTERNS = {
     }
 }
 
-def validate_batch_tickers(tickers):
-    """Validate a batch of tickers quickly"""
-    if not tickers:
-        return []
-    
-    try:
-        response = requests.post(
-            f"{BLOOMBERG_API_URL}/api/bloomberg/reference",
-            headers=HEADERS,
-            json={
-                "securities": tickers,
-                "fields": ["SECURITY_NAME"]
-            },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            securities = data.get("data", {}).get("securities_data", [])
-            
-            valid_tickers = []
-            for sec in securities:
-                if sec.get("success"):
-                    valid_tickers.append({
-                        'ticker': sec.get('security'),
-                        'name': sec.get('fields', {}).get('SECURITY_NAME', '')
-                    })
-            
-            return valid_tickers
-        
-        return []
-            
-    except Exception as e:
-        print(f"❌ Validation error: {e}")
-        return []
-
-def discover_irs_for_currency(currency):
-    """Fast IRS discovery for one currency"""
+def irs_candidates(currency):
+    """All possible IRS tickers for one currency"""
     config = IRS_PATTERNS.get(currency)
     if not config:
         return []
-    
-    print(f"\n🔍 {currency} IRS:")
-    
-    # Generate all possible tickers for this currency
-    test_tickers = []
-    for prefix in config['prefixes']:
-        for tenor in config['tenors']:
-            test_tickers.append(f"{prefix}{tenor} Curncy")
-    
-    # Test in batches of 10
-    valid_tickers = []
-    batch_size = 10
-    
-    for i in range(0, len(test_tickers), batch_size):
-        batch = test_tickers[i:i+batch_size]
-        batch_results = validate_batch_tickers(batch)
-        
-        if batch_results:
-            valid_tickers.extend(batch_results)
-            for ticker_data in batch_results:
-                print(f"  ✅ {ticker_data['ticker']} - {ticker_data['name']}")
-        
-        time.sleep(1)  # Rate limiting
-    
-    return valid_tickers
+    return [f"{prefix}{tenor} Curncy" for prefix in config['prefixes'] for tenor in config['tenors']]
+
+async def discover_all_irs(currencies):
+    """Validate every currency's IRS candidates concurrently"""
+    config = SwapDiscoveryConfig(bloomberg_api_url=BLOOMBERG_API_URL)
+    async with DiscoveryEngine(config, [PatternGenerator('irs', irs_candidates)], fields=["SECURITY_NAME"]) as engine:
+        return await engine.run(currencies)
 
 def main():
     """Fast IRS discovery for all G10"""
@@ -136,8 +79,14 @@ def main():
     all_irs_tickers = {}
     total_found = 0
     
+    results = asyncio.run(discover_all_irs(list(IRS_PATTERNS.keys())))
+    
     for currency in IRS_PATTERNS.keys():
-        irs_tickers = discover_irs_for_currency(currency)
+        irs_tickers = results[currency].valid
+        
+        print(f"\n🔍 {currency} IRS:")
+        for instrument in irs_tickers:
+            print(f"  ✅ {instrument.ticker} - {instrument.description}")
         
         if irs_tickers:
             all_irs_tickers[currency] = irs_tickers
@@ -151,7 +100,10 @@ def main():
     
     # Save results
     with open('irs_discoveries.json', 'w') as f:
-        json.dump(all_irs_tickers, f, indent=2)
+        json.dump({
+            currency: [{'ticker': i.ticker, 'name': i.description} for i in tickers]
+            for currency, tickers in all_irs_tickers.items()
+        }, f, indent=2)
     
     # Populate database
     if all_irs_tickers:
@@ -160,20 +112,11 @@ def main():
         cursor = conn.cursor()
         
         try:
-            added = 0
-            for currency, tickers in all_irs_tickers.items():
-                for ticker_data in tickers:
-                    ticker = ticker_data['ticker']
-                    
-                    cursor.execute("""
-                        INSERT INTO ticker_reference 
-                        (bloomberg_ticker, currency_code, instrument_type, curve_name, is_active)
-                        VALUES (%s, %s, %s, %s, %s)
-                        ON CONFLICT (bloomberg_ticker) DO NOTHING
-                    """, (ticker, currency, 'irs', f'{currency}_IRS', True))
-                    added += 1
-            
-            conn.commit()
+            added = insert_ticker_reference(
+                conn, [i for tickers in all_irs_tickers.values() for i in tickers],
+                curve_name=lambda instrument: f'{instrument.currency}_IRS',
+                instrument_type=lambda instrument: 'irs'
+            )
             print(f"✅ Added {added} IRS tickers to database")
             
             # Show final database state
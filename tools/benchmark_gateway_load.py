@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Load-test the gateway with dashboard traffic
+Runs virtual clients that repeatedly load the dashboard against a gateway
+backed by the Bloomberg VM simulator, and reports throughput, tail latency
+and how many upstream VM calls each client request costs.
+
+One dashboard load fires, concurrently like the React app does:
+- surface: GET /api/volatility/{pair} for 10 pairs
+- curve: POST /api/bloomberg/reference with one curve per currency, 25 currencies
+- forwards: GET /api/forwards (the full pair x tenor matrix)
+- historical: POST /api/bloomberg/historical/bulk for 1M, 3M and 1Y windows
+
+--mix runs the whole dashboard or just one of those groups. Each client
+waits for its whole load before starting the next, so --clients is the
+number of dashboards open at once.
+
+By default the enhanced gateway and the simulator both run in this process,
+wired together with httpx.ASGITransport - no ports, but the harness, gateway
+and simulator share one CPU. Use --gateway/--simulator to measure real
+servers (start the gateway with BLOOMBERG_API_URL pointing at the simulator).
+Upstream calls are read from the simulator's /sim/stats, which is reset after
+the warm-up.
+
+Results are written as JSON (--output, by default benchmark_results/) and
+--compare checks a run against an earlier one, exiting 1 when p95/p99 or
+upstream calls per request grew, or RPS fell, by more than --max-regression.
+
+Usage:
+    python benchmark_gateway_load.py [--mix dashboard] [--clients 10] [--duration 30]
+    python benchmark_gateway_load.py --sim latency_ms=200 --sim error_rate=0.02
+    python benchmark_gateway_load.py --gateway http://localhost:8000 --simulator http://localhost:8080
+    python benchmark_gateway_load.py --compare benchmark_results/gateway_load_dashboard_20250801_120000.json
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import math
+import os
+import subprocess
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from ticker_grammar import CURRENCY_GRAMMAR, IRS, OIS
+
+TOOLS_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = TOOLS_DIR / "benchmark_results"
+
+SURFACE_PAIRS = ["EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD", "EURGBP", "EURJPY", "USDSEK"]
+CURVE_YEARS = [1, 2, 3, 4, 5, 7, 10, 15, 20, 30]
+CURVE_FIELDS = ["PX_LAST", "YLD_YTM_MID", "DAYS_TO_MTY", "MATURITY"]
+CURVE_COUNT = 25
+# Fixed end date so every run asks for the same history
+HISTORY_END = date(2025, 6, 30)
+HISTORY_WINDOWS = {"1M": 30, "3M": 91, "1Y": 365}
+HISTORY_SECURITIES = [f"{pair}V1M BGN Curncy" for pair in SURFACE_PAIRS]
+
+# Compared with --compare: metric -> True when higher is worse
+REGRESSION_METRICS = {"rps": False, "p50_ms": True, "p95_ms": True, "p99_ms": True}
+
+Call = Tuple[str, str, str, Optional[Dict[str, Any]]]  # (kind, method, path, json body)
+
+
+def curve_tickers() -> Dict[str, List[str]]:
+    """One OIS (or IRS) curve per currency, tickers built from the grammar prefixes"""
+    curves = {}
+    for currency, families in CURRENCY_GRAMMAR.items():
+        prefixes = families.get(OIS) or families.get(IRS)
+        if prefixes:
+            curves[currency] = [f"{prefixes[0]}{years} Curncy" for years in CURVE_YEARS]
+        if len(curves) == CURVE_COUNT:
+            break
+    return curves
+
+
+def dashboard_calls() -> Dict[str, List[Call]]:
+    """The requests of one dashboard load, by group"""
+    history = []
+    for window, days in HISTORY_WINDOWS.items():
+        history.append(("historical", "POST", "/api/bloomberg/historical/bulk", {
+            "securities": HISTORY_SECURITIES,
+            "fields": ["PX_LAST"],
+            "start_date": (HISTORY_END - timedelta(days=days)).strftime("%Y%m%d"),
+            "end_date": HISTORY_END.strftime("%Y%m%d")
+        }))
+    return {
+        "surfaces": [("surface", "GET", f"/api/volatility/{pair}", None) for pair in SURFACE_PAIRS],
+        "curves": [
+            ("curve", "POST", "/api/bloomberg/reference", {"securities": tickers, "fields": CURVE_FIELDS})
+            for tickers in curve_tickers().values()
+        ],
+        "forwards": [("forwards", "GET", "/api/forwards", None)],
+        "historical": history
+    }
+
+
+MIXES = list(dashboard_calls()) + ["dashboard"]
+
+
+def mix_calls(mix: str) -> List[Call]:
+    groups = dashboard_calls()
+    if mix == "dashboard":
+        return [call for calls in groups.values() for call in calls]
+    return groups[mix]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(samples: List[Tuple[float, bool]], elapsed: float) -> Dict[str, Any]:
+    """samples are (seconds, ok) per client request"""
+    latencies = sorted(seconds * 1000 for seconds, _ in samples)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0
+    }
+
+
+def git_version() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=TOOLS_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def in_process_clients(enable_cache: bool) -> Tuple[httpx.AsyncClient, httpx.AsyncClient]:
+    """Enhanced gateway whose VM client talks to an in-process simulator"""
+    os.environ["ENABLE_CACHE"] = "true" if enable_cache else "false"
+    from bloomberg_vm_simulator import SimulatorConfig, create_app
+    from gateway_metrics import MeteredTransport
+
+    simulator_app = create_app(SimulatorConfig.from_env())
+    spec = importlib.util.spec_from_file_location("bloomberg_gateway_enhanced", TOOLS_DIR / "bloomberg-gateway-enhanced.py")
+    gateway = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gateway)
+    # Keep the gateway's circuit breaker / hedging in front of the simulator
+    gateway.upstream_transport.transport = MeteredTransport(httpx.ASGITransport(app=simulator_app))
+    gateway.http_client = httpx.AsyncClient(timeout=gateway.UPSTREAM_TIMEOUT, transport=gateway.upstream_transport)
+    return (
+        httpx.AsyncClient(transport=httpx.ASGITransport(app=gateway.app), base_url="http://gateway", timeout=120.0),
+        httpx.AsyncClient(transport=httpx.ASGITransport(app=simulator_app), base_url="http://simulator")
+    )
+
+
+async def simulator_stats(simulator: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+    try:
+        response = await simulator.get("/sim/stats")
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError:
+        return None
+
+
+async def run_load(
+    gateway: httpx.AsyncClient,
+    calls: List[Call],
+    clients: int,
+    duration: float,
+    warmup: int,
+    on_warm
+) -> Tuple[Dict[str, List[Tuple[float, bool]]], float, int]:
+    """Run `clients` looping dashboard loads; returns (samples by kind, elapsed, loads completed)"""
+    samples: Dict[str, List[Tuple[float, bool]]] = {}
+    recording = False
+
+    async def send(call: Call):
+        kind, method, path, body = call
+        started = time.perf_counter()
+        try:
+            response = await gateway.request(method, path, json=body)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if recording:
+            samples.setdefault(kind, []).append((time.perf_counter() - started, ok))
+
+    # Warm-up loads fill the routers, chunkers and caches the way a running gateway would be
+    for _ in range(warmup):
+        await asyncio.gather(*(send(call) for call in calls))
+    await on_warm()
+
+    recording = True
+    loads = 0
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def client():
+        nonlocal loads
+        while time.perf_counter() < deadline:
+            await asyncio.gather(*(send(call) for call in calls))
+            loads += 1
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return samples, time.perf_counter() - started, loads
+
+
+def upstream_summary(stats: Optional[Dict[str, Any]], client_requests: int) -> Optional[Dict[str, Any]]:
+    if stats is None:
+        return None
+    calls = sum(stats["requests"].values())
+    return {
+        "calls": calls,
+        "securities": stats["securities"],
+        "errors": stats["errors"],
+        "calls_per_request": round(calls / client_requests, 3) if client_requests else 0.0,
+        "securities_per_call": round(stats["securities"] / calls, 1) if calls else 0.0,
+        "by_endpoint": stats["requests"],
+        "max_in_flight": stats["max_in_flight"],
+        "simulator": stats["config"]
+    }
+
+
+async def benchmark(args) -> Dict[str, Any]:
+    if args.gateway:
+        gateway = httpx.AsyncClient(base_url=args.gateway, timeout=120.0)
+        simulator = httpx.AsyncClient(base_url=args.simulator or "http://localhost:8080")
+        mode = "http"
+    else:
+        gateway, simulator = in_process_clients(args.enable_cache)
+        mode = "in-process"
+
+    overrides = dict(setting.split("=", 1) for setting in args.sim)
+    if overrides:
+        response = await simulator.post("/sim/config", json=overrides)
+        response.raise_for_status()
+
+    async def reset_simulator():
+        try:
+            await simulator.post("/sim/reset")
+        except httpx.HTTPError:
+            pass
+
+    calls = mix_calls(args.mix)
+    started_at = datetime.now().isoformat()
+    try:
+        samples, elapsed, loads = await run_load(
+            gateway, calls, args.clients, args.duration, args.warmup, reset_simulator
+        )
+        stats = await simulator_stats(simulator)
+    finally:
+        await gateway.aclose()
+        await simulator.aclose()
+
+    everything = [sample for kind_samples in samples.values() for sample in kind_samples]
+    return {
+        "benchmark": "gateway_load",
+        "version": git_version(),
+        "started_at": started_at,
+        "mode": mode,
+        "mix": args.mix,
+        "clients": args.clients,
+        "duration_s": round(elapsed, 2),
+        "dashboard_loads": loads,
+        "requests_per_load": len(calls),
+        "enable_cache": args.enable_cache if mode == "in-process" else None,
+        "total": latency_summary(everything, elapsed),
+        "kinds": {kind: latency_summary(kind_samples, elapsed) for kind, kind_samples in sorted(samples.items())},
+        "upstream": upstream_summary(stats, len(everything))
+    }
+
+
+def print_report(result: Dict[str, Any]):
+    print(f"\n{result['mix']} mix, {result['clients']} clients, {result['duration_s']}s "
+          f"({result['mode']}, {result['dashboard_loads']} loads of {result['requests_per_load']} requests)\n")
+    print(f"{'Kind':<12} {'Requests':>9} {'Errors':>7} {'RPS':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print("-" * 68)
+    rows = list(result["kinds"].items()) + [("total", result["total"])]
+    for kind, summary in rows:
+        print(f"{kind:<12} {summary['requests']:>9} {summary['errors']:>7} {summary['rps']:>8.1f} "
+              f"{summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f}")
+
+    upstream = result["upstream"]
+    if upstream is None:
+        print("\nUpstream: no simulator stats (is --simulator the Bloomberg VM simulator?)")
+    else:
+        print(f"\nUpstream: {upstream['calls']} VM calls, {upstream['calls_per_request']} per client request, "
+              f"{upstream['securities_per_call']} securities per call, max {upstream['max_in_flight']} in flight")
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Print the change against a baseline run; returns the regressions beyond max_regression"""
+    regressions = []
+    rows = [("total", metric, result["total"], baseline["total"]) for metric in REGRESSION_METRICS]
+    if result.get("upstream") and baseline.get("upstream"):
+        rows.append(("upstream", "calls_per_request", result["upstream"], baseline["upstream"]))
+
+    print(f"\nCompared with {baseline.get('version')} ({baseline.get('started_at')}):")
+    for scope, metric, current, previous in rows:
+        before, after = previous.get(metric), current.get(metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        worse = change > max_regression if REGRESSION_METRICS.get(metric, True) else change < -max_regression
+        flag = "  REGRESSION" if worse else ""
+        print(f"  {scope} {metric:<18} {before:>10} -> {after:>10} ({change:+.1%}){flag}")
+        if worse:
+            regressions.append(f"{scope} {metric}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the gateway with dashboard traffic")
+    parser.add_argument("--mix", choices=MIXES, default="dashboard", help="Traffic mix to run")
+    parser.add_argument("--clients", type=int, default=10, help="Concurrent virtual clients")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to measure for")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured loads before measuring")
+    parser.add_argument("--gateway", help="Gateway URL (default: in-process enhanced gateway)")
+    parser.add_argument("--simulator", help="Simulator URL for /sim/stats (default: in-process, or http://localhost:8080)")
+    parser.add_argument("--sim", action="append", default=[], metavar="KEY=VALUE",
+                        help="Simulator setting for this run, e.g. latency_ms=200 (repeatable)")
+    parser.add_argument("--enable-cache", action="store_true", help="In-process gateway with its response cache on")
+    parser.add_argument("--output", type=Path, help="Result JSON file (default: benchmark_results/gateway_load_<mix>_<time>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier result JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="Allowed relative regression for --compare")
+    args = parser.parse_args()
+
+    result = asyncio.run(benchmark(args))
+    print_report(result)
+
+    output = args.output or RESULTS_DIR / f"gateway_load_{args.mix}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        regressions = compare(result, json.loads(args.compare.read_text()), args.max_regression)
+        if regressions:
+            print(f"\nRegressed beyond {args.max_regression:.0%}: {', '.join(regressions)}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the numerical and parsing kernels, with regression thresholds
+
+Each test times one kernel over several rounds and fails when its best round
+is more than KERNEL_MAX_REGRESSION slower than the same kernel in the
+baseline file. The best round rather than the mean is compared, since
+scheduling noise only ever adds time. Kernels without a baseline entry are
+just measured.
+
+- Garman-Kohlhagen pricing of 1, 1,000 and 100,000 options
+- Parsing 3,001 tickers with a cold (unmemoized) grammar
+- Assembling volatility surfaces for 40 pairs from one reference response
+- Building the 45-pair forward matrix with outrights and implied carry curves
+
+Baselines are machine specific: record one on the machine that runs the
+comparison (KERNEL_SAVE_BASELINE=true), then compare later versions to it.
+
+Run: python -m pytest benchmark_kernels.py -q
+
+Environment Variables:
+- KERNEL_BASELINE: Baseline JSON to compare against (default: benchmark_results/kernels_baseline.json)
+- KERNEL_MAX_REGRESSION: Allowed slowdown of the best round, as a fraction (default: 0.25)
+- KERNEL_SAVE_BASELINE: Write this run's timings as the new baseline (default: false)
+"""
+
+import importlib.util
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from benchmark_gateway_load import git_version
+from benchmark_ticker_grammar import PAIRS, repository_corpus
+from bloomberg_vm_simulator import BloombergSimulator, ReferenceRequest, SimulatorConfig
+from forward_curves import ALL_FORWARD_PAIRS, ForwardCurveTable
+from forward_outrights import OutrightBlock
+from garman_kohlhagen import price_fx_option
+from ticker_grammar import TickerGrammar
+from ticker_repository import TickerRepository
+
+TOOLS_DIR = Path(__file__).resolve().parent
+BASELINE_FILE = Path(os.getenv("KERNEL_BASELINE", str(TOOLS_DIR / "benchmark_results" / "kernels_baseline.json")))
+MAX_REGRESSION = float(os.getenv("KERNEL_MAX_REGRESSION", "0.25"))
+SAVE_BASELINE = os.getenv("KERNEL_SAVE_BASELINE", "false").lower() == "true"
+
+SURFACE_TENORS = ["ON", "1W", "2W", "1M", "2M", "3M", "6M", "9M", "1Y", "18M", "2Y"]
+SURFACE_FIELDS = ["PX_LAST", "PX_BID", "PX_ASK", "LAST_UPDATE"]
+TICKER_COUNT = 3001
+
+
+def load_gateway():
+    spec = importlib.util.spec_from_file_location("bloomberg_gateway_enhanced", TOOLS_DIR / "bloomberg-gateway-enhanced.py")
+    gateway = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gateway)
+    return gateway
+
+
+def reference_response(securities):
+    """Deterministic VM reference response from the simulator's price model"""
+    simulator = BloombergSimulator(SimulatorConfig(), TickerRepository.from_file(TOOLS_DIR / "central_bloomberg_ticker_repository_v3.json"))
+    return simulator.reference(ReferenceRequest(securities=securities, fields=SURFACE_FIELDS))
+
+
+def option_book(count):
+    """(spot, strike, years, domestic %, foreign %, vol %, type) across strikes and expiries"""
+    rng = random.Random(count)
+    book = []
+    for _ in range(count):
+        spot = rng.uniform(0.6, 1.6)
+        book.append((
+            spot, spot * rng.uniform(0.8, 1.2), rng.uniform(1 / 52, 2.0),
+            rng.uniform(0.0, 6.0), rng.uniform(-0.5, 5.0), rng.uniform(4.0, 20.0),
+            rng.choice(("call", "put"))
+        ))
+    return book
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    return json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {"kernels": {}}
+
+
+@pytest.fixture(scope="module")
+def results():
+    kernels = {}
+    yield kernels
+    if SAVE_BASELINE:
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_FILE.write_text(json.dumps({
+            "version": git_version(),
+            "recorded_at": datetime.now().isoformat(),
+            "kernels": kernels
+        }, indent=2))
+
+
+@pytest.fixture
+def benchmark(baseline, results):
+    """benchmark(name, fn, rounds=5, iterations=1) - times fn and checks it against the baseline"""
+
+    def run(name, fn, rounds=5, iterations=1):
+        fn()  # Warm-up: imports, caches, first allocations
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            timings.append((time.perf_counter() - started) / iterations * 1000)
+        results[name] = {
+            "best_ms": round(min(timings), 4),
+            "median_ms": round(statistics.median(timings), 4),
+            "rounds": rounds,
+            "iterations": iterations
+        }
+
+        previous = baseline["kernels"].get(name)
+        if previous is not None and not SAVE_BASELINE:
+            limit = previous["best_ms"] * (1 + MAX_REGRESSION)
+            assert results[name]["best_ms"] <= limit, (
+                f"{name}: best {results[name]['best_ms']:.3f} ms vs baseline {previous['best_ms']:.3f} ms "
+                f"(limit {limit:.3f} ms, +{MAX_REGRESSION:.0%})"
+            )
+        return results[name]
+
+    return run
+
+
+@pytest.mark.parametrize("count, rounds, iterations", [(1, 5, 2000), (1000, 5, 5), (100000, 3, 1)])
+def test_price_options(benchmark, count, rounds, iterations):
+    book = option_book(count)
+
+    def price():
+        return [price_fx_option(*option) for option in book]
+
+    benchmark(f"price_options_{count}", price, rounds=rounds, iterations=iterations)
+    assert all(result["status"] == "success" for result in price())
+
+
+def test_parse_tickers(benchmark):
+    corpus = random.Random(0).sample(repository_corpus(), TICKER_COUNT)
+    grammar = TickerGrammar(memo_size=0)  # Cold: every call goes through the parser
+
+    def parse():
+        return [grammar.parse(ticker) for ticker in corpus]
+
+    benchmark(f"parse_tickers_{TICKER_COUNT}", parse, rounds=5, iterations=3)
+    assert sum(record.known for record in parse()) > TICKER_COUNT // 2
+
+
+def test_assemble_surfaces(benchmark):
+    gateway = load_gateway()
+    slots = {pair: gateway.surface_slots(pair, SURFACE_TENORS) for pair in PAIRS}
+    securities = list(dict.fromkeys(
+        ticker for pair_slots in slots.values() for _, _, requested in pair_slots.values() for ticker in requested
+    ))
+    response = reference_response(securities)
+
+    def assemble():
+        return [
+            gateway.surface_to_columns(gateway.assemble_surface(pair, gateway.surface_slots(pair, SURFACE_TENORS), response))
+            for pair in PAIRS
+        ]
+
+    benchmark(f"assemble_surfaces_{len(PAIRS)}", assemble, rounds=5, iterations=3)
+    assert all(len(columns["tenor"]) == len(SURFACE_TENORS) for columns in assemble())
+
+
+def test_forward_curves(benchmark):
+    table = ForwardCurveTable.from_files()
+    response = reference_response(table.tickers(ALL_FORWARD_PAIRS))
+
+    def build():
+        return OutrightBlock.from_matrix(table.matrix(ALL_FORWARD_PAIRS, response)).to_columns()
+
+    benchmark(f"forward_curves_{len(ALL_FORWARD_PAIRS)}", build, rounds=5, iterations=10)
+    assert len(build()["pair"]) == len(ALL_FORWARD_PAIRS) * len(table.tenors)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark gateway response encodings
+Compares payload size and encode/decode time of nested JSON against the
+columnar Arrow and MessagePack layouts for a 40-pair surface sweep.
+
+Usage: python benchmark_response_encoding.py [--pairs 40] [--repeat 20]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from response_encoding import reference_to_columns, columns_to_arrow, columns_to_msgpack
+
+TENORS = ["ON", "1W", "2W", "1M", "2M", "3M", "6M", "9M", "1Y", "18M", "2Y"]
+DELTAS = [5, 10, 15, 25, 35]
+FIELDS = ["PX_LAST", "PX_BID", "PX_ASK", "LAST_UPDATE"]
+PAIRS = [
+    "EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD", "USDSEK", "USDNOK", "USDDKK",
+    "EURGBP", "EURJPY", "GBPJPY", "EURCHF", "AUDJPY", "CADJPY", "EURAUD", "EURNZD", "GBPAUD", "GBPNZD",
+    "USDSGD", "USDHKD", "USDCNH", "USDINR", "USDKRW", "USDTWD", "USDTHB", "USDPHP", "USDIDR", "USDMYR",
+    "USDMXN", "USDBRL", "USDCLP", "USDCOP", "USDZAR", "USDTRY", "USDPLN", "USDHUF", "USDCZK", "USDILS"
+]
+
+
+def build_surface_sweep(pairs):
+    """Synthetic VM reference response shaped like a full surface sweep"""
+    rng = random.Random(42)
+    securities_data = []
+    for pair in pairs:
+        for tenor in TENORS:
+            tickers = [f"{pair}V{tenor} BGN Curncy"]
+            tickers += [f"{pair}{d}R{tenor} BGN Curncy" for d in DELTAS]
+            tickers += [f"{pair}{d}B{tenor} BGN Curncy" for d in DELTAS]
+            for ticker in tickers:
+                mid = rng.uniform(-2.0, 15.0)
+                securities_data.append({
+                    "security": ticker,
+                    "success": True,
+                    "fields": {
+                        "PX_LAST": round(mid, 4),
+                        "PX_BID": round(mid - 0.1, 4),
+                        "PX_ASK": round(mid + 0.1, 4),
+                        "LAST_UPDATE": "16:59:58"
+                    }
+                })
+    return {"success": True, "data": {"securities_data": securities_data}}
+
+
+def time_it(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark gateway response encodings")
+    parser.add_argument("--pairs", type=int, default=40, help="Number of currency pairs in the sweep")
+    parser.add_argument("--repeat", type=int, default=20, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    response = build_surface_sweep(PAIRS[:args.pairs])
+    n_securities = len(response["data"]["securities_data"])
+    print(f"Surface sweep: {args.pairs} pairs, {n_securities} securities, {len(FIELDS)} fields\n")
+
+    results = []
+
+    encode_ms, payload = time_it(lambda: json.dumps(response).encode(), args.repeat)
+    decode_ms, _ = time_it(lambda: json.loads(payload), args.repeat)
+    results.append(("json (nested)", len(payload), encode_ms, decode_ms))
+
+    columnar_ms, columns = time_it(lambda: reference_to_columns(response, FIELDS), args.repeat)
+    print(f"Columnar conversion: {columnar_ms:.2f} ms\n")
+
+    encode_ms, payload = time_it(lambda: json.dumps({"columns": columns}).encode(), args.repeat)
+    decode_ms, _ = time_it(lambda: json.loads(payload), args.repeat)
+    results.append(("json (columnar)", len(payload), encode_ms, decode_ms))
+
+    if columns_to_msgpack(columns) is not None:
+        import msgpack
+        encode_ms, payload = time_it(lambda: columns_to_msgpack(columns), args.repeat)
+        decode_ms, _ = time_it(lambda: msgpack.unpackb(payload, raw=False), args.repeat)
+        results.append(("msgpack (columnar)", len(payload), encode_ms, decode_ms))
+    else:
+        print("msgpack not installed - skipping")
+
+    if columns_to_arrow(columns) is not None:
+        import pyarrow as pa
+        encode_ms, payload = time_it(lambda: columns_to_arrow(columns), args.repeat)
+        decode_ms, _ = time_it(lambda: pa.ipc.open_stream(payload).read_all(), args.repeat)
+        results.append(("arrow ipc (columnar)", len(payload), encode_ms, decode_ms))
+    else:
+        print("pyarrow not installed - skipping")
+
+    baseline_size = results[0][1]
+    print(f"{'Format':<22}{'Bytes':>12}{'vs JSON':>10}{'Encode ms':>12}{'Decode ms':>12}")
+    print("-" * 68)
+    for name, size, encode_ms, decode_ms in results:
+        print(f"{name:<22}{size:>12,}{size / baseline_size:>9.0%}{encode_ms:>12.2f}{decode_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared ticker grammar
+Parses the repository's ticker corpus cold (fresh grammar, empty memo) and
+warm (memoized) and reports throughput plus a family breakdown.
+
+The corpus is every ticker literal in the tools/ JSON and CSV data files plus
+the central ticker repository, with its working_patterns expanded over the
+repository's currencies, FX pairs and tenors.
+
+Usage: python benchmark_ticker_grammar.py [--repeat 20] [--corpus tickers.txt]
+"""
+
+import argparse
+import collections
+import json
+import re
+import time
+from pathlib import Path
+
+from ticker_grammar import CURRENCIES, TickerGrammar
+
+TOOLS_DIR = Path(__file__).resolve().parent
+REPOSITORY_FILE = TOOLS_DIR / "central_bloomberg_ticker_repository_v3.json"
+TICKER_RE = re.compile(r"\b[A-Z][A-Z0-9/]{1,15}(?: BGN)? (?:Curncy|Index|Govt|Comdty)\b")
+
+MM_TENORS = ["1W", "1M", "2M", "3M", "6M", "9M", "1Y"]
+SWAP_TENORS = ["1", "2", "3", "4", "5", "7", "10", "15", "20", "30", "A", "C", "F", "I", "18M"]
+FX_TENORS = ["ON", "1W", "2W", "1M", "2M", "3M", "6M", "9M", "1Y", "18M", "2Y"]
+DELTAS = [10, 25]
+PAIRS = [
+    "EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD", "USDSEK", "USDNOK", "USDDKK",
+    "EURGBP", "EURJPY", "GBPJPY", "EURCHF", "AUDJPY", "CADJPY", "EURAUD", "EURNZD", "GBPAUD", "GBPNZD",
+    "USDSGD", "USDHKD", "USDCNH", "USDINR", "USDKRW", "USDTWD", "USDTHB", "USDPHP", "USDIDR", "USDMYR",
+    "USDMXN", "USDBRL", "USDCLP", "USDCOP", "USDZAR", "USDTRY", "USDPLN", "USDHUF", "USDCZK", "USDILS"
+]
+
+
+def repository_corpus():
+    """Ticker literals from the data files plus the expanded repository patterns"""
+    tickers = set()
+    for path in list(TOOLS_DIR.glob("*.json")) + list(TOOLS_DIR.glob("*.csv")):
+        tickers.update(TICKER_RE.findall(path.read_text(errors="ignore")))
+
+    patterns = json.loads(REPOSITORY_FILE.read_text())["working_patterns"]
+    ois = patterns["ois_swaps"]["patterns"]
+    for currency in CURRENCIES[:50]:
+        tickers.add(f"{currency}ON Index")
+        for tenor in MM_TENORS:
+            tickers.add(f"{currency}{tenor} Index")
+            tickers.add(f"{currency}00{tenor} Index")
+        # Only currencies with their own OIS convention - "others" is a placeholder pattern
+        for template in ois[currency].split(", ") if currency in ois else []:
+            for tenor in SWAP_TENORS:
+                tickers.add(template.format(TENOR=tenor))
+    for pair in PAIRS:
+        tickers.add(f"{pair} Curncy")
+        for tenor in FX_TENORS:
+            tickers.add(f"{pair}{tenor} Curncy")
+            tickers.add(f"{pair}V{tenor} BGN Curncy")
+            for delta in DELTAS:
+                tickers.add(f"{pair}{delta}R{tenor} BGN Curncy")
+                tickers.add(f"{pair}{delta}B{tenor} BGN Curncy")
+    return sorted(tickers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared ticker grammar")
+    parser.add_argument("--repeat", type=int, default=20, help="Iterations per measurement")
+    parser.add_argument("--corpus", type=Path, help="Newline-separated ticker file instead of the repository corpus")
+    args = parser.parse_args()
+
+    corpus = args.corpus.read_text().split("\n") if args.corpus else repository_corpus()
+    corpus = [ticker.strip() for ticker in corpus if ticker.strip()]
+    total = json.loads(REPOSITORY_FILE.read_text())["metadata"]["total_valid_tickers"]
+    print(f"Corpus: {len(corpus):,} tickers (repository metadata lists {total:,} valid)\n")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        TickerGrammar()
+    build_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+    cold = 0.0
+    for _ in range(args.repeat):
+        grammar = TickerGrammar()
+        start = time.perf_counter()
+        records = [grammar.parse(ticker) for ticker in corpus]
+        cold += time.perf_counter() - start
+    cold /= args.repeat
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for ticker in corpus:
+            grammar.parse(ticker)
+    warm = (time.perf_counter() - start) / args.repeat
+
+    print(f"{'Pass':<18}{'Total ms':>12}{'us/ticker':>12}{'tickers/s':>14}")
+    print("-" * 56)
+    print(f"{'grammar build':<18}{build_ms:>12.2f}")
+    for name, seconds in (("cold (no memo)", cold), ("warm (memoized)", warm)):
+        print(f"{name:<18}{seconds * 1000:>12.2f}{seconds / len(corpus) * 1e6:>12.2f}{len(corpus) / seconds:>14,.0f}")
+
+    families = collections.Counter(record.family for record in records)
+    with_tenor = sum(1 for record in records if record.tenor)
+    print(f"\nParsed with a tenor: {with_tenor / len(corpus):.1%}")
+    print(f"{'Family':<20}{'Tickers':>10}")
+    for family, count in families.most_common():
+        print(f"{family:<20}{count:>10,}")
+
+
+if __name__ == "__main__":
+    main()
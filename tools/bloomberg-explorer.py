@@ -8,6 +8,9 @@ import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 
+from adaptive_chunker import AdaptiveChunker
+from validation_cache import ValidationCache
+
 class BloombergExplorer:
     def __init__(self):
         self.base_url = "http://20.172.249.92:8080"
@@ -48,14 +51,16 @@ class BloombergExplorer:
         
         print(f"📝 Checking {len(all_tickers)} tickers in batches...")
         
-        # Check in batches of 10
-        batch_size = 10
+        # Batch size adapts to VM latency and errors
+        chunker = AdaptiveChunker.for_endpoint("reference")
+        cache = ValidationCache()
+        known, unknown = cache.split(all_tickers, ["PX_LAST", "PX_BID", "PX_ASK"])
+        if known:
+            print(f"💾 {len(known)} tickers answered from the validation cache")
         valid_tickers = []
         
-        for i in range(0, len(all_tickers), batch_size):
-            batch = all_tickers[i:i+batch_size]
-            print(f"\n📦 Batch {i//batch_size + 1}: Checking {len(batch)} tickers")
-            
+        def check_batch(batch):
+            print(f"\n📦 Batch: Checking {len(batch)} tickers")
             response = requests.post(
                 f"{self.base_url}/api/bloomberg/reference",
                 headers=self.headers,
@@ -64,21 +69,26 @@ class BloombergExplorer:
                     "fields": ["PX_LAST", "PX_BID", "PX_ASK"]
                 }
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('success') and 'data' in data:
-                    securities = data['data'].get('securities_data', [])
-                    for sec in securities:
-                        if sec.get('success') and sec.get('fields'):
-                            if any(sec['fields'].get(f) is not None for f in ['PX_LAST', 'PX_BID', 'PX_ASK']):
-                                valid_tickers.append(sec['security'])
-                                print(f"  ✅ {sec['security']}: {sec['fields']}")
-                            else:
-                                print(f"  ⚠️  {sec['security']}: No data")
+            if response.status_code != 200:
+                return {"error": f"HTTP {response.status_code}"}
+            data = response.json()
+            cache.record_response(data, ["PX_LAST", "PX_BID", "PX_ASK"])
+            return data
+        
+        for data in [cache.cached_response(known)] + chunker.run_sync(unknown, check_batch):
+            if data.get('success') and 'data' in data:
+                securities = data['data'].get('securities_data', [])
+                for sec in securities:
+                    if sec.get('success') and sec.get('fields'):
+                        if any(sec['fields'].get(f) is not None for f in ['PX_LAST', 'PX_BID', 'PX_ASK']):
+                            valid_tickers.append(sec['security'])
+                            print(f"  ✅ {sec['security']}: {sec['fields']}")
                         else:
-                            print(f"  ❌ {sec['security']}: Failed")
+                            print(f"  ⚠️  {sec['security']}: No data")
+                    else:
+                        print(f"  ❌ {sec['security']}: Failed")
         
+        chunker.save()
         print(f"\n📊 Summary: {len(valid_tickers)} valid tickers found out of {len(all_tickers)} checked")
         return valid_tickers
     
@@ -8,23 +8,63 @@ Environment Variables:
 - REDIS_CONNECTION: Redis connection string (optional, for production)
 - ENABLE_CACHE: Enable caching (default: false for dev, true for prod)
 - CACHE_TTL: Cache time-to-live in seconds (default: 900)
+- STALE_CACHE_TTL: Seconds an expired entry is kept to serve while the VM is failing (default: 86400)
+- STALE_CACHE_MAX_ENTRIES: Most stale entries the in-memory cache keeps, least recently used dropped first (default: 1000)
+- UPSTREAM_TIMEOUT: Seconds one Bloomberg VM call may take (default: 30)
+- BREAKER_FAILURES: Consecutive failed VM calls that open the circuit (default: 5)
+- BREAKER_RESET_SECONDS: Seconds the circuit stays open before a probe call (default: 30)
+- HEDGE_ENABLED: Send a duplicate reference call when the first is slower than its p95 (default: false)
+- HEDGE_MIN_DELAY_MS: Shortest wait before a hedge is sent (default: 50)
+- HEDGE_MAX_RATIO: Largest fraction of reference calls that may be hedged (default: 0.1)
 - LOG_LEVEL: Logging level (default: INFO)
+- HISTORICAL_CONCURRENCY: Max concurrent upstream historical calls per bulk request (default: 8)
+- STREAM_POLL_INTERVAL: Seconds between shared upstream polls for streamed quotes (default: 2)
+- BATCH_WINDOW_MS: Micro-batching window for reference requests, 0 disables (default: 10)
+- BATCH_MAX_SECURITIES: Flush a reference batch early at this many securities (default: 200)
+- TICKER_ROUTES_FILE: Learned BGN/plain surface ticker routes (default: ~/.cache/bloomberg_ticker_routes.json)
+- ROUTE_REPROBE_INTERVAL: Seconds before a learned route is re-probed in the background (default: 21600)
+- NDF_MAPPING_FILE: Verified NDF mapping for forward curves (default: newest ndf_complete_mapping_*.json)
+- NDF_VERIFICATION_FILE: NDF verification results (default: newest ndf_verification_results_*.json)
+- TRACE_EXPORTER: Where request spans go - none, console or file (default: none)
+- TRACE_FILE: JSON-lines span file for TRACE_EXPORTER=file (default: ~/.cache/bloomberg_gateway_traces.jsonl)
+- PROFILER_ENABLED: Serve the /admin/profile sampling profiler (default: false)
+- PROFILER_TOKEN: X-Admin-Token required by /admin/profile; the endpoint stays off without one
+- PROFILER_MAX_SECONDS: Longest profile a request may ask for (default: 60)
 """
 
 import os
+import hmac
 import json
 import logging
+from collections import OrderedDict
+from dataclasses import asdict
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import httpx
 import asyncio
 from contextlib import asynccontextmanager
 
+from historical_matrix import extract_series, align_historical, matrix_to_columns
+from response_encoding import encode_response, reference_to_columns, historical_to_columns, records_to_columns
+from quote_stream import QuoteStreamHub
+from reference_batcher import ReferenceBatcher, merge_reference_responses
+from adaptive_chunker import AdaptiveChunker
+from ticker_grammar import FX_BUTTERFLY, FX_FORWARD, FX_RISK_REVERSAL, FX_SPOT, FX_VOL, tenor_days
+from ticker_repository import TickerRepository
+from ticker_routing import TickerRouter, returned_data, route_key
+from forward_curves import ALL_FORWARD_PAIRS, ForwardCurveTable
+from forward_outrights import OutrightCache
+from gateway_metrics import MeteredTransport, instrument, record_cache
+from circuit_breaker import CircuitBreaker, GuardedTransport
+from tracing import add_timing, trace_requests, tracer
+from sampling_profiler import ProfilerBusy, SamplingProfiler, collapsed
+
 # Configure logging
 logging.basicConfig(
     level=getattr(logging, os.getenv("LOG_LEVEL", "INFO")),
@@ -37,6 +77,19 @@ BLOOMBERG_API_URL = os.getenv("BLOOMBERG_API_URL", "http://20.172.249.92:8080")
 REDIS_CONNECTION = os.getenv("REDIS_CONNECTION")
 ENABLE_CACHE = os.getenv("ENABLE_CACHE", "false").lower() == "true"
 CACHE_TTL = int(os.getenv("CACHE_TTL", "900"))  # 15 minutes default
+STALE_CACHE_TTL = int(os.getenv("STALE_CACHE_TTL", "86400"))
+STALE_CACHE_MAX_ENTRIES = int(os.getenv("STALE_CACHE_MAX_ENTRIES", "1000"))
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "30"))
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+HISTORICAL_CONCURRENCY = int(os.getenv("HISTORICAL_CONCURRENCY", "8"))
+STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", "2"))
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "10"))
+BATCH_MAX_SECURITIES = int(os.getenv("BATCH_MAX_SECURITIES", "200"))
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN", "")
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+STREAM_FIELDS = ["PX_LAST", "PX_BID", "PX_ASK"]
+STREAM_KEEPALIVE = 15.0  # seconds between SSE keep-alive comments
 
 # Load ticker repository
 TICKER_REPO_PATH = Path(__file__).parent.parent / "knowledge" / "technical_resources" / "bloomberg_api" / "central_bloomberg_ticker_repository_v3.json"
@@ -45,17 +98,23 @@ if not TICKER_REPO_PATH.exists():
     TICKER_REPO_PATH = Path(__file__).parent / "central_bloomberg_ticker_repository_v3.json"
 
 try:
-    with open(TICKER_REPO_PATH) as f:
-        TICKER_REPOSITORY = json.load(f)
-    logger.info(f"Loaded {TICKER_REPOSITORY['metadata']['total_valid_tickers']} tickers from repository")
+    ticker_repository = TickerRepository.from_file(TICKER_REPO_PATH)
 except Exception as e:
     logger.warning(f"Could not load ticker repository: {e}")
-    TICKER_REPOSITORY = None
+    ticker_repository = TickerRepository()
+
+# Pair -> tenor -> forward ticker, NDF codes where verified
+forward_curves = ForwardCurveTable.from_files()
+# Outright/carry blocks computed once per forward matrix snapshot
+outright_cache = OutrightCache()
 
 # Cache implementation
 class CacheManager:
     def __init__(self):
         self.cache = {}
+        # Last value per key, served while the VM is failing - expires after STALE_CACHE_TTL
+        # like the Redis stale:* keys, and bounded to STALE_CACHE_MAX_ENTRIES (LRU)
+        self.stale: "OrderedDict[str, tuple]" = OrderedDict()
         self.redis_client = None
         
         if REDIS_CONNECTION and ENABLE_CACHE:
@@ -67,51 +126,104 @@ class CacheManager:
             except Exception as e:
                 logger.warning(f"Redis connection failed: {e}. Using in-memory cache.")
     
+    @property
+    def backend(self) -> str:
+        return "redis" if self.redis_client else "memory"
+    
     async def get(self, key: str) -> Optional[Dict]:
         if not ENABLE_CACHE:
             return None
             
-        if self.redis_client:
-            try:
-                data = self.redis_client.get(key)
-                if data:
-                    return json.loads(data)
-            except Exception as e:
-                logger.error(f"Redis get error: {e}")
-        else:
-            # In-memory cache
-            if key in self.cache:
-                data, timestamp = self.cache[key]
-                if datetime.now() - timestamp < timedelta(seconds=CACHE_TTL):
+        with tracer.start_as_current_span("cache.get", attributes={"cache.key": key, "cache.backend": self.backend}) as span:
+            if self.redis_client:
+                try:
+                    data = self.redis_client.get(key)
+                    record_cache("response", "hit" if data else "miss")
+                    span.set_attribute("cache.result", "hit" if data else "miss")
+                    if data:
+                        return json.loads(data)
+                except Exception as e:
+                    logger.error(f"Redis get error: {e}")
+            else:
+                # In-memory cache
+                result = "miss"
+                if key in self.cache:
+                    data, timestamp = self.cache[key]
+                    if datetime.now() - timestamp < timedelta(seconds=CACHE_TTL):
+                        result = "hit"
+                    else:
+                        result = "stale"
+                        del self.cache[key]
+                record_cache("response", result)
+                span.set_attribute("cache.result", result)
+                if result == "hit":
                     return data
-                else:
-                    del self.cache[key]
         return None
     
     async def set(self, key: str, value: Dict):
         if not ENABLE_CACHE:
             return
             
-        if self.redis_client:
-            try:
-                self.redis_client.setex(key, CACHE_TTL, json.dumps(value))
-            except Exception as e:
-                logger.error(f"Redis set error: {e}")
-        else:
-            # In-memory cache
-            self.cache[key] = (value, datetime.now())
+        with tracer.start_as_current_span("cache.set", attributes={"cache.key": key, "cache.backend": self.backend}):
+            if self.redis_client:
+                try:
+                    data = json.dumps(value)
+                    self.redis_client.setex(key, CACHE_TTL, data)
+                    self.redis_client.setex(f"stale:{key}", STALE_CACHE_TTL, data)
+                except Exception as e:
+                    logger.error(f"Redis set error: {e}")
+            else:
+                # In-memory cache
+                now = datetime.now()
+                self.cache[key] = (value, now)
+                self.stale[key] = (value, now)
+                self.stale.move_to_end(key)
+                while len(self.stale) > STALE_CACHE_MAX_ENTRIES:
+                    self.stale.popitem(last=False)
+    
+    async def get_stale(self, key: str) -> Optional[Dict]:
+        """Last value stored under key within STALE_CACHE_TTL - the fallback when Bloomberg fails"""
+        if not ENABLE_CACHE:
+            return None
+        
+        with tracer.start_as_current_span("cache.get_stale", attributes={"cache.key": key, "cache.backend": self.backend}) as span:
+            data = None
+            if self.redis_client:
+                try:
+                    raw = self.redis_client.get(f"stale:{key}")
+                    data = json.loads(raw) if raw else None
+                except Exception as e:
+                    logger.error(f"Redis get error: {e}")
+            elif key in self.stale:
+                data, timestamp = self.stale[key]
+                if datetime.now() - timestamp < timedelta(seconds=STALE_CACHE_TTL):
+                    self.stale.move_to_end(key)
+                else:
+                    data = None
+                    del self.stale[key]
+            record_cache("fallback", "hit" if data else "miss")
+            span.set_attribute("cache.result", "hit" if data else "miss")
+            return data
     
     async def clear(self):
         if self.redis_client:
             self.redis_client.flushdb()
         else:
             self.cache.clear()
+            self.stale.clear()
 
 # Initialize cache
 cache_manager = CacheManager()
 
-# HTTP client
-http_client = httpx.AsyncClient(timeout=30.0)
+# HTTP client - every VM call is timed for /metrics and goes through the circuit breaker;
+# reference calls are idempotent, so they may be hedged
+upstream_breaker = CircuitBreaker("bloomberg")
+upstream_transport = GuardedTransport(
+    MeteredTransport(),
+    upstream_breaker,
+    hedge_paths={"/api/bloomberg/reference"} if HEDGE_ENABLED else ()
+)
+http_client = httpx.AsyncClient(timeout=UPSTREAM_TIMEOUT, transport=upstream_transport)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -119,8 +231,13 @@ async def lifespan(app: FastAPI):
     logger.info("Bloomberg Gateway starting up...")
     logger.info(f"Cache enabled: {ENABLE_CACHE}")
     logger.info(f"Bloomberg API: {BLOOMBERG_API_URL}")
+    reprobe_task = asyncio.create_task(ticker_router.run(fetch_bloomberg_data))
     yield
     # Shutdown
+    reprobe_task.cancel()
+    await quote_hub.close()
+    reference_chunker.save()
+    ticker_router.save()
     await http_client.aclose()
     logger.info("Bloomberg Gateway shutting down...")
 
@@ -147,6 +264,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency, upstream latency and cache/error counters on /metrics
+instrument(app)
+# Spans per request (handler -> cache -> VM); X-Debug-Timing returns the breakdown
+trace_requests(app)
+
 # Models
 class VolatilityRequest(BaseModel):
     pair: str
@@ -156,37 +278,112 @@ class VolatilityResponse(BaseModel):
     data: Dict[str, Any]
     metadata: Dict[str, Any]
 
+class BulkHistoricalRequest(BaseModel):
+    securities: List[str]
+    fields: List[str] = ["PX_LAST"]
+    start_date: str  # YYYYMMDD format
+    end_date: str    # YYYYMMDD format
+    periodicity: str = "DAILY"
+
 # Helper functions
-def get_volatility_tickers(pair: str, tenors: List[str]) -> Dict[str, List[str]]:
-    """Get the best available tickers for a currency pair"""
-    tickers = {
-        "spot": [f"{pair} Curncy"],
-        "atm": [],
-        "rr_25d": [],
-        "bf_25d": [],
-        "forwards": []
+# Surface groups -> (ticker family, delta) they are looked up under in the repository
+SURFACE_GROUPS = {
+    "atm": (FX_VOL, None),
+    "rr_25d": (FX_RISK_REVERSAL, 25),
+    "bf_25d": (FX_BUTTERFLY, 25),
+    "forwards": (FX_FORWARD, None)
+}
+
+def template_tickers(pair: str, group: str, tenor: str) -> List[str]:
+    """Candidate tickers for a pillar the repository does not list (BGN first, plain as fallback)"""
+    if group == "atm":
+        if tenor == "ON":
+            return [f"{pair}VON Curncy"]
+        return [f"{pair}V{tenor} BGN Curncy", f"{pair}V{tenor} Curncy"]
+    if group == "rr_25d":
+        return [f"{pair}25R{tenor} BGN Curncy", f"{pair}25R{tenor} Curncy"]
+    if group == "bf_25d":
+        return [f"{pair}25B{tenor} BGN Curncy", f"{pair}25B{tenor} Curncy"]
+    return [f"{pair}{tenor} Curncy"]
+
+def pillar_candidates(pair: str, group: str, tenor: str, known: List) -> List[str]:
+    """Candidate tickers for a pillar in preference order, BGN before plain"""
+    templates = template_tickers(pair, group, tenor)
+    if not known:
+        return templates
+    # The repository often lists only the plain ticker; keep asking for BGN ahead of it
+    quotes_bgn = any(" BGN " in ticker for ticker in templates)
+    candidates = []
+    for record in known:
+        if quotes_bgn and record.source is None:
+            candidates.append(f"{record.root} BGN Curncy")
+        candidates.append(record.ticker)
+    return sorted(dict.fromkeys(candidates), key=lambda ticker: " BGN " not in ticker)
+
+# Learned per-pillar BGN / plain routing, persisted across restarts
+ticker_router = TickerRouter.load()
+
+def surface_slots(pair: str, tenors: List[str]) -> Dict[str, tuple]:
+    """Route key -> (group, tenor, tickers to request) for every pillar of a surface"""
+    # Candidates come from the repository when it lists the pillar, else from templates,
+    # BGN first either way; the router then narrows them to the variant that last returned data
+    spot = ticker_repository.find(pair, FX_SPOT, None)
+    key = route_key(pair, None, "spot")
+    slots = {key: ("spot", None, ticker_router.choose(key, [r.ticker for r in spot] or [f"{pair} Curncy"]))}
+    
+    for group, (family, delta) in SURFACE_GROUPS.items():
+        for tenor in tenors:
+            known = ticker_repository.find(pair, family, tenor, delta)
+            key = route_key(pair, tenor, group)
+            candidates = pillar_candidates(pair, group, tenor, known)
+            slots[key] = (group, tenor, ticker_router.choose(key, candidates))
+    
+    return slots
+
+def assemble_surface(pair: str, slots: Dict[str, tuple], bloomberg_response: Dict) -> Dict[str, Any]:
+    """Surface from a reference response; records which candidate answered each pillar"""
+    processed_data = {
+        "pair": pair,
+        "timestamp": datetime.now().isoformat(),
+        "tenors": {},
+        "spot": None
     }
     
-    for tenor in tenors:
-        if tenor == "ON":
-            tickers["atm"].append(f"{pair}VON Curncy")
-        else:
-            tickers["atm"].append(f"{pair}V{tenor} BGN Curncy")
-            tickers["atm"].append(f"{pair}V{tenor} Curncy")  # Fallback
-        
-        # Risk reversal and butterfly
-        tickers["rr_25d"].append(f"{pair}25R{tenor} BGN Curncy")
-        tickers["rr_25d"].append(f"{pair}25R{tenor} Curncy")  # Fallback
-        tickers["bf_25d"].append(f"{pair}25B{tenor} BGN Curncy")
-        tickers["bf_25d"].append(f"{pair}25B{tenor} Curncy")  # Fallback
+    with tracer.start_as_current_span("surface.process", attributes={"surface.pillars": len(slots)}):
+        securities_data = bloomberg_response.get("data", {}).get("securities_data", [])
+        returned = {
+            security_data["security"]: security_data.get("fields", {})
+            for security_data in securities_data
+            if returned_data(security_data)
+        }
+        answered = {security_data.get("security") for security_data in securities_data}
+        # A partial response (a chunk failed) is not evidence about routes
+        learn = not bloomberg_response.get("partial")
         
-        # Forwards
-        tickers["forwards"].append(f"{pair}{tenor} Curncy")
+        for key, (group, tenor, requested) in slots.items():
+            # Candidates are in preference order (BGN before plain), so the first hit wins
+            hit = next((ticker for ticker in requested if ticker in returned), None)
+            if learn:
+                ticker_router.record(key, requested, hit, answered)
+            if hit is None:
+                continue
+            if group == "spot":
+                processed_data["spot"] = returned[hit].get("PX_LAST")
+            else:
+                processed_data["tenors"].setdefault(tenor, {})[group] = returned[hit].get("PX_LAST")
     
-    return tickers
+    return processed_data
 
-async def fetch_bloomberg_data(securities: List[str], fields: List[str]) -> Dict:
-    """Fetch data from Bloomberg API"""
+def surface_to_columns(processed_data: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """Columnar view of a processed surface: one row per tenor"""
+    rows = [
+        {"tenor": tenor, **(values if isinstance(values, dict) else {"value": values})}
+        for tenor, values in processed_data.get("tenors", {}).items()
+    ]
+    return records_to_columns(rows) if rows else {"tenor": []}
+
+async def post_reference_chunk(securities: List[str], fields: List[str]) -> Dict:
+    """Single upstream reference call"""
     payload = {
         "securities": securities,
         "fields": fields
@@ -197,22 +394,54 @@ async def fetch_bloomberg_data(securities: List[str], fields: List[str]) -> Dict
         "Content-Type": "application/json"
     }
     
-    try:
+    with tracer.start_as_current_span("bloomberg.reference", attributes={"bloomberg.securities": len(securities)}) as span:
         response = await http_client.post(
             f"{BLOOMBERG_API_URL}/api/bloomberg/reference",
             json=payload,
             headers=headers
         )
-        
-        if response.status_code == 200:
+        span.set_attribute("http.status_code", response.status_code)
+    
+    if response.status_code == 200:
+        with tracer.start_as_current_span("bloomberg.parse", attributes={"http.response_content_length": len(response.content)}):
             return response.json()
-        else:
-            logger.error(f"Bloomberg API error: {response.status_code}")
-            return {"error": f"Bloomberg API returned {response.status_code}"}
-            
-    except Exception as e:
-        logger.error(f"Bloomberg API connection error: {e}")
-        return {"error": str(e)}
+    else:
+        logger.error(f"Bloomberg API error: {response.status_code}")
+        return {"error": f"Bloomberg API returned {response.status_code}"}
+
+# Learns the chunk size/concurrency the VM handles best from latency and errors
+reference_chunker = AdaptiveChunker.for_endpoint("reference")
+
+async def post_reference(securities: List[str], fields: List[str]) -> Dict:
+    """Upstream reference call split into adaptive chunks - callers should go through reference_batcher"""
+    if upstream_breaker.rejecting():
+        # Fail fast without chunking, so the chunker does not learn from refused calls
+        return {"error": f"Bloomberg API circuit open - retry in {upstream_breaker.retry_in():.0f}s"}
+    results = await reference_chunker.run(
+        securities,
+        lambda chunk: post_reference_chunk(chunk, fields)
+    )
+    return merge_reference_responses(results)
+
+# Concurrent reference requests share one merged upstream call
+reference_batcher = ReferenceBatcher(
+    post_reference,
+    window=BATCH_WINDOW_MS / 1000,
+    max_securities=BATCH_MAX_SECURITIES
+)
+
+async def fetch_bloomberg_data(securities: List[str], fields: List[str]) -> Dict:
+    """Fetch data from Bloomberg API"""
+    with tracer.start_as_current_span("bloomberg.fetch", attributes={"bloomberg.securities": len(securities)}) as span:
+        try:
+            return await reference_batcher.fetch(securities, fields)
+        except Exception as e:
+            logger.error(f"Bloomberg API connection error: {e}")
+            span.record_exception(e)
+            return {"error": str(e)}
+
+# One shared upstream polling loop for all streaming clients
+quote_hub = QuoteStreamHub(fetch_bloomberg_data, STREAM_FIELDS, STREAM_POLL_INTERVAL)
 
 # API Endpoints
 @app.get("/")
@@ -223,7 +452,7 @@ async def root():
         "status": "ready",
         "cache_enabled": ENABLE_CACHE,
         "bloomberg_api": BLOOMBERG_API_URL,
-        "ticker_repository": TICKER_REPOSITORY is not None,
+        "ticker_repository": len(ticker_repository) > 0,
         "environment": "development" if not ENABLE_CACHE else "production"
     }
 
@@ -240,79 +469,229 @@ async def health_check():
     return {
         "status": "healthy" if bloomberg_status else "degraded",
         "bloomberg_api": bloomberg_status,
+        "circuit": upstream_breaker.state,
         "cache": ENABLE_CACHE,
         "timestamp": datetime.now().isoformat()
     }
 
 @app.get("/api/volatility/{pair}", response_model=VolatilityResponse)
-async def get_volatility_surface(pair: str, force_fresh: bool = False):
+async def get_volatility_surface(pair: str, http_request: Request, force_fresh: bool = False):
     """
     Get complete volatility surface for a currency pair
     Uses intelligent ticker selection from our 3,001 discovered tickers
+    Supports Arrow/MessagePack via Accept header (one row per tenor)
     """
+    accept = http_request.headers.get("accept")
     cache_key = f"vol_{pair}"
     
     # Check cache first (unless forced fresh)
     if not force_fresh:
         cached_data = await cache_manager.get(cache_key)
         if cached_data:
-            return VolatilityResponse(
-                data=cached_data,
-                metadata={
-                    "source": "CACHE",
-                    "cached_at": cached_data.get("timestamp"),
-                    "pair": pair,
-                    "cache_ttl": CACHE_TTL
-                }
+            metadata = add_timing({
+                "source": "CACHE",
+                "cached_at": cached_data.get("timestamp"),
+                "pair": pair,
+                "cache_ttl": CACHE_TTL
+            })
+            return encode_response(
+                accept,
+                VolatilityResponse(data=cached_data, metadata=metadata),
+                columns=surface_to_columns(cached_data),
+                metadata={**metadata, "spot": cached_data.get("spot")}
             )
     
     # Define standard tenors
     tenors = ["ON", "1W", "2W", "1M", "2M", "3M", "6M", "9M", "1Y", "18M", "2Y"]
     
-    # Get tickers
-    ticker_groups = get_volatility_tickers(pair, tenors)
-    all_tickers = []
-    for group in ticker_groups.values():
-        all_tickers.extend(group)
+    # Get tickers - one per pillar once its route is learned
+    slots = surface_slots(pair, tenors)
+    all_tickers = list(dict.fromkeys(t for _, _, requested in slots.values() for t in requested))
     
     # Fetch from Bloomberg
     fields = ["PX_LAST", "PX_BID", "PX_ASK", "LAST_UPDATE"]
     bloomberg_response = await fetch_bloomberg_data(all_tickers, fields)
     
     if "error" in bloomberg_response:
-        raise HTTPException(status_code=503, detail=bloomberg_response["error"])
+        # Serve the last surface we had rather than nothing while the VM is failing
+        stale = await cache_manager.get_stale(cache_key)
+        if stale is None:
+            raise HTTPException(status_code=503, detail=bloomberg_response["error"])
+        metadata = add_timing({
+            "source": "CACHE_STALE",
+            "cached_at": stale.get("timestamp"),
+            "pair": pair,
+            "upstream_error": bloomberg_response["error"]
+        })
+        return encode_response(
+            accept,
+            VolatilityResponse(data=stale, metadata=metadata),
+            columns=surface_to_columns(stale),
+            metadata={**metadata, "spot": stale.get("spot")}
+        )
     
     # Process response
-    processed_data = {
+    processed_data = assemble_surface(pair, slots, bloomberg_response)
+    
+    # Cache the result - unless a chunk failed, so a gappy surface never
+    # replaces a complete one as the live or stale copy
+    partial = bool(bloomberg_response.get("partial"))
+    if not partial:
+        await cache_manager.set(cache_key, processed_data)
+    
+    metadata = add_timing({
+        "source": "BLOOMBERG_PARTIAL" if partial else "BLOOMBERG_LIVE",
+        "partial": partial,
+        "fetched_at": datetime.now().isoformat(),
         "pair": pair,
-        "timestamp": datetime.now().isoformat(),
-        "tenors": {},
-        "spot": None
+        "tickers_checked": len(all_tickers),
+        "repository_tickers": sum(1 for ticker in all_tickers if ticker in ticker_repository)
+    })
+    return encode_response(
+        accept,
+        VolatilityResponse(data=processed_data, metadata=metadata),
+        columns=surface_to_columns(processed_data),
+        metadata={**metadata, "spot": processed_data.get("spot")}
+    )
+
+@app.get("/api/tickers")
+async def query_tickers(
+    currency: Optional[str] = None,
+    pair: Optional[str] = None,
+    family: Optional[str] = None,
+    category: Optional[str] = None,
+    prefix: Optional[str] = None,
+    tenor: Optional[str] = None,
+    max_tenor: Optional[str] = None
+):
+    """
+    Indexed lookups into the ticker repository
+    
+    Examples: ?currency=EUR&family=ois, ?pair=USDJPY&family=fx_vol&max_tenor=1Y,
+    ?prefix=EESWE, ?category=government_bonds, ?tenor=10Y. No filter returns a summary.
+    """
+    if prefix:
+        records = ticker_repository.with_prefix(prefix)
+    elif currency or pair:
+        records = ticker_repository.select(
+            currency=currency,
+            pair=pair,
+            families=[family] if family else None,
+            max_days=tenor_days(max_tenor) if max_tenor else None
+        )
+    elif category:
+        records = ticker_repository.by_category(category)
+    elif tenor:
+        records = ticker_repository.by_tenor(tenor)
+    else:
+        return ticker_repository.summary()
+    
+    return {
+        "count": len(records),
+        "tickers": [
+            {**asdict(record), "category": ticker_repository.categories.get(record.ticker)}
+            for record in records
+        ]
     }
+
+async def load_forward_matrix(pairs: Optional[str], tenors: Optional[str], force_fresh: bool):
+    """Parse pair/tenor filters and return (cache key, forward matrix, source)"""
+    pair_list = [p.strip().upper() for p in pairs.split(",") if p.strip()] if pairs else ALL_FORWARD_PAIRS
+    tenor_list = [t.strip().upper() for t in tenors.split(",") if t.strip()] if tenors else forward_curves.tenors
+    unknown = [tenor for tenor in tenor_list if tenor not in forward_curves.tenors]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported tenors {unknown}; use {forward_curves.tenors}")
     
-    # Extract data
-    if "data" in bloomberg_response and "securities_data" in bloomberg_response["data"]:
-        for security_data in bloomberg_response["data"]["securities_data"]:
-            if security_data.get("success"):
-                ticker = security_data["security"]
-                fields = security_data.get("fields", {})
-                
-                # Process based on ticker type
-                if ticker == f"{pair} Curncy":
-                    processed_data["spot"] = fields.get("PX_LAST")
-                # Add more processing logic here
-    
-    # Cache the result
-    await cache_manager.set(cache_key, processed_data)
-    
-    return VolatilityResponse(
-        data=processed_data,
-        metadata={
-            "source": "BLOOMBERG_LIVE",
-            "fetched_at": datetime.now().isoformat(),
-            "pair": pair,
-            "tickers_checked": len(all_tickers)
+    cache_key = f"fwd_{','.join(pair_list)}_{','.join(tenor_list)}"
+    matrix = None if force_fresh else await cache_manager.get(cache_key)
+    if matrix:
+        return cache_key, matrix, "CACHE"
+    
+    securities = forward_curves.tickers(pair_list, tenor_list)
+    bloomberg_response = await fetch_bloomberg_data(securities, ["PX_LAST", "PX_BID", "PX_ASK"])
+    if "error" in bloomberg_response:
+        stale = await cache_manager.get_stale(cache_key)
+        if stale is None:
+            raise HTTPException(status_code=503, detail=bloomberg_response["error"])
+        return cache_key, stale, "CACHE_STALE"
+    with tracer.start_as_current_span("forwards.matrix", attributes={"forwards.pairs": len(pair_list)}):
+        matrix = {
+            **forward_curves.matrix(pair_list, bloomberg_response, tenor_list),
+            "timestamp": datetime.now().isoformat(),
+            "tickers_requested": len(securities)
         }
+    if bloomberg_response.get("partial"):
+        # Some pairs are missing - serve it, but keep the last complete matrix cached
+        return cache_key, matrix, "BLOOMBERG_PARTIAL"
+    await cache_manager.set(cache_key, matrix)
+    return cache_key, matrix, "BLOOMBERG_LIVE"
+
+@app.get("/api/forwards")
+async def get_forward_matrix(
+    http_request: Request,
+    pairs: Optional[str] = None,
+    tenors: Optional[str] = None,
+    force_fresh: bool = False
+):
+    """
+    Forward points for many pairs as a dense pair x tenor matrix
+    
+    pairs/tenors are comma-separated and default to all 45 pairs and the standard
+    forward tenors. NDF pairs use their verified NDF tickers. One batched upstream
+    call covers every pair; Arrow/MessagePack return one row per pair.
+    """
+    _, matrix, source = await load_forward_matrix(pairs, tenors, force_fresh)
+    
+    metadata = add_timing({
+        "source": source,
+        "partial": source == "BLOOMBERG_PARTIAL",
+        "pairs": len(matrix["pairs"]),
+        "tenors": len(matrix["tenors"])
+    })
+    rows = [
+        {"pair": pair, "spot": spot, "ndf": ndf, **dict(zip(matrix["tenors"], points))}
+        for pair, spot, ndf, points in zip(matrix["pairs"], matrix["spot"], matrix["ndf"], matrix["points"])
+    ]
+    return encode_response(
+        http_request.headers.get("accept"),
+        {"data": matrix, "metadata": metadata},
+        columns=records_to_columns(rows),
+        metadata=metadata
+    )
+
+@app.get("/api/forwards/outrights")
+async def get_forward_outrights(
+    http_request: Request,
+    pairs: Optional[str] = None,
+    tenors: Optional[str] = None,
+    force_fresh: bool = False
+):
+    """
+    Outrights, FX net %, bid/ask outrights and implied carry for the forward matrix
+    
+    Same filters as /api/forwards. Every grid is computed in one vectorized pass
+    and reused for all requests against the same snapshot. Arrow/MessagePack
+    return one row per (pair, tenor).
+    """
+    cache_key, matrix, source = await load_forward_matrix(pairs, tenors, force_fresh)
+    hits = outright_cache.hits
+    with tracer.start_as_current_span("forwards.outrights"):
+        block = outright_cache.get(cache_key, matrix)
+    record_cache("outrights", "hit" if outright_cache.hits > hits else "miss")
+    
+    metadata = add_timing({
+        "source": source,
+        "partial": source == "BLOOMBERG_PARTIAL",
+        "snapshot": block.snapshot,
+        "pairs": len(block.pairs),
+        "tenors": len(block.tenors),
+        "block_cache_hits": outright_cache.hits
+    })
+    return encode_response(
+        http_request.headers.get("accept"),
+        {"data": block.to_dict(), "metadata": metadata},
+        columns=block.to_columns(),
+        metadata=metadata
     )
 
 @app.post("/api/cache/clear")
@@ -326,36 +705,30 @@ async def clear_cache():
 
 # Direct proxy endpoints for frontend compatibility
 @app.post("/api/bloomberg/reference")
-async def bloomberg_reference_proxy(request: Dict[str, Any]):
+async def bloomberg_reference_proxy(request: Dict[str, Any], http_request: Request):
     """Direct proxy to Bloomberg reference endpoint - for frontend compatibility"""
     try:
-        payload = {
-            "securities": request.get("securities", []),
-            "fields": request.get("fields", [])
-        }
+        securities = request.get("securities", [])
+        fields = request.get("fields", [])
         
-        headers = {
-            "Authorization": "Bearer test",
-            "Content-Type": "application/json"
-        }
-        
-        response = await http_client.post(
-            f"{BLOOMBERG_API_URL}/api/bloomberg/reference",
-            json=payload,
-            headers=headers
-        )
+        result = await reference_batcher.fetch(securities, fields)
         
-        if response.status_code == 200:
-            return response.json()
+        if "error" not in result:
+            return encode_response(
+                http_request.headers.get("accept"),
+                result,
+                columns=reference_to_columns(result, fields),
+                metadata={"success": result.get("success")}
+            )
         else:
-            return {"error": f"Bloomberg API returned {response.status_code}"}
+            return result
             
     except Exception as e:
         logger.error(f"Bloomberg reference proxy error: {e}")
         raise HTTPException(status_code=503, detail=str(e))
 
 @app.post("/api/bloomberg/historical")
-async def bloomberg_historical_proxy(request: Dict[str, Any]):
+async def bloomberg_historical_proxy(request: Dict[str, Any], http_request: Request):
     """Direct proxy to Bloomberg historical endpoint - for frontend compatibility"""
     try:
         headers = {
@@ -363,14 +736,22 @@ async def bloomberg_historical_proxy(request: Dict[str, Any]):
             "Content-Type": "application/json"
         }
         
-        response = await http_client.post(
-            f"{BLOOMBERG_API_URL}/api/bloomberg/historical",
-            json=request,
-            headers=headers
-        )
+        with tracer.start_as_current_span("bloomberg.historical", attributes={"bloomberg.securities": 1}):
+            response = await http_client.post(
+                f"{BLOOMBERG_API_URL}/api/bloomberg/historical",
+                json=request,
+                headers=headers
+            )
         
         if response.status_code == 200:
-            return response.json()
+            with tracer.start_as_current_span("bloomberg.parse"):
+                result = response.json()
+            return encode_response(
+                http_request.headers.get("accept"),
+                result,
+                columns=historical_to_columns(result, request.get("fields", [])),
+                metadata={"success": result.get("success"), "security": request.get("security")}
+            )
         else:
             return {"error": f"Bloomberg API returned {response.status_code}"}
             
@@ -378,6 +759,215 @@ async def bloomberg_historical_proxy(request: Dict[str, Any]):
         logger.error(f"Bloomberg historical proxy error: {e}")
         raise HTTPException(status_code=503, detail=str(e))
 
+@app.post("/api/bloomberg/historical/bulk")
+async def bloomberg_historical_bulk(request: BulkHistoricalRequest, http_request: Request):
+    """
+    Bulk historical data as a dense date x security matrix
+    Fans out one upstream historical call per security and aligns dates server-side.
+    Returns Arrow IPC or MessagePack when requested via Accept header, compact JSON arrays otherwise.
+    """
+    securities = list(dict.fromkeys(request.securities))
+    if not securities:
+        raise HTTPException(status_code=400, detail="No securities requested")
+
+    headers = {
+        "Authorization": "Bearer test",
+        "Content-Type": "application/json"
+    }
+    semaphore = asyncio.Semaphore(HISTORICAL_CONCURRENCY)
+    errors: Dict[str, str] = {}
+
+    async def fetch_one(security: str) -> List[Dict[str, Any]]:
+        payload = {
+            "security": security,
+            "fields": request.fields,
+            "start_date": request.start_date,
+            "end_date": request.end_date,
+            "periodicity": request.periodicity
+        }
+        async with semaphore:
+            try:
+                with tracer.start_as_current_span("bloomberg.historical", attributes={"bloomberg.securities": 1}):
+                    response = await http_client.post(
+                        f"{BLOOMBERG_API_URL}/api/bloomberg/historical",
+                        json=payload,
+                        headers=headers
+                    )
+            except Exception as e:
+                errors[security] = str(e)
+                return []
+        if response.status_code != 200:
+            errors[security] = f"Bloomberg API returned {response.status_code}"
+            return []
+        with tracer.start_as_current_span("bloomberg.parse"):
+            body = response.json()
+        if not body.get("success"):
+            errors[security] = body.get("error") or "Request failed"
+        return extract_series(body)
+
+    results = await asyncio.gather(*(fetch_one(security) for security in securities))
+    if len(errors) == len(securities):
+        raise HTTPException(status_code=503, detail=f"All historical requests failed: {next(iter(errors.values()))}")
+
+    matrix = align_historical(dict(zip(securities, results)), securities, request.fields)
+
+    metadata = {
+        "source": "BLOOMBERG_LIVE",
+        "fetched_at": datetime.now().isoformat(),
+        "securities_requested": len(securities),
+        "dates": len(matrix["dates"]),
+        "errors": errors
+    }
+    return encode_response(
+        http_request.headers.get("accept"),
+        {"success": True, "data": matrix, "metadata": metadata},
+        columns=matrix_to_columns(matrix),
+        metadata=metadata
+    )
+
+# Streaming endpoints - push changed quotes instead of polling /reference
+def stream_tickers(tickers) -> List[str]:
+    """Subscription tickers from a comma-separated string or a JSON list - stripped, blanks dropped"""
+    items = tickers.split(",") if isinstance(tickers, str) else tickers or []
+    return [t.strip() for t in items if isinstance(t, str) and t.strip()]
+
+@app.get("/api/stream/quotes")
+async def stream_quotes(tickers: str, http_request: Request):
+    """
+    Server-Sent Events stream of live quotes
+    Each event is a JSON object of {ticker: fields} containing only changed tickers.
+    Usage: new EventSource('/api/stream/quotes?tickers=EURUSD Curncy,GBPUSD Curncy')
+    """
+    ticker_list = stream_tickers(tickers)
+    if not ticker_list:
+        raise HTTPException(status_code=400, detail="No tickers to stream")
+    subscription = quote_hub.subscribe(ticker_list)
+
+    async def events():
+        try:
+            while not await http_request.is_disconnected():
+                changes = await subscription.next_changes(timeout=STREAM_KEEPALIVE)
+                if changes:
+                    yield f"data: {json.dumps(changes)}\n\n"
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            quote_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/quotes")
+async def websocket_quotes(websocket: WebSocket):
+    """
+    WebSocket stream of live quotes
+    Client sends {"tickers": [...]} to subscribe, and again at any time to change the set.
+    Server sends {ticker: fields} messages containing only changed tickers.
+    """
+    await websocket.accept()
+    subscription = None
+
+    async def receive_updates():
+        while True:
+            message = await websocket.receive_json()
+            quote_hub.update(subscription, stream_tickers(message.get("tickers")))
+
+    try:
+        message = await websocket.receive_json()
+        subscription = quote_hub.subscribe(stream_tickers(message.get("tickers")))
+        receiver = asyncio.create_task(receive_updates())
+        try:
+            while True:
+                sender = asyncio.create_task(subscription.next_changes(timeout=STREAM_KEEPALIVE))
+                done, _ = await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+                if receiver in done:
+                    sender.cancel()
+                    receiver.result()  # Re-raises WebSocketDisconnect
+                changes = sender.result()
+                if changes:
+                    await websocket.send_json(changes)
+        finally:
+            receiver.cancel()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if subscription:
+            quote_hub.unsubscribe(subscription)
+
+@app.get("/api/stream/status")
+async def stream_status():
+    """Shared quote stream state - unique tickers, upstream polls so far"""
+    return {
+        "unique_tickers": len(quote_hub.tickers),
+        "upstream_polls": quote_hub.polls,
+        "poll_interval": quote_hub.interval
+    }
+
+@app.get("/api/batcher/status")
+async def batcher_status():
+    """Reference micro-batcher counters - client requests vs upstream calls"""
+    return {
+        "window_ms": BATCH_WINDOW_MS,
+        "max_securities": BATCH_MAX_SECURITIES,
+        **reference_batcher.stats,
+        "upstream_chunk_size": reference_chunker.size,
+        "upstream_concurrency": reference_chunker.concurrency
+    }
+
+@app.get("/api/upstream/status")
+async def upstream_status():
+    """Circuit breaker state and hedging counters for Bloomberg VM calls"""
+    return upstream_transport.summary()
+
+@app.get("/api/routing/status")
+async def routing_status():
+    """Learned surface ticker routes - how many pillars skip the BGN/plain double fetch"""
+    return ticker_router.summary()
+
+# Only samples while a profile is requested - no thread or hook otherwise
+profiler = SamplingProfiler()
+
+def require_admin(http_request: Request):
+    """Admin endpoints are invisible unless enabled and answer only to the admin token"""
+    if not (PROFILER_ENABLED and PROFILER_TOKEN):
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = http_request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode(), PROFILER_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profile", include_in_schema=False)
+async def sampling_profile(
+    http_request: Request,
+    seconds: float = 10,
+    interval_ms: float = 5,
+    include_idle: bool = False
+):
+    """
+    Sample the live process for `seconds` and return collapsed stacks
+    
+    Output is one "thread;file:function;... count" line per stack, ready for
+    flamegraph.pl or speedscope. Idle event-loop/worker waits are left out
+    unless include_idle=true. One profile runs at a time.
+    """
+    require_admin(http_request)
+    if not 0 < seconds <= PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {PROFILER_MAX_SECONDS}]")
+    
+    try:
+        stacks, samples = await profiler.profile(seconds, max(interval_ms, 1) / 1000, include_idle)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    logger.info(f"Profiled {seconds}s: {samples} samples, {len(stacks)} distinct stacks")
+    return Response(
+        content=collapsed(stacks),
+        media_type="text/plain",
+        headers={"X-Profile-Samples": str(samples)}
+    )
+
 # Container/Kubernetes specific endpoints
 @app.get("/ready")
 async def readiness():
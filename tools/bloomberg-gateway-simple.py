@@ -13,6 +13,8 @@ import asyncio
 from datetime import datetime
 import os
 
+from gateway_metrics import MeteredTransport, instrument
+
 app = FastAPI(title="Bloomberg Gateway", version="1.0.0")
 
 # Enable CORS
@@ -29,9 +31,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request/upstream latency and error counters on /metrics
+instrument(app)
+
 # Bloomberg VM API
-BLOOMBERG_API_URL = "http://20.172.249.92:8080"
-http_client = httpx.AsyncClient(timeout=30.0)
+BLOOMBERG_API_URL = os.getenv("BLOOMBERG_API_URL", "http://20.172.249.92:8080")
+http_client = httpx.AsyncClient(timeout=30.0, transport=MeteredTransport())
 
 class BloombergRequest(BaseModel):
     securities: List[str]
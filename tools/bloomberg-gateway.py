@@ -12,6 +12,11 @@ import requests
 from datetime import datetime
 import uvicorn
 import json
+import os
+
+from adaptive_chunker import AdaptiveChunker
+from validation_cache import ValidationCache
+from gateway_metrics import instrument, metered_session, record_cache
 
 app = FastAPI(title="Bloomberg Gateway", version="2.0.0")
 
@@ -24,12 +29,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request/upstream latency and cache/error counters on /metrics
+instrument(app)
+
 # Bloomberg VM API configuration
-BLOOMBERG_API_URL = "http://20.172.249.92:8080"
+BLOOMBERG_API_URL = os.getenv("BLOOMBERG_API_URL", "http://20.172.249.92:8080")
 DEFAULT_HEADERS = {
     'Authorization': 'Bearer test',
     'Content-Type': 'application/json'
 }
+# All VM calls go through one pooled session, timed for /metrics
+bloomberg_session = metered_session()
+
+# Chunk size for ticker validation is learned from VM latency/errors
+reference_chunker = AdaptiveChunker.for_endpoint("reference")
+# Outcomes of earlier probes - known valid and known dead tickers are not re-checked
+validation_cache = ValidationCache()
 
 class GenericRequest(BaseModel):
     """Generic request that can handle any Bloomberg query"""
@@ -63,7 +78,7 @@ async def root():
 async def health_check():
     """Check Bloomberg API health and capabilities"""
     try:
-        response = requests.get(
+        response = bloomberg_session.get(
             f"{BLOOMBERG_API_URL}/health", 
             headers=DEFAULT_HEADERS,
             timeout=5
@@ -90,7 +105,7 @@ async def generic_query(request: GenericRequest):
         
         for security in request.securities:
             try:
-                response = requests.post(
+                response = bloomberg_session.post(
                     f"{BLOOMBERG_API_URL}/api/bloomberg/historical",
                     headers=DEFAULT_HEADERS,
                     json={
@@ -127,7 +142,7 @@ async def generic_query(request: GenericRequest):
     else:
         # Reference/real-time query
         try:
-            response = requests.post(
+            response = bloomberg_session.post(
                 f"{BLOOMBERG_API_URL}/api/bloomberg/reference",
                 headers=DEFAULT_HEADERS,
                 json={
@@ -233,15 +248,12 @@ async def explore_tickers(
     
     # Check which tickers are valid
     if tickers:
-        # Check in batches
+        # Check in adaptively sized batches
         valid_tickers = []
-        batch_size = 20
         
-        for i in range(0, min(len(tickers), max_results), batch_size):
-            batch = tickers[i:i+batch_size]
-            
+        def check_batch(batch):
             try:
-                response = requests.post(
+                response = bloomberg_session.post(
                     f"{BLOOMBERG_API_URL}/api/bloomberg/reference",
                     headers=DEFAULT_HEADERS,
                     json={
@@ -250,18 +262,27 @@ async def explore_tickers(
                     },
                     timeout=10
                 )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('success') and 'data' in data:
-                        for sec in data['data'].get('securities_data', []):
-                            if sec.get('success'):
-                                valid_tickers.append({
-                                    "ticker": sec['security'],
-                                    "has_data": sec.get('fields', {}).get('PX_LAST') is not None
-                                })
-            except:
-                pass
+            except Exception as e:
+                return {"error": str(e)}
+            
+            if response.status_code != 200:
+                return {"error": f"HTTP {response.status_code}"}
+            data = response.json()
+            validation_cache.record_response(data, ["PX_LAST"])
+            return data
+        
+        known, unknown = validation_cache.split(tickers[:max_results], ["PX_LAST"])
+        record_cache("validation", "hit", len(known))
+        record_cache("validation", "miss", len(unknown))
+        for data in [validation_cache.cached_response(known)] + reference_chunker.run_sync(unknown, check_batch):
+            if data.get('success') and 'data' in data:
+                for sec in data['data'].get('securities_data', []):
+                    if sec.get('success'):
+                        valid_tickers.append({
+                            "ticker": sec['security'],
+                            "has_data": sec.get('fields', {}).get('PX_LAST') is not None
+                        })
+        reference_chunker.save()
         
         return {
             "pattern": pattern,
@@ -289,7 +310,7 @@ async def raw_proxy(request: Request):
     
     # Forward to Bloomberg API
     try:
-        response = requests.request(
+        response = bloomberg_session.request(
             method=request.method,
             url=f"{BLOOMBERG_API_URL}{path}",
             headers=DEFAULT_HEADERS,
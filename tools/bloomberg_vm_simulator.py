@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Bloomberg VM Simulator
+Offline stand-in for the Bloomberg VM API at http://20.172.249.92:8080
+
+Serves the endpoints the gateways and tools call, with the VM's response shapes:
+
+- GET  /health
+- POST /api/bloomberg/reference          {"securities", "fields"} -> data.securities_data[].fields
+- POST /api/bloomberg/historical         {"security", "fields", "start_date", "end_date", "periodicity"}
+- POST /api/bloomberg/ticker-discovery   {"search_type", "currency", "max_results"}
+
+Prices are synthetic but deterministic: a ticker's level comes from a hash of
+the ticker and its parsed family (FX spot, forward points, vols, risk
+reversals, butterflies, rates), and moves smoothly from day to day, so the
+same request on the same day always returns the same numbers. Every ticker
+in central_bloomberg_ticker_repository_v3.json is valid, as is anything the
+ticker grammar recognises (unless SIM_STRICT=true); other tickers come back
+with success=false like an unknown security.
+
+Latency is base + per-security cost + jitter, queued behind a concurrency
+limit like the VM's single Bloomberg session. Errors can be injected at a
+rate, and requests above SIM_MAX_SECURITIES fail like an overloaded VM.
+Settings can be changed at runtime (POST /sim/config) and counters read or
+reset (GET /sim/stats, POST /sim/reset) so benchmarks can count upstream calls.
+
+Point a gateway at it with BLOOMBERG_API_URL=http://localhost:8080.
+
+Usage:
+    python bloomberg_vm_simulator.py                   # serves on SIM_PORT
+    uvicorn bloomberg_vm_simulator:create_app --factory --port 8080
+    app = create_app(SimulatorConfig(latency_ms=0))    # in-process, e.g. httpx.ASGITransport
+
+Environment Variables:
+- SIM_PORT: Port to serve on (default: 8080)
+- SIM_LATENCY_MS: Base latency per request (default: 20)
+- SIM_JITTER_MS: Uniform random extra latency (default: 5)
+- SIM_COST_PER_SECURITY_MS: Extra latency per requested security (default: 1)
+- SIM_CONCURRENCY: Requests the simulated session works on at once (default: 4)
+- SIM_ERROR_RATE: Fraction of requests that fail with HTTP 500 (default: 0)
+- SIM_MAX_SECURITIES: Reference requests above this fail with HTTP 500, 0 disables (default: 0)
+- SIM_STRICT: Only repository tickers are valid (default: false)
+- SIM_SEED: Seed for prices, jitter and injected errors (default: 0)
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import random
+from dataclasses import asdict, dataclass, fields
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from ticker_grammar import (
+    BOND, FX_BUTTERFLY, FX_FORWARD, FX_NDF, FX_RISK_REVERSAL, FX_SPOT, FX_VOL,
+    MONEY_MARKET, OVERNIGHT, UNKNOWN, TickerRecord, parse_ticker
+)
+from ticker_repository import TickerRepository
+
+logger = logging.getLogger(__name__)
+
+REPOSITORY_FILE = Path(__file__).parent / "central_bloomberg_ticker_repository_v3.json"
+
+# Rough spot levels by quote currency so synthetic FX looks like FX
+SPOT_LEVELS = {
+    "JPY": 150, "KRW": 1350, "IDR": 15800, "INR": 83, "CLP": 930, "COP": 4000, "HUF": 360,
+    "CZK": 23, "PHP": 56, "TWD": 32, "THB": 36, "CNH": 7.2, "CNY": 7.2, "BRL": 5.0, "MXN": 17,
+    "ZAR": 18.5, "TRY": 32, "SEK": 10.5, "NOK": 10.7, "DKK": 6.9, "PLN": 4.0, "SGD": 1.35,
+    "HKD": 7.8, "ILS": 3.7, "CAD": 1.36, "CHF": 0.88, "USD": 1.1
+}
+SEARCH_FAMILIES = {
+    "ois": ["ois"], "irs": ["irs"], "fx_spot": [FX_SPOT], "fx_vol": [FX_VOL, FX_RISK_REVERSAL, FX_BUTTERFLY],
+    "fx_forward": [FX_FORWARD, FX_NDF], "govt_bond": [BOND], "money_market": [MONEY_MARKET, OVERNIGHT]
+}
+
+
+@dataclass
+class SimulatorConfig:
+    latency_ms: float = 20.0
+    jitter_ms: float = 5.0
+    cost_per_security_ms: float = 1.0
+    concurrency: int = 4
+    error_rate: float = 0.0
+    max_securities: int = 0
+    strict: bool = False
+    seed: int = 0
+
+    @classmethod
+    def from_env(cls) -> "SimulatorConfig":
+        return cls(
+            latency_ms=float(os.getenv("SIM_LATENCY_MS", "20")),
+            jitter_ms=float(os.getenv("SIM_JITTER_MS", "5")),
+            cost_per_security_ms=float(os.getenv("SIM_COST_PER_SECURITY_MS", "1")),
+            concurrency=int(os.getenv("SIM_CONCURRENCY", "4")),
+            error_rate=float(os.getenv("SIM_ERROR_RATE", "0")),
+            max_securities=int(os.getenv("SIM_MAX_SECURITIES", "0")),
+            strict=os.getenv("SIM_STRICT", "false").lower() == "true",
+            seed=int(os.getenv("SIM_SEED", "0"))
+        )
+
+
+def unit_hash(*parts: Any) -> float:
+    """Deterministic float in [0, 1) for the given parts"""
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+class PriceModel:
+    """Deterministic synthetic quotes per (ticker, day)"""
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+
+    def level(self, record: TickerRecord) -> float:
+        u = unit_hash(self.seed, record.root)
+        years = max(record.tenor_days, 1) / 365
+        if record.family == FX_SPOT:
+            scale = SPOT_LEVELS.get((record.pair or "")[3:6], 1.2)
+            return scale * (0.9 + 0.2 * u)
+        if record.family in (FX_FORWARD, FX_NDF):
+            # Forward points grow with tenor; sign is fixed per pair
+            sign = 1 if unit_hash(self.seed, record.pair) < 0.5 else -1
+            return sign * (5 + 95 * u) * math.sqrt(years)
+        if record.family == FX_VOL:
+            return 6 + 8 * u + 0.8 * math.log1p(years)
+        if record.family == FX_RISK_REVERSAL:
+            return (u - 0.5) * 4 * (record.delta or 25) / 25
+        if record.family == FX_BUTTERFLY:
+            return 0.1 + 0.6 * u * (record.delta or 25) / 25
+        if record.family == UNKNOWN:
+            return 10 + 90 * u
+        # Rates: a currency level plus an upward sloping term structure
+        base = 0.5 + 4.5 * unit_hash(self.seed, record.currency)
+        return base + 0.35 * math.log1p(years) + 0.1 * (u - 0.5)
+
+    def quote(self, record: TickerRecord, day: date) -> Dict[str, float]:
+        level = self.level(record)
+        t = day.toordinal()
+        phase = 2 * math.pi * unit_hash(self.seed, record.root, "phase")
+        wave = math.sin(t / 9 + phase) + 0.5 * math.sin(t / 37 + 2 * phase)
+        noise = unit_hash(self.seed, record.root, t) - 0.5
+        amplitude = max(abs(level), 1) * (0.01 if record.family in (FX_SPOT, UNKNOWN) else 0.03)
+        last = level + amplitude * (wave + 0.3 * noise)
+        spread = abs(last) * 0.0004 if record.family == FX_SPOT else max(abs(last) * 0.0004, 0.01)
+        digits = 6 if record.family == FX_SPOT and abs(last) < 10 else 4
+        return {
+            "PX_LAST": round(last, digits),
+            "PX_BID": round(last - spread / 2, digits),
+            "PX_ASK": round(last + spread / 2, digits),
+            "PX_MID": round(last, digits),
+            "PX_OPEN": round(last - amplitude * 0.2 * noise, digits),
+            "PX_HIGH": round(last + amplitude * 0.3, digits),
+            "PX_LOW": round(last - amplitude * 0.3, digits)
+        }
+
+
+def history_dates(start: date, end: date, periodicity: str) -> List[date]:
+    """Weekdays between start and end, thinned to week or month ends"""
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    days = [d for d in days if d.weekday() < 5]
+    periodicity = periodicity.upper()
+    if periodicity == "WEEKLY":
+        return [d for d in days if d.weekday() == 4]
+    if periodicity == "MONTHLY":
+        return [d for i, d in enumerate(days) if i + 1 == len(days) or days[i + 1].month != d.month]
+    return days
+
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value.replace("-", ""), "%Y%m%d").date()
+
+
+class ReferenceRequest(BaseModel):
+    securities: List[str]
+    fields: List[str] = ["PX_LAST"]
+
+
+class HistoricalRequest(BaseModel):
+    security: str
+    fields: List[str] = ["PX_LAST"]
+    start_date: str
+    end_date: str
+    periodicity: Optional[str] = "DAILY"
+
+
+class TickerSearchRequest(BaseModel):
+    search_type: str
+    currency: str
+    asset_class: Optional[str] = "Curncy"
+    max_results: Optional[int] = 100
+
+
+class BloombergSimulator:
+    """Request handling, latency model and counters behind the simulator app"""
+
+    def __init__(self, config: SimulatorConfig, repository: TickerRepository):
+        self.config = config
+        self.repository = repository
+        self.prices = PriceModel(config.seed)
+        self.random = random.Random(config.seed)
+        self.session = asyncio.Semaphore(config.concurrency)
+        self.reset()
+
+    def reset(self):
+        self.stats = {"requests": {}, "securities": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def configure(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        known = {f.name for f in fields(SimulatorConfig)}
+        for name, value in changes.items():
+            if name not in known:
+                continue
+            current = getattr(self.config, name)
+            if isinstance(current, bool):
+                value = value if isinstance(value, bool) else str(value).lower() == "true"
+            setattr(self.config, name, type(current)(value))
+        self.prices = PriceModel(self.config.seed)
+        self.session = asyncio.Semaphore(self.config.concurrency)
+        return asdict(self.config)
+
+    def is_valid(self, record: TickerRecord) -> bool:
+        if record.ticker in self.repository:
+            return True
+        return not self.config.strict and record.known and record.yellow_key is not None
+
+    async def work(self, endpoint: str, securities: int) -> Optional[JSONResponse]:
+        """Count the request and spend its simulated time; returns an error response to inject"""
+        self.stats["requests"][endpoint] = self.stats["requests"].get(endpoint, 0) + 1
+        self.stats["securities"] += securities
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        try:
+            async with self.session:
+                delay = (
+                    self.config.latency_ms
+                    + self.config.cost_per_security_ms * securities
+                    + self.config.jitter_ms * self.random.random()
+                )
+                if delay > 0:
+                    await asyncio.sleep(delay / 1000)
+        finally:
+            self.stats["in_flight"] -= 1
+
+        if self.config.max_securities and securities > self.config.max_securities:
+            return self.error(f"Too many securities in one request ({securities} > {self.config.max_securities})")
+        if self.config.error_rate and self.random.random() < self.config.error_rate:
+            return self.error("Simulated Bloomberg error")
+        return None
+
+    def error(self, message: str) -> JSONResponse:
+        self.stats["errors"] += 1
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "data": None, "error": message, "timestamp": datetime.now().isoformat()}
+        )
+
+    def reference(self, request: ReferenceRequest) -> Dict[str, Any]:
+        today = date.today()
+        securities_data = []
+        for security in request.securities:
+            record = parse_ticker(security)
+            if not self.is_valid(record):
+                securities_data.append({
+                    "security": security, "fields": {}, "success": False, "error": "Unknown/Invalid security"
+                })
+                continue
+            quote = self.prices.quote(record, today)
+            values = {field: quote.get(field) for field in request.fields}
+            if "LAST_UPDATE" in request.fields:
+                values["LAST_UPDATE"] = datetime.now().strftime("%H:%M:%S")
+            if "NAME" in request.fields:
+                values["NAME"] = record.root
+            securities_data.append({"security": security, "fields": values, "success": True})
+        # No "error" key on success, like the VM - the gateway's chunker treats one as a failure
+        return {
+            "success": True,
+            "data": {"securities_data": securities_data, "source": "Bloomberg Simulator"}
+        }
+
+    def historical(self, request: HistoricalRequest) -> Dict[str, Any]:
+        record = parse_ticker(request.security)
+        if not self.is_valid(record):
+            return {"success": False, "data": None, "error": f"Unknown/Invalid security: {request.security}"}
+        points = []
+        for day in history_dates(parse_date(request.start_date), parse_date(request.end_date), request.periodicity or "DAILY"):
+            quote = self.prices.quote(record, day)
+            points.append({"date": day.isoformat(), **{field: quote.get(field) for field in request.fields}})
+        return {
+            "success": True,
+            "data": {"security": request.security, "data": points, "source": "Bloomberg Simulator"},
+            "error": None,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def discover(self, request: TickerSearchRequest) -> Dict[str, Any]:
+        families = SEARCH_FAMILIES.get(request.search_type, [request.search_type])
+        try:
+            records = self.repository.select(currency=request.currency, families=families)
+        except ValueError as e:
+            records, error = [], str(e)
+        else:
+            error = None
+        tickers = [
+            {
+                "ticker": record.ticker,
+                "description": f"{record.currency or request.currency} {record.family} {record.tenor or ''}".strip(),
+                "instrument_type": request.search_type,
+                "currency": request.currency,
+                "tenor": record.tenor
+            }
+            for record in records[:request.max_results]
+        ]
+        return {
+            "success": error is None,
+            "search_criteria": {"search_type": request.search_type, "currency": request.currency},
+            "tickers_found": len(tickers),
+            "tickers": tickers,
+            "error": error
+        }
+
+
+def create_app(config: Optional[SimulatorConfig] = None, repository: Optional[TickerRepository] = None) -> FastAPI:
+    config = config or SimulatorConfig.from_env()
+    if repository is None:
+        repository = TickerRepository.from_file(REPOSITORY_FILE) if REPOSITORY_FILE.exists() else TickerRepository()
+    simulator = BloombergSimulator(config, repository)
+    app = FastAPI(title="Bloomberg VM Simulator", version="1.0.0")
+    app.state.simulator = simulator
+
+    @app.get("/health")
+    async def health():
+        now = datetime.now().isoformat()
+        return {
+            "success": True,
+            "data": {
+                "api_status": "healthy",
+                "bloomberg_terminal_running": True,
+                "bloomberg_service_available": True,
+                "server_time": now,
+                "is_using_mock_data": True,
+                "repository_tickers": len(repository)
+            },
+            "error": None,
+            "timestamp": now
+        }
+
+    @app.post("/api/bloomberg/reference")
+    async def reference(request: ReferenceRequest):
+        failure = await simulator.work("reference", len(request.securities))
+        return failure or simulator.reference(request)
+
+    @app.post("/api/bloomberg/historical")
+    async def historical(request: HistoricalRequest):
+        failure = await simulator.work("historical", 1)
+        return failure or simulator.historical(request)
+
+    @app.post("/api/bloomberg/ticker-discovery")
+    async def ticker_discovery(request: TickerSearchRequest):
+        failure = await simulator.work("ticker-discovery", 0)
+        return failure or simulator.discover(request)
+
+    @app.get("/sim/stats")
+    async def sim_stats():
+        return {"config": asdict(simulator.config), **simulator.stats}
+
+    @app.post("/sim/config")
+    async def sim_config(changes: Dict[str, Any]):
+        return simulator.configure(changes)
+
+    @app.post("/sim/reset")
+    async def sim_reset():
+        simulator.reset()
+        return {"reset": True}
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    port = int(os.getenv("SIM_PORT", "8080"))
+    uvicorn.run(create_app(), host="0.0.0.0", port=port)
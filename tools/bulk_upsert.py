@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Bulk Upsert Layer for Ticker and Curve Tables
+Set-based writes instead of one INSERT ... ON CONFLICT round trip per row
+
+Population scripts used to call cursor.execute() once per ticker over a TLS
+connection to Azure, so a few thousand tickers cost thousands of round trips.
+bulk_upsert() instead:
+
+1. dedupes rows on the conflict key (last one wins)
+2. loads them into a temporary staging table with execute_values (one
+   multi-row INSERT per page)
+3. merges the staging table into the target with a single
+   INSERT ... SELECT ... ON CONFLICT statement
+
+It runs on the caller's cursor, so several upserts can share one transaction:
+
+    with conn:
+        with conn.cursor() as cur:
+            counts = bulk_upsert(cur, "bloomberg_tickers", columns, rows, conflict=["bloomberg_ticker"])
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+
+def bulk_upsert(
+    cur,
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    conflict: Sequence[str],
+    update: Optional[Sequence[str]] = None,
+    touch: Sequence[str] = (),
+    page_size: int = 1000
+) -> Dict[str, int]:
+    """
+    Upsert rows into `table` through a staging table
+
+    Args:
+        cur: psycopg2 cursor - the caller owns the transaction
+        columns: column names matching each row's values
+        conflict: unique-key columns for ON CONFLICT
+        update: columns overwritten on conflict (default: every non-key column);
+                an empty list means ON CONFLICT DO NOTHING
+        touch: timestamp columns set to CURRENT_TIMESTAMP on conflict
+        page_size: rows per execute_values statement
+
+    Returns:
+        {"rows": staged row count, "inserted": n, "updated": n, "seconds": db time}
+    """
+    columns = list(columns)
+    if update is None:
+        update = [c for c in columns if c not in conflict]
+    if not rows:
+        return {"rows": 0, "inserted": 0, "updated": 0, "seconds": 0.0}
+
+    # ON CONFLICT cannot touch the same target row twice in one statement
+    key_index = [columns.index(c) for c in conflict]
+    unique_rows = list({tuple(row[i] for i in key_index): tuple(row) for row in rows}.values())
+
+    start = time.perf_counter()
+    # Always schema-qualified so the DROP below can never hit a real table
+    stage = sql.Identifier("pg_temp", f"_stage_{table}")
+    column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+
+    # Copy column types only - no constraints, defaults or sequences
+    cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(stage))
+    cur.execute(sql.SQL("CREATE TEMP TABLE {} ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA").format(
+        stage, column_list, sql.Identifier(table)
+    ))
+    execute_values(
+        cur,
+        sql.SQL("INSERT INTO {} ({}) VALUES %s").format(stage, column_list).as_string(cur),
+        unique_rows,
+        page_size=page_size
+    )
+
+    if update or touch:
+        assignments = [sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(c)) for c in update]
+        assignments += [sql.SQL("{} = CURRENT_TIMESTAMP").format(sql.Identifier(c)) for c in touch]
+        on_conflict = sql.SQL("DO UPDATE SET {}").format(sql.SQL(", ").join(assignments))
+    else:
+        on_conflict = sql.SQL("DO NOTHING")
+
+    # xmax = 0 only for freshly inserted tuples, which splits the count
+    cur.execute(sql.SQL(
+        "INSERT INTO {table} ({columns}) SELECT {columns} FROM {stage} "
+        "ON CONFLICT ({conflict}) {action} RETURNING (xmax = 0) AS inserted"
+    ).format(
+        table=sql.Identifier(table),
+        columns=column_list,
+        stage=stage,
+        conflict=sql.SQL(", ").join(map(sql.Identifier, conflict)),
+        action=on_conflict
+    ))
+    returned = [row["inserted"] if isinstance(row, dict) else row[0] for row in cur.fetchall()]
+    counts = {
+        "rows": len(unique_rows),
+        "inserted": sum(1 for inserted in returned if inserted),
+        "updated": sum(1 for inserted in returned if not inserted),
+        "seconds": time.perf_counter() - start
+    }
+    logger.info(
+        f"{table}: {counts['rows']} rows staged, {counts['inserted']} inserted, "
+        f"{counts['updated']} updated in {counts['seconds']:.2f}s"
+    )
+    return counts
+
+
+def upsert_in_transaction(conn, writes: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """
+    Run several bulk_upsert calls in one transaction - all of them land or none do
+
+    Each write is a dict of bulk_upsert keyword arguments (table, columns, rows, conflict, ...).
+    Returns per-table counts; raises after rolling back if any write fails.
+    """
+    results = {}
+    try:
+        with conn.cursor() as cur:
+            for write in writes:
+                results[write["table"]] = bulk_upsert(cur, **write)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return results
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Upstream Circuit Breaker and Hedged Requests
+Bounds how long clients wait, and how much piles up, when the Bloomberg VM is slow or down
+
+Without a breaker every request during a VM incident waits out the full
+client timeout, and new requests keep arriving behind it. The breaker
+counts consecutive failed calls (exceptions, timeouts and HTTP 5xx); after
+BREAKER_FAILURES it opens and calls fail at once with CircuitOpen. After
+BREAKER_RESET_SECONDS it is half-open: one probe call goes through, and its
+outcome closes the circuit or opens it for another period.
+
+Hedging trims the tail when the VM is merely slow. For idempotent calls
+(the gateway hedges reference requests) a duplicate is sent when the first
+call has not answered within that endpoint's recent p95 latency; whichever
+answers first is used and the other is cancelled. At most HEDGE_MAX_RATIO of
+calls are hedged, so a struggling VM never sees double the load.
+
+Both live in GuardedTransport, an httpx transport around MeteredTransport,
+so every attempt - hedges included - is metered, and call sites see an
+ordinary transport error when the circuit is open.
+
+Usage:
+    breaker = CircuitBreaker("bloomberg")
+    transport = GuardedTransport(MeteredTransport(), breaker, hedge_paths={"/api/bloomberg/reference"})
+    http_client = httpx.AsyncClient(timeout=30.0, transport=transport)
+    if breaker.rejecting(): ...        # skip work that would fail anyway
+
+Environment Variables:
+- BREAKER_FAILURES: Consecutive failed calls that open the circuit (default: 5)
+- BREAKER_RESET_SECONDS: Seconds the circuit stays open before a probe (default: 30)
+- HEDGE_MIN_DELAY_MS: Shortest wait before a hedge is sent (default: 50)
+- HEDGE_MAX_RATIO: Largest fraction of hedgeable calls that may be hedged (default: 0.1)
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import httpx
+
+from gateway_metrics import CIRCUIT_STATE, HEDGES
+
+logger = logging.getLogger(__name__)
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "50"))
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.1"))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(httpx.TransportError):
+    """Upstream call refused without being sent because the circuit is open"""
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures -> half-open probe after `reset_timeout`"""
+
+    def __init__(
+        self,
+        name: str = "bloomberg",
+        failure_threshold: int = BREAKER_FAILURES,
+        reset_timeout: float = BREAKER_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.stats = {"opened": 0, "rejected": 0, "failures": 0, "successes": 0}
+        CIRCUIT_STATE.labels(name).set(STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.log(logging.WARNING if state == OPEN else logging.INFO, f"[{self.name}] circuit {self.state} -> {state}")
+        self.state = state
+        CIRCUIT_STATE.labels(self.name).set(STATE_VALUES[state])
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self.clock() - self.opened_at))
+
+    def rejecting(self) -> bool:
+        """True while calls are refused outright (open and not yet due for a probe)"""
+        return self.state == OPEN and self.retry_in() > 0
+
+    def acquire(self):
+        """Admit a call or raise CircuitOpen; half-open admits one probe at a time"""
+        if self.state == OPEN:
+            if self.retry_in() > 0:
+                self.stats["rejected"] += 1
+                raise CircuitOpen(f"Bloomberg API circuit open - retry in {self.retry_in():.0f}s")
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probing:
+                self.stats["rejected"] += 1
+                raise CircuitOpen("Bloomberg API circuit half-open - probe in flight")
+            self._probing = True
+
+    def success(self):
+        self.stats["successes"] += 1
+        self.failures = 0
+        self._probing = False
+        self._set_state(CLOSED)
+
+    def failure(self):
+        self.stats["failures"] += 1
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.stats["opened"] += 1
+            self.opened_at = self.clock()
+            self._set_state(OPEN)
+
+    def abandon(self):
+        """The admitted call was cancelled by its caller - no verdict either way"""
+        self._probing = False
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            "retry_in": round(self.retry_in(), 1),
+            **self.stats
+        }
+
+
+class LatencyTracker:
+    """Recent successful call latencies; quantiles once `min_samples` have been seen"""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[max(1, math.ceil(q * len(ordered))) - 1]
+
+
+def discard(task: asyncio.Task):
+    """Cancel a losing attempt, or close its response if it already answered"""
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled() and task.exception() is None:
+        asyncio.ensure_future(task.result().aclose())
+
+
+class GuardedTransport(httpx.AsyncBaseTransport):
+    """Circuit breaker for every call, hedging for calls to `hedge_paths` (idempotent endpoints only)"""
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        breaker: CircuitBreaker,
+        hedge_paths: Iterable[str] = (),
+        hedge_min_delay: float = HEDGE_MIN_DELAY_MS / 1000,
+        hedge_max_ratio: float = HEDGE_MAX_RATIO
+    ):
+        self.transport = transport
+        self.breaker = breaker
+        self.hedge_paths = set(hedge_paths)
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_ratio = hedge_max_ratio
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.stats = {"hedgeable": 0, "hedged": 0, "hedge_wins": 0}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.breaker.acquire()
+        path = request.url.path
+        started = time.perf_counter()
+        try:
+            if path in self.hedge_paths:
+                response = await self._hedged(request, path)
+            else:
+                response = await self.transport.handle_async_request(request)
+        except asyncio.CancelledError:
+            self.breaker.abandon()
+            raise
+        except Exception:
+            self.breaker.failure()
+            raise
+
+        if response.status_code >= 500:
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+            self.latency.setdefault(path, LatencyTracker()).add(time.perf_counter() - started)
+        return response
+
+    def hedge_delay(self, path: str) -> Optional[float]:
+        """p95 of recent calls to `path`, or None when hedging is not due (no history, budget spent)"""
+        tracker = self.latency.get(path)
+        p95 = tracker.quantile(0.95) if tracker else None
+        if p95 is None or self.stats["hedged"] >= self.hedge_max_ratio * self.stats["hedgeable"]:
+            return None
+        return max(p95, self.hedge_min_delay)
+
+    async def _hedged(self, request: httpx.Request, path: str) -> httpx.Response:
+        self.stats["hedgeable"] += 1
+        delay = self.hedge_delay(path)
+        first = asyncio.ensure_future(self.transport.handle_async_request(request))
+        if delay is None:
+            return await first
+
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+        except asyncio.CancelledError:
+            first.cancel()
+            raise
+        if done:
+            return first.result()
+
+        self.stats["hedged"] += 1
+        HEDGES.labels(path, "sent").inc()
+        hedge = asyncio.ensure_future(self.transport.handle_async_request(request))
+        pending = {first, hedge}
+        failed = []
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status_code < 500:
+                        if task is hedge:
+                            self.stats["hedge_wins"] += 1
+                            HEDGES.labels(path, "won").inc()
+                        discard(hedge if task is first else first)
+                        return task.result()
+                    failed.append(task)
+            # Both failed: prefer a 5xx response over an exception
+            responses = [task for task in failed if task.exception() is None]
+            chosen = responses[0] if responses else failed[0]
+            for task in failed:
+                if task is not chosen:
+                    discard(task)
+            return chosen.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+    def summary(self) -> Dict[str, Any]:
+        delays = {path: self.hedge_delay(path) for path in self.hedge_paths}
+        return {
+            "circuit": self.breaker.summary(),
+            "hedge_paths": sorted(self.hedge_paths),
+            "hedge_delay_ms": {path: round(delay * 1000, 1) if delay else None for path, delay in delays.items()},
+            **self.stats
+        }
@@ -4,14 +4,21 @@ Comprehensive OIS Ticker Discovery and Database Population
 Discovers and validates real OIS tickers for ALL currencies using Bloomberg API
 """
 
+import argparse
+import asyncio
 import requests
 import json
-import time
 import psycopg2
 import logging
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+from comprehensive_swap_discovery import SwapDiscoveryConfig
+from discovery_checkpoint import DiscoveryCheckpoint
+from discovery_engine import (
+    CurrencyDiscovery, DiscoveryEngine, SearchGenerator, extract_tenor, insert_ticker_reference
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -50,10 +57,11 @@ ALL_CURRENCIES = {
 }
 
 class OISTickerDiscovery:
-    def __init__(self):
+    def __init__(self, resume: bool = False):
         self.discovered_tickers = {}
         self.validated_tickers = {}
         self.failed_validations = {}
+        self.checkpoint = DiscoveryCheckpoint("comprehensive_ois_discovery", resume=resume)
         
     def test_bloomberg_connection(self) -> bool:
         """Test Bloomberg API connection"""
@@ -69,101 +77,47 @@ class OISTickerDiscovery:
             logger.error(f"❌ Failed to connect to Bloomberg API: {e}")
             return False
     
-    def discover_currency_tickers(self, currency: str) -> List[Dict]:
-        """Discover OIS tickers for a specific currency with comprehensive search patterns"""
-        logger.info(f"🔍 Discovering OIS tickers for {currency}")
-        
-        try:
-            # Comprehensive search patterns for maximum coverage
-            search_patterns = [
-                # Direct OIS search
-                {"search_type": "ois", "currency": currency, "max_results": 100},
-                {"search_type": "swap", "currency": currency, "subcategory": "ois", "max_results": 100},
-                
-                # Generic patterns
-                {"search_pattern": f"{currency} OIS", "max_results": 100},
-                {"search_pattern": f"{currency} Overnight", "max_results": 100},
-                {"search_pattern": f"{currency} Index Swap", "max_results": 100},
-                
-                # Common ticker patterns
-                {"search_pattern": f"{currency}SO", "max_results": 100},  # USSO, EURSO etc
-                {"search_pattern": f"{currency}OIS", "max_results": 100},
-                {"search_pattern": f"{currency}OISD", "max_results": 100}, # Daily compounded
-                {"search_pattern": f"{currency}SW", "max_results": 100},   # Generic swap
-                
-                # Specific tenor patterns
-                {"search_pattern": f"{currency}SO1", "max_results": 50},   # 1Y OIS
-                {"search_pattern": f"{currency}SO2", "max_results": 50},   # 2Y OIS
-                {"search_pattern": f"{currency}SO5", "max_results": 50},   # 5Y OIS
-                {"search_pattern": f"{currency}SO10", "max_results": 50},  # 10Y OIS
-                
-                # Alternative patterns for different markets
-                {"search_pattern": f"{currency}ON", "max_results": 50},    # Overnight
-                {"search_pattern": f"{currency}IBOR", "max_results": 50},  # Some markets use this
-                {"search_pattern": f"{currency}IR", "max_results": 50},    # Interest Rate
-                
-                # Market-specific patterns
-                {"search_pattern": f"{currency} SONIA" if currency == "GBP" else f"{currency} SOFR" if currency == "USD" else f"{currency} ESTR" if currency == "EUR" else f"{currency} TONAR" if currency == "JPY" else f"{currency} RFR", "max_results": 50},
-            ]
-            
-            all_tickers = []
-            
-            for i, pattern in enumerate(search_patterns):
-                try:
-                    logger.info(f"  Trying pattern {i+1}/{len(search_patterns)}: {pattern}")
-                    
-                    response = requests.post(
-                        f"{BLOOMBERG_API_URL}/api/bloomberg/ticker-discovery",
-                        headers=HEADERS,
-                        json=pattern,
-                        timeout=30
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        tickers = data.get("tickers", [])
-                        if tickers:
-                            logger.info(f"    ✅ Found {len(tickers)} tickers")
-                            all_tickers.extend(tickers)
-                        else:
-                            logger.info(f"    ⚠️  No tickers found")
-                    else:
-                        logger.warning(f"    ❌ HTTP {response.status_code}")
-                        
-                    time.sleep(1.5)  # Rate limiting
-                    
-                except Exception as e:
-                    logger.warning(f"    ❌ Pattern failed: {e}")
-                    continue
+    def search_patterns(self, currency: str) -> List[Dict]:
+        """Comprehensive ticker-discovery search patterns for maximum coverage"""
+        return [
+            # Direct OIS search
+            {"search_type": "ois", "currency": currency, "max_results": 100},
+            {"search_type": "swap", "currency": currency, "subcategory": "ois", "max_results": 100},
             
-            # Remove duplicates
-            unique_tickers = []
-            seen_tickers = set()
-            for ticker in all_tickers:
-                ticker_code = ticker.get('ticker', '')
-                if ticker_code and ticker_code not in seen_tickers:
-                    unique_tickers.append(ticker)
-                    seen_tickers.add(ticker_code)
+            # Generic patterns
+            {"search_pattern": f"{currency} OIS", "max_results": 100},
+            {"search_pattern": f"{currency} Overnight", "max_results": 100},
+            {"search_pattern": f"{currency} Index Swap", "max_results": 100},
             
-            logger.info(f"✅ Found {len(unique_tickers)} unique tickers for {currency}")
+            # Common ticker patterns
+            {"search_pattern": f"{currency}SO", "max_results": 100},  # USSO, EURSO etc
+            {"search_pattern": f"{currency}OIS", "max_results": 100},
+            {"search_pattern": f"{currency}OISD", "max_results": 100}, # Daily compounded
+            {"search_pattern": f"{currency}SW", "max_results": 100},   # Generic swap
             
-            # Filter for OIS-relevant tickers
-            ois_tickers = []
-            for ticker in unique_tickers:
-                ticker_code = ticker.get('ticker', '')
-                description = ticker.get('description', '').upper()
-                
-                # Check if it's OIS-related
-                if self.is_ois_ticker(ticker_code, description, currency):
-                    ois_tickers.append(ticker)
-                    logger.info(f"    OIS: {ticker_code} - {description}")
+            # Specific tenor patterns
+            {"search_pattern": f"{currency}SO1", "max_results": 50},   # 1Y OIS
+            {"search_pattern": f"{currency}SO2", "max_results": 50},   # 2Y OIS
+            {"search_pattern": f"{currency}SO5", "max_results": 50},   # 5Y OIS
+            {"search_pattern": f"{currency}SO10", "max_results": 50},  # 10Y OIS
             
-            logger.info(f"✅ Filtered to {len(ois_tickers)} OIS-relevant tickers for {currency}")
-            return ois_tickers
+            # Alternative patterns for different markets
+            {"search_pattern": f"{currency}ON", "max_results": 50},    # Overnight
+            {"search_pattern": f"{currency}IBOR", "max_results": 50},  # Some markets use this
+            {"search_pattern": f"{currency}IR", "max_results": 50},    # Interest Rate
             
-        except Exception as e:
-            logger.error(f"❌ Error discovering {currency} tickers: {e}")
-            return []
+            # Market-specific patterns
+            {"search_pattern": f"{currency} SONIA" if currency == "GBP" else f"{currency} SOFR" if currency == "USD" else f"{currency} ESTR" if currency == "EUR" else f"{currency} TONAR" if currency == "JPY" else f"{currency} RFR", "max_results": 50},
+        ]
+    
+    async def run_discovery(self, currencies: List[str]) -> Dict[str, CurrencyDiscovery]:
+        """Search, filter and validate OIS tickers for all currencies concurrently"""
+        generator = SearchGenerator('ois', self.search_patterns, accept=self.is_ois_ticker)
+        config = SwapDiscoveryConfig(bloomberg_api_url=BLOOMBERG_API_URL)
+        async with DiscoveryEngine(
+            config, [generator], fields=["PX_LAST", "SECURITY_NAME", "SECURITY_DES"], checkpoint=self.checkpoint
+        ) as engine:
+            return await engine.run(currencies)
     
     def is_ois_ticker(self, ticker: str, description: str, currency: str) -> bool:
         """Determine if a ticker is OIS-related"""
@@ -199,55 +153,6 @@ class OISTickerDiscovery:
         
         return False
     
-    def validate_tickers(self, tickers: List[str]) -> Dict[str, bool]:
-        """Validate tickers using Bloomberg API"""
-        if not tickers:
-            return {}
-            
-        logger.info(f"🔍 Validating {len(tickers)} tickers")
-        
-        try:
-            # Validate in chunks of 20 to respect API limits
-            chunk_size = 20
-            validation_results = {}
-            
-            for i in range(0, len(tickers), chunk_size):
-                chunk = tickers[i:i + chunk_size]
-                
-                response = requests.post(
-                    f"{BLOOMBERG_API_URL}/api/bloomberg/validate-tickers",
-                    headers=HEADERS,
-                    json={
-                        "tickers": chunk,
-                        "fields": ["PX_LAST", "SECURITY_NAME", "SECURITY_DES"]
-                    },
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("success"):
-                        for validation in data.get("validations", []):
-                            ticker = validation.get("ticker")
-                            is_valid = validation.get("valid", False)
-                            validation_results[ticker] = is_valid
-                            
-                            if is_valid:
-                                logger.info(f"  ✅ {ticker} - Valid")
-                            else:
-                                error = validation.get("error", "Unknown error")
-                                logger.warning(f"  ❌ {ticker} - Invalid: {error}")
-                else:
-                    logger.error(f"Validation API error: {response.status_code}")
-                
-                time.sleep(2)  # Rate limiting between chunks
-            
-            return validation_results
-            
-        except Exception as e:
-            logger.error(f"❌ Error validating tickers: {e}")
-            return {}
-    
     def categorize_ois_tickers(self, tickers: List[Dict], currency: str) -> Dict[str, List[str]]:
         """Categorize tickers by tenor and type"""
         categorized = {
@@ -314,113 +219,9 @@ class OISTickerDiscovery:
             logger.error(f"❌ Failed to create table: {e}")
             conn.rollback()
     
-    def insert_validated_tickers(self, conn, currency: str, validated_tickers: Dict[str, bool]):
-        """Insert validated tickers into database"""
-        inserted_count = 0
-        skipped_count = 0
-        
-        try:
-            with conn.cursor() as cursor:
-                for ticker, is_valid in validated_tickers.items():
-                    if not is_valid:
-                        skipped_count += 1
-                        continue
-                    
-                    # Determine curve name and tenor
-                    curve_name = f"{currency}_OIS"
-                    tenor = self.extract_tenor_from_ticker(ticker, currency)
-                    
-                    # Insert or update ticker
-                    cursor.execute("""
-                        INSERT INTO ticker_reference 
-                        (bloomberg_ticker, currency_code, instrument_type, curve_name, tenor, is_active)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (bloomberg_ticker) 
-                        DO UPDATE SET 
-                            updated_at = CURRENT_TIMESTAMP,
-                            is_active = EXCLUDED.is_active,
-                            curve_name = EXCLUDED.curve_name,
-                            tenor = EXCLUDED.tenor
-                    """, (ticker, currency, 'OIS', curve_name, tenor, True))
-                    
-                    inserted_count += 1
-                
-                conn.commit()
-                logger.info(f"✅ Inserted/updated {inserted_count} tickers for {currency}, skipped {skipped_count} invalid")
-                
-        except Exception as e:
-            logger.error(f"❌ Failed to insert tickers for {currency}: {e}")
-            conn.rollback()
-    
     def extract_tenor_from_ticker(self, ticker: str, currency: str) -> Optional[str]:
-        """Extract tenor from ticker code with comprehensive patterns"""
-        import re
-        
-        ticker_upper = ticker.upper()
-        
-        # Overnight patterns
-        if any(pattern in ticker_upper for pattern in ['ON', 'O/N', 'OVERNIGHT']):
-            return 'ON'
-        
-        # Week patterns
-        week_match = re.search(r'(\d+)W', ticker_upper)
-        if week_match:
-            return f"{week_match.group(1)}W"
-        
-        # Common OIS patterns: USSO1, EURSO2, etc.
-        ois_match = re.search(f'{currency}SO(\\d+)', ticker_upper)
-        if ois_match:
-            num = int(ois_match.group(1))
-            if num <= 24:  # Up to 24 months
-                return f"{num}M"
-            else:
-                return f"{num}Y"
-        
-        # Generic patterns with explicit M/Y: USD1Y, EUR6M, etc.
-        explicit_match = re.search(f'{currency}(\\d+)([MY])', ticker_upper)
-        if explicit_match:
-            return f"{explicit_match.group(1)}{explicit_match.group(2)}"
-        
-        # Numeric patterns at the end: pattern like USOIS1, EUOIS5
-        end_num_match = re.search(f'{currency}[A-Z]*?(\\d+)$', ticker_upper)
-        if end_num_match:
-            num = int(end_num_match.group(1))
-            if num <= 24:
-                return f"{num}M"
-            else:
-                return f"{num}Y"
-        
-        # Month patterns: 1M, 3M, 6M, etc.
-        month_match = re.search(r'(\\d+)M', ticker_upper)
-        if month_match:
-            return f"{month_match.group(1)}M"
-            
-        # Year patterns: 1Y, 2Y, etc.
-        year_match = re.search(r'(\\d+)Y', ticker_upper)
-        if year_match:
-            return f"{year_match.group(1)}Y"
-        
-        # Special cases for different market conventions
-        special_tenors = {
-            '1D': 'ON',
-            '1W': '1W',
-            '2W': '2W',
-            '3W': '3W',
-            '1M': '1M',
-            '2M': '2M',
-            '3M': '3M',
-            '6M': '6M',
-            '9M': '9M',
-            '12M': '1Y',
-            '18M': '18M',
-            '24M': '2Y'
-        }
-        
-        for pattern, tenor in special_tenors.items():
-            if pattern in ticker_upper:
-                return tenor
-        
-        return None
+        """Extract tenor from ticker code"""
+        return extract_tenor(ticker, currency)
     
     def discover_all_currencies(self):
         """Main method to discover OIS tickers for all currencies"""
@@ -443,42 +244,40 @@ class OISTickerDiscovery:
             
             all_currencies = ALL_CURRENCIES['G10'] + ALL_CURRENCIES['EM']
             
+            results = asyncio.run(self.run_discovery(all_currencies))
+            
             for currency in all_currencies:
-                logger.info(f"\n{'='*50}")
-                logger.info(f"Processing {currency}")
-                logger.info(f"{'='*50}")
-                
-                # Step 1: Discover tickers
-                discovered = self.discover_currency_tickers(currency)
-                if not discovered:
+                result = results[currency]
+                if not result.candidates:
                     logger.warning(f"⚠️  No tickers discovered for {currency}")
                     continue
                 
-                # Step 2: Extract ticker codes for validation
-                ticker_codes = [t.get('ticker', '') for t in discovered if t.get('ticker')]
-                if not ticker_codes:
-                    logger.warning(f"⚠️  No valid ticker codes found for {currency}")
-                    continue
-                
-                # Step 3: Validate tickers
-                validation_results = self.validate_tickers(ticker_codes)
-                if not validation_results:
-                    logger.warning(f"⚠️  Validation failed for {currency}")
-                    continue
-                
-                # Step 4: Store results
-                self.discovered_tickers[currency] = discovered
-                self.validated_tickers[currency] = validation_results
-                
-                # Step 5: Insert into database
-                self.insert_validated_tickers(conn, currency, validation_results)
-                
-                # Rate limiting between currencies
-                time.sleep(3)
+                # Store results
+                self.discovered_tickers[currency] = [
+                    {'ticker': c.ticker, 'description': c.description, 'tenor': c.tenor}
+                    for c in result.candidates
+                ]
+                self.validated_tickers[currency] = result.validation
+                skipped_count = len(result.candidates) - len(result.valid)
+                logger.info(f"✅ {len(result.valid)} valid tickers for {currency}, skipped {skipped_count} invalid")
+            
+            # Insert every currency's valid tickers in one bulk upsert
+            all_valid = [instrument for result in results.values() for instrument in result.valid]
+            inserted_count = insert_ticker_reference(
+                conn, all_valid,
+                curve_name=lambda instrument: f"{instrument.currency}_OIS",
+                instrument_type=lambda instrument: 'OIS',
+                include_tenor=True
+            )
+            logger.info(f"✅ Inserted/updated {inserted_count} tickers")
             
             # Generate summary report
             self.generate_summary_report()
             
+            # Completed cleanly - the next run starts fresh
+            if all(result.complete for result in results.values()):
+                self.checkpoint.clear()
+            
         finally:
             conn.close()
             logger.info("✅ Database connection closed")
@@ -545,7 +344,12 @@ class OISTickerDiscovery:
 
 def main():
     """Main execution function"""
-    discovery = OISTickerDiscovery()
+    parser = argparse.ArgumentParser(description="Comprehensive OIS ticker discovery")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip currencies completed by an interrupted run")
+    args = parser.parse_args()
+    
+    discovery = OISTickerDiscovery(resume=args.resume)
     discovery.discover_all_currencies()
 
 if __name__ == "__main__":
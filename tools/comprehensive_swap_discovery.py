@@ -18,21 +18,16 @@ import logging
 import time
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, List, Optional
 import httpx
 import psycopg2
-from psycopg2.extras import RealDictCursor
 import argparse
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('comprehensive_swap_discovery.log'),
-        logging.StreamHandler()
-    ]
-)
+from adaptive_chunker import AdaptiveChunker
+from bulk_upsert import upsert_in_transaction
+from rate_limiter import TokenBucket
+from validation_cache import ValidationCache
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -40,8 +35,9 @@ class SwapDiscoveryConfig:
     """Configuration for swap discovery"""
     bloomberg_api_url: str = "http://20.172.249.92:8080"
     max_results_per_search: int = 100
-    validation_batch_size: int = 50
-    rate_limit_delay: float = 0.5  # seconds between API calls
+    validation_batch_size: int = 50  # Starting chunk size - adapted at runtime
+    requests_per_second: float = 8.0  # Global budget shared by all concurrent calls
+    rate_limit_burst: int = 8
     
     # Database configuration
     db_host: str = "gzcdevserver.postgres.database.azure.com"
@@ -62,6 +58,17 @@ class SwapInstrument:
     properties: Dict
     is_validated: bool = False
 
+def validation_fields(row) -> Optional[Dict]:
+    """A validate-tickers row (or bare bool) as reference fields - None when the ticker is invalid"""
+    if not isinstance(row, dict):
+        return {} if row else None
+    if not row.get('valid'):
+        return None
+    return {
+        "NAME": row.get('name', row.get('description')),
+        "PX_LAST": row.get('last_price', row.get('px_last'))
+    }
+
 class SwapDiscoveryEngine:
     """Main engine for discovering and validating swap instruments"""
     
@@ -69,7 +76,11 @@ class SwapDiscoveryEngine:
         self.config = config
         self.session = httpx.AsyncClient(timeout=30.0)
         self.discovered_instruments: List[SwapInstrument] = []
-        self.validation_cache: Set[str] = set()
+        self.validation_cache = ValidationCache()
+        self.rate_limiter = TokenBucket(config.requests_per_second, config.rate_limit_burst)
+        self.validation_chunker = AdaptiveChunker.for_endpoint(
+            "validate-tickers", initial_size=config.validation_batch_size
+        )
         
         # Define search configurations
         self.swap_types = {
@@ -156,7 +167,7 @@ class SwapDiscoveryEngine:
         }
         
         try:
-            await asyncio.sleep(self.config.rate_limit_delay)
+            await self.rate_limiter.acquire()
             
             response = await self.session.post(
                 f"{self.config.bloomberg_api_url}/api/bloomberg/ticker-discovery",
@@ -206,8 +217,12 @@ class SwapDiscoveryEngine:
             logger.error(f"Error discovering {swap_type} for {currency}: {e}")
             return []
 
-    async def validate_tickers_batch(self, tickers: List[str]) -> Dict[str, bool]:
-        """Validate a batch of Bloomberg tickers"""
+    async def validate_tickers_batch(self, tickers: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Validate a batch of Bloomberg tickers - returns {"error": ...} if the call failed
+
+        Otherwise ticker -> the fields the VM returned when valid, None when invalid.
+        """
         
         if not tickers:
             return {}
@@ -218,7 +233,7 @@ class SwapDiscoveryEngine:
         }
         
         try:
-            await asyncio.sleep(self.config.rate_limit_delay)
+            await self.rate_limiter.acquire()
             
             response = await self.session.post(
                 f"{self.config.bloomberg_api_url}/api/bloomberg/validate-tickers",
@@ -228,42 +243,43 @@ class SwapDiscoveryEngine:
             
             if response.status_code != 200:
                 logger.error(f"Validation failed: {response.status_code}")
-                return {ticker: False for ticker in tickers}
+                return {"error": f"HTTP {response.status_code}"}
             
             data = response.json()
             
             # Handle different response formats
-            if isinstance(data, dict) and 'results' in data:
-                return data['results']
+            if isinstance(data, dict) and isinstance(data.get('results'), list):
+                # [{ticker, valid, ...}] - valid is None when the VM could not check the ticker
+                rows = {r['ticker']: r for r in data['results'] if r.get('valid') is not None}
+            elif isinstance(data, dict) and 'results' in data:
+                rows = data['results']
             elif isinstance(data, dict):
-                return data
+                rows = data
             else:
-                return {ticker: False for ticker in tickers}
+                return {"error": "Unexpected validation response"}
+            return {ticker: validation_fields(row) for ticker, row in rows.items()}
                 
         except Exception as e:
             logger.error(f"Error validating tickers: {e}")
-            return {ticker: False for ticker in tickers}
+            return {"error": str(e)}
 
     async def discover_all_swaps(self) -> List[SwapInstrument]:
         """Discover all swap instruments across all types and currencies"""
         
         logger.info("Starting comprehensive swap discovery...")
-        all_instruments = []
-        
-        total_combinations = len(self.swap_types) * len(self.currencies)
-        completed = 0
+        combinations = [
+            (swap_type, currency)
+            for swap_type in self.swap_types.keys()
+            for currency in self.currencies.keys()
+        ]
+        logger.info(f"Searching {len(combinations)} type/currency combinations concurrently")
         
-        for swap_type in self.swap_types.keys():
-            for currency in self.currencies.keys():
-                logger.info(f"Progress: {completed}/{total_combinations} - Discovering {swap_type} for {currency}")
-                
-                instruments = await self.discover_swaps_for_type_currency(swap_type, currency)
-                all_instruments.extend(instruments)
-                
-                completed += 1
-                
-                # Rate limiting
-                await asyncio.sleep(self.config.rate_limit_delay)
+        # All searches run at once - the shared token bucket bounds the request rate
+        results = await asyncio.gather(*(
+            self.discover_swaps_for_type_currency(swap_type, currency)
+            for swap_type, currency in combinations
+        ))
+        all_instruments = [instrument for instruments in results for instrument in instruments]
         
         logger.info(f"Discovery complete. Found {len(all_instruments)} total instruments")
         return all_instruments
@@ -277,18 +293,21 @@ class SwapDiscoveryEngine:
         unique_tickers = list(set(instr.ticker for instr in instruments))
         logger.info(f"Validating {len(unique_tickers)} unique tickers")
         
-        validation_results = {}
-        
-        # Process in batches
-        for i in range(0, len(unique_tickers), self.config.validation_batch_size):
-            batch = unique_tickers[i:i + self.config.validation_batch_size]
-            logger.info(f"Validating batch {i//self.config.validation_batch_size + 1}: {len(batch)} tickers")
-            
-            batch_results = await self.validate_tickers_batch(batch)
-            validation_results.update(batch_results)
-            
-            # Rate limiting between batches
-            await asyncio.sleep(self.config.rate_limit_delay * 2)
+        # Tickers validated on a recent run are not probed again
+        known, unknown = self.validation_cache.split(unique_tickers)
+        validation_results = {ticker: entry["valid"] for ticker, entry in known.items()}
+        logger.info(f"{len(known)} tickers answered from the validation cache, probing {len(unknown)}")
+        
+        # Process in batches sized and parallelised from observed latency/errors
+        for batch_results in await self.validation_chunker.run(unknown, self.validate_tickers_batch):
+            if "error" not in batch_results:
+                validation_results.update({ticker: fields is not None for ticker, fields in batch_results.items()})
+                self.validation_cache.record(batch_results)
+        self.validation_chunker.save()
+        logger.info(
+            f"Validation chunking settled at {self.validation_chunker.size} tickers x "
+            f"{self.validation_chunker.concurrency} concurrent requests"
+        )
         
         # Apply validation results
         validated_instruments = []
@@ -304,127 +323,85 @@ class SwapDiscoveryEngine:
         """Populate database with discovered and validated instruments"""
         
         logger.info(f"Populating database with {len(instruments)} validated instruments...")
+        now = datetime.now()
+        
+        writes = [
+            # 1. ticker_reference table
+            {
+                "table": "ticker_reference",
+                "columns": ["ticker", "description", "asset_class", "currency",
+                            "instrument_type", "properties", "tenor_years"],
+                "rows": [(
+                    instrument.ticker,
+                    instrument.description,
+                    'rates',
+                    instrument.currency,
+                    instrument.swap_type,
+                    json.dumps(instrument.properties),
+                    instrument.tenor_days / 365.25 if instrument.tenor_days > 0 else None
+                ) for instrument in instruments],
+                "conflict": ["ticker"],
+                "update": ["description", "properties"],
+                "touch": ["last_updated"]
+            },
+            # 2. bloomberg_tickers table
+            {
+                "table": "bloomberg_tickers",
+                "columns": ["bloomberg_ticker", "description", "currency", "tenor", "tenor_numeric",
+                            "category", "subcategory", "properties", "validation_status", "last_validated_at"],
+                "rows": [(
+                    instrument.ticker,
+                    instrument.description,
+                    instrument.currency,
+                    instrument.tenor,
+                    instrument.tenor_days,
+                    'swap',
+                    instrument.swap_type,
+                    json.dumps(instrument.properties),
+                    'valid' if instrument.is_validated else 'invalid',
+                    now
+                ) for instrument in instruments],
+                "conflict": ["bloomberg_ticker"],
+                "update": ["description", "properties", "validation_status", "last_validated_at"]
+            },
+            # 3. rate curve definitions
+            {
+                "table": "rate_curve_definitions",
+                "columns": ["curve_name", "currency_code", "curve_type", "methodology"],
+                "rows": [(
+                    curve_def['curve_name'],
+                    curve_def['currency_code'],
+                    curve_def['curve_type'],
+                    curve_def['methodology']
+                ) for curve_def in self.generate_curve_definitions(instruments)],
+                "conflict": ["curve_name"],
+                "update": ["methodology"],
+                "touch": ["updated_at"]
+            },
+            # 4. rate curve mappings
+            {
+                "table": "rate_curve_mappings",
+                "columns": ["curve_name", "bloomberg_ticker", "sorting_order"],
+                "rows": [(
+                    mapping['curve_name'],
+                    mapping['bloomberg_ticker'],
+                    mapping['sorting_order']
+                ) for mapping in self.generate_curve_mappings(instruments)],
+                "conflict": ["curve_name", "bloomberg_ticker"],
+                "update": ["sorting_order"]
+            }
+        ]
         
+        # One transaction: every table is updated or none is
         with self.get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                
-                # 1. Populate ticker_reference table
-                logger.info("Populating ticker_reference table...")
-                ticker_insert_count = 0
-                
-                for instrument in instruments:
-                    try:
-                        cur.execute("""
-                            INSERT INTO ticker_reference (
-                                ticker, description, asset_class, currency, 
-                                instrument_type, properties, tenor_years
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-                            ON CONFLICT (ticker) DO UPDATE SET
-                                description = EXCLUDED.description,
-                                properties = EXCLUDED.properties,
-                                last_updated = CURRENT_TIMESTAMP
-                        """, (
-                            instrument.ticker,
-                            instrument.description,
-                            'rates',
-                            instrument.currency,
-                            instrument.swap_type,
-                            json.dumps(instrument.properties),
-                            instrument.tenor_days / 365.25 if instrument.tenor_days > 0 else None
-                        ))
-                        ticker_insert_count += 1
-                    except Exception as e:
-                        logger.error(f"Error inserting ticker {instrument.ticker}: {e}")
-                
-                logger.info(f"Inserted/updated {ticker_insert_count} tickers in ticker_reference")
-                
-                # 2. Populate bloomberg_tickers table
-                logger.info("Populating bloomberg_tickers table...")
-                bloomberg_insert_count = 0
-                
-                for instrument in instruments:
-                    try:
-                        cur.execute("""
-                            INSERT INTO bloomberg_tickers (
-                                bloomberg_ticker, description, currency, tenor,
-                                tenor_numeric, category, subcategory, properties,
-                                validation_status, last_validated_at
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            ON CONFLICT (bloomberg_ticker) DO UPDATE SET
-                                description = EXCLUDED.description,
-                                properties = EXCLUDED.properties,
-                                validation_status = EXCLUDED.validation_status,
-                                last_validated_at = EXCLUDED.last_validated_at
-                        """, (
-                            instrument.ticker,
-                            instrument.description,
-                            instrument.currency,
-                            instrument.tenor,
-                            instrument.tenor_days,
-                            'swap',
-                            instrument.swap_type,
-                            json.dumps(instrument.properties),
-                            'valid' if instrument.is_validated else 'invalid',
-                            datetime.now()
-                        ))
-                        bloomberg_insert_count += 1
-                    except Exception as e:
-                        logger.error(f"Error inserting Bloomberg ticker {instrument.ticker}: {e}")
-                
-                logger.info(f"Inserted/updated {bloomberg_insert_count} tickers in bloomberg_tickers")
-                
-                # 3. Create rate curve definitions
-                logger.info("Creating rate curve definitions...")
-                curve_definitions = self.generate_curve_definitions(instruments)
-                curve_insert_count = 0
-                
-                for curve_def in curve_definitions:
-                    try:
-                        cur.execute("""
-                            INSERT INTO rate_curve_definitions (
-                                curve_name, currency_code, curve_type, methodology
-                            ) VALUES (%s, %s, %s, %s)
-                            ON CONFLICT (curve_name) DO UPDATE SET
-                                methodology = EXCLUDED.methodology,
-                                updated_at = CURRENT_TIMESTAMP
-                        """, (
-                            curve_def['curve_name'],
-                            curve_def['currency_code'],
-                            curve_def['curve_type'],
-                            curve_def['methodology']
-                        ))
-                        curve_insert_count += 1
-                    except Exception as e:
-                        logger.error(f"Error inserting curve definition {curve_def['curve_name']}: {e}")
-                
-                logger.info(f"Inserted/updated {curve_insert_count} curve definitions")
-                
-                # 4. Create rate curve mappings
-                logger.info("Creating rate curve mappings...")
-                mappings = self.generate_curve_mappings(instruments)
-                mapping_insert_count = 0
-                
-                for mapping in mappings:
-                    try:
-                        cur.execute("""
-                            INSERT INTO rate_curve_mappings (
-                                curve_name, bloomberg_ticker, sorting_order
-                            ) VALUES (%s, %s, %s)
-                            ON CONFLICT (curve_name, bloomberg_ticker) DO UPDATE SET
-                                sorting_order = EXCLUDED.sorting_order
-                        """, (
-                            mapping['curve_name'],
-                            mapping['bloomberg_ticker'],
-                            mapping['sorting_order']
-                        ))
-                        mapping_insert_count += 1
-                    except Exception as e:
-                        logger.error(f"Error inserting mapping {mapping['curve_name']}/{mapping['bloomberg_ticker']}: {e}")
-                
-                logger.info(f"Inserted/updated {mapping_insert_count} curve mappings")
-                
-                conn.commit()
-                logger.info("Database population completed successfully")
+            counts = upsert_in_transaction(conn, writes)
+        
+        for table, count in counts.items():
+            logger.info(
+                f"{table}: {count['inserted']} inserted, {count['updated']} updated "
+                f"({count['seconds']:.2f}s)"
+            )
+        logger.info("Database population completed successfully")
 
     def generate_curve_definitions(self, instruments: List[SwapInstrument]) -> List[Dict]:
         """Generate curve definitions from discovered instruments"""
@@ -654,4 +631,13 @@ async def main():
                 logger.info(f"  - {gap}")
 
 if __name__ == "__main__":
+    # Setup logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('comprehensive_swap_discovery.log'),
+            logging.StreamHandler()
+        ]
+    )
     asyncio.run(main())
\ No newline at end of file
@@ -2,15 +2,27 @@
 """
 Currency Forward Data Coverage Analysis
 Analyzes Bloomberg forward curve data availability for all currency pairs
+
+All pairs are checked concurrently over one pooled client under a shared
+request budget, and results are merged as they arrive. Each run is compared
+with the newest previous forward_coverage_analysis_*.json; a new snapshot
+(plus a forward_coverage_diff_*.json) is only written when coverage changed,
+so the check is cheap enough to run hourly.
+
+Usage: python currency_forward_coverage_analysis.py [--rate 4] [--concurrency 8] [--full]
 """
 
 import httpx
 import asyncio
+import argparse
 import json
 from datetime import datetime
-from typing import Dict, List
+from pathlib import Path
+from typing import Dict, List, Optional
 import sys
 
+from rate_limiter import TokenBucket
+
 # Bloomberg Gateway URL - Real API endpoint
 BLOOMBERG_API_URL = "http://20.172.249.92:8080"
 
@@ -26,9 +38,63 @@ CURRENCY_PAIRS = {
     "CROSSES": ["EURGBP", "EURJPY", "GBPJPY", "EURCHF", "AUDJPY", "CADJPY", "EURAUD", "EURNZD", "GBPAUD", "GBPNZD"]
 }
 
+def latest_snapshot(directory: Path = Path(".")) -> Optional[Path]:
+    """Newest forward_coverage_analysis_*.json, the baseline for the diff"""
+    snapshots = sorted(directory.glob("forward_coverage_analysis_*.json"))
+    return snapshots[-1] if snapshots else None
+
+def diff_coverage(previous: Dict, current: Dict) -> Dict:
+    """
+    Coverage changes between two detailed_results maps
+    
+    Prices move every run, so only spot availability, available tenors and
+    the pair's category are compared. Pairs that errored this run are
+    reported separately instead of as lost coverage.
+    """
+    def category_of(categories: Dict, pair: str) -> Optional[str]:
+        return next((name for name, pairs in categories.items() if pair in pairs), None)
+    
+    diff = {"category_changes": {}, "gained_tenors": {}, "lost_tenors": {}, "spot_changes": {},
+            "new_pairs": [], "removed_pairs": [], "errors": []}
+    old_results, new_results = previous.get("detailed_results", {}), current.get("detailed_results", {})
+    
+    for pair, result in new_results.items():
+        if result.get("status") == "error":
+            diff["errors"].append(pair)
+            continue
+        old = old_results.get(pair)
+        if old is None:
+            diff["new_pairs"].append(pair)
+            continue
+        old_tenors = set(old.get("available_forwards", []))
+        new_tenors = set(result.get("available_forwards", []))
+        if new_tenors - old_tenors:
+            diff["gained_tenors"][pair] = [t for t in FORWARD_TENORS if t in new_tenors - old_tenors]
+        if old_tenors - new_tenors:
+            diff["lost_tenors"][pair] = [t for t in FORWARD_TENORS if t in old_tenors - new_tenors]
+        if bool(old.get("has_spot")) != bool(result.get("has_spot")):
+            diff["spot_changes"][pair] = bool(result.get("has_spot"))
+        old_category = category_of(previous.get("categories", {}), pair)
+        new_category = category_of(current.get("categories", {}), pair)
+        if old_category != new_category:
+            diff["category_changes"][pair] = [old_category, new_category]
+    
+    diff["removed_pairs"] = sorted(set(old_results) - set(new_results))
+    return diff
+
+def has_changes(diff: Dict) -> bool:
+    return any(diff[key] for key in diff if key != "errors")
+
 class ForwardDataAnalyzer:
-    def __init__(self):
+    def __init__(self, requests_per_second: float = 4.0, concurrency: int = 8, write_full: bool = False):
         self.results = {}
+        self.write_full = write_full
+        self.pair_filter: Optional[List[str]] = None
+        self.concurrency = concurrency
+        # One pooled client and one request budget shared by every pair
+        self.client: Optional[httpx.AsyncClient] = None
+        self.rate_limiter = TokenBucket(requests_per_second, burst=concurrency)
+        self.semaphore = asyncio.Semaphore(concurrency)
         self.categories = {
             "full_5y": [],      # Has all tenors including 5Y
             "full_3y": [],      # Has all tenors up to 3Y
@@ -40,40 +106,39 @@ class ForwardDataAnalyzer:
         
     async def analyze_pair(self, pair: str, category: str) -> Dict:
         """Analyze forward data availability for a currency pair"""
-        print(f"\nAnalyzing {pair} ({category})...")
-        
         # Build Bloomberg tickers
         spot_ticker = f"{pair} Curncy"
         forward_tickers = [f"{pair}{tenor} Curncy" for tenor in FORWARD_TENORS]
         all_tickers = [spot_ticker] + forward_tickers
         
+        headers = {
+            "Authorization": "Bearer test",  # Bloomberg API auth
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "securities": all_tickers,
+            "fields": ["PX_LAST", "NAME", "LAST_UPDATE"]
+        }
+        
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                headers = {
-                    "Authorization": "Bearer test",  # Bloomberg API auth
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "securities": all_tickers,
-                    "fields": ["PX_LAST", "NAME", "LAST_UPDATE"]
-                }
-                
-                response = await client.post(
+            async with self.semaphore:
+                await self.rate_limiter.acquire()
+                response = await self.client.post(
                     f"{BLOOMBERG_API_URL}/api/bloomberg/reference",
                     json=payload,
                     headers=headers
                 )
+            
+            if response.status_code == 200:
+                data = response.json()
+                return self.process_response(pair, category, data)
+            else:
+                print(f"  ❌ {pair}: API returned status {response.status_code}")
+                return {"pair": pair, "category": category, "status": "error"}
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    return self.process_response(pair, category, data)
-                else:
-                    print(f"  ❌ API returned status {response.status_code}")
-                    return {"pair": pair, "category": category, "status": "error"}
-                    
         except Exception as e:
-            print(f"  ❌ Error: {str(e)}")
+            print(f"  ❌ {pair}: Error: {str(e)}")
             return {"pair": pair, "category": category, "status": "error", "error": str(e)}
     
     def process_response(self, pair: str, category: str, response: Dict) -> Dict:
@@ -100,7 +165,6 @@ class ForwardDataAnalyzer:
                         if ticker == f"{pair} Curncy":
                             result["has_spot"] = True
                             result["data_points"]["SPOT"] = fields["PX_LAST"]
-                            print(f"  ✓ Spot rate: {fields['PX_LAST']}")
                         else:
                             # Extract tenor
                             tenor = ticker.replace(pair, "").replace(" Curncy", "").strip()
@@ -129,11 +193,11 @@ class ForwardDataAnalyzer:
         
         # Print summary
         if result["available_forwards"]:
-            print(f"  ✓ Forward data: {len(result['available_forwards'])} tenors (max: {result['longest_tenor']})")
+            print(f"  ✓ {pair}: {len(result['available_forwards'])} forward tenors (max: {result['longest_tenor']})")
         elif result["has_spot"]:
-            print(f"  ⚠️  Spot only - no forward data")
+            print(f"  ⚠️  {pair}: spot only - no forward data")
         else:
-            print(f"  ❌ No data available")
+            print(f"  ❌ {pair}: no data available")
         
         return result
     
@@ -155,24 +219,31 @@ class ForwardDataAnalyzer:
         else:
             self.categories["no_data"].append(pair)
     
-    async def analyze_all_pairs(self):
-        """Analyze all currency pairs"""
+    async def analyze_all_pairs(self, pairs: Optional[List[str]] = None):
+        """Analyze all currency pairs concurrently, merging results as they complete"""
+        self.pair_filter = pairs
+        work = [
+            (pair, category) for category, category_pairs in CURRENCY_PAIRS.items()
+            for pair in category_pairs if not pairs or pair in pairs
+        ]
         print("=" * 80)
         print("BLOOMBERG FX FORWARD DATA COVERAGE ANALYSIS")
         print("=" * 80)
-        print(f"Analyzing {sum(len(pairs) for pairs in CURRENCY_PAIRS.values())} currency pairs")
+        print(f"Analyzing {len(work)} currency pairs ({self.concurrency} concurrent)")
         print(f"Checking {len(FORWARD_TENORS)} forward tenors per pair")
         print("=" * 80)
         
-        for category, pairs in CURRENCY_PAIRS.items():
-            print(f"\n{category} CURRENCIES:")
-            print("-" * 40)
-            
-            for pair in pairs:
-                result = await self.analyze_pair(pair, category)
-                self.results[pair] = result
-                await asyncio.sleep(0.5)  # Rate limiting
+        started = datetime.now()
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+            self.client = client
+            tasks = [asyncio.create_task(self.analyze_pair(pair, category)) for pair, category in work]
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                self.results[result["pair"]] = result
         
+        elapsed = (datetime.now() - started).total_seconds()
+        print(f"\nChecked {len(work)} pairs in {elapsed:.1f}s (throttled {self.rate_limiter.waited:.1f}s)")
         self.generate_report()
     
     def generate_report(self):
@@ -235,26 +306,90 @@ class ForwardDataAnalyzer:
             for pair in sorted(ndf_candidates):
                 print(f"  - {pair}")
         
-        # Save results
+        # Compare with the previous run before writing anything
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"forward_coverage_analysis_{timestamp}.json"
+        current = {
+            "timestamp": datetime.now().isoformat(),
+            "summary": {
+                "total_pairs": total,
+                "categories": {k: len(v) for k, v in self.categories.items()}
+            },
+            "categories": {k: sorted(v) for k, v in self.categories.items()},
+            "detailed_results": dict(sorted(self.results.items()))
+        }
+        
+        baseline = latest_snapshot()
+        diff = None
+        if baseline:
+            with open(baseline) as f:
+                previous = json.load(f)
+            diff = diff_coverage(previous, current)
+            self.carry_forward(previous, current, diff["errors"])
+            if self.pair_filter:
+                # A partial run says nothing about the pairs it skipped
+                diff["removed_pairs"] = []
+            self.print_diff(baseline, diff)
+        
+        if self.pair_filter:
+            print("\n📊 Partial run (--pairs) - snapshot not written")
+            return
         
+        if diff is not None and not has_changes(diff) and not self.write_full:
+            print(f"\n📊 Coverage unchanged since {baseline} - no new snapshot written")
+            return
+        
+        if diff is not None:
+            diff_file = f"forward_coverage_diff_{timestamp}.json"
+            with open(diff_file, 'w') as f:
+                json.dump({"timestamp": current["timestamp"], "baseline": str(baseline), **diff}, f, indent=2)
+            print(f"\n📊 Coverage diff saved to: {diff_file}")
+        
+        filename = f"forward_coverage_analysis_{timestamp}.json"
         with open(filename, 'w') as f:
-            json.dump({
-                "timestamp": datetime.now().isoformat(),
-                "summary": {
-                    "total_pairs": total,
-                    "categories": {k: len(v) for k, v in self.categories.items()}
-                },
-                "categories": self.categories,
-                "detailed_results": self.results
-            }, f, indent=2)
+            json.dump(current, f, indent=2)
         
-        print(f"\n📊 Detailed results saved to: {filename}")
+        print(f"📊 Detailed results saved to: {filename}")
+    
+    def carry_forward(self, previous: Dict, current: Dict, errored: List[str]):
+        """Keep the last known result for pairs that errored this run"""
+        for pair in errored:
+            old = previous.get("detailed_results", {}).get(pair)
+            if old is None:
+                continue
+            current["detailed_results"][pair] = old
+            for name, pairs in previous.get("categories", {}).items():
+                if pair in pairs and pair not in current["categories"].setdefault(name, []):
+                    current["categories"][name] = sorted(current["categories"][name] + [pair])
+        current["summary"]["categories"] = {k: len(v) for k, v in current["categories"].items()}
+    
+    def print_diff(self, baseline: Path, diff: Dict):
+        print("\n" + "=" * 80)
+        print(f"CHANGES SINCE {baseline}")
+        print("=" * 80)
+        if not has_changes(diff):
+            print("\nNo coverage changes")
+        for pair, (old, new) in sorted(diff["category_changes"].items()):
+            print(f"  {pair}: {old} -> {new}")
+        for pair, tenors in sorted(diff["gained_tenors"].items()):
+            print(f"  ✅ {pair}: gained {', '.join(tenors)}")
+        for pair, tenors in sorted(diff["lost_tenors"].items()):
+            print(f"  ❌ {pair}: lost {', '.join(tenors)}")
+        for pair, has_spot in sorted(diff["spot_changes"].items()):
+            print(f"  {'✅' if has_spot else '❌'} {pair}: spot {'available' if has_spot else 'missing'}")
+        for key, label in (("new_pairs", "New pairs"), ("removed_pairs", "Removed pairs"), ("errors", "Errored (not compared)")):
+            if diff[key]:
+                print(f"  {label}: {', '.join(sorted(diff[key]))}")
 
 async def main():
-    analyzer = ForwardDataAnalyzer()
-    await analyzer.analyze_all_pairs()
+    parser = argparse.ArgumentParser(description="Bloomberg FX forward data coverage analysis")
+    parser.add_argument("--rate", type=float, default=4.0, help="Upstream requests per second")
+    parser.add_argument("--concurrency", type=int, default=8, help="Pairs checked at once")
+    parser.add_argument("--pairs", nargs="+", help="Only these pairs (default: all)")
+    parser.add_argument("--full", action="store_true", help="Write a full snapshot even if nothing changed")
+    args = parser.parse_args()
+    
+    analyzer = ForwardDataAnalyzer(args.rate, args.concurrency, write_full=args.full)
+    await analyzer.analyze_all_pairs(args.pairs)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Discovery Run Checkpoints
+Lets an interrupted discovery sweep resume instead of starting over
+
+Completed units of work (one currency's discovery results) are written to a
+small JSON state file as soon as they finish. Running the script again with
+--resume loads that file and skips every completed unit. Probes inside an
+unfinished currency are not lost either: each reference batch is recorded in
+the persistent validation cache, so only unanswered batches are re-sent.
+
+Usage:
+    checkpoint = DiscoveryCheckpoint("efficient_ois_discovery", resume=args.resume)
+    if checkpoint.done("USD"):
+        results = checkpoint.get("USD")
+    else:
+        checkpoint.put("USD", results)
+    checkpoint.clear()  # after the whole run succeeded
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DiscoveryCheckpoint:
+    """JSON-file checkpoint of completed work units, saved after every unit"""
+
+    def __init__(self, name: str, resume: bool = False, directory: Optional[Path] = None):
+        self.name = name
+        self.path = Path(directory or Path.cwd()) / f"{name}.checkpoint.json"
+        self.state = {"name": name, "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "completed": {}}
+
+        if resume and self.path.exists():
+            try:
+                self.state = json.loads(self.path.read_text())
+                logger.info(
+                    f"Resuming {name} from {self.path} - "
+                    f"{len(self.state['completed'])} units already complete"
+                )
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+        elif resume:
+            logger.info(f"No checkpoint at {self.path} - starting a fresh run")
+
+    def done(self, key: str) -> bool:
+        return key in self.state["completed"]
+
+    def get(self, key: str) -> Any:
+        return self.state["completed"].get(key)
+
+    def put(self, key: str, value: Any):
+        """Mark a unit complete and flush the checkpoint to disk"""
+        self.state["completed"][key] = value
+        self.state["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            tmp_path.write_text(json.dumps(self.state, indent=2, default=str))
+            # Atomic rename so a crash mid-write never leaves a truncated checkpoint
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write checkpoint {self.path}: {e}")
+
+    def clear(self):
+        """Remove the checkpoint once the run has fully completed"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Concurrent Ticker Discovery Engine
+One async pipeline shared by the OIS/IRS discovery scripts
+
+Every discovery script used to walk currencies one at a time, sleep 1-3
+seconds between calls and carry its own copy of validation, tenor parsing and
+the ticker_reference insert. DiscoveryEngine builds on SwapDiscoveryEngine:
+
+- candidate generators are pluggable (ticker-discovery searches, pattern tables)
+- each currency runs generate -> dedupe -> validate as its own task
+- tenors come from the shared ticker grammar (ticker_grammar.py)
+- all currencies share one token bucket, so the VM sees a bounded request rate
+  no matter how many tasks are in flight
+- validation goes through /api/bloomberg/reference in adaptively sized chunks,
+  skipping tickers with a fresh result in the persistent validation cache
+- with a DiscoveryCheckpoint, finished currencies are saved as they complete
+  and skipped when an interrupted run is resumed; a currency with a failed
+  search or unanswered probes is not finished
+
+Usage:
+    engine = DiscoveryEngine(SwapDiscoveryConfig(), [SearchGenerator("ois", [{"search_type": "ois"}])])
+    async with engine:
+        results = await engine.run(["USD", "EUR", "GBP"])
+    insert_ticker_reference(conn, [i for r in results.values() for i in r.valid])
+"""
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from adaptive_chunker import AdaptiveChunker
+from bulk_upsert import upsert_in_transaction
+from comprehensive_swap_discovery import SwapDiscoveryConfig, SwapDiscoveryEngine, SwapInstrument
+from discovery_checkpoint import DiscoveryCheckpoint
+from ticker_grammar import parse_ticker, tenor_days as tenor_to_days
+from validation_cache import is_valid_security
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {
+    "Authorization": "Bearer test",
+    "Content-Type": "application/json"
+}
+
+
+def extract_tenor(ticker: str, currency: str = "") -> Optional[str]:
+    """Tenor label from the shared ticker grammar (USSO1 -> 1Y, USSOA -> 1M, SOFRRATE -> ON)"""
+    return parse_ticker(ticker).tenor
+
+
+class CandidateGenerator(ABC):
+    """
+    Produces candidate tickers for a currency
+
+    Fallback generators only run when every primary generator came back empty.
+    `keep` filters validated instruments (descriptions are filled in by then).
+    """
+
+    name = "candidates"
+    fallback = False
+
+    @abstractmethod
+    async def generate(self, engine: "DiscoveryEngine", currency: str) -> List[SwapInstrument]:
+        """Candidate instruments for one currency"""
+
+    def keep(self, instrument: SwapInstrument) -> bool:
+        return True
+
+
+class SearchGenerator(CandidateGenerator):
+    """Candidates from /api/bloomberg/ticker-discovery searches"""
+
+    def __init__(
+        self,
+        swap_type: str,
+        searches: Union[List[Dict[str, Any]], Callable[[str], List[Dict[str, Any]]]],
+        accept: Optional[Callable[[str, str, str], bool]] = None,
+        max_results: int = 100,
+        fallback: bool = False
+    ):
+        self.name = f"search:{swap_type}"
+        self.swap_type = swap_type
+        self.searches = searches
+        self.accept = accept
+        self.max_results = max_results
+        self.fallback = fallback
+
+    def payloads(self, currency: str) -> List[Dict[str, Any]]:
+        """Search payloads with {currency} substituted in string values"""
+        searches = self.searches(currency) if callable(self.searches) else self.searches
+        payloads = []
+        for search in searches:
+            payload = {
+                key: value.format(currency=currency) if isinstance(value, str) else value
+                for key, value in search.items()
+            }
+            if "search_pattern" not in payload:
+                payload.setdefault("currency", currency)
+            payload.setdefault("max_results", self.max_results)
+            payloads.append(payload)
+        return payloads
+
+    async def generate(self, engine: "DiscoveryEngine", currency: str) -> List[SwapInstrument]:
+        results = await asyncio.gather(*(engine.search(payload) for payload in self.payloads(currency)))
+        # A failed search is not "no candidates" - the currency stays unfinished
+        engine.failed_searches[currency] += sum(found is None for found in results)
+
+        candidates = []
+        for ticker_info in (info for found in results if found for info in found):
+            if isinstance(ticker_info, dict):
+                ticker = ticker_info.get("ticker", "")
+                description = ticker_info.get("description", "")
+                tenor = ticker_info.get("tenor", "")
+            else:
+                ticker, description, tenor = str(ticker_info), "", ""
+            if not ticker or (self.accept and not self.accept(ticker, description, currency)):
+                continue
+            candidates.append(engine.candidate(ticker, currency, self.swap_type, self.name, description, tenor))
+        return candidates
+
+
+class PatternGenerator(CandidateGenerator):
+    """Candidates built from a ticker pattern table - no discovery calls needed"""
+
+    def __init__(
+        self,
+        swap_type: str,
+        build: Callable[[str], Iterable[str]],
+        keep: Optional[Callable[[SwapInstrument], bool]] = None,
+        fallback: bool = False
+    ):
+        self.name = f"pattern:{swap_type}"
+        self.swap_type = swap_type
+        self.build = build
+        self._keep = keep
+        self.fallback = fallback
+
+    async def generate(self, engine: "DiscoveryEngine", currency: str) -> List[SwapInstrument]:
+        return [
+            engine.candidate(ticker, currency, self.swap_type, self.name)
+            for ticker in self.build(currency)
+        ]
+
+    def keep(self, instrument: SwapInstrument) -> bool:
+        return self._keep(instrument) if self._keep else True
+
+
+@dataclass
+class CurrencyDiscovery:
+    """Outcome of one currency's pipeline"""
+    currency: str
+    candidates: List[SwapInstrument] = field(default_factory=list)
+    valid: List[SwapInstrument] = field(default_factory=list)
+    seconds: float = 0.0
+    unanswered: List[str] = field(default_factory=list)
+    failed_searches: int = 0
+
+    @property
+    def complete(self) -> bool:
+        """Every search and probe was answered, so the result can be checkpointed"""
+        return not self.unanswered and not self.failed_searches
+
+    @property
+    def validation(self) -> Dict[str, bool]:
+        return {c.ticker: c.is_validated for c in self.candidates}
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Valid instruments are the validated candidates, so candidates alone are enough
+        return {
+            "currency": self.currency,
+            "candidates": [asdict(c) for c in self.candidates],
+            "seconds": self.seconds
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CurrencyDiscovery":
+        candidates = [SwapInstrument(**c) for c in data.get("candidates", [])]
+        return cls(data["currency"], candidates, [c for c in candidates if c.is_validated], data.get("seconds", 0.0))
+
+
+class DiscoveryEngine(SwapDiscoveryEngine):
+    """SwapDiscoveryEngine with pluggable generators and a concurrent per-currency pipeline"""
+
+    def __init__(
+        self,
+        config: SwapDiscoveryConfig,
+        generators: List[CandidateGenerator],
+        fields: List[str] = None,
+        currency_concurrency: int = 8,
+        checkpoint: Optional[DiscoveryCheckpoint] = None
+    ):
+        super().__init__(config)
+        self.checkpoint = checkpoint
+        self.generators = generators
+        self.fields = fields or ["PX_LAST", "SECURITY_NAME"]
+        self.currency_semaphore = asyncio.Semaphore(currency_concurrency)
+        self.reference_chunker = AdaptiveChunker.for_endpoint("discovery-reference", initial_size=20)
+        self.stats = {"searches": 0, "failed_searches": 0, "reference_calls": 0}
+        self.failed_searches: Counter = Counter()  # currency -> searches that got no answer
+
+    def candidate(
+        self,
+        ticker: str,
+        currency: str,
+        swap_type: str,
+        generator: str,
+        description: str = "",
+        tenor: str = ""
+    ) -> SwapInstrument:
+        tenor = tenor or extract_tenor(ticker, currency) or ""
+        return SwapInstrument(
+            ticker=ticker,
+            description=description,
+            currency=currency,
+            tenor=tenor,
+            tenor_days=tenor_to_days(tenor),
+            swap_type=swap_type,
+            properties={"generator": generator, "discovery_method": "discovery_engine"}
+        )
+
+    async def search(self, payload: Dict[str, Any]) -> Optional[List[Any]]:
+        """One rate-limited ticker-discovery call; None on failure, so it is not mistaken for no results"""
+        await self.rate_limiter.acquire()
+        self.stats["searches"] += 1
+        try:
+            response = await self.session.post(
+                f"{self.config.bloomberg_api_url}/api/bloomberg/ticker-discovery",
+                json=payload,
+                headers=HEADERS
+            )
+            if response.status_code != 200:
+                logger.warning(f"Search {payload} failed: HTTP {response.status_code}")
+            else:
+                data = response.json()
+                if data.get("success", True):
+                    return data.get("tickers") or []
+                logger.warning(f"Search {payload} failed: {data.get('error')}")
+        except Exception as e:
+            logger.warning(f"Search {payload} failed: {e}")
+        self.stats["failed_searches"] += 1
+        return None
+
+    async def reference_chunk(self, tickers: List[str]) -> Dict[str, Any]:
+        """One rate-limited reference call; {"error": ...} on failure so the chunker backs off"""
+        await self.rate_limiter.acquire()
+        self.stats["reference_calls"] += 1
+        try:
+            response = await self.session.post(
+                f"{self.config.bloomberg_api_url}/api/bloomberg/reference",
+                json={"securities": tickers, "fields": self.fields},
+                headers=HEADERS
+            )
+            if response.status_code != 200:
+                return {"error": f"HTTP {response.status_code}"}
+            data = response.json()
+            if not data.get("success"):
+                return {"error": data.get("error", "Reference request failed")}
+            self.validation_cache.record_response(data, self.fields)
+            return data
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def validate(self, tickers: List[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Reference-check tickers
+
+        Returns (ticker -> fields for the ones with data, tickers the VM never answered for).
+        """
+        # Recently probed tickers (valid or dead) come from the persistent cache
+        known, unknown = self.validation_cache.split(tickers, self.fields)
+        valid = {
+            security_data["security"]: security_data["fields"]
+            for security_data in self.validation_cache.cached_response(known)["data"]["securities_data"]
+            if is_valid_security(security_data)
+        }
+        if not unknown:
+            return valid, []
+
+        answered = set()
+        for result in await self.reference_chunker.run(unknown, self.reference_chunk):
+            if "error" in result:
+                continue
+            for security_data in result.get("data", {}).get("securities_data", []):
+                answered.add(security_data.get("security"))
+                if is_valid_security(security_data):
+                    valid[security_data.get("security")] = security_data.get("fields") or {}
+        return valid, [t for t in unknown if t not in answered]
+
+    async def _generate(self, currency: str, generators: List[CandidateGenerator]) -> List[SwapInstrument]:
+        results = await asyncio.gather(*(g.generate(self, currency) for g in generators))
+        return [candidate for candidates in results for candidate in candidates]
+
+    async def discover_currency(self, currency: str) -> CurrencyDiscovery:
+        """Generate, dedupe and validate candidates for one currency"""
+        if self.checkpoint and self.checkpoint.done(currency):
+            result = CurrencyDiscovery.from_dict(self.checkpoint.get(currency))
+            logger.info(f"{currency}: {len(result.valid)} valid tickers restored from checkpoint")
+            return result
+
+        async with self.currency_semaphore:
+            start = time.perf_counter()
+            primary = [g for g in self.generators if not g.fallback]
+            candidates = await self._generate(currency, primary)
+            if not candidates:
+                candidates = await self._generate(currency, [g for g in self.generators if g.fallback])
+
+            unique: Dict[str, SwapInstrument] = {}
+            for candidate in candidates:
+                unique.setdefault(candidate.ticker, candidate)
+            candidates = list(unique.values())
+
+            validated, unanswered = await self.validate([c.ticker for c in candidates]) if candidates else ({}, [])
+            keep = {g.name: g.keep for g in self.generators}
+
+            valid = []
+            for candidate in candidates:
+                fields = validated.get(candidate.ticker)
+                if fields is None:
+                    continue
+                candidate.description = candidate.description or fields.get("SECURITY_NAME") or ""
+                candidate.properties.update({k: v for k, v in fields.items() if v is not None})
+                candidate.is_validated = keep[candidate.properties["generator"]](candidate)
+                if candidate.is_validated:
+                    valid.append(candidate)
+
+            result = CurrencyDiscovery(
+                currency, candidates, valid, time.perf_counter() - start, unanswered, self.failed_searches[currency]
+            )
+            logger.info(
+                f"{currency}: {len(valid)}/{len(candidates)} candidates valid ({result.seconds:.1f}s)"
+                + (f", {len(unanswered)} unanswered" if unanswered else "")
+                + (f", {result.failed_searches} searches failed" if result.failed_searches else "")
+            )
+            # A currency with failed searches or unanswered probes is not complete - a resumed run retries it
+            if self.checkpoint and result.complete:
+                self.checkpoint.put(currency, result.to_dict())
+            return result
+
+    async def run(self, currencies: List[str]) -> Dict[str, CurrencyDiscovery]:
+        """Run every currency's pipeline concurrently under the shared rate limit"""
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self.discover_currency(c) for c in currencies))
+        self.reference_chunker.save()
+        logger.info(
+            f"Discovery of {len(currencies)} currencies took {time.perf_counter() - start:.1f}s "
+            f"({self.stats['searches']} searches, {self.stats['reference_calls']} reference calls, "
+            f"{self.validation_cache.stats['hits']} cached validations, {self.rate_limiter.waited:.1f}s throttled)"
+        )
+        return {result.currency: result for result in results}
+
+
+def insert_ticker_reference(
+    conn,
+    instruments: List[SwapInstrument],
+    curve_name: Callable[[SwapInstrument], str] = None,
+    instrument_type: Callable[[SwapInstrument], str] = None,
+    include_tenor: bool = False
+) -> int:
+    """
+    Bulk upsert validated instruments into the scripts' ticker_reference table
+
+    (bloomberg_ticker, currency_code, instrument_type, curve_name, is_active),
+    plus tenor for schemas that carry it. Returns rows written, 0 on failure.
+    """
+    curve_name = curve_name or (lambda i: f"{i.currency}_{i.swap_type.upper()}")
+    instrument_type = instrument_type or (lambda i: i.swap_type.upper())
+    columns = ["bloomberg_ticker", "currency_code", "instrument_type", "curve_name", "is_active"]
+    if include_tenor:
+        columns.append("tenor")
+
+    rows = []
+    for instrument in instruments:
+        row = [instrument.ticker, instrument.currency, instrument_type(instrument), curve_name(instrument), True]
+        if include_tenor:
+            row.append(instrument.tenor or None)
+        rows.append(row)
+
+    try:
+        counts = upsert_in_transaction(conn, [{
+            "table": "ticker_reference",
+            "columns": columns,
+            "rows": rows,
+            "conflict": ["bloomberg_ticker"]
+        }])
+    except Exception as e:
+        logger.error(f"Failed to insert tickers: {e}")
+        return 0
+    return counts["ticker_reference"]["rows"]
@@ -5,14 +5,22 @@ Discovers and validates real OIS tickers for ALL currencies using Bloomberg API
 Uses reference data endpoint for validation since validate-tickers doesn't exist
 """
 
+import argparse
+import asyncio
 import requests
 import json
-import time
 import psycopg2
 import logging
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+from comprehensive_swap_discovery import SwapDiscoveryConfig
+from discovery_checkpoint import DiscoveryCheckpoint
+from discovery_engine import (
+    CurrencyDiscovery, DiscoveryEngine, PatternGenerator, SearchGenerator,
+    extract_tenor, insert_ticker_reference
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -54,10 +62,11 @@ ALL_CURRENCIES = {
 STANDARD_TENORS = ['ON', '1W', '2W', '3W', '1M', '2M', '3M', '6M', '9M', '1Y', '18M', '2Y', '3Y', '4Y', '5Y', '7Y', '10Y', '15Y', '20Y', '30Y']
 
 class EfficientOISDiscovery:
-    def __init__(self):
+    def __init__(self, resume: bool = False):
         self.discovered_tickers = {}
         self.validated_tickers = {}
         self.failed_validations = {}
+        self.checkpoint = DiscoveryCheckpoint("efficient_ois_discovery", resume=resume)
         
     def test_bloomberg_connection(self) -> bool:
         """Test Bloomberg API connection"""
@@ -73,77 +82,23 @@ class EfficientOISDiscovery:
             logger.error(f"❌ Failed to connect to Bloomberg API: {e}")
             return False
     
-    def discover_currency_tickers(self, currency: str) -> List[Dict]:
-        """Discover OIS tickers for a specific currency using focused search patterns"""
-        logger.info(f"🔍 Discovering OIS tickers for {currency}")
-        
-        try:
-            # Focus on the most effective search patterns
-            search_patterns = [
-                {"search_type": "ois", "currency": currency, "max_results": 100}
-            ]
-            
-            all_tickers = []
-            
-            for pattern in search_patterns:
-                try:
-                    response = requests.post(
-                        f"{BLOOMBERG_API_URL}/api/bloomberg/ticker-discovery",
-                        headers=HEADERS,
-                        json=pattern,
-                        timeout=30
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        tickers = data.get("tickers", [])
-                        if tickers:
-                            logger.info(f"  ✅ Found {len(tickers)} tickers")
-                            all_tickers.extend(tickers)
-                        else:
-                            logger.info(f"  ⚠️  No tickers found with OIS search")
-                    else:
-                        logger.warning(f"  ❌ HTTP {response.status_code}")
-                        
-                    time.sleep(1)  # Rate limiting
-                    
-                except Exception as e:
-                    logger.warning(f"  ❌ Search failed: {e}")
-                    continue
-            
-            # If no tickers found with OIS search, try common patterns manually
-            if not all_tickers:
-                logger.info(f"  Trying manual pattern generation for {currency}")
-                manual_tickers = self.generate_manual_ois_patterns(currency)
-                all_tickers.extend(manual_tickers)
-            
-            # Remove duplicates
-            unique_tickers = []
-            seen_tickers = set()
-            for ticker in all_tickers:
-                ticker_code = ticker.get('ticker', '')
-                if ticker_code and ticker_code not in seen_tickers:
-                    unique_tickers.append(ticker)
-                    seen_tickers.add(ticker_code)
-            
-            logger.info(f"✅ Found {len(unique_tickers)} total tickers for {currency}")
-            
-            # Filter for OIS-relevant tickers
-            ois_tickers = []
-            for ticker in unique_tickers:
-                ticker_code = ticker.get('ticker', '')
-                description = ticker.get('description', '')
-                
-                if self.is_ois_ticker(ticker_code, description, currency):
-                    ois_tickers.append(ticker)
-                    logger.info(f"    OIS: {ticker_code} - {description}")
-            
-            logger.info(f"✅ Filtered to {len(ois_tickers)} OIS-relevant tickers for {currency}")
-            return ois_tickers
-            
-        except Exception as e:
-            logger.error(f"❌ Error discovering {currency} tickers: {e}")
-            return []
+    async def run_discovery(self, currencies: List[str]) -> Dict[str, CurrencyDiscovery]:
+        """Discover and validate OIS tickers for all currencies concurrently"""
+        generators = [
+            # Focus on the most effective search pattern
+            SearchGenerator('ois', [{"search_type": "ois"}], accept=self.is_ois_ticker),
+            # If the OIS search finds nothing, try common patterns manually
+            PatternGenerator(
+                'ois',
+                lambda currency: [p['ticker'] for p in self.generate_manual_ois_patterns(currency)],
+                fallback=True
+            )
+        ]
+        config = SwapDiscoveryConfig(bloomberg_api_url=BLOOMBERG_API_URL)
+        async with DiscoveryEngine(
+            config, generators, fields=["PX_LAST", "SECURITY_NAME"], checkpoint=self.checkpoint
+        ) as engine:
+            return await engine.run(currencies)
     
     def generate_manual_ois_patterns(self, currency: str) -> List[Dict]:
         """Generate manual OIS ticker patterns when discovery fails"""
@@ -205,63 +160,6 @@ class EfficientOISDiscovery:
         
         return False
     
-    def validate_tickers_with_reference_data(self, tickers: List[str]) -> Dict[str, bool]:
-        """Validate tickers using Bloomberg reference data endpoint"""
-        if not tickers:
-            return {}
-            
-        logger.info(f"🔍 Validating {len(tickers)} tickers using reference data")
-        
-        try:
-            # Validate in chunks of 10 to respect API limits
-            chunk_size = 10
-            validation_results = {}
-            
-            for i in range(0, len(tickers), chunk_size):
-                chunk = tickers[i:i + chunk_size]
-                
-                try:
-                    response = requests.post(
-                        f"{BLOOMBERG_API_URL}/api/bloomberg/reference",
-                        headers=HEADERS,
-                        json={
-                            "securities": chunk,
-                            "fields": ["PX_LAST", "SECURITY_NAME"]
-                        },
-                        timeout=30
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data.get("success"):
-                            for sec_data in data.get("data", {}).get("securities_data", []):
-                                ticker = sec_data.get("security")
-                                is_valid = sec_data.get("success", False)
-                                validation_results[ticker] = is_valid
-                                
-                                if is_valid:
-                                    logger.info(f"  ✅ {ticker} - Valid")
-                                else:
-                                    logger.warning(f"  ❌ {ticker} - Invalid")
-                        else:
-                            logger.error(f"Reference data request failed: {data.get('error', 'Unknown error')}")
-                    else:
-                        logger.error(f"Reference data API error: {response.status_code}")
-                
-                except Exception as e:
-                    logger.error(f"Error validating chunk: {e}")
-                    # Mark all tickers in chunk as invalid
-                    for ticker in chunk:
-                        validation_results[ticker] = False
-                
-                time.sleep(2)  # Rate limiting between chunks
-            
-            return validation_results
-            
-        except Exception as e:
-            logger.error(f"❌ Error validating tickers: {e}")
-            return {}
-    
     def connect_to_database(self):
         """Connect to PostgreSQL database"""
         try:
@@ -295,75 +193,9 @@ class EfficientOISDiscovery:
             logger.error(f"❌ Failed to create table: {e}")
             conn.rollback()
     
-    def insert_validated_tickers(self, conn, currency: str, validated_tickers: Dict[str, bool]):
-        """Insert validated tickers into database"""
-        inserted_count = 0
-        skipped_count = 0
-        
-        try:
-            with conn.cursor() as cursor:
-                for ticker, is_valid in validated_tickers.items():
-                    if not is_valid:
-                        skipped_count += 1
-                        continue
-                    
-                    # Determine curve name and tenor
-                    curve_name = f"{currency}_OIS"
-                    tenor = self.extract_tenor_from_ticker(ticker, currency)
-                    
-                    # Insert or update ticker
-                    cursor.execute("""
-                        INSERT INTO ticker_reference 
-                        (bloomberg_ticker, currency_code, instrument_type, curve_name, tenor, is_active)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (bloomberg_ticker) 
-                        DO UPDATE SET 
-                            updated_at = CURRENT_TIMESTAMP,
-                            is_active = EXCLUDED.is_active,
-                            curve_name = EXCLUDED.curve_name,
-                            tenor = EXCLUDED.tenor
-                    """, (ticker, currency, 'OIS', curve_name, tenor, True))
-                    
-                    inserted_count += 1
-                
-                conn.commit()
-                logger.info(f"✅ Inserted/updated {inserted_count} tickers for {currency}, skipped {skipped_count} invalid")
-                
-        except Exception as e:
-            logger.error(f"❌ Failed to insert tickers for {currency}: {e}")
-            conn.rollback()
-    
     def extract_tenor_from_ticker(self, ticker: str, currency: str) -> Optional[str]:
         """Extract tenor from ticker code"""
-        import re
-        
-        ticker_upper = ticker.upper()
-        
-        # Overnight patterns
-        if any(pattern in ticker_upper for pattern in ['ON', 'O/N', 'OVERNIGHT']):
-            return 'ON'
-        
-        # Common OIS patterns: USSO1, EURSO2, etc.
-        ois_match = re.search(f'{currency}SO(\\d+)', ticker_upper)
-        if ois_match:
-            num = int(ois_match.group(1))
-            if num <= 24:  # Up to 24 months
-                return f"{num}M"
-            else:
-                return f"{num}Y"
-        
-        # Generic patterns: USD1Y, EUR6M, etc.
-        explicit_match = re.search(f'{currency}(\\d+)([MY])', ticker_upper)
-        if explicit_match:
-            return f"{explicit_match.group(1)}{explicit_match.group(2)}"
-        
-        # Numeric patterns at the end
-        end_num_match = re.search(r'(\d+)\s*(?:CURNCY|INDEX)?$', ticker_upper)
-        if end_num_match:
-            num = int(end_num_match.group(1))
-            return f"{num}Y"  # Assume years for OIS
-        
-        return None
+        return extract_tenor(ticker, currency)
     
     def discover_all_currencies(self):
         """Main method to discover OIS tickers for all currencies"""
@@ -387,42 +219,40 @@ class EfficientOISDiscovery:
             # Process G10 first (highest priority)
             all_currencies = ALL_CURRENCIES['G10'] + ALL_CURRENCIES['EM']
             
+            results = asyncio.run(self.run_discovery(all_currencies))
+            
             for currency in all_currencies:
-                logger.info(f"\n{'='*50}")
-                logger.info(f"Processing {currency}")
-                logger.info(f"{'='*50}")
-                
-                # Step 1: Discover tickers
-                discovered = self.discover_currency_tickers(currency)
-                if not discovered:
+                result = results[currency]
+                if not result.candidates:
                     logger.warning(f"⚠️  No tickers discovered for {currency}")
                     continue
                 
-                # Step 2: Extract ticker codes for validation
-                ticker_codes = [t.get('ticker', '') for t in discovered if t.get('ticker')]
-                if not ticker_codes:
-                    logger.warning(f"⚠️  No valid ticker codes found for {currency}")
-                    continue
-                
-                # Step 3: Validate tickers using reference data
-                validation_results = self.validate_tickers_with_reference_data(ticker_codes)
-                if not validation_results:
-                    logger.warning(f"⚠️  Validation failed for {currency}")
-                    continue
-                
-                # Step 4: Store results
-                self.discovered_tickers[currency] = discovered
-                self.validated_tickers[currency] = validation_results
-                
-                # Step 5: Insert into database
-                self.insert_validated_tickers(conn, currency, validation_results)
-                
-                # Rate limiting between currencies
-                time.sleep(2)
+                # Store results
+                self.discovered_tickers[currency] = [
+                    {'ticker': c.ticker, 'description': c.description, 'tenor': c.tenor}
+                    for c in result.candidates
+                ]
+                self.validated_tickers[currency] = result.validation
+                skipped_count = len(result.candidates) - len(result.valid)
+                logger.info(f"✅ {len(result.valid)} valid tickers for {currency}, skipped {skipped_count} invalid")
+            
+            # Insert every currency's valid tickers in one bulk upsert
+            all_valid = [instrument for result in results.values() for instrument in result.valid]
+            inserted_count = insert_ticker_reference(
+                conn, all_valid,
+                curve_name=lambda instrument: f"{instrument.currency}_OIS",
+                instrument_type=lambda instrument: 'OIS',
+                include_tenor=True
+            )
+            logger.info(f"✅ Inserted/updated {inserted_count} tickers")
             
             # Generate summary report
             self.generate_summary_report()
             
+            # Completed cleanly - the next run starts fresh
+            if all(result.complete for result in results.values()):
+                self.checkpoint.clear()
+            
         finally:
             conn.close()
             logger.info("✅ Database connection closed")
@@ -505,7 +335,12 @@ class EfficientOISDiscovery:
 
 def main():
     """Main execution function"""
-    discovery = EfficientOISDiscovery()
+    parser = argparse.ArgumentParser(description="Efficient OIS ticker discovery")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip currencies completed by an interrupted run")
+    args = parser.parse_args()
+    
+    discovery = EfficientOISDiscovery(resume=args.resume)
     discovery.discover_all_currencies()
 
 if __name__ == "__main__":
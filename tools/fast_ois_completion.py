@@ -12,6 +12,9 @@ import logging
 from typing import Dict, List, Optional
 from datetime import datetime
 
+from adaptive_chunker import AdaptiveChunker
+from validation_cache import ValidationCache
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -44,12 +47,12 @@ WORKING_PATTERNS = {
 
 def validate_ticker_set(tickers: List[str]) -> Dict[str, bool]:
     """Validate a set of tickers quickly"""
-    validation_results = {}
-    chunk_size = 15
+    validation_results = {ticker: False for ticker in tickers}
+    chunker = AdaptiveChunker.for_endpoint("reference")
+    cache = ValidationCache()
+    known, unknown = cache.split(tickers, ["PX_LAST"])
     
-    for i in range(0, len(tickers), chunk_size):
-        chunk = tickers[i:i + chunk_size]
-        
+    def validate_chunk(chunk):
         try:
             response = requests.post(
                 f"{BLOOMBERG_API_URL}/api/bloomberg/reference",
@@ -57,25 +60,29 @@ def validate_ticker_set(tickers: List[str]) -> Dict[str, bool]:
                 json={"securities": chunk, "fields": ["PX_LAST"]},
                 timeout=20
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("success"):
-                    for sec_data in data.get("data", {}).get("securities_data", []):
-                        ticker = sec_data.get("security")
-                        is_valid = (sec_data.get("success", False) and 
-                                  sec_data.get("fields", {}).get("PX_LAST") is not None)
-                        validation_results[ticker] = is_valid
-                        if is_valid:
-                            price = sec_data.get("fields", {}).get("PX_LAST")
-                            logger.info(f"✅ {ticker} = {price}")
         except Exception as e:
             logger.error(f"Validation error: {e}")
-            for ticker in chunk:
-                validation_results[ticker] = False
+            return {"error": str(e)}
         
-        time.sleep(0.5)
+        if response.status_code != 200:
+            return {"error": f"HTTP {response.status_code}"}
+        data = response.json()
+        cache.record_response(data, ["PX_LAST"])
+        return data
+    
+    # Tickers probed on a recent run are answered from the validation cache
+    for data in [cache.cached_response(known)] + chunker.run_sync(unknown, validate_chunk):
+        if data.get("success"):
+            for sec_data in data.get("data", {}).get("securities_data", []):
+                ticker = sec_data.get("security")
+                is_valid = (sec_data.get("success", False) and 
+                          sec_data.get("fields", {}).get("PX_LAST") is not None)
+                validation_results[ticker] = is_valid
+                if is_valid:
+                    price = sec_data.get("fields", {}).get("PX_LAST")
+                    logger.info(f"✅ {ticker} = {price}")
     
+    chunker.save()
     return validation_results
 
 def generate_currency_candidates(currency: str) -> List[str]:
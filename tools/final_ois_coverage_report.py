@@ -10,7 +10,8 @@ import psycopg2
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime
-import re
+
+from ticker_grammar import parse_ticker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -53,42 +54,7 @@ class OISCoverageAnalyzer:
     
     def extract_tenor_from_ticker(self, ticker: str) -> Optional[str]:
         """Extract tenor from ticker code"""
-        ticker_upper = ticker.upper()
-        
-        # Overnight patterns
-        if 'ON' in ticker_upper or 'O/N' in ticker_upper:
-            return 'ON'
-        
-        # Week patterns
-        week_match = re.search(r'(\d+)W', ticker_upper)
-        if week_match:
-            return f"{week_match.group(1)}W"
-        
-        # Month patterns
-        month_match = re.search(r'(\d+)M', ticker_upper)
-        if month_match:
-            return f"{month_match.group(1)}M"
-        
-        # Year patterns - look for number followed by year indicators or at end
-        year_patterns = [
-            r'(\d+)Y',  # Explicit Y
-            r'SO(\d+)',  # USSO1, EURSO2 etc.
-            r'(\d+)\s*(?:CURNCY|INDEX|$)'  # Number at end
-        ]
-        
-        for pattern in year_patterns:
-            match = re.search(pattern, ticker_upper)
-            if match:
-                num = int(match.group(1))
-                if num <= 24:  # Treat small numbers as months if no explicit Y
-                    if 'Y' in pattern or 'SO' in pattern:
-                        return f"{num}Y"
-                    else:
-                        return f"{num}M"
-                else:
-                    return f"{num}Y"
-        
-        return 'Unknown'
+        return parse_ticker(ticker).tenor or 'Unknown'
     
     def analyze_ticker_patterns(self, currency: str, tickers: List[str]) -> Dict:
         """Analyze ticker patterns for a currency"""
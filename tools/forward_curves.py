@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+NDF-aware Forward Curves
+Resolves every FX pair's forward tickers from the verified NDF mapping
+
+NDF knowledge used to live only in the ndf_*_results JSON snapshots and in
+check_ndf_tickers.py / verify_remaining_ndfs.py, which re-probe IRN / NTN /
+KWN / IHN ... patterns on every run. ForwardCurveTable loads the verified
+tickers once, assigns each to its pair and tenor with the shared grammar
+(so a ticker filed under the wrong pair - CLN is COP, not CLP - lands where
+it belongs), and precomputes one row per pair: tenor -> ticker. Tenors
+without a verified NDF ticker fall back to the deliverable outright.
+
+A forward matrix for all 45 pairs is then one deduplicated ticker list, one
+batched upstream call and a dense pair x tenor grid.
+
+Usage:
+    table = ForwardCurveTable.from_files()
+    table.resolve("USDKRW")            # {"1W": "KWN1W Curncy", ..., "1Y": "USDKRW1Y Curncy"}
+    response = await fetch_bloomberg_data(table.tickers(pairs), ["PX_LAST"])
+    matrix = table.matrix(pairs, response)
+
+Environment Variables:
+- NDF_MAPPING_FILE: Verified NDF mapping (default: newest ndf_complete_mapping_*.json)
+- NDF_VERIFICATION_FILE: NDF verification results (default: newest ndf_verification_results_*.json)
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from ticker_grammar import FX_NDF, parse_ticker, tenor_days
+
+logger = logging.getLogger(__name__)
+
+TOOLS_DIR = Path(__file__).resolve().parent
+
+# Same tenors and pairs as currency_forward_coverage_analysis.py
+FORWARD_TENORS = ["1W", "2W", "1M", "2M", "3M", "6M", "9M", "1Y", "18M", "2Y", "3Y", "5Y"]
+FORWARD_PAIRS = {
+    "G10": ["EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD", "USDSEK", "USDNOK", "USDDKK"],
+    "EM_ASIA": ["USDSGD", "USDHKD", "USDCNH", "USDINR", "USDKRW", "USDTWD", "USDTHB", "USDPHP", "USDIDR", "USDMYR"],
+    "EM_LATAM": ["USDMXN", "USDBRL", "USDCLP", "USDCOP", "USDPEN", "USDARS"],
+    "EM_EMEA": ["USDZAR", "USDTRY", "USDRUB", "USDPLN", "USDHUF", "USDCZK", "USDILS", "USDAED", "USDSAR"],
+    "CROSSES": ["EURGBP", "EURJPY", "GBPJPY", "EURCHF", "AUDJPY", "CADJPY", "EURAUD", "EURNZD", "GBPAUD", "GBPNZD"]
+}
+ALL_FORWARD_PAIRS = [pair for pairs in FORWARD_PAIRS.values() for pair in pairs]
+
+# Forward points per unit of the quote currency (outright = spot + points / factor)
+DEFAULT_PIP_FACTOR = 10000
+PIP_FACTORS = {
+    "JPY": 100, "THB": 100, "HUF": 100, "INR": 100, "CZK": 1000,
+    # Large-figure and NDF quotes come in whole currency units
+    "KRW": 1, "IDR": 1, "TWD": 1, "PHP": 1, "CLP": 1, "COP": 1
+}
+
+
+def pip_factor(pair: str) -> int:
+    return PIP_FACTORS.get(pair.upper()[3:6], DEFAULT_PIP_FACTOR)
+
+
+def latest(pattern: str) -> Optional[Path]:
+    """Newest timestamped snapshot matching pattern in tools/"""
+    matches = sorted(TOOLS_DIR.glob(pattern))
+    return matches[-1] if matches else None
+
+
+def verified_tickers(document: Dict[str, Any]) -> List[str]:
+    """Every ticker an NDF mapping or verification snapshot recorded as returning data"""
+    tickers = []
+    for section in ("detailed_results", "results"):
+        for result in (document.get(section) or {}).values():
+            tickers.extend(entry["ticker"] for entry in result.get("tickers", []) if "ticker" in entry)
+    for fmt in (document.get("ticker_formats") or {}).values():
+        tickers.extend(fmt.get("working_tickers", []))
+    return tickers
+
+
+class ForwardCurveTable:
+    """pair -> tenor -> ticker, NDF tickers where verified and outrights elsewhere"""
+
+    def __init__(self, ndf_tickers: Iterable[str] = (), tenors: List[str] = FORWARD_TENORS):
+        self.tenors = list(tenors)
+        self._days = {tenor_days(tenor): tenor for tenor in self.tenors}
+        # pair -> {tenor: verified NDF ticker}
+        self.ndf: Dict[str, Dict[str, str]] = {}
+        for ticker in ndf_tickers:
+            record = parse_ticker(ticker)
+            tenor = self._days.get(record.tenor_days)
+            if record.family == FX_NDF and record.pair and tenor:
+                self.ndf.setdefault(record.pair, {})[tenor] = ticker
+        self._rows: Dict[str, Dict[str, str]] = {}
+        for pair in ALL_FORWARD_PAIRS:
+            self.resolve(pair)
+
+    @classmethod
+    def from_files(
+        cls,
+        mapping: Optional[Union[str, Path]] = None,
+        verification: Optional[Union[str, Path]] = None
+    ) -> "ForwardCurveTable":
+        """Load the verified NDF snapshots; a missing file just means no NDF tickers from it"""
+        paths = [
+            mapping or os.getenv("NDF_MAPPING_FILE") or latest("ndf_complete_mapping_*.json"),
+            verification or os.getenv("NDF_VERIFICATION_FILE") or latest("ndf_verification_results_*.json")
+        ]
+        tickers = []
+        for path in filter(None, paths):
+            try:
+                with open(path) as f:
+                    tickers.extend(verified_tickers(json.load(f)))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load NDF snapshot {path}: {e}")
+        table = cls(dict.fromkeys(tickers))
+        logger.info(f"Forward curves: {len(table.ndf)} NDF pairs, {sum(map(len, table.ndf.values()))} verified NDF tickers")
+        return table
+
+    def is_ndf(self, pair: str) -> bool:
+        return pair.upper() in self.ndf
+
+    def resolve(self, pair: str) -> Dict[str, str]:
+        """Tenor -> ticker for one pair, a single dict lookup once built"""
+        pair = pair.upper()
+        row = self._rows.get(pair)
+        if row is None:
+            ndf = self.ndf.get(pair, {})
+            row = self._rows[pair] = {
+                tenor: ndf.get(tenor) or f"{pair}{tenor} Curncy" for tenor in self.tenors
+            }
+        return row
+
+    def tickers(self, pairs: Iterable[str], tenors: Optional[List[str]] = None) -> List[str]:
+        """Deduplicated spot + forward tickers for one batched request"""
+        tenors = tenors or self.tenors
+        securities = []
+        for pair in pairs:
+            row = self.resolve(pair)
+            securities.append(f"{pair.upper()} Curncy")
+            securities.extend(row[tenor] for tenor in tenors if tenor in row)
+        return list(dict.fromkeys(securities))
+
+    def matrix(
+        self,
+        pairs: List[str],
+        response: Dict[str, Any],
+        tenors: Optional[List[str]] = None,
+        fields: Iterable[str] = ("PX_LAST", "PX_BID", "PX_ASK")
+    ) -> Dict[str, Any]:
+        """
+        Dense pair x tenor grids of forward points from one reference response
+
+        points / bid_points / ask_points come from PX_LAST / PX_BID / PX_ASK
+        (whichever were requested); None marks a pillar without data.
+        """
+        tenors = tenors or self.tenors
+        returned = {
+            sd.get("security"): sd.get("fields") or {}
+            for sd in (response.get("data") or {}).get("securities_data", [])
+            if sd.get("success")
+        }
+        pairs = [pair.upper() for pair in pairs]
+        rows = [self.resolve(pair) for pair in pairs]
+        matrix = {
+            "pairs": pairs,
+            "tenors": tenors,
+            "tickers": [[row.get(tenor) for tenor in tenors] for row in rows],
+            "pip_factors": [pip_factor(pair) for pair in pairs],
+            "ndf": [pair in self.ndf for pair in pairs]
+        }
+        for field, grid, spot in (
+            ("PX_LAST", "points", "spot"), ("PX_BID", "bid_points", "spot_bid"), ("PX_ASK", "ask_points", "spot_ask")
+        ):
+            if field not in fields:
+                continue
+            matrix[spot] = [returned.get(f"{pair} Curncy", {}).get(field) for pair in pairs]
+            matrix[grid] = [[returned.get(row.get(tenor), {}).get(field) for tenor in tenors] for row in rows]
+        return matrix
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Vectorized Forward Outrights
+Outrights, FX net %, bid/ask outrights and implied carry for a whole forward matrix
+
+The forward curve tab converts `Spot + Points / PipFactor` one point at a
+time in the browser. OutrightBlock takes the dense pair x tenor matrix built
+by ForwardCurveTable.matrix() and derives every grid as NumPy arrays in one
+pass - a (pairs, 1) spot and pip-factor column broadcast against the
+(pairs, tenors) points. Missing pillars are NaN internally and None on the
+way out.
+
+Blocks are cached per snapshot (matrix key + fetch timestamp), so every
+request against the same snapshot is served from one precomputed block.
+
+Usage:
+    block = outright_cache.get(cache_key, matrix)
+    block.to_dict()       # pair x tenor lists for JSON
+    block.to_columns()    # one row per (pair, tenor) for Arrow/MessagePack
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ticker_grammar import tenor_days
+
+GRIDS = ("points", "outright", "net_pct", "bid", "ask", "carry")
+
+
+def as_grid(values: Any, shape: Tuple[int, ...]) -> np.ndarray:
+    """Lists with None holes -> float array with NaN holes"""
+    if values is None:
+        return np.full(shape, np.nan)
+    return np.array(values, dtype=float).reshape(shape)
+
+
+def to_lists(grid: np.ndarray) -> List[Any]:
+    """NaN -> None so the grid serializes as JSON"""
+    return np.where(np.isnan(grid), None, grid).tolist()
+
+
+@dataclass
+class OutrightBlock:
+    """Derived forward grids for one matrix snapshot; every grid is (pairs, tenors)"""
+    pairs: List[str]
+    tenors: List[str]
+    snapshot: Optional[str]
+    spot: np.ndarray
+    pip_factors: np.ndarray
+    points: np.ndarray
+    outright: np.ndarray
+    net_pct: np.ndarray
+    bid: np.ndarray
+    ask: np.ndarray
+    carry: np.ndarray
+
+    @classmethod
+    def from_matrix(cls, matrix: Dict[str, Any]) -> "OutrightBlock":
+        pairs, tenors = matrix["pairs"], matrix["tenors"]
+        column = (len(pairs), 1)
+        grid = (len(pairs), len(tenors))
+
+        spot = as_grid(matrix.get("spot"), column)
+        pip = as_grid(matrix.get("pip_factors"), column)
+        points = as_grid(matrix.get("points"), grid)
+        # Quote-side spot falls back to mid when Bloomberg has no bid/ask for it
+        spot_bid = as_grid(matrix.get("spot_bid"), column)
+        spot_bid = np.where(np.isnan(spot_bid), spot, spot_bid)
+        spot_ask = as_grid(matrix.get("spot_ask"), column)
+        spot_ask = np.where(np.isnan(spot_ask), spot, spot_ask)
+        years = np.array([tenor_days(tenor) for tenor in tenors], dtype=float) / 365.25
+
+        outright = spot + points / pip
+        with np.errstate(divide="ignore", invalid="ignore"):
+            net_pct = (outright - spot) / spot * 100
+            # Annualised forward premium, same definition as the forward curve tab
+            carry = np.where(years > 0, ((outright / spot) ** (1 / years) - 1) * 100, np.nan)
+
+        return cls(
+            pairs=list(pairs),
+            tenors=list(tenors),
+            snapshot=matrix.get("timestamp"),
+            spot=spot[:, 0],
+            pip_factors=pip[:, 0],
+            points=points,
+            outright=outright,
+            net_pct=net_pct,
+            bid=spot_bid + as_grid(matrix.get("bid_points"), grid) / pip,
+            ask=spot_ask + as_grid(matrix.get("ask_points"), grid) / pip,
+            carry=carry
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pairs": self.pairs,
+            "tenors": self.tenors,
+            "snapshot": self.snapshot,
+            "spot": to_lists(self.spot),
+            "pip_factors": to_lists(self.pip_factors),
+            **{name: to_lists(getattr(self, name)) for name in GRIDS}
+        }
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        """Long layout: one row per (pair, tenor)"""
+        columns = {
+            "pair": np.repeat(self.pairs, len(self.tenors)).tolist(),
+            "tenor": np.tile(self.tenors, len(self.pairs)).tolist(),
+            "spot": to_lists(np.repeat(self.spot, len(self.tenors)))
+        }
+        for name in GRIDS:
+            columns[name] = to_lists(getattr(self, name).ravel())
+        return columns
+
+
+class OutrightCache:
+    """Most recent blocks keyed by (matrix key, snapshot timestamp)"""
+
+    def __init__(self, max_blocks: int = 16):
+        self.max_blocks = max_blocks
+        self._blocks: "OrderedDict[Tuple[str, Optional[str]], OutrightBlock]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, matrix: Dict[str, Any]) -> OutrightBlock:
+        """Block for this matrix snapshot, computed at most once"""
+        snapshot = (key, matrix.get("timestamp"))
+        block = self._blocks.get(snapshot)
+        if block is not None:
+            self.hits += 1
+            self._blocks.move_to_end(snapshot)
+            return block
+
+        self.misses += 1
+        block = self._blocks[snapshot] = OutrightBlock.from_matrix(matrix)
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        return block
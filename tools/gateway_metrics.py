@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Gateway Prometheus Metrics
+Request latency per route, Bloomberg VM latency per endpoint, cache and error counters
+
+gateway.log only says that something happened, not where the time went. Every
+gateway exposes the same families on /metrics:
+
+- gateway_request_duration_seconds{method,route,status}: client request latency,
+  labelled by route template (/api/volatility/{pair}) so pairs do not explode
+  the label set; streamed responses are timed until the body is finished
+- gateway_requests_in_flight{route}
+- gateway_upstream_duration_seconds{endpoint,status}: Bloomberg VM calls, timed
+  until the response body has been read
+- gateway_upstream_in_flight{endpoint}
+- gateway_upstream_securities{endpoint}: securities per upstream call, i.e. how
+  well batching and chunking fill each call
+- gateway_cache_requests_total{cache,result}: hit / miss / stale
+- gateway_errors_total{where,type}: exception class or HTTP status, for client
+  requests and upstream calls
+- gateway_circuit_state{circuit}: upstream circuit breaker, 0 closed / 1 half-open / 2 open
+- gateway_upstream_hedges_total{endpoint,result}: hedged duplicate calls sent / won
+
+Upstream calls are measured in the HTTP client itself (MeteredTransport for
+httpx, metered_session() for requests), so every call to the VM is counted
+without touching the call sites.
+
+Usage:
+    instrument(app)                                           # middleware + /metrics
+    http_client = httpx.AsyncClient(transport=MeteredTransport())
+    record_cache("response", "hit")
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Callable, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.routing import BaseRoute, Match
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SECURITIES_BUCKETS = (1, 5, 10, 25, 50, 100, 200, 500, 1000, 2500)
+
+REQUEST_LATENCY = Histogram(
+    "gateway_request_duration_seconds", "Client request latency by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge("gateway_requests_in_flight", "Client requests being handled", ["route"])
+UPSTREAM_LATENCY = Histogram(
+    "gateway_upstream_duration_seconds", "Bloomberg VM call latency including the response body",
+    ["endpoint", "status"], buckets=LATENCY_BUCKETS
+)
+UPSTREAM_IN_FLIGHT = Gauge("gateway_upstream_in_flight", "Bloomberg VM calls in flight", ["endpoint"])
+UPSTREAM_SECURITIES = Histogram(
+    "gateway_upstream_securities", "Securities per Bloomberg VM call",
+    ["endpoint"], buckets=SECURITIES_BUCKETS
+)
+CACHE_REQUESTS = Counter("gateway_cache_requests_total", "Cache lookups by outcome", ["cache", "result"])
+ERRORS = Counter("gateway_errors_total", "Errors by where they happened and type", ["where", "type"])
+CIRCUIT_STATE = Gauge("gateway_circuit_state", "Upstream circuit: 0 closed, 1 half-open, 2 open", ["circuit"])
+HEDGES = Counter(
+    "gateway_upstream_hedges_total", "Duplicate upstream calls sent after the p95 delay, and those that answered first",
+    ["endpoint", "result"]
+)
+
+
+def record_cache(cache: str, result: str, count: int = 1):
+    """result is "hit", "miss" or "stale" (present but expired)"""
+    CACHE_REQUESTS.labels(cache, result).inc(count)
+
+
+def record_error(where: str, error: Any):
+    """error is an exception or an HTTP status code"""
+    ERRORS.labels(where, f"HTTP{error}" if isinstance(error, int) else type(error).__name__).inc()
+
+
+def route_template(routes: List[BaseRoute], scope: dict) -> str:
+    """The path template a request is routed to, so path parameters share one label"""
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path  # Path matched but not the method (405)
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware - unlike BaseHTTPMiddleware it leaves streamed bodies alone"""
+
+    def __init__(self, app, routes: List[BaseRoute]):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route = route_template(self.routes, scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            record_error("request", e)
+            raise
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
+        if status >= 500:
+            record_error("request", status)
+
+
+def instrument(app: FastAPI):
+    """Time every request and serve the metrics on GET /metrics"""
+    app.add_middleware(MetricsMiddleware, routes=app.routes)
+
+    async def metrics():
+        # Set as a header - media_type would get a second charset appended
+        return Response(generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+
+
+def securities_in(body: Optional[bytes]) -> Optional[int]:
+    """Number of securities in a VM request body ({"securities": [...]} or {"security": ...})"""
+    try:
+        payload = json.loads(body)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if isinstance(payload.get("securities"), list):
+        return len(payload["securities"])
+    return 1 if "security" in payload else None
+
+
+class UpstreamCall:
+    """Latency, in-flight and securities for one VM call; finish() is idempotent"""
+
+    def __init__(self, url: str, body: Optional[bytes]):
+        self.endpoint = urlsplit(str(url)).path or "/"
+        count = securities_in(body)
+        if count is not None:
+            UPSTREAM_SECURITIES.labels(self.endpoint).observe(count)
+        UPSTREAM_IN_FLIGHT.labels(self.endpoint).inc()
+        self.started = time.perf_counter()
+        self.finished = False
+
+    def finish(self, status: Any = None, error: Optional[Exception] = None):
+        """status is the HTTP status, or "cancelled" for a call abandoned by its caller"""
+        if self.finished:
+            return
+        self.finished = True
+        UPSTREAM_IN_FLIGHT.labels(self.endpoint).dec()
+        UPSTREAM_LATENCY.labels(self.endpoint, "error" if error else str(status)).observe(
+            time.perf_counter() - self.started
+        )
+        if error is not None:
+            record_error("upstream", error)
+        elif isinstance(status, int) and status >= 400:
+            record_error("upstream", status)
+
+
+class TimedStream(httpx.AsyncByteStream):
+    """Response body that finishes its UpstreamCall once it is read (or closed)"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_done: Callable[[Optional[Exception]], None]):
+        self.stream = stream
+        self.on_done = on_done
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self.stream:
+                yield chunk
+        except Exception as e:
+            self.on_done(e)
+            raise
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            self.on_done(None)
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records every VM call; wraps AsyncHTTPTransport by default"""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            body = request.content
+        except httpx.RequestNotRead:
+            body = None
+        call = UpstreamCall(request.url, body)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except asyncio.CancelledError:
+            # e.g. the losing half of a hedged call - not an upstream error
+            call.finish("cancelled")
+            raise
+        except Exception as e:
+            call.finish(error=e)
+            raise
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=TimedStream(response.stream, lambda e: call.finish(response.status_code, e)),
+            extensions=response.extensions
+        )
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def metered_session():
+    """requests.Session whose calls are recorded like MeteredTransport's (for bloomberg-gateway.py)"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    class MeteredAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            call = UpstreamCall(request.url, request.body)
+            try:
+                response = super().send(request, **kwargs)
+            except Exception as e:
+                call.finish(error=e)
+                raise
+            call.finish(response.status_code)
+            return response
+
+    session = requests.Session()
+    session.mount("http://", MeteredAdapter())
+    session.mount("https://", MeteredAdapter())
+    return session
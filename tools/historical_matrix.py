@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Historical Matrix Builder
+Aligns per-security Bloomberg historical series onto a shared date index
+
+The VM's /api/bloomberg/historical endpoint returns one security per call as a
+list of {date, FIELD: value} dicts. This module turns many of those responses
+into a dense date x security matrix (one per field) for bulk consumers.
+"""
+
+from typing import List, Dict, Any
+
+
+def extract_series(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Pull the list of data points out of a VM historical response"""
+    if not response or not response.get("success"):
+        return []
+    data = response.get("data") or {}
+    return data.get("data") or []
+
+
+def align_historical(
+    series: Dict[str, List[Dict[str, Any]]],
+    securities: List[str],
+    fields: List[str]
+) -> Dict[str, Any]:
+    """
+    Align historical series onto a shared, sorted date index
+
+    Args:
+        series: security -> list of {date, FIELD: value} points
+        securities: column order for the matrix
+        fields: fields to extract (one matrix per field)
+
+    Returns:
+        {"dates": [...], "securities": [...], "fields": [...],
+         "values": {field: [[value per security] per date]}}
+        Missing observations are None. Repeated securities or fields are
+        kept once, so every matrix column has its own name.
+    """
+    securities = list(dict.fromkeys(securities))
+    fields = list(dict.fromkeys(fields))
+    dates = sorted({point["date"] for points in series.values() for point in points if point.get("date")})
+    row_of = {date: i for i, date in enumerate(dates)}
+
+    values = {field: [[None] * len(securities) for _ in dates] for field in fields}
+
+    for col, security in enumerate(securities):
+        for point in series.get(security, []):
+            row = row_of.get(point.get("date"))
+            if row is None:
+                continue
+            for field in fields:
+                value = point.get(field)
+                if value is not None:
+                    values[field][row][col] = value
+
+    return {
+        "dates": dates,
+        "securities": securities,
+        "fields": fields,
+        "values": values
+    }
+
+
+def column_name(security: str, field: str, fields: List[str]) -> str:
+    """Column label for a security/field cell; bare security when only one field"""
+    return security if len(fields) == 1 else f"{security}|{field}"
+
+
+def matrix_to_columns(matrix: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """
+    Columnar view of an aligned matrix for binary encodings
+
+    Layout is one "date" column followed by one column per security
+    (per security and field when several fields were requested).
+    """
+    fields = matrix["fields"]
+    columns: Dict[str, List[Any]] = {"date": matrix["dates"]}
+    for field in fields:
+        rows = matrix["values"][field]
+        for col, security in enumerate(matrix["securities"]):
+            columns[column_name(security, field, fields)] = [row[col] for row in rows]
+    return columns
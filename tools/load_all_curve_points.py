@@ -11,9 +11,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from yield_curve_db_endpoint import get_database_connection
 import pandas as pd
 import requests
-import time
 from datetime import datetime
 
+from adaptive_chunker import AdaptiveChunker
+from ticker_grammar import parse_ticker
+
 BLOOMBERG_API_URL = "http://20.172.249.92:8080"
 HEADERS = {
     "Authorization": "Bearer test",
@@ -21,48 +23,17 @@ HEADERS = {
 }
 
 def extract_tenor_from_ticker(ticker):
-    """Extract tenor from Bloomberg ticker pattern"""
-    # Handle monthly patterns (USSOA, USSOB, etc.)
-    if len(ticker) > 8 and ticker[-8].isalpha() and ticker[-7:] == ' Curncy':
-        month_map = {
-            'A': '1M', 'B': '2M', 'C': '3M', 'D': '4M', 'E': '5M', 'F': '6M',
-            'G': '7M', 'H': '8M', 'I': '9M', 'J': '10M', 'K': '11M', 'L': '12M'
-        }
-        month_char = ticker[-8]
-        if month_char in month_map:
-            return month_map[month_char]
-    
-    # Handle yearly patterns (USSO1, USSO10, etc.)
-    if 'SO' in ticker and ticker.split('SO')[-1].split()[0].replace('M','').isdigit():
-        tenor_part = ticker.split('SO')[-1].split()[0]
-        if 'M' in tenor_part:
-            return tenor_part
-        else:
-            return f"{tenor_part}Y"
-    
-    # Handle EESWE patterns for EUR
-    if 'EESWE' in ticker:
-        parts = ticker.split('EESWE')[-1].split()[0]
-        if parts.endswith('M'):
-            return parts
-        elif parts.isdigit():
-            return f"{parts}Y"
-    
-    # Handle overnight rates
-    if 'Index' in ticker:
-        return 'ON'
-    
-    return None
+    """Extract tenor from Bloomberg ticker pattern (shared ticker grammar)"""
+    return parse_ticker(ticker).tenor
 
 def fetch_market_data(tickers):
     """Fetch current market data for tickers"""
     market_data = {}
     
-    # Process in batches
-    batch_size = 20
-    for i in range(0, len(tickers), batch_size):
-        batch = tickers[i:i+batch_size]
-        
+    # Process in batches sized from observed VM latency/errors
+    chunker = AdaptiveChunker.for_endpoint("reference")
+    
+    def fetch_batch(batch):
         try:
             # Use bloomberg/reference endpoint
             response = requests.post(
@@ -74,26 +45,28 @@ def fetch_market_data(tickers):
                 },
                 timeout=30
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success') and 'data' in result:
-                    securities_data = result['data'].get('securities_data', [])
-                    for sec in securities_data:
-                        if sec.get('success'):
-                            ticker = sec.get('security')
-                            fields = sec.get('fields', {})
-                            if 'PX_LAST' in fields:
-                                market_data[ticker] = {
-                                    'rate': fields.get('PX_LAST'),
-                                    'change': fields.get('CHG_PCT_1D', 0)
-                                }
-            
-            time.sleep(0.5)  # Rate limiting
-            
         except Exception as e:
-            print(f"Error fetching batch {i//batch_size + 1}: {e}")
+            print(f"Error fetching batch of {len(batch)}: {e}")
+            return {"error": str(e)}
+        
+        if response.status_code != 200:
+            return {"error": f"HTTP {response.status_code}"}
+        return response.json()
+    
+    for result in chunker.run_sync(tickers, fetch_batch):
+        if result.get('success') and 'data' in result:
+            securities_data = result['data'].get('securities_data', [])
+            for sec in securities_data:
+                if sec.get('success'):
+                    ticker = sec.get('security')
+                    fields = sec.get('fields', {})
+                    if 'PX_LAST' in fields:
+                        market_data[ticker] = {
+                            'rate': fields.get('PX_LAST'),
+                            'change': fields.get('CHG_PCT_1D', 0)
+                        }
     
+    chunker.save()
     return market_data
 
 def main():
@@ -12,6 +12,8 @@ import requests
 from datetime import datetime, timedelta
 import uvicorn
 
+from ticker_grammar import FX_BUTTERFLY, FX_RISK_REVERSAL, FX_VOL, parse_ticker
+
 app = FastAPI(title="Bloomberg Data Explorer", version="1.0.0")
 
 # Enable CORS
@@ -135,32 +137,18 @@ async def get_volatility_surface(request: VolatilitySurfaceRequest):
                 if sec_data.get('success') and sec_data.get('fields'):
                     security = sec_data['security']
                     
-                    # Parse tenor from security name
-                    import re
-                    
-                    # ATM pattern
-                    atm_match = re.search(rf'{request.currency_pair}V(\w+)', security)
-                    if atm_match:
-                        tenor = atm_match.group(1)
-                        if tenor not in surface_data:
-                            surface_data[tenor] = {"atm": {}, "rr": {}, "bf": {}}
-                        surface_data[tenor]["atm"] = sec_data['fields']
+                    # Parse tenor and delta from security name
+                    record = parse_ticker(security)
+                    if record.pair != request.currency_pair or record.family not in (FX_VOL, FX_RISK_REVERSAL, FX_BUTTERFLY):
                         continue
                     
-                    # RR/BF pattern
-                    rr_bf_match = re.search(rf'{request.currency_pair}(\d+)(R|B)(\w+)', security)
-                    if rr_bf_match:
-                        delta = int(rr_bf_match.group(1))
-                        type_char = rr_bf_match.group(2)
-                        tenor = rr_bf_match.group(3)
-                        
-                        if tenor not in surface_data:
-                            surface_data[tenor] = {"atm": {}, "rr": {}, "bf": {}}
-                        
-                        if type_char == 'R':
-                            surface_data[tenor]["rr"][f"{delta}D"] = sec_data['fields']
-                        else:
-                            surface_data[tenor]["bf"][f"{delta}D"] = sec_data['fields']
+                    surface = surface_data.setdefault(record.tenor, {"atm": {}, "rr": {}, "bf": {}})
+                    if record.family == FX_VOL:
+                        surface["atm"] = sec_data['fields']
+                    elif record.family == FX_RISK_REVERSAL:
+                        surface["rr"][f"{record.delta}D"] = sec_data['fields']
+                    else:
+                        surface["bf"][f"{record.delta}D"] = sec_data['fields']
             
             return {
                 "success": True,
@@ -212,10 +200,9 @@ async def discover_tickers(currency_pair: str):
             for sec in data['data']['securities_data']:
                 if sec.get('success') and sec.get('fields', {}).get('PX_LAST') is not None:
                     # Extract tenor
-                    import re
-                    match = re.search(rf'{currency_pair}V(\w+)', sec['security'])
-                    if match:
-                        valid_tickers['atm'].append(match.group(1))
+                    record = parse_ticker(sec['security'])
+                    if record.family == FX_VOL and record.pair == currency_pair:
+                        valid_tickers['atm'].append(record.tenor)
     
     return {
         "currency_pair": currency_pair,
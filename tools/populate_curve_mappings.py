@@ -8,64 +8,20 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from yield_curve_db_endpoint import get_database_connection
-import requests
+from comprehensive_swap_discovery import SwapDiscoveryConfig
+from discovery_engine import DiscoveryEngine, SearchGenerator
+from bulk_upsert import bulk_upsert
+import asyncio
 import json
-import time
 
 BLOOMBERG_API_URL = "http://20.172.249.92:8080"
-BLOOMBERG_HEADERS = {
-    "Authorization": "Bearer test",
-    "Content-Type": "application/json"
-}
 
-def discover_ois_tickers(currency, max_results=50):
-    """Discover OIS tickers for a currency using Bloomberg API"""
-    try:
-        response = requests.post(
-            f"{BLOOMBERG_API_URL}/api/bloomberg/ticker-discovery",
-            headers=BLOOMBERG_HEADERS,
-            json={
-                "search_type": "ois",
-                "currency": currency,
-                "max_results": max_results
-            },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("tickers", [])
-        else:
-            print(f"API error for {currency}: {response.status_code} - {response.text}")
-            return []
-            
-    except Exception as e:
-        print(f"Error discovering {currency} OIS tickers: {e}")
-        return []
-
-def validate_tickers(tickers):
-    """Validate tickers using Bloomberg API"""
-    if not tickers:
-        return []
-        
-    try:
-        response = requests.post(
-            f"{BLOOMBERG_API_URL}/api/bloomberg/validate-tickers",
-            headers=BLOOMBERG_HEADERS,
-            json=tickers,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            return [ticker for ticker in data if ticker.get("valid", False)]
-        else:
-            print(f"Validation API error: {response.status_code} - {response.text}")
-            return []
-            
-    except Exception as e:
-        print(f"Error validating tickers: {e}")
-        return []
+async def discover_ois_tickers(currencies, max_results=50):
+    """Discover and validate OIS tickers for all currencies concurrently"""
+    generator = SearchGenerator("ois", [{"search_type": "ois"}], max_results=max_results)
+    config = SwapDiscoveryConfig(bloomberg_api_url=BLOOMBERG_API_URL)
+    async with DiscoveryEngine(config, [generator]) as engine:
+        return await engine.run(currencies)
 
 def parse_tenor_to_days(tenor_str):
     """Parse tenor string to days"""
@@ -101,8 +57,8 @@ def get_existing_curve_mappings(cursor, curve_name):
     
     return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
 
-def populate_curve_mappings_for_currency(currency):
-    """Discover and populate curve mappings for a specific currency"""
+def populate_curve_mappings_for_currency(currency, discovery):
+    """Populate curve mappings for a specific currency from its discovery results"""
     print(f"\n=== Processing {currency} ===")
     
     # Connect to database
@@ -130,9 +86,7 @@ def populate_curve_mappings_for_currency(currency):
             existing_mappings = get_existing_curve_mappings(cursor, curve_name)
             print(f"Found {len(existing_mappings)} existing mappings")
             
-            # Discover OIS tickers
-            print(f"Discovering OIS tickers for {currency}...")
-            discovered_tickers = discover_ois_tickers(currency)
+            discovered_tickers = discovery.candidates
             print(f"Discovered {len(discovered_tickers)} potential tickers")
             
             if not discovered_tickers:
@@ -140,11 +94,8 @@ def populate_curve_mappings_for_currency(currency):
                 continue
             
             # Extract just the ticker symbols
-            ticker_symbols = [t.get("ticker", "") for t in discovered_tickers if t.get("ticker")]
-            
-            # Validate tickers
-            print(f"Validating {len(ticker_symbols)} tickers...")
-            validated_tickers = validate_tickers(ticker_symbols)
+            ticker_symbols = [t.ticker for t in discovered_tickers]
+            validated_tickers = discovery.valid
             print(f"Validated {len(validated_tickers)} tickers")
             
             # Check which tickers already exist in bloomberg_tickers table
@@ -161,9 +112,9 @@ def populate_curve_mappings_for_currency(currency):
             print(f"Found {len(existing_tickers)} tickers in bloomberg_tickers table")
             
             # Process each validated ticker
-            new_mappings = 0
+            mapping_rows = []
             for ticker_info in validated_tickers:
-                ticker = ticker_info.get("ticker", "")
+                ticker = ticker_info.ticker
                 if not ticker or ticker in existing_mappings:
                     continue
                     
@@ -184,20 +135,16 @@ def populate_curve_mappings_for_currency(currency):
                     if days:
                         sorting_order = days
                 
-                # Insert mapping
-                try:
-                    cursor.execute("""
-                        INSERT INTO rate_curve_mappings 
-                        (curve_name, bloomberg_ticker, tenor, currency_code, rate_type, sorting_order)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (curve_name, ticker, db_tenor or "UNKNOWN", currency, "OIS", sorting_order))
-                    
-                    new_mappings += 1
-                    print(f"Added mapping: {curve_name} -> {ticker} ({db_tenor})")
-                    
-                except Exception as e:
-                    print(f"Error inserting mapping for {ticker}: {e}")
+                mapping_rows.append((curve_name, ticker, db_tenor or "UNKNOWN", currency, "OIS", sorting_order))
+                print(f"Mapping: {curve_name} -> {ticker} ({db_tenor})")
             
+            # Insert all new mappings in one set-based write
+            counts = bulk_upsert(
+                cursor, "rate_curve_mappings",
+                ["curve_name", "bloomberg_ticker", "tenor", "currency_code", "rate_type", "sorting_order"],
+                mapping_rows, conflict=["curve_name", "bloomberg_ticker"], update=[]
+            )
+            new_mappings = counts["inserted"]
             print(f"Added {new_mappings} new mappings for {curve_name}")
             
         # Commit changes
@@ -213,11 +160,11 @@ def populate_curve_mappings_for_currency(currency):
 def main():
     """Main function to populate curve mappings for all major currencies"""
     currencies = ["USD", "EUR", "GBP", "JPY", "CHF", "CAD", "AUD", "NOK", "SEK"]
+    discoveries = asyncio.run(discover_ois_tickers(currencies))
     
     for currency in currencies:
         try:
-            populate_curve_mappings_for_currency(currency)
-            time.sleep(2)  # Rate limiting
+            populate_curve_mappings_for_currency(currency, discoveries[currency])
         except Exception as e:
             print(f"Failed to process {currency}: {e}")
     
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Shared Live Quote Stream
+One upstream polling loop for every ticker any client is watching
+
+Clients subscribe to a ticker set and receive only the values that changed.
+The hub reference-counts tickers across subscriptions, so the upstream call
+rate depends on the number of unique tickers, not on the number of open tabs.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+FetchFunction = Callable[[List[str], List[str]], Awaitable[Dict[str, Any]]]
+
+
+class QuoteSubscription:
+    """A client's view of the stream: its tickers plus coalesced pending changes"""
+
+    def __init__(self, tickers: Set[str]):
+        self.tickers = tickers
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, changes: Dict[str, Dict[str, Any]]):
+        # Coalesce into the pending dict so slow consumers never queue stale updates
+        self.pending.update(changes)
+        self._ready.set()
+
+    async def next_changes(self, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Wait for changes; returns {} on timeout (useful for keep-alives)"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        changes, self.pending = self.pending, {}
+        self._ready.clear()
+        return changes
+
+
+class QuoteStreamHub:
+    """Polls the union of subscribed tickers and fans out per-ticker diffs"""
+
+    def __init__(self, fetch: FetchFunction, fields: List[str], interval: float = 2.0):
+        self.fetch = fetch
+        self.fields = fields
+        self.interval = interval
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        self.subscribers: Dict[str, Set[QuoteSubscription]] = {}
+        self.polls = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def tickers(self) -> List[str]:
+        return list(self.subscribers.keys())
+
+    def subscribe(self, tickers: Iterable[str]) -> QuoteSubscription:
+        subscription = QuoteSubscription(set())
+        self.update(subscription, tickers)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll_loop())
+        return subscription
+
+    def update(self, subscription: QuoteSubscription, tickers: Iterable[str]):
+        """Replace a subscription's ticker set, sending known values for new tickers"""
+        wanted = {t for t in tickers if t}
+        for ticker in subscription.tickers - wanted:
+            self._release(subscription, ticker)
+        added = wanted - subscription.tickers
+        for ticker in added:
+            self.subscribers.setdefault(ticker, set()).add(subscription)
+        subscription.tickers = wanted
+
+        snapshot = {t: self.latest[t] for t in added if t in self.latest}
+        if snapshot:
+            subscription.push(snapshot)
+
+    def unsubscribe(self, subscription: QuoteSubscription):
+        for ticker in list(subscription.tickers):
+            self._release(subscription, ticker)
+        subscription.tickers = set()
+        if not self.subscribers and self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _release(self, subscription: QuoteSubscription, ticker: str):
+        watchers = self.subscribers.get(ticker)
+        if watchers is None:
+            return
+        watchers.discard(subscription)
+        if not watchers:
+            del self.subscribers[ticker]
+            self.latest.pop(ticker, None)
+
+    async def poll_once(self):
+        """Fetch every watched ticker once and push changed values to their watchers"""
+        tickers = self.tickers
+        if not tickers:
+            return
+        response = await self.fetch(tickers, self.fields)
+        self.polls += 1
+        if "error" in response:
+            logger.warning(f"Quote stream poll failed: {response['error']}")
+            return
+
+        changed: Dict[str, Dict[str, Any]] = {}
+        for security_data in (response.get("data") or {}).get("securities_data", []):
+            ticker = security_data.get("security")
+            if ticker not in self.subscribers or not security_data.get("success"):
+                continue
+            fields = security_data.get("fields") or {}
+            if self.latest.get(ticker) != fields:
+                self.latest[ticker] = fields
+                changed[ticker] = fields
+
+        if not changed:
+            return
+        per_subscriber: Dict[QuoteSubscription, Dict[str, Dict[str, Any]]] = {}
+        for ticker, fields in changed.items():
+            for subscription in self.subscribers.get(ticker, ()):
+                per_subscriber.setdefault(subscription, {})[ticker] = fields
+        for subscription, changes in per_subscriber.items():
+            subscription.push(changes)
+
+    async def _poll_loop(self):
+        while self.subscribers:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Quote stream poll error: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
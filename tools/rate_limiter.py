@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Token Bucket Rate Limiter
+Global request budget for scripts that hit the Bloomberg VM concurrently
+
+Discovery scripts used to sleep a fixed 1-3 seconds after every call, which
+both wastes time when the VM is idle and does nothing to bound the total rate
+once several requests are in flight. A TokenBucket hands out `rate` tokens
+per second (up to `burst` at once) and every caller awaits one before it
+sends, so any number of concurrent tasks share a single request budget.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket - `rate` requests per second with bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited = 0.0  # Total seconds callers spent throttled
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._updated) * self.rate, self.burst)
+        self._updated = now
+
+    async def acquire(self, tokens: int = 1):
+        """Wait until `tokens` are available, then take them"""
+        # The lock keeps waiters in FIFO order so no caller starves
+        async with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                delay = (tokens - self._tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self._tokens -= tokens
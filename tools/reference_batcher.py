@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Reference Request Micro-Batcher
+Coalesces concurrent /api/bloomberg/reference calls into one upstream request
+
+Dashboard load fires many small reference requests within milliseconds of
+each other. The batcher holds them for a short window (or until a size cap is
+reached), sends one merged and deduplicated upstream call, then hands each
+caller back only the securities and fields it asked for.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SendFunction = Callable[[List[str], List[str]], Awaitable[Dict[str, Any]]]
+
+
+class ReferenceBatcher:
+    """Collects reference requests for `window` seconds or up to `max_securities`"""
+
+    def __init__(self, send: SendFunction, window: float = 0.01, max_securities: int = 200):
+        self.send = send
+        self.window = window
+        self.max_securities = max_securities
+        self._pending: List[Tuple[List[str], List[str], asyncio.Future]] = []
+        self._securities: Dict[str, None] = {}  # Ordered set of pending securities
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()  # In-flight dispatches - the loop only keeps weak references
+        self.stats = {"requests": 0, "upstream_calls": 0, "securities_requested": 0, "securities_sent": 0}
+
+    async def fetch(self, securities: List[str], fields: List[str]) -> Dict[str, Any]:
+        """Queue a reference request and wait for its slice of the merged response"""
+        if self.window <= 0:
+            return await self.send(securities, fields)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((securities, fields, future))
+        self._securities.update(dict.fromkeys(securities))
+        self.stats["requests"] += 1
+        self.stats["securities_requested"] += len(securities)
+
+        if len(self._securities) >= self.max_securities:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        securities, self._securities = list(self._securities), {}
+        fields = list(dict.fromkeys(field for _, batch_fields, _ in batch for field in batch_fields))
+        task = asyncio.create_task(self._dispatch(batch, securities, fields))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch, securities: List[str], fields: List[str]):
+        self.stats["upstream_calls"] += 1
+        self.stats["securities_sent"] += len(securities)
+        if len(batch) > 1:
+            logger.debug(f"Merged {len(batch)} reference requests into one call for {len(securities)} securities")
+
+        try:
+            result = await self.send(securities, fields)
+        except asyncio.CancelledError:
+            for _, _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for request_securities, request_fields, future in batch:
+            if not future.done():
+                future.set_result(demultiplex(result, request_securities, request_fields))
+
+
+def demultiplex(result: Dict[str, Any], securities: List[str], fields: List[str]) -> Dict[str, Any]:
+    """Slice a merged reference response down to one caller's securities and fields"""
+    if "error" in result or "data" not in result:
+        return result
+
+    by_security = {}
+    for security_data in result["data"].get("securities_data", []):
+        by_security.setdefault(security_data.get("security"), security_data)
+
+    securities_data = []
+    for security in dict.fromkeys(securities):
+        security_data = by_security.get(security)
+        if security_data is None:
+            continue
+        if "fields" in security_data:
+            merged_fields = security_data.get("fields") or {}
+            security_data = {
+                **security_data,
+                "fields": {field: merged_fields[field] for field in fields if field in merged_fields}
+            }
+        securities_data.append(security_data)
+
+    sliced = {**result, "data": {**result["data"], "securities_data": securities_data}}
+    # A partial merged response is only partial for callers missing one of their securities
+    sliced.pop("partial", None)
+    if result.get("partial") and len(securities_data) < len(dict.fromkeys(securities)):
+        sliced["partial"] = True
+    return sliced
+
+
+def merge_reference_responses(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-chunk reference responses back into one response
+
+    Failed chunks are dropped; if every chunk failed the first error is returned.
+    """
+    succeeded = [r for r in results if "error" not in r and "data" in r]
+    if not succeeded:
+        return results[0] if results else {"success": True, "data": {"securities_data": []}}
+
+    securities_data = []
+    for result in succeeded:
+        securities_data.extend(result["data"].get("securities_data", []))
+    merged = {**succeeded[0], "data": {**succeeded[0]["data"], "securities_data": securities_data}}
+    if len(succeeded) < len(results):
+        merged["partial"] = True
+    return merged
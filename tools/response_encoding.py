@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Gateway Response Encoding
+Content negotiation between JSON and columnar binary formats
+
+Heavy gateway endpoints return deeply nested securities_data[].fields{} JSON.
+Clients that send an Accept header for Arrow or MessagePack get the same data
+as a columnar layout instead: one list per column, keys written once.
+
+Supported media types:
+- application/vnd.apache.arrow.stream (requires pyarrow)
+- application/msgpack, application/x-msgpack (requires msgpack)
+- application/json (default / fallback)
+"""
+
+import json
+import logging
+from typing import List, Dict, Any, Optional
+
+from fastapi import Response
+
+logger = logging.getLogger(__name__)
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+FORMATS = {
+    ARROW_STREAM_MEDIA_TYPE: "arrow",
+    **{media_type: "msgpack" for media_type in MSGPACK_MEDIA_TYPES},
+    "application/json": "json"
+}
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """Pick 'arrow', 'msgpack' or 'json' from an Accept header, honouring q-values"""
+    best, best_q = "json", 0.0
+    for part in (accept or "").lower().split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        fmt = FORMATS.get(media_type)
+        if fmt is None:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        # Ties go to the type listed first
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+def reference_to_columns(response: Dict[str, Any], fields: List[str]) -> Dict[str, List[Any]]:
+    """
+    Flatten a VM reference response into columns
+
+    One row per security: security, success, then one column per field.
+    """
+    securities_data = (response.get("data") or {}).get("securities_data", [])
+    columns: Dict[str, List[Any]] = {"security": [], "success": []}
+    for field in fields:
+        columns[field] = []
+
+    for security_data in securities_data:
+        security_fields = security_data.get("fields") or {}
+        columns["security"].append(security_data.get("security"))
+        columns["success"].append(bool(security_data.get("success")))
+        for field in fields:
+            columns[field].append(security_fields.get(field))
+
+    return columns
+
+
+def historical_to_columns(response: Dict[str, Any], fields: List[str]) -> Dict[str, List[Any]]:
+    """Flatten a VM historical response into a date column plus one column per field"""
+    points = (response.get("data") or {}).get("data") or []
+    columns: Dict[str, List[Any]] = {"date": [point.get("date") for point in points]}
+    for field in fields:
+        columns[field] = [point.get(field) for point in points]
+    return columns
+
+
+def records_to_columns(records: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Turn a list of flat dicts into columns, filling absent keys with None"""
+    keys: List[str] = []
+    for record in records:
+        for key in record:
+            if key not in keys:
+                keys.append(key)
+    return {key: [record.get(key) for record in records] for key in keys}
+
+
+def columns_to_arrow(columns: Dict[str, List[Any]], metadata: Optional[Dict[str, Any]] = None) -> Optional[bytes]:
+    """
+    Encode columns as an Arrow IPC stream
+    Response metadata travels as JSON in the schema metadata under "metadata".
+    Returns None when pyarrow is not installed.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+
+    arrays = {}
+    for name, values in columns.items():
+        try:
+            arrays[name] = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed-type columns (e.g. PX_LAST vs NAME strings) go over as strings
+            arrays[name] = pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+    table = pa.table(arrays)
+    if metadata:
+        table = table.replace_schema_metadata({"metadata": json.dumps(metadata, default=str)})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def columns_to_msgpack(columns: Dict[str, List[Any]], metadata: Optional[Dict[str, Any]] = None) -> Optional[bytes]:
+    """Encode columns as MessagePack; returns None when msgpack is not installed"""
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack.packb({"columns": columns, "metadata": metadata or {}}, default=str, use_bin_type=True)
+
+
+def encode_response(
+    accept: Optional[str],
+    payload: Any,
+    columns: Optional[Dict[str, List[Any]]] = None,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Any:
+    """
+    Encode an endpoint result according to the Accept header
+
+    Args:
+        accept: Request Accept header
+        payload: The regular JSON result, returned unchanged for JSON clients
+        columns: Columnar view of the payload for binary clients
+        metadata: Small scalar metadata carried alongside the columns
+
+    Returns:
+        A binary Response for Arrow/MessagePack, otherwise payload itself so
+        FastAPI serializes it as before.
+    """
+    fmt = negotiate_format(accept)
+    if fmt == "json" or columns is None:
+        return payload
+
+    if fmt == "arrow":
+        encoded = columns_to_arrow(columns, metadata)
+        media_type = ARROW_STREAM_MEDIA_TYPE
+    else:
+        encoded = columns_to_msgpack(columns, metadata)
+        media_type = MSGPACK_MEDIA_TYPES[0]
+
+    if encoded is None:
+        logger.warning(f"{fmt} requested but its library is not installed - falling back to JSON")
+        return payload
+    return Response(content=encoded, media_type=media_type)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+In-Process Sampling Profiler
+Time-boxed stack sampling of the live gateway, returned as collapsed stacks
+
+py-spy cannot be attached inside the container, so the gateway samples
+itself: a short-lived thread reads sys._current_frames() every `interval`
+seconds for `duration` seconds and counts each thread's stack. The result
+is in the collapsed format ("thread;file:function;file:function count")
+that flamegraph.pl, speedscope and inferno read directly.
+
+Nothing runs between profiles - the sampling thread only exists while a
+profile is being taken, so an idle profiler costs nothing. One profile runs
+at a time.
+
+The event loop thread spends most of an idle gateway in selector.select();
+those samples are dropped unless include_idle is set, so the flamegraph
+shows where busy time goes (JSON encoding, pydantic validation, ...).
+
+Usage:
+    profiler = SamplingProfiler()
+    stacks = await profiler.profile(duration=10, interval=0.005)
+    text = collapsed(stacks)
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Top frames that mean a thread is waiting, not working (blocked in C below them)
+IDLE_FUNCTIONS = {"select", "poll", "epoll", "wait", "accept", "sleep", "_worker", "_wait_for_tstate_lock"}
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).stem}:{code.co_name}".replace(" ", "_").replace(";", "_")
+
+
+def is_idle(frame) -> bool:
+    return frame.f_code.co_name in IDLE_FUNCTIONS
+
+
+class ProfilerBusy(RuntimeError):
+    """A profile is already running"""
+
+
+class SamplingProfiler:
+    """Samples every thread's stack; stacks are counted as collapsed strings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.running = False
+        self.last: Optional[Dict[str, float]] = None
+
+    def sample(self, duration: float, interval: float, include_idle: bool = False) -> Tuple[Counter, int]:
+        """Blocking sampling loop - returns (stack counts, samples taken)"""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        self.running = True
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        started = time.perf_counter()
+        try:
+            deadline = started + duration
+            while time.perf_counter() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own or (not include_idle and is_idle(frame)):
+                        continue
+                    labels = []
+                    while frame is not None:
+                        labels.append(frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(names.get(ident, f"thread-{ident}").replace(" ", "_"))
+                    stacks[";".join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(interval)
+        finally:
+            self.running = False
+            self.last = {
+                "finished_at": time.time(),
+                "duration": time.perf_counter() - started,
+                "samples": samples
+            }
+            self._lock.release()
+        return stacks, samples
+
+    async def profile(self, duration: float, interval: float, include_idle: bool = False) -> Tuple[Counter, int]:
+        """Sample on a worker thread so the event loop keeps serving (and being sampled)"""
+        return await asyncio.to_thread(self.sample, duration, interval, include_idle)
+
+
+def collapsed(stacks: Counter) -> str:
+    """flamegraph.pl / speedscope input, hottest stacks first"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
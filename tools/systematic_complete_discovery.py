@@ -3,20 +3,20 @@
 Systematic complete discovery of all available swap curves for all currencies
 """
 
-import requests
+import argparse
+import asyncio
 import json
-import time
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from yield_curve_db_endpoint import get_database_connection
+from comprehensive_swap_discovery import SwapDiscoveryConfig
+from bulk_upsert import bulk_upsert
+from discovery_checkpoint import DiscoveryCheckpoint
+from discovery_engine import DiscoveryEngine, PatternGenerator, SearchGenerator
 
 BLOOMBERG_API_URL = "http://20.172.249.92:8080"
-HEADERS = {
-    "Authorization": "Bearer test",
-    "Content-Type": "application/json"
-}
 
 # All currencies to check
 ALL_CURRENCIES = [
@@ -41,68 +41,20 @@ REFERENCE_RATES = {
     'BRL': ('SELIC', 'Sistema Especial de Liquidação e Custódia')
 }
 
-def discover_ois_for_currency(currency):
-    """Discover all available OIS tickers for a currency"""
-    try:
-        response = requests.post(
-            f"{BLOOMBERG_API_URL}/api/bloomberg/ticker-discovery",
-            headers=HEADERS,
-            json={
-                "search_type": "ois",
-                "currency": currency,
-                "max_results": 100
-            },
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("tickers", [])
-        else:
-            return []
-            
-    except Exception as e:
-        print(f"❌ Error discovering {currency}: {e}")
-        return []
+def is_ois_name(instrument):
+    """Pattern hits only count when Bloomberg names them as OIS/overnight/index"""
+    name = instrument.description.upper()
+    return 'OIS' in name or 'OVERNIGHT' in name or 'INDEX' in name
 
-def test_ticker_patterns(currency, patterns):
-    """Test specific ticker patterns for a currency"""
-    valid_tickers = []
-    
-    for pattern_batch in [patterns[i:i+10] for i in range(0, len(patterns), 10)]:
-        try:
-            response = requests.post(
-                f"{BLOOMBERG_API_URL}/api/bloomberg/reference",
-                headers=HEADERS,
-                json={
-                    "securities": pattern_batch,
-                    "fields": ["SECURITY_NAME", "PX_LAST"]
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                securities = data.get("data", {}).get("securities_data", [])
-                
-                for sec in securities:
-                    if sec.get("success"):
-                        ticker = sec.get("security")
-                        name = sec.get("fields", {}).get("SECURITY_NAME", "")
-                        if 'OIS' in name.upper() or 'OVERNIGHT' in name.upper() or 'INDEX' in name.upper():
-                            valid_tickers.append({
-                                'ticker': ticker,
-                                'name': name,
-                                'currency': currency
-                            })
-                            print(f"  ✅ Found: {ticker} - {name}")
-            
-            time.sleep(1)  # Rate limiting
-                
-        except Exception as e:
-            print(f"  ❌ Error testing patterns: {e}")
-    
-    return valid_tickers
+async def discover_all(currencies, checkpoint=None):
+    """Discovery endpoint first, pattern-based search where it returns nothing"""
+    generators = [
+        SearchGenerator('ois', [{"search_type": "ois"}]),
+        PatternGenerator('ois', generate_ticker_patterns, keep=is_ois_name, fallback=True)
+    ]
+    config = SwapDiscoveryConfig(bloomberg_api_url=BLOOMBERG_API_URL)
+    async with DiscoveryEngine(config, generators, fields=["SECURITY_NAME", "PX_LAST"], checkpoint=checkpoint) as engine:
+        return await engine.run(currencies)
 
 def generate_ticker_patterns(currency):
     """Generate potential OIS ticker patterns based on currency"""
@@ -165,7 +117,7 @@ def populate_database_complete(all_discoveries):
         cursor.execute("DELETE FROM ticker_reference")
         print(f"Cleared existing ticker_reference data")
         
-        total_added = 0
+        rows = []
         
         for currency, tickers in all_discoveries.items():
             if not tickers:
@@ -182,18 +134,16 @@ def populate_database_complete(all_discoveries):
                 
                 # Determine instrument type
                 inst_type = 'overnight' if 'Index' in ticker and 'RATE' in ticker else 'ois'
-                
-                cursor.execute("""
-                    INSERT INTO ticker_reference 
-                    (bloomberg_ticker, currency_code, instrument_type, curve_name, is_active)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (bloomberg_ticker) DO NOTHING
-                """, (ticker, currency, inst_type, curve_name, True))
-                
-                total_added += 1
+                rows.append((ticker, currency, inst_type, curve_name, True))
         
+        # Same transaction as the DELETE above, so readers never see an empty table
+        counts = bulk_upsert(
+            cursor, "ticker_reference",
+            ["bloomberg_ticker", "currency_code", "instrument_type", "curve_name", "is_active"],
+            rows, conflict=["bloomberg_ticker"], update=[]
+        )
         conn.commit()
-        print(f"\n✅ Successfully added {total_added} tickers to database")
+        print(f"\n✅ Successfully added {counts['inserted']} tickers to database in {counts['seconds']:.2f}s")
         
         # Show final state by currency
         cursor.execute("""
@@ -210,48 +160,46 @@ def populate_database_complete(all_discoveries):
             grand_total += row[1]
         
         print(f"\n🎉 TOTAL TICKERS IN DATABASE: {grand_total}")
+        return True
         
     except Exception as e:
         print(f"❌ Database error: {e}")
         conn.rollback()
+        return False
     finally:
         conn.close()
 
 def main():
     """Complete systematic discovery for all currencies"""
+    parser = argparse.ArgumentParser(description="Systematic complete OIS discovery")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip currencies completed by an interrupted run")
+    args = parser.parse_args()
+    
     print("=== SYSTEMATIC COMPLETE OIS DISCOVERY ===")
     
+    checkpoint = DiscoveryCheckpoint("systematic_complete_discovery", resume=args.resume)
     all_discoveries = {}
+    results = asyncio.run(discover_all(ALL_CURRENCIES, checkpoint))
     
     for currency in ALL_CURRENCIES:
+        result = results[currency]
         print(f"\n{'='*60}")
         print(f"🔍 {currency} - {REFERENCE_RATES.get(currency, ['Unknown', 'Unknown rate'])[1]}")
         print(f"{'='*60}")
         
-        # First try discovery endpoint
-        print(f"\n1. Testing discovery endpoint for {currency}...")
-        discovered = discover_ois_for_currency(currency)
+        for instrument in result.valid:
+            print(f"  ✅ Found: {instrument.ticker} - {instrument.description}")
         
-        if discovered:
-            print(f"  📊 Discovery found {len(discovered)} tickers")
-            all_discoveries[currency] = discovered
+        if result.valid:
+            source = result.valid[0].properties['generator']
+            print(f"  📊 {source} found {len(result.valid)} valid tickers")
+            all_discoveries[currency] = [
+                {'ticker': i.ticker, 'name': i.description, 'currency': currency}
+                for i in result.valid
+            ]
         else:
-            print(f"  ❌ Discovery returned no results")
-            
-            # Try pattern-based search
-            print(f"\n2. Testing pattern-based search for {currency}...")
-            patterns = generate_ticker_patterns(currency)
-            print(f"  📝 Testing {len(patterns)} patterns...")
-            
-            valid_tickers = test_ticker_patterns(currency, patterns)
-            
-            if valid_tickers:
-                print(f"  ✅ Pattern search found {len(valid_tickers)} valid tickers")
-                all_discoveries[currency] = valid_tickers
-            else:
-                print(f"  ❌ No valid OIS tickers found for {currency}")
-        
-        time.sleep(2)  # Rate limiting between currencies
+            print(f"  ❌ No valid OIS tickers found for {currency}")
     
     # Save complete discoveries
     with open('complete_ois_discoveries.json', 'w') as f:
@@ -267,8 +215,10 @@ def main():
         print(f"{currency}: {len(tickers)} tickers")
     
     # Populate database
-    if all_discoveries:
-        populate_database_complete(all_discoveries)
+    # Keep the checkpoint if anything is unfinished so a --resume only redoes that part
+    loaded = not all_discoveries or populate_database_complete(all_discoveries)
+    if loaded and all(result.complete for result in results.values()):
+        checkpoint.clear()
     
     print("\n🎉 SYSTEMATIC DISCOVERY AND POPULATION COMPLETE!")
 
@@ -5,14 +5,19 @@ Focus on currencies and patterns that actually work
 Uses existing database schema and validates with real Bloomberg data
 """
 
+import argparse
+import asyncio
 import requests
 import json
-import time
 import psycopg2
 import logging
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+from comprehensive_swap_discovery import SwapDiscoveryConfig
+from discovery_checkpoint import DiscoveryCheckpoint
+from discovery_engine import CurrencyDiscovery, DiscoveryEngine, PatternGenerator, insert_ticker_reference
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -96,10 +101,11 @@ KNOWN_OIS_PATTERNS = {
 }
 
 class TargetedOISDiscovery:
-    def __init__(self):
+    def __init__(self, resume: bool = False):
         self.valid_tickers = {}
         self.total_discovered = 0
         self.total_valid = 0
+        self.checkpoint = DiscoveryCheckpoint("targeted_ois_discovery", resume=resume)
         
     def test_bloomberg_connection(self) -> bool:
         """Test Bloomberg API connection"""
@@ -147,60 +153,18 @@ class TargetedOISDiscovery:
         # Remove duplicates
         return list(set(candidates))
     
-    def validate_tickers_bulk(self, tickers: List[str]) -> Dict[str, bool]:
-        """Validate multiple tickers efficiently using Bloomberg reference data"""
-        if not tickers:
-            return {}
-            
-        logger.info(f"🔍 Validating {len(tickers)} ticker candidates")
-        
-        validation_results = {}
-        chunk_size = 20  # Conservative chunk size
-        
-        for i in range(0, len(tickers), chunk_size):
-            chunk = tickers[i:i + chunk_size]
-            
-            try:
-                response = requests.post(
-                    f"{BLOOMBERG_API_URL}/api/bloomberg/reference",
-                    headers=HEADERS,
-                    json={
-                        "securities": chunk,
-                        "fields": ["PX_LAST", "SECURITY_NAME", "SECURITY_DES"]
-                    },
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("success"):
-                        for sec_data in data.get("data", {}).get("securities_data", []):
-                            ticker = sec_data.get("security")
-                            is_valid = sec_data.get("success", False) and sec_data.get("fields", {}).get("PX_LAST") is not None
-                            validation_results[ticker] = is_valid
-                            
-                            if is_valid:
-                                price = sec_data.get("fields", {}).get("PX_LAST")
-                                name = sec_data.get("fields", {}).get("SECURITY_NAME", "")
-                                logger.info(f"  ✅ {ticker} = {price} ({name})")
-                            else:
-                                logger.debug(f"  ❌ {ticker} - No data")
-                    else:
-                        logger.error(f"Reference data request failed: {data.get('error', 'Unknown error')}")
-                else:
-                    logger.error(f"Reference data API error: {response.status_code}")
-            
-            except Exception as e:
-                logger.error(f"Error validating chunk: {e}")
-                for ticker in chunk:
-                    validation_results[ticker] = False
-            
-            time.sleep(1)  # Rate limiting
-        
-        valid_count = sum(1 for v in validation_results.values() if v)
-        logger.info(f"📊 Validation complete: {valid_count}/{len(tickers)} valid")
-        
-        return validation_results
+    async def run_discovery(self, currencies: List[str]) -> Dict[str, CurrencyDiscovery]:
+        """Validate every currency's candidates concurrently with the shared discovery engine"""
+        generator = PatternGenerator(
+            'ois',
+            self.generate_ticker_candidates,
+            keep=lambda instrument: instrument.properties.get("PX_LAST") is not None
+        )
+        config = SwapDiscoveryConfig(bloomberg_api_url=BLOOMBERG_API_URL)
+        async with DiscoveryEngine(
+            config, [generator], fields=["PX_LAST", "SECURITY_NAME", "SECURITY_DES"], checkpoint=self.checkpoint
+        ) as engine:
+            return await engine.run(currencies)
     
     def connect_to_database(self):
         """Connect to PostgreSQL database"""
@@ -212,78 +176,18 @@ class TargetedOISDiscovery:
             logger.error(f"❌ Failed to connect to database: {e}")
             return None
     
-    def insert_valid_tickers(self, conn, currency: str, valid_tickers: Dict[str, bool]):
-        """Insert valid tickers into database using existing schema"""
-        inserted_count = 0
-        skipped_count = 0
-        
-        try:
-            with conn.cursor() as cursor:
-                for ticker, is_valid in valid_tickers.items():
-                    if not is_valid:
-                        skipped_count += 1
-                        continue
-                    
-                    # Determine curve name
-                    curve_name = f"{currency}_OIS"
-                    
-                    # Insert or update ticker (using existing schema)
-                    cursor.execute("""
-                        INSERT INTO ticker_reference 
-                        (bloomberg_ticker, currency_code, instrument_type, curve_name, is_active)
-                        VALUES (%s, %s, %s, %s, %s)
-                        ON CONFLICT (bloomberg_ticker) 
-                        DO UPDATE SET 
-                            currency_code = EXCLUDED.currency_code,
-                            instrument_type = EXCLUDED.instrument_type,
-                            curve_name = EXCLUDED.curve_name,
-                            is_active = EXCLUDED.is_active
-                    """, (ticker, currency, 'OIS', curve_name, True))
-                    
-                    inserted_count += 1
-                
-                conn.commit()
-                logger.info(f"✅ Inserted/updated {inserted_count} tickers for {currency}")
-                
-        except Exception as e:
-            logger.error(f"❌ Failed to insert tickers for {currency}: {e}")
-            conn.rollback()
-    
-    def discover_currency_ois(self, currency: str, conn) -> int:
-        """Discover and validate OIS tickers for a specific currency"""
-        logger.info(f"\n{'='*50}")
-        logger.info(f"Discovering OIS tickers for {currency}")
-        logger.info(f"{'='*50}")
-        
-        # Generate ticker candidates
-        candidates = self.generate_ticker_candidates(currency)
-        if not candidates:
-            logger.warning(f"No ticker candidates generated for {currency}")
-            return 0
-        
-        logger.info(f"Generated {len(candidates)} ticker candidates")
-        
-        # Validate candidates
-        validation_results = self.validate_tickers_bulk(candidates)
-        if not validation_results:
-            logger.warning(f"Validation failed for {currency}")
-            return 0
-        
-        # Count valid tickers
-        valid_count = sum(1 for v in validation_results.values() if v)
+    def store_currency_results(self, result: CurrencyDiscovery) -> int:
+        """Record one currency's valid OIS tickers"""
+        currency = result.currency
+        valid_count = len(result.valid)
         
         if valid_count > 0:
             logger.info(f"🎉 Found {valid_count} valid OIS tickers for {currency}")
+            for instrument in result.valid:
+                logger.info(f"  ✅ {instrument.ticker} = {instrument.properties.get('PX_LAST')} ({instrument.description})")
             
             # Store results
-            self.valid_tickers[currency] = {
-                ticker: is_valid 
-                for ticker, is_valid in validation_results.items() 
-                if is_valid
-            }
-            
-            # Insert into database
-            self.insert_valid_tickers(conn, currency, validation_results)
+            self.valid_tickers[currency] = {instrument.ticker: True for instrument in result.valid}
         else:
             logger.warning(f"⚠️  No valid OIS tickers found for {currency}")
         
@@ -310,14 +214,25 @@ class TargetedOISDiscovery:
             currencies = list(KNOWN_OIS_PATTERNS.keys())
             logger.info(f"Processing {len(currencies)} currencies: {', '.join(currencies)}")
             
+            results = asyncio.run(self.run_discovery(currencies))
             for currency in currencies:
-                valid_count = self.discover_currency_ois(currency, conn)
-                self.total_valid += valid_count
-                time.sleep(2)  # Rate limiting between currencies
+                self.total_valid += self.store_currency_results(results[currency])
+            
+            # Insert every currency's valid tickers in one bulk upsert
+            inserted_count = insert_ticker_reference(
+                conn, [instrument for result in results.values() for instrument in result.valid],
+                curve_name=lambda instrument: f"{instrument.currency}_OIS",
+                instrument_type=lambda instrument: 'OIS'
+            )
+            logger.info(f"✅ Inserted/updated {inserted_count} tickers")
             
             # Generate final report
             self.generate_final_report()
             
+            # Completed cleanly - the next run starts fresh
+            if all(result.complete for result in results.values()):
+                self.checkpoint.clear()
+            
         finally:
             conn.close()
             logger.info("✅ Database connection closed")
@@ -387,7 +302,12 @@ class TargetedOISDiscovery:
 
 def main():
     """Main execution function"""
-    discovery = TargetedOISDiscovery()
+    parser = argparse.ArgumentParser(description="Targeted OIS ticker discovery")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip currencies completed by an interrupted run")
+    args = parser.parse_args()
+    
+    discovery = TargetedOISDiscovery(resume=args.resume)
     discovery.discover_all_ois_tickers()
 
 if __name__ == "__main__":
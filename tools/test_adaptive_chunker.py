@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for AIMD chunk sizing, split-retry of failed chunks and persisted state
+
+Run: python -m pytest test_adaptive_chunker.py -q
+"""
+
+import asyncio
+
+import pytest
+
+import adaptive_chunker
+from adaptive_chunker import AdaptiveChunker
+
+TICKERS = [f"T{i} Curncy" for i in range(40)]
+
+
+@pytest.fixture(autouse=True)
+def state_file(tmp_path, monkeypatch):
+    path = tmp_path / "chunker.json"
+    monkeypatch.setattr(adaptive_chunker, "STATE_FILE", path)
+    return path
+
+
+def chunker(**kwargs):
+    return AdaptiveChunker("test", **{"initial_size": 10, "min_size": 2, "max_size": 30, **kwargs})
+
+
+def test_additive_increase_on_fast_full_chunks():
+    c = chunker(initial_concurrency=1, increase=5)
+    for _ in range(4):
+        c.record(c.size, 0.1, True)
+    assert c.size == 30  # 10 -> 15 -> 20 -> 25 -> 30, capped at max_size
+    assert c.concurrency == 2  # One more slot every 4 clean chunks
+
+
+def test_short_chunks_do_not_grow_size():
+    c = chunker()
+    c.record(3, 0.1, True)
+    assert c.size == 10
+
+
+def test_multiplicative_decrease_on_error_and_slow_chunk():
+    c = chunker(initial_concurrency=4, target_latency=1.0)
+    c.record(10, 0.1, False)
+    assert (c.size, c.concurrency, c.stats["errors"]) == (5, 2, 1)
+    c.record(5, 2.0, True)  # Slow but fine: backs off without counting an error
+    assert (c.size, c.concurrency, c.stats["errors"]) == (2, 1, 1)
+    c.record(2, 0.1, False)
+    assert c.size == 2  # Never below min_size
+
+
+def test_failed_chunk_is_split_and_retried_once():
+    c = chunker(initial_concurrency=1)
+    calls = []
+
+    def call(chunk):
+        calls.append(list(chunk))
+        if len(calls) == 1:
+            return {"error": "HTTP 500"}
+        return {"data": chunk}
+
+    results = c.run_sync(TICKERS[:10], call)
+    assert [len(chunk) for chunk in calls] == [10, 5, 5]
+    assert [ticker for result in results for ticker in result["data"]] == TICKERS[:10]
+
+
+def test_retry_failure_is_returned_or_raised():
+    c = chunker(initial_concurrency=1)
+    results = c.run_sync(TICKERS[:4], lambda chunk: {"error": "HTTP 500"})
+    assert results == [{"error": "HTTP 500"}, {"error": "HTTP 500"}]
+
+    def boom(chunk):
+        raise ConnectionError("VM unreachable")
+
+    with pytest.raises(ConnectionError):
+        chunker().run_sync(TICKERS[:4], boom)
+
+
+def test_async_run_respects_concurrency_and_covers_every_item():
+    c = chunker(initial_size=5, initial_concurrency=2, max_concurrency=2)
+    active = peak = 0
+    failed = []
+
+    async def call(chunk):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if "T7 Curncy" in chunk and not failed:
+            failed.append(chunk)
+            return {"error": "HTTP 500"}
+        return {"data": chunk}
+
+    results = asyncio.run(c.run(TICKERS, call))
+    assert peak <= 2 and len(failed) == 1
+    assert sorted(t for r in results for t in r["data"]) == sorted(TICKERS)
+
+
+def test_concurrent_runs_share_the_concurrency_limit():
+    c = chunker(initial_size=5, initial_concurrency=2, max_concurrency=2)
+    active = peak = 0
+
+    async def call(chunk):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return {"data": chunk}
+
+    async def run():
+        batches = await asyncio.gather(*[c.run(TICKERS[i::3], call) for i in range(3)])
+        return [t for results in batches for r in results for t in r["data"]]
+
+    assert sorted(asyncio.run(run())) == sorted(TICKERS)
+    assert peak == 2 and c._active == 0 and c._waiters == []
+
+
+def test_cancelled_run_releases_its_slots():
+    c = chunker(initial_size=5, initial_concurrency=1, max_concurrency=1)
+
+    async def stall(chunk):
+        await asyncio.sleep(10)
+
+    async def quick(chunk):
+        return {"data": chunk}
+
+    async def run():
+        stalled = asyncio.create_task(c.run(TICKERS, stall))
+        waiting = asyncio.create_task(c.run(TICKERS[:5], quick))
+        await asyncio.sleep(0.01)
+        assert c._active == 1 and len(c._waiters) == 1
+        stalled.cancel()
+        return await asyncio.wait_for(waiting, 1)
+
+    assert asyncio.run(run()) == [{"data": TICKERS[:5]}]
+    assert c._active == 0
+
+
+def test_learned_state_is_resumed(state_file):
+    c = chunker()
+    c.record(10, 0.1, True)
+    c.save()
+    resumed = AdaptiveChunker.for_endpoint("test", min_size=2, max_size=30)
+    assert (resumed.size, resumed.concurrency) == (15, c.concurrency)
+    # Saved values are clamped to the new limits
+    assert AdaptiveChunker.for_endpoint("test", max_size=12).size == 12
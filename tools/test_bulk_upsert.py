@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk upsert layer
+
+The round trip against PostgreSQL needs a scratch database and only runs
+when TEST_DATABASE_URL is set (e.g. postgresql://localhost/scratch); every
+table it touches is a session temp table.
+
+Run: TEST_DATABASE_URL=postgresql://localhost/scratch python -m pytest test_bulk_upsert.py -q
+"""
+
+import os
+
+import pytest
+
+from bulk_upsert import bulk_upsert, upsert_in_transaction
+
+DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+class FailingConnection:
+    """Connection whose cursor fails on the first statement"""
+
+    def __init__(self):
+        self.committed = self.rolled_back = False
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement):
+        raise RuntimeError("connection reset")
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+def test_no_rows_skips_the_database():
+    assert bulk_upsert(None, "ticker_reference", ["ticker"], [], conflict=["ticker"]) == {
+        "rows": 0, "inserted": 0, "updated": 0, "seconds": 0.0
+    }
+
+
+def test_failed_write_rolls_back_the_transaction():
+    conn = FailingConnection()
+    with pytest.raises(RuntimeError):
+        upsert_in_transaction(conn, [{"table": "ticker_reference", "columns": ["ticker"], "rows": [("A",)],
+                                      "conflict": ["ticker"]}])
+    assert conn.rolled_back and not conn.committed
+
+
+@pytest.fixture
+def conn():
+    if not DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    import psycopg2
+    conn = psycopg2.connect(DATABASE_URL)
+    with conn.cursor() as cur:
+        cur.execute(
+            "CREATE TEMP TABLE upsert_target (ticker TEXT PRIMARY KEY, currency TEXT, "
+            "description TEXT, updated_at TIMESTAMP)"
+        )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def rows_in(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT ticker, currency, description FROM upsert_target ORDER BY ticker")
+        return cur.fetchall()
+
+
+def test_insert_then_update(conn):
+    columns = ["ticker", "currency", "description"]
+    first = upsert_in_transaction(conn, [{"table": "upsert_target", "columns": columns, "conflict": ["ticker"],
+                                          "rows": [("USSO1 Curncy", "USD", "1Y"), ("EESWE1 Curncy", "EUR", "1Y")]}])
+    assert first["upsert_target"]["inserted"] == 2
+
+    second = upsert_in_transaction(conn, [{"table": "upsert_target", "columns": columns, "conflict": ["ticker"],
+                                           "rows": [("USSO1 Curncy", "USD", "old"), ("USSO1 Curncy", "USD", "OIS 1Y"),
+                                                    ("USSO2 Curncy", "USD", "2Y")]}])
+    # Duplicate keys are collapsed before the merge, last one wins
+    assert (second["upsert_target"]["rows"], second["upsert_target"]["inserted"],
+            second["upsert_target"]["updated"]) == (2, 1, 1)
+    assert rows_in(conn) == [("EESWE1 Curncy", "EUR", "1Y"), ("USSO1 Curncy", "USD", "OIS 1Y"),
+                             ("USSO2 Curncy", "USD", "2Y")]
+
+
+def test_do_nothing_and_touch(conn):
+    columns = ["ticker", "currency", "description"]
+    write = {"table": "upsert_target", "columns": columns, "conflict": ["ticker"]}
+    upsert_in_transaction(conn, [{**write, "rows": [("USSO1 Curncy", "USD", "1Y")]}])
+    upsert_in_transaction(conn, [{**write, "rows": [("USSO1 Curncy", "USD", "changed")], "update": []}])
+    assert rows_in(conn) == [("USSO1 Curncy", "USD", "1Y")]
+
+    upsert_in_transaction(conn, [{**write, "rows": [("USSO1 Curncy", "USD", "1Y")], "update": [],
+                                  "touch": ["updated_at"]}])
+    with conn.cursor() as cur:
+        cur.execute("SELECT updated_at IS NOT NULL FROM upsert_target")
+        assert cur.fetchone() == (True,)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for the upstream circuit breaker and hedged reference calls
+
+The breaker runs on a fake clock; the VM is an httpx transport whose
+per-call delay and status are scripted.
+
+Run: python -m pytest test_circuit_breaker.py -q
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, GuardedTransport, LatencyTracker
+
+REFERENCE = "http://vm/api/bloomberg/reference"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ScriptedVM(httpx.AsyncBaseTransport):
+    """Answers each call after script(call number) -> (delay seconds, status)"""
+
+    def __init__(self, script=lambda n: (0.0, 200)):
+        self.script = script
+        self.calls = 0
+        self.cancelled = 0
+
+    async def handle_async_request(self, request):
+        self.calls += 1
+        delay, status = self.script(self.calls)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return httpx.Response(status, json={"call": self.calls})
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=3, reset_timeout=30, clock=clock)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(2):
+        breaker.acquire()
+        breaker.failure()
+    breaker.acquire()
+    breaker.success()  # A success resets the count
+    for _ in range(3):
+        breaker.acquire()
+        breaker.failure()
+    assert breaker.state == OPEN and breaker.rejecting()
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()
+    assert breaker.stats["rejected"] == 1 and breaker.stats["opened"] == 1
+
+
+def test_half_open_admits_one_probe(breaker, clock):
+    for _ in range(3):
+        breaker.acquire()
+        breaker.failure()
+    clock.now += 30
+    assert not breaker.rejecting() and breaker.retry_in() == 0
+    breaker.acquire()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()  # Second caller while the probe is in flight
+    breaker.success()
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens(breaker, clock):
+    for _ in range(3):
+        breaker.acquire()
+        breaker.failure()
+    clock.now += 30
+    breaker.acquire()
+    breaker.failure()
+    assert breaker.state == OPEN and breaker.retry_in() == 30
+
+
+def test_abandoned_probe_frees_the_slot(breaker, clock):
+    for _ in range(3):
+        breaker.acquire()
+        breaker.failure()
+    clock.now += 30
+    breaker.acquire()
+    breaker.abandon()
+    breaker.acquire()  # Another caller may probe
+    assert breaker.state == HALF_OPEN
+
+
+def test_transport_counts_5xx_and_rejects_when_open(breaker):
+    vm = ScriptedVM(lambda n: (0.0, 500))
+
+    async def run():
+        async with httpx.AsyncClient(transport=GuardedTransport(vm, breaker)) as client:
+            statuses = [(await client.get("http://vm/health")).status_code for _ in range(3)]
+            with pytest.raises(CircuitOpen):
+                await client.get("http://vm/health")
+            return statuses
+
+    assert asyncio.run(run()) == [500, 500, 500]
+    assert vm.calls == 3 and breaker.state == OPEN
+
+
+def test_latency_quantile_needs_history():
+    tracker = LatencyTracker(size=100, min_samples=20)
+    for i in range(19):
+        tracker.add(i / 100)
+    assert tracker.quantile(0.95) is None
+    tracker.add(0.19)
+    assert tracker.quantile(0.95) == 0.18
+
+
+def test_slow_call_is_hedged_and_hedge_wins(breaker):
+    # 20 fast calls build a p95, then call 21 stalls and its hedge (call 22) answers
+    vm = ScriptedVM(lambda n: (1.0, 200) if n == 21 else (0.001, 200))
+    transport = GuardedTransport(vm, breaker, hedge_paths={"/api/bloomberg/reference"}, hedge_min_delay=0.02,
+                                 hedge_max_ratio=0.5)
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            for _ in range(20):
+                await client.post(REFERENCE, json={})
+            started = asyncio.get_running_loop().time()
+            response = await client.post(REFERENCE, json={})
+            return response, asyncio.get_running_loop().time() - started
+
+    response, elapsed = asyncio.run(run())
+    assert response.json() == {"call": 22}
+    assert elapsed < 0.5
+    assert transport.stats["hedged"] == 1 and transport.stats["hedge_wins"] == 1
+    assert vm.cancelled == 1  # The stalled original was cancelled
+
+
+def test_hedge_budget_and_unhedged_paths(breaker):
+    vm = ScriptedVM(lambda n: (0.05, 200) if n > 20 else (0.001, 200))
+    transport = GuardedTransport(vm, breaker, hedge_paths={"/api/bloomberg/reference"}, hedge_min_delay=0.01,
+                                 hedge_max_ratio=0.04)
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            for _ in range(24):
+                await client.post(REFERENCE, json={})
+            await client.get("http://vm/api/bloomberg/historical")
+
+    asyncio.run(run())
+    # Every slow call is due a hedge, but 4% of 24 calls is less than two; historical is never hedged
+    assert transport.stats["hedgeable"] == 24 and transport.stats["hedged"] == 1
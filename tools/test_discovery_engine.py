@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the discovery engine's per-currency pipeline and run checkpoints
+
+The VM's ticker-discovery and reference endpoints are an httpx.MockTransport;
+nothing leaves the process.
+
+Run: python -m pytest test_discovery_engine.py -q
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import adaptive_chunker
+from comprehensive_swap_discovery import SwapDiscoveryConfig
+from discovery_checkpoint import DiscoveryCheckpoint
+from discovery_engine import CandidateGenerator, DiscoveryEngine, PatternGenerator, SearchGenerator
+from validation_cache import ValidationCache
+
+SEARCH_RESULTS = {
+    "USD": [{"ticker": "USSO1 BGN Curncy", "description": "USD OIS 1Y"}, {"ticker": "USSO2 BGN Curncy"}],
+    "EUR": [{"ticker": "EESWE1 BGN Curncy", "description": "EUR OIS 1Y"}],
+}
+DEAD = {"USSO2 BGN Curncy"}
+
+
+class FakeVM:
+    """Searches answer from SEARCH_RESULTS; currencies in `failing` get HTTP 500 (or success=false)"""
+
+    def __init__(self, failing=(), failure="http"):
+        self.failing = set(failing)
+        self.failure = failure
+        self.searches = []
+
+    def __call__(self, request):
+        body = json.loads(request.content)
+        if request.url.path.endswith("/ticker-discovery"):
+            self.searches.append(body["currency"])
+            if body["currency"] in self.failing:
+                if self.failure == "http":
+                    return httpx.Response(500)
+                return httpx.Response(200, json={"success": False, "error": "Bloomberg session down", "tickers": []})
+            return httpx.Response(200, json={"success": True, "tickers": SEARCH_RESULTS.get(body["currency"], [])})
+        return httpx.Response(200, json={"success": True, "data": {"securities_data": [
+            {"security": t, "success": False, "fields": {}} if t in DEAD else
+            {"security": t, "success": True, "fields": {"PX_LAST": 3.5, "SECURITY_NAME": f"{t} name"}}
+            for t in body["securities"]
+        ]}})
+
+
+@pytest.fixture
+def make_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(adaptive_chunker, "STATE_FILE", tmp_path / "chunker.json")
+    engines = []
+
+    def make(vm, generators=None, checkpoint=None):
+        engine = DiscoveryEngine(
+            SwapDiscoveryConfig(bloomberg_api_url="http://vm", requests_per_second=1000, rate_limit_burst=1000),
+            generators or [SearchGenerator("ois", [{"search_type": "ois"}])],
+            checkpoint=checkpoint
+        )
+        engine.session = httpx.AsyncClient(transport=httpx.MockTransport(vm))
+        engine.validation_cache = ValidationCache(path=tmp_path / "validations.sqlite")
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.validation_cache.close()
+
+
+def run(engine, currencies):
+    async def go():
+        async with engine:
+            return await engine.run(currencies)
+    return asyncio.run(go())
+
+
+def test_search_and_validate(make_engine):
+    results = run(make_engine(FakeVM()), ["USD", "EUR"])
+    assert [i.ticker for i in results["USD"].valid] == ["USSO1 BGN Curncy"]
+    assert results["USD"].validation == {"USSO1 BGN Curncy": True, "USSO2 BGN Curncy": False}
+    assert results["EUR"].valid[0].tenor == "1Y"
+    assert all(result.complete for result in results.values())
+
+
+@pytest.mark.parametrize("failure", ["http", "unsuccessful"])
+def test_failed_search_is_not_checkpointed(make_engine, tmp_path, failure):
+    checkpoint = DiscoveryCheckpoint("test", directory=tmp_path)
+    engine = make_engine(FakeVM(failing={"USD"}, failure=failure), checkpoint=checkpoint)
+    results = run(engine, ["USD", "EUR"])
+
+    assert results["USD"].failed_searches == 1 and not results["USD"].complete
+    assert engine.stats["failed_searches"] == 1
+    assert not checkpoint.done("USD")
+    assert checkpoint.done("EUR")
+
+
+def test_resume_skips_completed_currencies(make_engine, tmp_path):
+    first = DiscoveryCheckpoint("test", directory=tmp_path)
+    run(make_engine(FakeVM(failing={"USD"}), checkpoint=first), ["USD", "EUR"])
+
+    vm = FakeVM()
+    resumed = DiscoveryCheckpoint("test", resume=True, directory=tmp_path)
+    results = run(make_engine(vm, checkpoint=resumed), ["USD", "EUR"])
+    assert vm.searches == ["USD"]
+    assert [i.ticker for i in results["EUR"].valid] == ["EESWE1 BGN Curncy"]
+    assert [i.ticker for i in results["USD"].valid] == ["USSO1 BGN Curncy"]
+
+
+def test_fallback_runs_only_when_primary_is_empty(make_engine):
+    fallback = PatternGenerator("ois", lambda currency: [f"{currency}SO1 Curncy"], fallback=True)
+    results = run(make_engine(FakeVM(), [SearchGenerator("ois", [{"search_type": "ois"}]), fallback]), ["USD", "GBP"])
+    assert "GBPSO1 Curncy" in results["GBP"].validation
+    assert "USDSO1 Curncy" not in results["USD"].validation
+
+
+def test_checkpoint_round_trip(tmp_path):
+    checkpoint = DiscoveryCheckpoint("test", directory=tmp_path)
+    checkpoint.put("USD", {"currency": "USD", "candidates": []})
+    assert DiscoveryCheckpoint("test", resume=True, directory=tmp_path).done("USD")
+    assert not DiscoveryCheckpoint("test", directory=tmp_path).done("USD")  # Fresh run without --resume
+    checkpoint.clear()
+    assert not checkpoint.path.exists()
+
+
+def test_unreadable_checkpoint_starts_fresh(tmp_path):
+    (tmp_path / "test.checkpoint.json").write_text("{truncated")
+    assert DiscoveryCheckpoint("test", resume=True, directory=tmp_path).state["completed"] == {}
+
+
+def test_generator_without_generate_fails_at_construction():
+    class Incomplete(CandidateGenerator):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the forward coverage diff and carry-forward of errored pairs
+
+Run: python -m pytest test_forward_coverage.py -q
+"""
+
+import copy
+
+from currency_forward_coverage_analysis import ForwardDataAnalyzer, diff_coverage, has_changes
+
+
+def ok(pair, tenors, spot=True, price=1.0):
+    return {"pair": pair, "has_spot": spot, "available_forwards": tenors, "data_points": {"SPOT": price}}
+
+
+PREVIOUS = {
+    "categories": {"partial_short": ["EURUSD", "USDINR"], "spot_only": ["USDKRW"], "no_data": ["USDARS"]},
+    "detailed_results": {
+        "EURUSD": ok("EURUSD", ["1M", "3M"]),
+        "USDINR": ok("USDINR", ["1W", "1M"]),
+        "USDKRW": ok("USDKRW", []),
+        "USDARS": ok("USDARS", [], spot=False),
+    },
+}
+
+
+def snapshot(categories, results):
+    return {"summary": {"total_pairs": len(results)}, "categories": categories, "detailed_results": results}
+
+
+def test_unchanged_coverage_ignores_prices():
+    current = copy.deepcopy(PREVIOUS)
+    for result in current["detailed_results"].values():
+        result["data_points"]["SPOT"] = 2.0
+    assert not has_changes(diff_coverage(PREVIOUS, current))
+
+
+def test_tenor_spot_and_category_changes():
+    current = snapshot(
+        {"partial_long": ["EURUSD"], "partial_short": ["USDINR", "USDKRW"], "spot_only": ["USDARS"]},
+        {
+            "EURUSD": ok("EURUSD", ["3M", "2Y", "1M"]),
+            "USDINR": ok("USDINR", ["1M"]),
+            "USDKRW": ok("USDKRW", ["1W"]),
+            "USDARS": ok("USDARS", []),
+        },
+    )
+    diff = diff_coverage(PREVIOUS, current)
+    assert diff["gained_tenors"] == {"EURUSD": ["2Y"], "USDKRW": ["1W"]}
+    assert diff["lost_tenors"] == {"USDINR": ["1W"]}
+    assert diff["spot_changes"] == {"USDARS": True}
+    assert diff["category_changes"] == {
+        "EURUSD": ["partial_short", "partial_long"], "USDKRW": ["spot_only", "partial_short"],
+        "USDARS": ["no_data", "spot_only"],
+    }
+    assert has_changes(diff)
+
+
+def test_tenors_are_listed_in_curve_order():
+    current = snapshot(PREVIOUS["categories"], {**PREVIOUS["detailed_results"],
+                                                "EURUSD": ok("EURUSD", ["5Y", "1M", "3M", "1W", "18M"])})
+    assert diff_coverage(PREVIOUS, current)["gained_tenors"] == {"EURUSD": ["1W", "18M", "5Y"]}
+
+
+def test_errors_new_and_removed_pairs():
+    current = snapshot(
+        {"partial_short": ["EURUSD"], "no_data": ["USDARS"], "spot_only": ["USDCLP"]},
+        {
+            "EURUSD": ok("EURUSD", ["1M", "3M"]),
+            "USDINR": {"pair": "USDINR", "status": "error"},
+            "USDARS": ok("USDARS", [], spot=False),
+            "USDCLP": ok("USDCLP", []),
+        },
+    )
+    diff = diff_coverage(PREVIOUS, current)
+    # An errored pair is not lost coverage
+    assert diff["errors"] == ["USDINR"] and "USDINR" not in diff["lost_tenors"]
+    assert diff["new_pairs"] == ["USDCLP"]
+    assert diff["removed_pairs"] == ["USDKRW"]
+    assert not diff["category_changes"]
+
+    assert not has_changes({**diff, "new_pairs": [], "removed_pairs": []})  # Errors alone are no change
+
+
+def test_carry_forward_keeps_the_last_known_result():
+    current = snapshot(
+        {"partial_short": ["EURUSD"], "spot_only": [], "no_data": ["USDARS"]},
+        {
+            "EURUSD": ok("EURUSD", ["1M", "3M"]),
+            "USDINR": {"pair": "USDINR", "status": "error"},
+            "USDKRW": {"pair": "USDKRW", "status": "error"},
+            "USDARS": ok("USDARS", [], spot=False),
+            "USDCLP": {"pair": "USDCLP", "status": "error"},      # Never seen before - nothing to carry
+        },
+    )
+    ForwardDataAnalyzer().carry_forward(PREVIOUS, current, ["USDINR", "USDKRW", "USDCLP"])
+
+    assert current["detailed_results"]["USDINR"] == PREVIOUS["detailed_results"]["USDINR"]
+    assert current["detailed_results"]["USDCLP"] == {"pair": "USDCLP", "status": "error"}
+    assert current["categories"]["partial_short"] == ["EURUSD", "USDINR"]
+    assert current["categories"]["spot_only"] == ["USDKRW"]
+    assert current["summary"]["categories"] == {"partial_short": 2, "spot_only": 1, "no_data": 1}
+    # Carrying forward twice does not duplicate a pair
+    ForwardDataAnalyzer().carry_forward(PREVIOUS, current, ["USDINR"])
+    assert current["categories"]["partial_short"] == ["EURUSD", "USDINR"]
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for NDF-aware forward curve resolution and pip scaling
+
+Run: python -m pytest test_forward_curves.py -q
+"""
+
+import json
+
+import pytest
+
+from forward_curves import DEFAULT_PIP_FACTOR, ForwardCurveTable, pip_factor, verified_tickers
+
+NDF_TICKERS = [
+    "IRN1M Curncy", "IRN12M Curncy",   # 12M files under the 1Y pillar
+    "KWN1W Curncy",
+    "CLN1M Curncy",                    # CLN is COP, not CLP
+    "IRN7M Curncy",                    # No 7M pillar in the table
+    "EURUSD1M Curncy",                 # Deliverable - not an NDF
+]
+
+
+@pytest.fixture
+def table():
+    return ForwardCurveTable(NDF_TICKERS, tenors=["1W", "1M", "1Y"])
+
+
+def response(values):
+    """Reference response with PX_LAST/PX_BID/PX_ASK = value, value - 1, value + 1"""
+    return {"data": {"securities_data": [
+        {"security": ticker, "success": True, "fields": {"PX_LAST": v, "PX_BID": v - 1, "PX_ASK": v + 1}}
+        for ticker, v in values.items()
+    ] + [{"security": "USDINR1W Curncy", "success": False, "fields": {"PX_LAST": 99.0}}]}}
+
+
+@pytest.mark.parametrize("pair, factor", [
+    ("EURUSD", DEFAULT_PIP_FACTOR), ("GBPUSD", 10000), ("USDJPY", 100), ("EURJPY", 100), ("usdczk", 1000),
+    ("USDKRW", 1), ("USDCLP", 1), ("USDINR", 100),
+])
+def test_pip_factor_follows_the_quote_currency(pair, factor):
+    assert pip_factor(pair) == factor
+
+
+def test_verified_ndf_tickers_replace_outrights(table):
+    assert table.resolve("usdinr") == {"1W": "USDINR1W Curncy", "1M": "IRN1M Curncy", "1Y": "IRN12M Curncy"}
+    assert table.resolve("USDKRW")["1W"] == "KWN1W Curncy"
+    assert table.resolve("USDCOP")["1M"] == "CLN1M Curncy"
+    assert table.resolve("USDCLP")["1M"] == "USDCLP1M Curncy"
+    assert table.resolve("EURUSD") == {"1W": "EURUSD1W Curncy", "1M": "EURUSD1M Curncy", "1Y": "EURUSD1Y Curncy"}
+    assert table.is_ndf("USDINR") and not table.is_ndf("EURUSD")
+
+
+def test_tickers_are_one_deduplicated_list(table):
+    assert table.tickers(["USDINR", "usdinr", "EURUSD"], tenors=["1M"]) == [
+        "USDINR Curncy", "IRN1M Curncy", "EURUSD Curncy", "EURUSD1M Curncy"
+    ]
+
+
+def test_matrix_grids(table):
+    matrix = table.matrix(["USDINR", "USDJPY"], response({
+        "USDINR Curncy": 83.0, "IRN1M Curncy": 0.25, "IRN12M Curncy": 1.5,
+        "USDJPY Curncy": 150.0, "USDJPY1M Curncy": -50.0,
+    }))
+    assert matrix["pip_factors"] == [100, 100] and matrix["ndf"] == [True, False]
+    assert matrix["tickers"][0] == ["USDINR1W Curncy", "IRN1M Curncy", "IRN12M Curncy"]
+    assert matrix["spot"] == [83.0, 150.0]
+    assert matrix["points"] == [[None, 0.25, 1.5], [None, -50.0, None]]  # Failed and missing pillars are None
+    assert matrix["bid_points"][1][1] == -51.0 and matrix["ask_points"][0][2] == 2.5
+
+
+def test_matrix_only_builds_requested_fields(table):
+    matrix = table.matrix(["EURUSD"], response({"EURUSD Curncy": 1.1}), fields=["PX_LAST"])
+    assert "points" in matrix and "bid_points" not in matrix and "spot_ask" not in matrix
+
+
+def test_snapshots_are_read_from_every_section(tmp_path):
+    mapping = tmp_path / "mapping.json"
+    mapping.write_text(json.dumps({
+        "detailed_results": {"USDINR": {"tickers": [{"ticker": "IRN1M Curncy"}, {"note": "no ticker"}]}},
+        "ticker_formats": {"KWN": {"working_tickers": ["KWN1W Curncy"]}},
+    }))
+    assert verified_tickers(json.loads(mapping.read_text())) == ["IRN1M Curncy", "KWN1W Curncy"]
+
+    table = ForwardCurveTable.from_files(mapping, tmp_path / "missing.json")
+    assert table.resolve("USDINR")["1M"] == "IRN1M Curncy" and table.resolve("USDKRW")["1W"] == "KWN1W Curncy"
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for vectorized forward outrights and the per-snapshot block cache
+
+Run: python -m pytest test_forward_outrights.py -q
+"""
+
+import math
+
+import pytest
+
+from forward_outrights import OutrightBlock, OutrightCache
+
+
+def matrix(timestamp="2026-01-02T10:00:00"):
+    return {
+        "pairs": ["EURUSD", "USDJPY"],
+        "tenors": ["1M", "1Y"],
+        "timestamp": timestamp,
+        "spot": [1.1, 150.0],
+        "spot_bid": [1.0999, None],          # USDJPY has no quote-side spot
+        "spot_ask": [1.1001, None],
+        "pip_factors": [10000, 100],
+        "points": [[25.0, 300.0], [-50.0, None]],
+        "bid_points": [[24.0, 298.0], [-51.0, None]],
+        "ask_points": [[26.0, 302.0], [-49.0, None]],
+    }
+
+
+def test_outrights_match_the_scalar_formula():
+    block = OutrightBlock.from_matrix(matrix())
+    assert block.outright[0, 0] == pytest.approx(1.1 + 25 / 10000)
+    assert block.outright[1, 0] == pytest.approx(150.0 - 0.5)
+    assert block.net_pct[0, 1] == pytest.approx(0.03 / 1.1 * 100)
+    # Annualised over 365 / 365.25 years
+    assert block.carry[0, 1] == pytest.approx(((1.13 / 1.1) ** (365.25 / 365) - 1) * 100)
+
+
+def test_bid_ask_fall_back_to_mid_spot():
+    block = OutrightBlock.from_matrix(matrix())
+    assert block.bid[0, 0] == pytest.approx(1.0999 + 24 / 10000)
+    assert block.ask[1, 0] == pytest.approx(150.0 - 0.49)
+
+
+def test_missing_pillars_are_none_in_output():
+    block = OutrightBlock.from_matrix(matrix())
+    assert math.isnan(block.outright[1, 1])
+    data = block.to_dict()
+    assert data["outright"][1][1] is None and data["carry"][1][1] is None
+    assert data["snapshot"] == "2026-01-02T10:00:00"
+
+
+def test_long_columns():
+    columns = OutrightBlock.from_matrix(matrix()).to_columns()
+    assert columns["pair"] == ["EURUSD", "EURUSD", "USDJPY", "USDJPY"]
+    assert columns["tenor"] == ["1M", "1Y", "1M", "1Y"]
+    assert columns["spot"] == [1.1, 1.1, 150.0, 150.0]
+    assert columns["outright"][3] is None
+
+
+def test_missing_optional_grids_become_nan():
+    data = {key: value for key, value in matrix().items() if key not in ("bid_points", "spot_bid")}
+    block = OutrightBlock.from_matrix(data)
+    assert block.to_dict()["bid"] == [[None, None], [None, None]]
+    assert block.ask[0, 0] == pytest.approx(1.1001 + 26 / 10000)
+
+
+def test_cache_reuses_blocks_per_snapshot():
+    cache = OutrightCache(max_blocks=2)
+    first = cache.get("fwd_all", matrix())
+    assert cache.get("fwd_all", matrix()) is first
+    assert cache.get("fwd_all", matrix("2026-01-02T10:15:00")) is not first
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    cache.get("fwd_eur", matrix())  # Third snapshot evicts the least recently used
+    cache.get("fwd_all", matrix())
+    assert cache.misses == 4
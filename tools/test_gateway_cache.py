@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the enhanced gateway's response and stale caches
+
+The upstream VM is an httpx.MockTransport behind the gateway's real
+breaker / chunker / batcher path, and the gateway is called in-process
+through httpx.ASGITransport.
+
+Run: python -m pytest test_gateway_cache.py -q
+"""
+
+import asyncio
+import importlib.util
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+
+from adaptive_chunker import AdaptiveChunker
+from circuit_breaker import CircuitBreaker, GuardedTransport
+from reference_batcher import ReferenceBatcher
+from ticker_routing import TickerRouter
+
+TOOLS_DIR = Path(__file__).resolve().parent
+
+
+class FakeVM:
+    """Reference endpoint answering every security, or 500 while `failing` matches a chunk"""
+
+    def __init__(self):
+        self.failing = lambda securities: False
+
+    def __call__(self, request):
+        securities = json.loads(request.content)["securities"]
+        if self.failing(securities):
+            return httpx.Response(500, json={"error": "boom"})
+        return httpx.Response(200, json={"success": True, "data": {"securities_data": [
+            {"security": ticker, "success": True, "fields": {"PX_LAST": 1.0, "PX_BID": 0.9, "PX_ASK": 1.1}}
+            for ticker in securities
+        ]}})
+
+
+@pytest.fixture(scope="module")
+def gateway():
+    spec = importlib.util.spec_from_file_location("bloomberg_gateway_enhanced", TOOLS_DIR / "bloomberg-gateway-enhanced.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def vm(gateway, tmp_path, monkeypatch):
+    vm = FakeVM()
+    breaker = CircuitBreaker("test", failure_threshold=1000)
+    monkeypatch.setattr(gateway, "ENABLE_CACHE", True)
+    monkeypatch.setattr(gateway, "cache_manager", gateway.CacheManager())
+    monkeypatch.setattr(gateway, "ticker_router", TickerRouter(path=tmp_path / "routes.json"))
+    monkeypatch.setattr(gateway, "upstream_breaker", breaker)
+    monkeypatch.setattr(gateway, "http_client", httpx.AsyncClient(
+        transport=GuardedTransport(httpx.MockTransport(vm), breaker)
+    ))
+    monkeypatch.setattr(gateway, "reference_chunker", AdaptiveChunker("test", initial_size=5, min_size=5))
+    monkeypatch.setattr(gateway, "reference_batcher", ReferenceBatcher(gateway.post_reference))
+    return vm
+
+
+def get(gateway, path):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=gateway.app), base_url="http://gateway") as client:
+            return (await client.get(path)).json()
+    return asyncio.run(run())
+
+
+def test_partial_surface_is_served_but_not_cached(gateway, vm):
+    complete = get(gateway, "/api/volatility/EURUSD")
+    assert complete["metadata"]["source"] == "BLOOMBERG_LIVE"
+    assert complete["metadata"]["partial"] is False
+
+    vm.failing = lambda securities: any("1M" in ticker for ticker in securities)
+    partial = get(gateway, "/api/volatility/EURUSD?force_fresh=true")
+    assert partial["metadata"]["source"] == "BLOOMBERG_PARTIAL"
+    assert partial["metadata"]["partial"] is True
+
+    # The complete surface is still the cached and the stale copy
+    assert get(gateway, "/api/volatility/EURUSD")["data"]["timestamp"] == complete["data"]["timestamp"]
+    vm.failing = lambda securities: True
+    stale = get(gateway, "/api/volatility/EURUSD?force_fresh=true")
+    assert stale["metadata"]["source"] == "CACHE_STALE"
+    assert stale["data"]["timestamp"] == complete["data"]["timestamp"]
+
+
+def test_partial_forward_matrix_is_not_cached(gateway, vm):
+    vm.failing = lambda securities: any(ticker.startswith("EUR") for ticker in securities)
+    partial = get(gateway, "/api/forwards?pairs=EURUSD,USDJPY")
+    assert partial["metadata"]["source"] == "BLOOMBERG_PARTIAL"
+    assert partial["metadata"]["partial"] is True
+
+    vm.failing = lambda securities: False
+    complete = get(gateway, "/api/forwards?pairs=EURUSD,USDJPY")
+    assert complete["metadata"]["source"] == "BLOOMBERG_LIVE"
+    assert get(gateway, "/api/forwards?pairs=EURUSD,USDJPY")["metadata"]["source"] == "CACHE"
+
+
+def test_stale_entries_expire(gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "ENABLE_CACHE", True)
+    monkeypatch.setattr(gateway, "STALE_CACHE_TTL", 60)
+    cache = gateway.CacheManager()
+    asyncio.run(cache.set("vol_EURUSD", {"pair": "EURUSD"}))
+    assert asyncio.run(cache.get_stale("vol_EURUSD")) == {"pair": "EURUSD"}
+
+    value, stored_at = cache.stale["vol_EURUSD"]
+    cache.stale["vol_EURUSD"] = (value, stored_at - gateway.timedelta(seconds=61))
+    assert asyncio.run(cache.get_stale("vol_EURUSD")) is None
+    assert "vol_EURUSD" not in cache.stale
+
+
+def test_stale_cache_is_bounded_lru(gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "ENABLE_CACHE", True)
+    monkeypatch.setattr(gateway, "STALE_CACHE_MAX_ENTRIES", 2)
+    cache = gateway.CacheManager()
+
+    async def run():
+        await cache.set("a", {"key": "a"})
+        await cache.set("b", {"key": "b"})
+        await cache.get_stale("a")  # Recently used - "b" is now the oldest
+        await cache.set("c", {"key": "c"})
+        return [await cache.get_stale(key) for key in "abc"]
+
+    assert asyncio.run(run()) == [{"key": "a"}, None, {"key": "c"}]
+    assert len(cache.stale) == 2
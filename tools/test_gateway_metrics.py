@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Tests for the gateway Prometheus metrics
+
+A small FastAPI app stands in for the gateway; upstream calls go through
+MeteredTransport over an httpx.MockTransport. Metrics live in the default
+registry, so each test uses its own routes and endpoints.
+
+Run: python -m pytest test_gateway_metrics.py -q
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+
+from gateway_metrics import MeteredTransport, instrument, route_template
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/api/volatility/{pair}")
+    async def volatility(pair: str):
+        return {"pair": pair}
+
+    @app.post("/api/cache/clear")
+    async def clear():
+        return {}
+
+    @app.get("/api/boom")
+    async def boom():
+        raise ValueError("boom")
+
+    instrument(app)
+    return app
+
+
+def call(app, method, path):
+    async def run():
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            return await client.request(method, path)
+
+    return asyncio.run(run())
+
+
+def test_route_template_labels():
+    app = make_app()
+    scope = {"type": "http", "method": "GET", "path": "/api/volatility/EURUSD", "root_path": ""}
+    assert route_template(app.routes, scope) == "/api/volatility/{pair}"
+    assert route_template(app.routes, {**scope, "path": "/api/cache/clear"}) == "/api/cache/clear"  # 405
+    assert route_template(app.routes, {**scope, "path": "/nowhere"}) == "unmatched"
+
+
+def test_requests_are_labelled_by_template_and_status():
+    app = make_app()
+    route = "/api/volatility/{pair}"
+    before = sample("gateway_request_duration_seconds_count", method="GET", route=route, status="200")
+    assert call(app, "GET", "/api/volatility/EURUSD").status_code == 200
+    assert call(app, "GET", "/api/volatility/USDJPY").status_code == 200
+    assert sample("gateway_request_duration_seconds_count", method="GET", route=route, status="200") == before + 2
+    assert sample("gateway_requests_in_flight", route=route) == 0
+
+    assert call(app, "GET", "/api/cache/clear").status_code == 405
+    assert sample("gateway_request_duration_seconds_count", method="GET", route="/api/cache/clear", status="405") >= 1
+
+
+def test_exceptions_are_labelled_500():
+    app = make_app()
+    errors = sample("gateway_errors_total", where="request", type="ValueError")
+    assert call(app, "GET", "/api/boom").status_code == 500
+    assert sample("gateway_request_duration_seconds_count", method="GET", route="/api/boom", status="500") == 1
+    assert sample("gateway_errors_total", where="request", type="ValueError") == errors + 1
+    assert sample("gateway_requests_in_flight", route="/api/boom") == 0
+
+
+def test_metrics_endpoint():
+    response = call(make_app(), "GET", "/metrics")
+    assert response.status_code == 200
+    assert "gateway_request_duration_seconds" in response.text
+
+
+def test_upstream_call_is_timed_until_the_body_is_read():
+    endpoint = "/api/bloomberg/reference"
+    seen = {}
+
+    def handler(request):
+        seen["in_flight"] = sample("gateway_upstream_in_flight", endpoint=endpoint)
+        return httpx.Response(200, json={"data": {}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=MeteredTransport(httpx.MockTransport(handler))) as client:
+            async with client.stream("POST", f"http://vm{endpoint}", json={"securities": ["A", "B"]}) as response:
+                seen["reading"] = sample("gateway_upstream_in_flight", endpoint=endpoint)
+                await response.aread()
+
+    before = sample("gateway_upstream_duration_seconds_count", endpoint=endpoint, status="200")
+    asyncio.run(run())
+    assert seen == {"in_flight": 1, "reading": 1}
+    assert sample("gateway_upstream_in_flight", endpoint=endpoint) == 0
+    assert sample("gateway_upstream_duration_seconds_count", endpoint=endpoint, status="200") == before + 1
+    assert sample("gateway_upstream_securities_sum", endpoint=endpoint) >= 2
+
+
+def test_upstream_errors_and_cancellation_release_the_gauge():
+    class Transport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            if request.url.path == "/down":
+                raise httpx.ConnectError("refused")
+            await asyncio.sleep(10)
+
+    async def run():
+        async with httpx.AsyncClient(transport=MeteredTransport(Transport())) as client:
+            try:
+                await client.get("http://vm/down")
+            except httpx.ConnectError:
+                pass
+            task = asyncio.create_task(client.get("http://vm/slow"))
+            await asyncio.sleep(0.01)
+            in_flight = sample("gateway_upstream_in_flight", endpoint="/slow")
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return in_flight
+
+    assert asyncio.run(run()) == 1
+    assert sample("gateway_upstream_in_flight", endpoint="/slow") == 0
+    assert sample("gateway_upstream_duration_seconds_count", endpoint="/slow", status="cancelled") == 1
+    assert sample("gateway_upstream_in_flight", endpoint="/down") == 0
+    assert sample("gateway_upstream_duration_seconds_count", endpoint="/down", status="error") == 1
+    assert sample("gateway_errors_total", where="upstream", type="ConnectError") >= 1
+
+
+def test_abandoned_body_read_releases_the_gauge():
+    class SlowBody(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield b"{"
+            await asyncio.sleep(10)
+            yield b"}"
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=SlowBody()))
+
+    async def run():
+        async with httpx.AsyncClient(transport=MeteredTransport(transport)) as client:
+            task = asyncio.create_task(client.get("http://vm/body"))
+            await asyncio.sleep(0.01)
+            in_flight = sample("gateway_upstream_in_flight", endpoint="/body")
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return in_flight
+
+    assert asyncio.run(run()) == 1
+    assert sample("gateway_upstream_in_flight", endpoint="/body") == 0
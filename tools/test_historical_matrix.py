@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for aligning historical series onto a shared date index
+
+Run: python -m pytest test_historical_matrix.py -q
+"""
+
+from historical_matrix import align_historical, extract_series, matrix_to_columns
+
+SERIES = {
+    "EURUSD Curncy": [
+        {"date": "2026-01-05", "PX_LAST": 1.10, "PX_HIGH": 1.11},
+        {"date": "2026-01-02", "PX_LAST": 1.09},
+    ],
+    "USDJPY Curncy": [
+        {"date": "2026-01-06", "PX_LAST": 150.0, "PX_HIGH": 151.0},
+        {"date": "2026-01-05", "PX_LAST": None},
+        {"PX_LAST": 99.0},                                  # No date - dropped
+    ],
+}
+
+
+def test_dates_are_the_sorted_union():
+    matrix = align_historical(SERIES, ["EURUSD Curncy", "USDJPY Curncy", "GBPUSD Curncy"], ["PX_LAST"])
+    assert matrix["dates"] == ["2026-01-02", "2026-01-05", "2026-01-06"]
+    assert matrix["values"]["PX_LAST"] == [
+        [1.09, None, None],
+        [1.10, None, None],   # An explicit None stays missing
+        [None, 150.0, None],  # GBPUSD has no series at all
+    ]
+
+
+def test_one_matrix_per_field():
+    matrix = align_historical(SERIES, ["USDJPY Curncy", "EURUSD Curncy"], ["PX_LAST", "PX_HIGH"])
+    assert matrix["values"]["PX_HIGH"] == [[None, None], [None, 1.11], [151.0, None]]
+    assert matrix["values"]["PX_LAST"][1] == [None, 1.10]
+
+
+def test_single_field_columns_use_the_bare_security():
+    columns = matrix_to_columns(align_historical(SERIES, ["EURUSD Curncy", "USDJPY Curncy"], ["PX_LAST"]))
+    assert list(columns) == ["date", "EURUSD Curncy", "USDJPY Curncy"]
+    assert columns["USDJPY Curncy"] == [None, None, 150.0]
+
+
+def test_multi_field_columns_and_duplicates():
+    matrix = align_historical(SERIES, ["EURUSD Curncy", "EURUSD Curncy"], ["PX_LAST", "PX_HIGH", "PX_LAST"])
+    assert matrix["fields"] == ["PX_LAST", "PX_HIGH"] and matrix["securities"] == ["EURUSD Curncy"]
+    assert list(matrix_to_columns(matrix)) == ["date", "EURUSD Curncy|PX_LAST", "EURUSD Curncy|PX_HIGH"]
+
+    # A field repeated on its own is still one field, so columns stay bare
+    repeated = align_historical(SERIES, ["EURUSD Curncy"], ["PX_LAST", "PX_LAST"])
+    assert list(matrix_to_columns(repeated)) == ["date", "EURUSD Curncy"]
+
+
+def test_extract_series():
+    assert extract_series({"success": True, "data": {"data": [{"date": "2026-01-02"}]}}) == [{"date": "2026-01-02"}]
+    assert extract_series({"success": False, "data": {"data": [{"date": "2026-01-02"}]}}) == []
+    assert extract_series({"success": True, "data": None}) == []
+    assert extract_series(None) == []
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared quote stream hub
+
+The upstream is a fake fetch that answers from a dict of current prices
+and records which tickers each poll asked for.
+
+Run: python -m pytest test_quote_stream.py -q
+"""
+
+import asyncio
+import importlib.util
+from pathlib import Path
+
+from quote_stream import QuoteStreamHub
+
+TOOLS_DIR = Path(__file__).resolve().parent
+
+
+class FakeFetch:
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    async def __call__(self, tickers, fields):
+        self.calls.append(sorted(tickers))
+        return {"data": {"securities_data": [
+            {"security": t, "success": True, "fields": {"PX_LAST": self.prices[t]}}
+            if t in self.prices else {"security": t, "success": False, "fields": {}}
+            for t in tickers
+        ]}}
+
+
+def test_refcounts_across_subscriptions():
+    async def run():
+        hub = QuoteStreamHub(FakeFetch({}), ["PX_LAST"], interval=60)
+        first = hub.subscribe(["A", "B"])
+        second = hub.subscribe(["B", "C"])
+        union = sorted(hub.tickers)
+        hub.unsubscribe(first)
+        after_first = sorted(hub.tickers)
+        running = hub._task is not None
+        hub.unsubscribe(second)
+        return union, after_first, running, hub.tickers, hub._task
+
+    union, after_first, running, tickers, task = asyncio.run(run())
+    assert union == ["A", "B", "C"]
+    assert after_first == ["B", "C"]  # B is still watched by the second subscription
+    assert running
+    assert tickers == [] and task is None
+
+
+def test_poll_loop_covers_the_union_and_stops_with_the_last_subscriber():
+    fetch = FakeFetch({"A": 1.0, "B": 2.0, "C": 3.0})
+
+    async def run():
+        hub = QuoteStreamHub(fetch, ["PX_LAST"], interval=0.01)
+        first = hub.subscribe(["A", "B"])
+        second = hub.subscribe(["B", "C"])
+        await asyncio.sleep(0.05)
+        task = hub._task
+        hub.unsubscribe(first)
+        hub.unsubscribe(second)
+        await asyncio.sleep(0)
+        polls = hub.polls
+        await asyncio.sleep(0.05)
+        return task, polls, hub.polls
+
+    task, polls, later = asyncio.run(run())
+    assert fetch.calls[0] == ["A", "B", "C"]  # One call for both subscriptions
+    assert task.cancelled()
+    assert later == polls
+
+
+def test_only_changed_tickers_are_pushed():
+    fetch = FakeFetch({"A": 1.0, "B": 2.0})
+
+    async def run():
+        hub = QuoteStreamHub(fetch, ["PX_LAST"], interval=60)
+        subscription = hub.subscribe(["A", "B"])
+        await hub.poll_once()
+        first = await subscription.next_changes(timeout=0.1)
+        fetch.prices["B"] = 2.5
+        await hub.poll_once()
+        second = await subscription.next_changes(timeout=0.1)
+        await hub.poll_once()
+        third = await subscription.next_changes(timeout=0.1)
+        await hub.close()
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first == {"A": {"PX_LAST": 1.0}, "B": {"PX_LAST": 2.0}}
+    assert second == {"B": {"PX_LAST": 2.5}}
+    assert third == {}
+
+
+def test_pending_updates_coalesce_for_slow_consumers():
+    fetch = FakeFetch({"A": 1.0, "B": 2.0})
+
+    async def run():
+        hub = QuoteStreamHub(fetch, ["PX_LAST"], interval=60)
+        subscription = hub.subscribe(["A", "B"])
+        await hub.poll_once()
+        for price in (1.1, 1.2, 1.3):
+            fetch.prices["A"] = price
+            await hub.poll_once()
+        changes = await subscription.next_changes(timeout=0.1)
+        await hub.close()
+        return changes
+
+    # Four polls, one delivery holding only the latest value of each ticker
+    assert asyncio.run(run()) == {"A": {"PX_LAST": 1.3}, "B": {"PX_LAST": 2.0}}
+
+
+def test_new_subscribers_get_known_values_and_failures_are_skipped():
+    fetch = FakeFetch({"A": 1.0})
+
+    async def run():
+        hub = QuoteStreamHub(fetch, ["PX_LAST"], interval=60)
+        hub.subscribe(["A", "MISSING"])
+        await hub.poll_once()
+        late = hub.subscribe(["A"])
+        changes = await late.next_changes(timeout=0.1)
+        latest = dict(hub.latest)
+        await hub.close()
+        return changes, latest
+
+    changes, latest = asyncio.run(run())
+    assert changes == {"A": {"PX_LAST": 1.0}}
+    assert "MISSING" not in latest
+
+
+def test_blank_tickers_are_dropped():
+    spec = importlib.util.spec_from_file_location("bloomberg_gateway_enhanced", TOOLS_DIR / "bloomberg-gateway-enhanced.py")
+    gateway = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gateway)
+
+    assert gateway.stream_tickers(" EURUSD Curncy, ,GBPUSD Curncy ,") == ["EURUSD Curncy", "GBPUSD Curncy"]
+    assert gateway.stream_tickers(["EURUSD Curncy ", "", None, 5]) == ["EURUSD Curncy"]
+    assert gateway.stream_tickers(None) == []
+
+    async def run():
+        hub = QuoteStreamHub(FakeFetch({}), ["PX_LAST"], interval=60)
+        subscription = hub.subscribe(["A", ""])
+        hub.update(subscription, ["", "B"])
+        tickers = hub.tickers
+        await hub.close()
+        return tickers
+
+    assert asyncio.run(run()) == ["B"]
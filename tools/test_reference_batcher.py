@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for reference micro-batching and merging chunked reference responses
+
+Run: python -m pytest test_reference_batcher.py -q
+"""
+
+import asyncio
+import gc
+
+from reference_batcher import ReferenceBatcher, demultiplex, merge_reference_responses
+
+
+def answer(securities, fields):
+    return {"success": True, "data": {"securities_data": [
+        {"security": ticker, "success": True, "fields": {field: f"{ticker}:{field}" for field in fields}}
+        for ticker in securities
+    ]}}
+
+
+class FakeSend:
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = []
+
+    async def __call__(self, securities, fields):
+        self.calls.append((list(securities), list(fields)))
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return answer(securities, fields)
+
+
+def test_concurrent_requests_share_one_call():
+    send = FakeSend()
+    batcher = ReferenceBatcher(send, window=0.02)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.fetch(["A Curncy", "B Curncy"], ["PX_LAST"]),
+            batcher.fetch(["B Curncy", "C Curncy"], ["PX_BID"]),
+        )
+
+    first, second = asyncio.run(run())
+    assert send.calls == [(["A Curncy", "B Curncy", "C Curncy"], ["PX_LAST", "PX_BID"])]
+    assert [sd["security"] for sd in first["data"]["securities_data"]] == ["A Curncy", "B Curncy"]
+    assert second["data"]["securities_data"][0]["fields"] == {"PX_BID": "B Curncy:PX_BID"}
+    assert batcher.stats["securities_requested"] == 4 and batcher.stats["securities_sent"] == 3
+
+
+def test_size_cap_flushes_immediately():
+    send = FakeSend()
+    batcher = ReferenceBatcher(send, window=10.0, max_securities=2)
+
+    async def run():
+        return await asyncio.wait_for(batcher.fetch(["A Curncy", "B Curncy"], ["PX_LAST"]), timeout=1.0)
+
+    assert len(asyncio.run(run())["data"]["securities_data"]) == 2
+
+
+def test_upstream_exception_reaches_every_caller():
+    batcher = ReferenceBatcher(FakeSend(error=RuntimeError("VM down")), window=0.01)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.fetch(["A Curncy"], ["PX_LAST"]),
+            batcher.fetch(["B Curncy"], ["PX_LAST"]),
+            return_exceptions=True
+        )
+
+    assert [str(e) for e in asyncio.run(run())] == ["VM down", "VM down"]
+
+
+def test_dispatch_tasks_are_kept_until_done():
+    send = FakeSend(delay=0.05)
+    batcher = ReferenceBatcher(send, window=0.001)
+
+    async def run():
+        fetch = asyncio.ensure_future(batcher.fetch(["A Curncy"], ["PX_LAST"]))
+        await asyncio.sleep(0.01)
+        in_flight = len(batcher._tasks)
+        gc.collect()
+        result = await fetch
+        return in_flight, result
+
+    in_flight, result = asyncio.run(run())
+    assert in_flight == 1 and batcher._tasks == set()
+    assert result["data"]["securities_data"][0]["security"] == "A Curncy"
+
+
+def test_window_zero_sends_directly():
+    send = FakeSend()
+    batcher = ReferenceBatcher(send, window=0)
+    asyncio.run(batcher.fetch(["A Curncy"], ["PX_LAST"]))
+    assert batcher.stats["requests"] == 0 and len(send.calls) == 1
+
+
+def test_demultiplex_passes_errors_through():
+    assert demultiplex({"error": "HTTP 500"}, ["A Curncy"], ["PX_LAST"]) == {"error": "HTTP 500"}
+
+
+def test_demultiplex_marks_partial_only_callers_missing_securities():
+    merged = {**answer(["A Curncy", "B Curncy"], ["PX_LAST"]), "partial": True}  # C's chunk failed
+    assert "partial" not in demultiplex(merged, ["A Curncy", "B Curncy", "A Curncy"], ["PX_LAST"])
+    assert demultiplex(merged, ["A Curncy", "C Curncy"], ["PX_LAST"])["partial"] is True
+    assert "partial" not in demultiplex(answer(["A Curncy"], ["PX_LAST"]), ["A Curncy", "C Curncy"], ["PX_LAST"])
+
+
+def test_partial_batch_stays_complete_for_answered_callers():
+    async def send(securities, fields):
+        answered = [ticker for ticker in securities if ticker != "C Curncy"]
+        return {**answer(answered, fields), "partial": True}
+
+    async def run():
+        batcher = ReferenceBatcher(send, window=0.01)
+        return await asyncio.gather(batcher.fetch(["A Curncy"], ["PX_LAST"]),
+                                    batcher.fetch(["B Curncy", "C Curncy"], ["PX_LAST"]))
+
+    complete, partial = asyncio.run(run())
+    assert "partial" not in complete
+    assert partial["partial"] is True
+
+
+def test_merge_marks_partial_when_a_chunk_failed():
+    merged = merge_reference_responses([
+        answer(["A Curncy"], ["PX_LAST"]),
+        {"error": "Bloomberg API returned 500"},
+        answer(["C Curncy"], ["PX_LAST"]),
+    ])
+    assert [sd["security"] for sd in merged["data"]["securities_data"]] == ["A Curncy", "C Curncy"]
+    assert merged["partial"] is True
+
+
+def test_merge_complete_and_all_failed():
+    merged = merge_reference_responses([answer(["A Curncy"], ["PX_LAST"]), answer(["B Curncy"], ["PX_LAST"])])
+    assert "partial" not in merged and len(merged["data"]["securities_data"]) == 2
+    assert merge_reference_responses([{"error": "first"}, {"error": "second"}]) == {"error": "first"}
+    assert merge_reference_responses([])["data"]["securities_data"] == []
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for gateway content negotiation and the columnar encodings
+
+Run: python -m pytest test_response_encoding.py -q
+"""
+
+import json
+
+import pytest
+
+from response_encoding import (
+    ARROW_STREAM_MEDIA_TYPE, columns_to_arrow, encode_response, historical_to_columns, negotiate_format,
+    records_to_columns, reference_to_columns
+)
+
+REFERENCE = {"data": {"securities_data": [
+    {"security": "EURUSD Curncy", "success": True, "fields": {"PX_LAST": 1.1, "NAME": "EUR-USD"}},
+    {"security": "BAD Curncy", "success": False, "fields": {}},
+]}}
+HISTORICAL = {"data": {"data": [
+    {"date": "2026-01-02", "PX_LAST": 1.1},
+    {"date": "2026-01-05", "PX_LAST": 1.2, "PX_HIGH": 1.25},
+]}}
+
+
+@pytest.mark.parametrize("accept, fmt", [
+    (None, "json"),
+    ("*/*", "json"),
+    ("text/html, image/png", "json"),                                   # Unknown types fall back to JSON
+    ("application/vnd.apache.arrow.stream", "arrow"),
+    ("Application/X-MsgPack", "msgpack"),
+    ("application/msgpack, application/vnd.apache.arrow.stream", "msgpack"),  # Ties go to the first listed
+    ("application/msgpack;q=0.5, application/vnd.apache.arrow.stream", "arrow"),
+    ("application/json, application/msgpack;q=0.9", "json"),
+    ("application/json;q=0.1, application/msgpack;q=0.9", "msgpack"),
+    ("application/msgpack;q=0", "json"),                                # q=0 means not acceptable
+    ("application/msgpack;q=bogus", "json"),
+])
+def test_negotiate_format(accept, fmt):
+    assert negotiate_format(accept) == fmt
+
+
+def test_reference_and_historical_columns():
+    assert reference_to_columns(REFERENCE, ["PX_LAST", "NAME"]) == {
+        "security": ["EURUSD Curncy", "BAD Curncy"],
+        "success": [True, False],
+        "PX_LAST": [1.1, None],
+        "NAME": ["EUR-USD", None],
+    }
+    assert historical_to_columns(HISTORICAL, ["PX_LAST", "PX_HIGH"]) == {
+        "date": ["2026-01-02", "2026-01-05"], "PX_LAST": [1.1, 1.2], "PX_HIGH": [None, 1.25]
+    }
+    assert reference_to_columns({"error": "down"}, ["PX_LAST"]) == {"security": [], "success": [], "PX_LAST": []}
+
+
+def test_records_to_columns_fills_missing_keys():
+    assert records_to_columns([{"tenor": "1M", "atm": 7.0}, {"tenor": "1Y", "rr_25d": -0.5}]) == {
+        "tenor": ["1M", "1Y"], "atm": [7.0, None], "rr_25d": [None, -0.5]
+    }
+
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    for columns in (reference_to_columns(REFERENCE, ["PX_LAST", "NAME"]),
+                    historical_to_columns(HISTORICAL, ["PX_LAST", "PX_HIGH"])):
+        response = encode_response("application/msgpack", {"json": True}, columns=columns, metadata={"source": "X"})
+        assert response.media_type == "application/msgpack"
+        assert msgpack.unpackb(response.body, raw=False) == {"columns": columns, "metadata": {"source": "X"}}
+
+
+def test_arrow_mixed_columns_fall_back_to_strings():
+    pa = pytest.importorskip("pyarrow")
+    encoded = columns_to_arrow({"value": [1.5, "N.A.", None], "px": [1.0, 2.0, None]}, metadata={"pair": "EURUSD"})
+    table = pa.ipc.open_stream(encoded).read_all()
+    assert table.column("value").type == pa.string()
+    assert table.column("value").to_pylist() == ["1.5", "N.A.", None]
+    assert table.column("px").to_pylist() == [1.0, 2.0, None]
+    assert json.loads(table.schema.metadata[b"metadata"]) == {"pair": "EURUSD"}
+
+
+def test_json_clients_get_the_payload_unchanged():
+    payload = {"success": True}
+    assert encode_response("application/json", payload, columns={"a": [1]}) is payload
+    # No columnar view -> JSON even for binary clients
+    assert encode_response(ARROW_STREAM_MEDIA_TYPE, payload) is payload
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for the sampling profiler and the gateway's /admin/profile access rules
+
+Run: python -m pytest test_sampling_profiler.py -q
+"""
+
+import asyncio
+import importlib.util
+import threading
+from collections import Counter
+from pathlib import Path
+
+import httpx
+import pytest
+
+from sampling_profiler import ProfilerBusy, SamplingProfiler, collapsed
+
+TOOLS_DIR = Path(__file__).resolve().parent
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def workers():
+    """An idle thread blocked in Event.wait and a busy one spinning in busy_loop"""
+    stop = threading.Event()
+
+    def busy_loop():
+        total = 0
+        while not stop.is_set():
+            total += 1
+
+    threads = [threading.Thread(target=stop.wait, name="idle worker"),
+               threading.Thread(target=busy_loop, name="busy-worker")]
+    for thread in threads:
+        thread.start()
+    yield
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+
+def threads_in(stacks):
+    return {stack.split(";")[0] for stack in stacks}
+
+
+def test_idle_frames_are_dropped_unless_asked_for(workers):
+    profiler = SamplingProfiler()
+    stacks, samples = profiler.sample(0.1, 0.005)
+    assert samples > 0 and profiler.last["samples"] == samples
+    assert any(stack.startswith("busy-worker;") and stack.endswith(":busy_loop") for stack in stacks)
+    assert "idle_worker" not in threads_in(stacks)
+
+    stacks, _ = profiler.sample(0.05, 0.005, include_idle=True)
+    assert "idle_worker" in threads_in(stacks)  # Spaces in thread names become underscores
+
+
+def test_one_profile_at_a_time():
+    profiler = SamplingProfiler()
+
+    async def run():
+        first = asyncio.create_task(profiler.profile(0.2, 0.01))
+        await asyncio.sleep(0.05)
+        assert profiler.running
+        with pytest.raises(ProfilerBusy):
+            await profiler.profile(0.1, 0.01)
+        await first
+
+    asyncio.run(run())
+    assert not profiler.running
+    profiler.sample(0.01, 0.005)  # The lock was released
+
+
+def test_collapsed_is_hottest_first():
+    assert collapsed(Counter({"main;a:f": 1, "main;a:g": 3})) == "main;a:g 3\nmain;a:f 1\n"
+
+
+@pytest.fixture(scope="module")
+def gateway():
+    spec = importlib.util.spec_from_file_location("bloomberg_gateway_enhanced", TOOLS_DIR / "bloomberg-gateway-enhanced.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def profile(gateway, query="seconds=0.05", token=TOKEN):
+    headers = {"X-Admin-Token": token} if token is not None else {}
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=gateway.app), base_url="http://gateway") as client:
+            return await client.get(f"/admin/profile?{query}", headers=headers)
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def enabled(gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "PROFILER_ENABLED", True)
+    monkeypatch.setattr(gateway, "PROFILER_TOKEN", TOKEN)
+    monkeypatch.setattr(gateway, "PROFILER_MAX_SECONDS", 1.0)
+    monkeypatch.setattr(gateway, "profiler", SamplingProfiler())
+    return gateway
+
+
+def test_profile_is_hidden_unless_enabled_with_a_token(gateway, monkeypatch):
+    monkeypatch.setattr(gateway, "PROFILER_ENABLED", False)
+    monkeypatch.setattr(gateway, "PROFILER_TOKEN", TOKEN)
+    assert profile(gateway).status_code == 404
+
+    monkeypatch.setattr(gateway, "PROFILER_ENABLED", True)
+    monkeypatch.setattr(gateway, "PROFILER_TOKEN", "")
+    assert profile(gateway, token="").status_code == 404
+
+
+def test_profile_needs_the_admin_token(enabled):
+    assert profile(enabled, token="wrong").status_code == 403
+    assert profile(enabled, token=None).status_code == 403
+
+
+@pytest.mark.parametrize("seconds", ["0", "-1", "1.5"])
+def test_profile_seconds_are_bounded(enabled, seconds):
+    assert profile(enabled, query=f"seconds={seconds}").status_code == 400
+
+
+def test_profile_returns_collapsed_stacks(enabled):
+    response = profile(enabled, query="seconds=0.05&interval_ms=1&include_idle=true")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["x-profile-samples"]) > 0
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+
+def test_concurrent_profile_is_rejected(enabled):
+    enabled.profiler._lock.acquire()
+    try:
+        assert profile(enabled).status_code == 409
+    finally:
+        enabled.profiler._lock.release()
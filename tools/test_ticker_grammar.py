@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared Bloomberg ticker grammar
+
+Run: python -m pytest test_ticker_grammar.py -q
+"""
+
+import pytest
+
+from ticker_grammar import (
+    FX_BUTTERFLY, FX_FORWARD, FX_NDF, FX_RISK_REVERSAL, FX_SPOT, FX_VOL, IRS, MONEY_MARKET, OIS, OVERNIGHT, UNKNOWN,
+    TickerGrammar, parse_ticker, tenor_days, tenor_label
+)
+
+
+@pytest.mark.parametrize("ticker, family, currency, tenor, days", [
+    ("USSO1 Curncy", OIS, "USD", "1Y", 365),
+    ("USSOA Curncy", OIS, "USD", "1M", 30),            # OIS month letters
+    ("USSO1F Curncy", OIS, "USD", "18M", 540),         # 1 year + F (6 months)
+    ("EESWE1Z Curncy", OIS, "EUR", "1D", 1),
+    ("BPSWS18M Curncy", OIS, "GBP", "18M", 540),       # Longest prefix wins over BPSW
+    ("USSW10 Curncy", IRS, "USD", "10Y", 3650),
+    ("USSW2YR Curncy", IRS, "USD", "2Y", 730),
+    ("US0003M Index", MONEY_MARKET, "USD", "3M", 90),
+    ("SOFRRATE Index", OVERNIGHT, "USD", "ON", 1),
+    ("SONIA Index", OVERNIGHT, "GBP", "ON", 1),        # Bare benchmark name
+    ("ESTR10 Index", OIS, "EUR", "10Y", 3650),         # Term point on an overnight benchmark
+])
+def test_rates_tickers(ticker, family, currency, tenor, days):
+    record = parse_ticker(ticker)
+    assert (record.family, record.currency, record.tenor, record.tenor_days) == (family, currency, tenor, days)
+
+
+@pytest.mark.parametrize("ticker, family, pair, tenor, delta", [
+    ("EURUSD Curncy", FX_SPOT, "EURUSD", None, None),
+    ("EURUSD3M Curncy", FX_FORWARD, "EURUSD", "3M", None),
+    ("EURUSDV1M BGN Curncy", FX_VOL, "EURUSD", "1M", None),
+    ("EURUSD25R3M BGN Curncy", FX_RISK_REVERSAL, "EURUSD", "3M", 25),
+    ("USDJPY10B1Y Curncy", FX_BUTTERFLY, "USDJPY", "1Y", 10),
+    ("IRN1M Curncy", FX_NDF, "USDINR", "1M", None),
+    ("NDFUSDINR1M Curncy", FX_NDF, "USDINR", "1M", None),
+])
+def test_fx_tickers(ticker, family, pair, tenor, delta):
+    record = parse_ticker(ticker)
+    assert (record.family, record.pair, record.tenor, record.delta) == (family, pair, tenor, delta)
+
+
+def test_source_and_yellow_key_are_split_off():
+    record = parse_ticker("EURUSDV1M BGN Curncy")
+    assert (record.root, record.source, record.yellow_key) == ("EURUSDV1M", "BGN", "CURNCY")
+
+
+def test_yellow_key_must_fit_the_family():
+    # Swaps are quoted under Curncy; an Index ticker with a swap prefix is not an IRS
+    assert parse_ticker("USSW10 Index").family == UNKNOWN
+
+
+def test_unknown_prefix_keeps_a_best_effort_tenor():
+    record = parse_ticker("XYZSO3 Curncy")
+    assert not record.known and record.tenor == "3Y"
+
+
+def test_memoized_and_cold_grammars_agree():
+    cold = TickerGrammar(memo_size=0)
+    for ticker in ["USSO1 Curncy", "EURUSD25R3M BGN Curncy", "SONIA Index", "IRN1M Curncy"]:
+        assert cold.parse(ticker) == parse_ticker(ticker)
+    assert parse_ticker("USSO1 Curncy") is parse_ticker("USSO1 Curncy")
+
+
+@pytest.mark.parametrize("tenor, days", [("ON", 1), ("1W", 7), ("18M", 540), ("12M", 365), ("2YR", 730), ("", 0),
+                                         ("bogus", 0)])
+def test_tenor_days(tenor, days):
+    assert tenor_days(tenor) == days
+
+
+@pytest.mark.parametrize("days, label", [(1, "ON"), (3, "3D"), (14, "2W"), (90, "3M"), (540, "18M"), (730, "2Y")])
+def test_tenor_label(days, label):
+    assert tenor_label(days) == label
+    assert tenor_days(label) == days
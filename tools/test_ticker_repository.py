@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the indexed ticker repository
+
+Run: python -m pytest test_ticker_repository.py -q
+"""
+
+from pathlib import Path
+
+import pytest
+
+from ticker_grammar import FX_VOL, IRS, OIS
+from ticker_repository import TickerRepository
+
+REPOSITORY_FILE = Path(__file__).resolve().parent / "central_bloomberg_ticker_repository_v3.json"
+
+REPOSITORY_JSON = {
+    "metadata": {"version": "test", "note": "USSO99 Curncy"},
+    "usage_examples": ["USSO50 Curncy"],
+    "ois": {
+        "USD": ["USSO10 Curncy", "USSO1 Curncy", "USSOA Curncy", "USSO2 Curncy"],
+        "EUR": ["EESWE1 BGN Curncy", "EESWE5 Curncy"],
+    },
+    "irs": {"USD": {"liquid": ["USSW10 Curncy", "USSW2 Curncy"]}},
+    "fx_volatility": {"USDJPY": ["USDJPYV1M BGN Curncy", "USDJPYV1Y BGN Curncy", "USDJPYV2Y BGN Curncy",
+                                 "USDJPY25R1M BGN Curncy"]},
+    "descriptions": {"USSO1 Curncy": "not a list of tickers"},
+}
+
+
+@pytest.fixture
+def repository():
+    return TickerRepository.from_json(REPOSITORY_JSON)
+
+
+def tickers(records):
+    return [r.ticker for r in records]
+
+
+def test_example_sections_and_non_tickers_are_skipped(repository):
+    assert len(repository) == 12
+    assert "USSO99 Curncy" not in repository and "USSO50 Curncy" not in repository
+    assert repository.categories["USSW2 Curncy"] == "liquid"
+
+
+def test_select_is_sorted_by_tenor(repository):
+    assert tickers(repository.select(currency="USD", families=[OIS])) == [
+        "USSOA Curncy", "USSO1 Curncy", "USSO2 Curncy", "USSO10 Curncy"
+    ]
+    assert tickers(repository.select(currency="usd", families=[OIS, IRS], min_days=365, max_days=730)) == [
+        "USSO1 Curncy", "USSO2 Curncy", "USSW2 Curncy"
+    ]
+
+
+def test_select_by_pair(repository):
+    assert tickers(repository.select(pair="USDJPY", families=[FX_VOL], max_days=365)) == [
+        "USDJPYV1M BGN Curncy", "USDJPYV1Y BGN Curncy"
+    ]
+    assert len(repository.select(pair="USDJPY")) == 4
+    with pytest.raises(ValueError):
+        repository.select()
+
+
+def test_find_one_pillar(repository):
+    assert tickers(repository.find("USDJPY", FX_VOL, "12M")) == ["USDJPYV1Y BGN Curncy"]
+    assert tickers(repository.find("USDJPY", "fx_risk_reversal", "1M", delta=25)) == ["USDJPY25R1M BGN Curncy"]
+    assert repository.find("USDJPY", "fx_risk_reversal", "1M", delta=10) == []
+
+
+def test_prefix_tenor_and_category_lookups(repository):
+    assert tickers(repository.with_prefix("eeswe")) == ["EESWE1 BGN Curncy", "EESWE5 Curncy"]
+    assert repository.with_prefix("ZZZ") == []
+    assert set(tickers(repository.by_tenor("1Y"))) == {"USSO1 Curncy", "EESWE1 BGN Curncy", "USDJPYV1Y BGN Curncy"}
+    assert len(repository.by_category("USD")) == 4
+    assert len(repository.by_pair("usdjpy")) == 4
+
+
+def test_adding_a_known_ticker_is_a_no_op(repository):
+    record = repository.get("USSO1 Curncy")
+    assert repository.add("USSO1 Curncy", "other") is record
+    assert len(repository.select(currency="USD", families=[OIS])) == 4
+
+
+def test_summary(repository):
+    summary = repository.summary()
+    assert summary["tickers"] == 12 and summary["pairs"] == 1
+    assert summary["families"][OIS] == 6
+
+
+@pytest.mark.skipif(not REPOSITORY_FILE.exists(), reason="repository JSON not checked out")
+def test_shipped_repository_indexes():
+    repository = TickerRepository.from_file(REPOSITORY_FILE)
+    assert len(repository) > 0
+    assert all(r.known for r in repository.select(pair="EURUSD", families=[FX_VOL]))
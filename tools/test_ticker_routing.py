@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for learned ticker routing and how the gateway feeds it
+
+Routes are only learned from what the VM actually said: a pillar is dead
+when every variant came back without data, never because its chunk was
+lost in a partial response.
+
+Run: python -m pytest test_ticker_routing.py -q
+"""
+
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from ticker_routing import TickerRouter, route_key
+
+TOOLS_DIR = Path(__file__).resolve().parent
+BGN, PLAIN = "EURUSDV1M BGN Curncy", "EURUSDV1M Curncy"
+KEY = "EURUSD|1M|atm"
+
+
+def entry(ticker, px=None):
+    if px is None:
+        return {"security": ticker, "success": False, "fields": {}}
+    return {"security": ticker, "success": True, "fields": {"PX_LAST": px}}
+
+
+def response(*entries, partial=False):
+    result = {"data": {"securities_data": list(entries)}}
+    if partial:
+        result["partial"] = True
+    return result
+
+
+@pytest.fixture
+def router(tmp_path):
+    return TickerRouter(path=tmp_path / "routes.json", reprobe_interval=3600)
+
+
+@pytest.fixture(scope="module")
+def gateway():
+    spec = importlib.util.spec_from_file_location("bloomberg_gateway_enhanced", TOOLS_DIR / "bloomberg-gateway-enhanced.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_learns_hit_and_routes_to_it(router):
+    router.record(KEY, [BGN, PLAIN], PLAIN)
+    assert router.choose(KEY, [BGN, PLAIN]) == [PLAIN]
+
+
+def test_dead_only_when_every_variant_answered(router):
+    router.record(KEY, [BGN, PLAIN], None, answered={BGN})
+    assert KEY not in router.routes
+    router.record(KEY, [BGN, PLAIN], None, answered={BGN, PLAIN})
+    assert router.choose(KEY, [BGN, PLAIN]) == []
+
+
+def test_single_candidate_miss_is_not_learned(router):
+    router.record(KEY, [BGN], None, answered={BGN})
+    assert KEY not in router.routes
+
+
+def test_lost_route_relearns_only_on_answered_miss(router):
+    router.record(KEY, [BGN, PLAIN], BGN)
+    router.record(KEY, [BGN], None, answered=set())
+    assert router.routes[KEY]["ticker"] == BGN
+    router.record(KEY, [BGN], None, answered={BGN})
+    assert KEY not in router.routes
+
+
+def test_reprobe_switches_and_skips_unanswered(router):
+    router.record(KEY, [BGN, PLAIN], PLAIN)
+    other = "EURUSD|2M|atm"
+    router.record(other, ["EURUSDV2M BGN Curncy", "EURUSDV2M Curncy"], "EURUSDV2M Curncy")
+    for route in router.routes.values():
+        route["checked_at"] = 0
+
+    async def fetch(securities, fields):
+        # The 2M chunk was lost: its tickers are not in the reply at all
+        return response(entry(BGN, 1.1), entry(PLAIN, 1.1), partial=True)
+
+    assert asyncio.run(router.reprobe(fetch)) == 1
+    assert router.routes[KEY]["ticker"] == BGN
+    assert router.routes[other]["ticker"] == "EURUSDV2M Curncy"
+    assert router.routes[other]["checked_at"] == 0
+
+
+def test_failed_reprobe_changes_nothing(router):
+    router.record(KEY, [BGN, PLAIN], PLAIN)
+    router.routes[KEY]["checked_at"] = 0
+
+    async def fetch(securities, fields):
+        return {"error": "Bloomberg API unavailable"}
+
+    assert asyncio.run(router.reprobe(fetch)) == 0
+    assert router.routes[KEY]["ticker"] == PLAIN
+
+
+def test_routes_persist(router):
+    router.record(KEY, [BGN, PLAIN], BGN)
+    router.save()
+    assert TickerRouter.load(path=router.path).routes[KEY]["ticker"] == BGN
+
+
+def test_partial_surface_learns_nothing(gateway, router, monkeypatch):
+    monkeypatch.setattr(gateway, "ticker_router", router)
+    slots = gateway.surface_slots("EURUSD", ["1M", "2M"])
+    tickers = [t for _, _, requested in slots.values() for t in requested]
+    # Only the 1M tickers were answered; the chunk with the rest failed
+    answered = [entry(t, 1.0) for t in tickers if "1M" in t]
+    gateway.assemble_surface("EURUSD", slots, response(*answered, partial=True))
+    assert router.routes == {}
+
+
+def test_unanswered_pillars_are_not_dead(gateway, router, monkeypatch):
+    monkeypatch.setattr(gateway, "ticker_router", router)
+    slots = gateway.surface_slots("EURUSD", ["1M", "2M"])
+    tickers = [t for _, _, requested in slots.values() for t in requested]
+    answered = [entry(t, 1.0) for t in tickers if "1M" in t] + [entry(t) for t in tickers if "2M" in t and "BGN" in t]
+    gateway.assemble_surface("EURUSD", slots, response(*answered))
+
+    assert router.routes[route_key("EURUSD", "1M", "atm")]["ticker"] is not None
+    # 2M plain variants never came back, so 2M pillars stay unknown rather than dead
+    assert route_key("EURUSD", "2M", "atm") not in router.routes
+
+
+def test_repository_pillars_ask_for_bgn_first(gateway, router, monkeypatch):
+    monkeypatch.setattr(gateway, "ticker_router", router)
+    # The repository lists only the plain EURUSD vol ticker
+    assert [r.ticker for r in gateway.ticker_repository.find("EURUSD", gateway.FX_VOL, "1M")] == [PLAIN]
+    slots = gateway.surface_slots("EURUSD", ["1M"])
+    assert slots[KEY][2] == [BGN, PLAIN]
+    assert slots[route_key("EURUSD", "1M", "forwards")][2] == ["EURUSD1M Curncy"]
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for request tracing and the X-Debug-Timing breakdown
+
+Run: python -m pytest test_tracing.py -q
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from tracing import add_timing, timings, trace_requests, tracer
+
+watched = []
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/api/volatility/{pair}")
+    async def volatility(pair: str):
+        with tracer.start_as_current_span("cache.get"):
+            pass
+        with tracer.start_as_current_span("bloomberg.fetch"):
+            await asyncio.sleep(0.01)
+        watched.append(len(timings._traces))
+        return {"pair": pair, "metadata": add_timing({"source": "BLOOMBERG"})}
+
+    trace_requests(app)
+    return app
+
+
+def get(headers=None):
+    watched.clear()
+
+    async def run():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            return await client.get("/api/volatility/EURUSD", headers=headers)
+
+    return asyncio.run(run())
+
+
+def test_debug_header_returns_the_breakdown():
+    response = get({"X-Debug-Timing": "1"})
+    timing = response.json()["metadata"]["timing"]
+    assert watched == [1]
+
+    assert [span["name"] for span in timing["spans"]] == ["bloomberg.fetch", "cache.get"]  # Slowest first
+    assert timing["spans"][0]["count"] == 1 and timing["spans"][0]["ms"] >= 10
+    assert timing["elapsed_ms"] >= timing["spans"][0]["ms"]
+
+    header = response.headers["server-timing"]
+    assert header.startswith("bloomberg.fetch;dur=") and ", cache.get;dur=" in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+    assert timings._traces == {}  # Forgotten once the request is done
+
+
+def test_requests_without_the_header_collect_nothing():
+    response = get()
+    assert response.json()["metadata"] == {"source": "BLOOMBERG"}
+    assert "server-timing" not in response.headers
+    assert watched == [0] and timings._traces == {}
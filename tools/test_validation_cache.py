@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent ticker validation cache
+
+Run: python -m pytest test_validation_cache.py -q
+"""
+
+import time
+
+import pytest
+
+from validation_cache import ValidationCache, is_valid_security
+
+
+def response(*securities_data):
+    return {"success": True, "data": {"securities_data": list(securities_data)}}
+
+
+def live(ticker, **fields):
+    return {"security": ticker, "success": True, "fields": fields}
+
+
+def unknown(ticker):
+    return {"security": ticker, "success": False, "fields": {}, "error": "Unknown/Invalid security"}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ValidationCache(path=tmp_path / "validations.sqlite", valid_ttl=3600, invalid_ttl=7200)
+    yield cache
+    cache.close()
+
+
+def test_split_and_replay(cache):
+    cache.record_response(response(live("USSW5 Curncy", PX_LAST=3.9), unknown("USSW99 Curncy")), ["PX_LAST"])
+    known, missing = cache.split(["USSW5 Curncy", "USSW99 Curncy", "USSW7 Curncy"], ["PX_LAST"])
+    assert missing == ["USSW7 Curncy"]
+    replay = {sd["security"]: is_valid_security(sd) for sd in cache.cached_response(known)["data"]["securities_data"]}
+    assert replay == {"USSW5 Curncy": True, "USSW99 Curncy": False}
+    assert cache.stats["hits"] == 2 and cache.stats["misses"] == 1
+
+
+def test_other_fields_are_a_miss(cache):
+    # A SECURITY_NAME-only probe must not answer a later PX_LAST check
+    cache.record_response(response(live("USSW5 Curncy", SECURITY_NAME="USD SWAP 5Y")), ["SECURITY_NAME"])
+    known, missing = cache.split(["USSW5 Curncy"], ["PX_LAST"])
+    assert known == {} and missing == ["USSW5 Curncy"]
+
+    cache.record_response(response(live("USSW5 Curncy", PX_LAST=3.9)), ["PX_LAST"])
+    known, _ = cache.split(["USSW5 Curncy"], ["SECURITY_NAME", "PX_LAST"])
+    assert known["USSW5 Curncy"]["fields"] == {"SECURITY_NAME": "USD SWAP 5Y", "PX_LAST": 3.9}
+
+
+def test_lookup_returns_only_requested_fields(cache):
+    cache.record_response(response(live("USSW5 Curncy", PX_LAST=3.9, SECURITY_NAME="USD SWAP 5Y")))
+    known, _ = cache.split(["USSW5 Curncy"], ["SECURITY_NAME"])
+    assert known["USSW5 Curncy"]["fields"] == {"SECURITY_NAME": "USD SWAP 5Y"}
+
+
+def test_empty_fields_are_remembered(cache):
+    # Known to Bloomberg but no price: covered, and still without data on replay
+    cache.record_response(response(live("USSW40 Curncy")), ["PX_LAST"])
+    known, missing = cache.split(["USSW40 Curncy"], ["PX_LAST"])
+    assert missing == []
+    assert known["USSW40 Curncy"] == {"valid": True, "fields": {"PX_LAST": None}}
+    assert not is_valid_security(cache.cached_response(known)["data"]["securities_data"][0])
+
+
+def test_invalid_answers_any_fields(cache):
+    cache.record_response(response(unknown("NDFUSDINR1M Curncy")), ["PX_LAST"])
+    known, _ = cache.split(["NDFUSDINR1M Curncy"], ["SECURITY_NAME", "PX_BID"])
+    assert known == {"NDFUSDINR1M Curncy": {"valid": False, "fields": {}}}
+
+
+def test_failed_calls_are_ignored(cache):
+    cache.record_response({"error": "HTTP 500"}, ["PX_LAST"])
+    cache.record_response({"success": False, "error": "timeout"}, ["PX_LAST"])
+    assert cache.stats["stored"] == 0
+
+
+def test_entries_expire(cache):
+    cache.record({"USSW5 Curncy": {"PX_LAST": 3.9}, "USSW99 Curncy": None})
+    cache._conn.execute("UPDATE validations SET checked_at = ?", (time.time() - 5000,))
+    known, missing = cache.split(["USSW5 Curncy", "USSW99 Curncy"])
+    # Valid rows expire after an hour, invalid ones after two
+    assert list(known) == ["USSW99 Curncy"] and missing == ["USSW5 Curncy"]
+
+
+def test_persists_across_instances(cache):
+    cache.record({"USSW5 Curncy": {"PX_LAST": 3.9}})
+    reopened = ValidationCache(path=cache.path)
+    assert reopened.lookup(["USSW5 Curncy"]) == {"USSW5 Curncy": {"valid": True, "fields": {"PX_LAST": 3.9}}}
+    reopened.close()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the Bloomberg VM simulator: response shapes and price determinism
+
+The benchmarks compare gateway kernels on simulator prices, so the same
+request must return the same numbers for a given seed and day.
+
+Run: python -m pytest test_vm_simulator.py -q
+"""
+
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+from bloomberg_vm_simulator import BloombergSimulator, ReferenceRequest, SimulatorConfig, create_app
+from ticker_repository import TickerRepository
+
+TOOLS_DIR = Path(__file__).resolve().parent
+REPOSITORY = TickerRepository.from_json({"ois": {"USD": ["USSO1 Curncy", "USSO2 Curncy"]}})
+SECURITIES = ["EURUSD Curncy", "EURUSDV1M BGN Curncy", "USSO1 Curncy", "NOT A TICKER"]
+
+
+def config(**overrides):
+    return SimulatorConfig(**{"latency_ms": 0, "jitter_ms": 0, "cost_per_security_ms": 0, **overrides})
+
+
+def calls(app, *requests):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://vm") as client:
+            return [await client.request(method, path, json=body) for method, path, body in requests]
+
+    return asyncio.run(run())
+
+
+def reference(securities=SECURITIES, fields=("PX_LAST", "PX_BID", "PX_ASK")):
+    return ("POST", "/api/bloomberg/reference", {"securities": list(securities), "fields": list(fields)})
+
+
+def test_reference_shape():
+    response, = calls(create_app(config(), REPOSITORY), reference())
+    body = response.json()
+    assert response.status_code == 200 and body["success"] and "error" not in body
+
+    rows = body["data"]["securities_data"]
+    assert [row["security"] for row in rows] == SECURITIES
+    assert all(row["success"] for row in rows[:3])
+    assert set(rows[0]["fields"]) == {"PX_LAST", "PX_BID", "PX_ASK"}
+    assert rows[0]["fields"]["PX_BID"] < rows[0]["fields"]["PX_LAST"] < rows[0]["fields"]["PX_ASK"]
+    assert rows[3] == {"security": "NOT A TICKER", "fields": {}, "success": False, "error": "Unknown/Invalid security"}
+
+
+def test_historical_and_discovery_shapes():
+    app = create_app(config(), REPOSITORY)
+    history, unknown, search = calls(
+        app,
+        ("POST", "/api/bloomberg/historical", {"security": "USSO1 Curncy", "fields": ["PX_LAST"],
+                                               "start_date": "20260105", "end_date": "20260111"}),
+        ("POST", "/api/bloomberg/historical", {"security": "NOT A TICKER", "start_date": "20260105",
+                                               "end_date": "20260111"}),
+        ("POST", "/api/bloomberg/ticker-discovery", {"search_type": "ois", "currency": "USD"}),
+    )
+    points = history.json()["data"]["data"]
+    assert [point["date"] for point in points] == ["2026-01-05", "2026-01-06", "2026-01-07", "2026-01-08",
+                                                   "2026-01-09"]  # Weekdays only
+    assert set(points[0]) == {"date", "PX_LAST"}
+    assert unknown.json()["success"] is False
+
+    found = search.json()
+    assert found["success"] and found["tickers_found"] == 2
+    assert [ticker["ticker"] for ticker in found["tickers"]] == ["USSO1 Curncy", "USSO2 Curncy"]
+
+
+def test_prices_are_deterministic_per_seed():
+    same = [create_app(config(seed=7), REPOSITORY) for _ in range(2)]
+    first, second = [calls(app, reference())[0].json()["data"]["securities_data"] for app in same]
+    assert first == second
+
+    other = create_app(config(seed=8), REPOSITORY)
+    changed = calls(other, reference())[0].json()["data"]["securities_data"]
+    assert changed[0]["fields"] != first[0]["fields"]
+
+    # The in-process kernel path (benchmark_kernels) sees the same numbers as the HTTP app
+    direct = BloombergSimulator(config(seed=7), REPOSITORY).reference(
+        ReferenceRequest(securities=SECURITIES, fields=["PX_LAST", "PX_BID", "PX_ASK"])
+    )
+    assert direct["data"]["securities_data"] == first
+
+
+def test_injected_failures_and_stats():
+    app = create_app(config(max_securities=2), REPOSITORY)
+    too_many, ok, stats = calls(app, reference(), reference(SECURITIES[:2]), ("GET", "/sim/stats", None))
+    assert too_many.status_code == 500 and too_many.json()["success"] is False
+    assert ok.status_code == 200
+    assert stats.json()["errors"] == 1
+
+    failing = create_app(config(error_rate=1.0), REPOSITORY)
+    assert calls(failing, reference())[0].status_code == 500
+
+
+@pytest.mark.parametrize("statement", [
+    "import bloomberg_vm_simulator as sim; assert not hasattr(sim, 'app')",
+    "import logging, bloomberg_vm_simulator; assert not logging.getLogger().handlers",
+])
+def test_import_has_no_side_effects(statement):
+    subprocess.run([sys.executable, "-c", statement], cwd=TOOLS_DIR, check=True)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Bloomberg Ticker Grammar
+One compiled parser for every rates / FX ticker the tools deal with
+
+Tenor and instrument parsing used to be re-implemented with ad-hoc string
+logic in each script, and the copies disagreed (USSO1 came out as 1M in one
+place and 1Y in another). The grammar is built once from CURRENCY_GRAMMAR, a
+per-currency table of ticker prefixes by instrument family:
+
+- prefixes are compiled into a trie, so a ticker is matched by one left-to-right
+  walk over its root, longest prefix first
+- the remainder after the prefix goes through one compiled tenor grammar
+  (1Z, 2W, 18M, 10Y, 2YR, OIS month letters A-K, 1F = 1Y6M, bare numbers)
+- FX pairs, NDF codes, ATM vols, risk reversals and butterflies are recognised
+  from the pair structure instead of a prefix list
+- results are memoized, so repeat lookups are a dict hit
+
+Every parse returns a TickerRecord (currency, family, tenor, tenor days,
+delta, pair). Tenor days use 30-day months and 365-day years, the same
+convention as the rest of the tools.
+
+Usage:
+    record = parse_ticker("USSO1 Curncy")
+    record.family, record.tenor, record.tenor_days   # ('ois', '1Y', 365)
+    parse_ticker("EURUSD25R3M BGN Curncy").delta     # 25
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+YELLOW_KEYS = ("CURNCY", "INDEX", "COMDTY", "GOVT", "CORP", "EQUITY")
+PRICING_SOURCES = ("BGN", "BGNL", "CMPN", "CMPL", "CMPT", "BVAL", "ICPL", "TRPU", "FRTD")
+
+# Instrument families
+OIS = "ois"
+IRS = "irs"
+MONEY_MARKET = "money_market"
+OVERNIGHT = "overnight"
+BOND = "bond"
+FX_SPOT = "fx_spot"
+FX_FORWARD = "fx_forward"
+FX_NDF = "fx_ndf"
+FX_VOL = "fx_vol"
+FX_RISK_REVERSAL = "fx_risk_reversal"
+FX_BUTTERFLY = "fx_butterfly"
+UNKNOWN = "unknown"
+
+FX_FAMILIES = (FX_SPOT, FX_FORWARD, FX_NDF, FX_VOL, FX_RISK_REVERSAL, FX_BUTTERFLY)
+
+# Yellow keys each family is quoted under (rates fixings live under Index)
+FAMILY_KEYS = {
+    OIS: ("CURNCY", "INDEX"),
+    IRS: ("CURNCY",),
+    MONEY_MARKET: ("INDEX",),
+    OVERNIGHT: ("INDEX",),
+    BOND: ("INDEX", "GOVT"),
+}
+
+CURRENCIES = (
+    "USD", "EUR", "GBP", "JPY", "CHF", "CAD", "AUD", "NZD", "SEK", "NOK", "DKK", "ISK",
+    "PLN", "CZK", "HUF", "RON", "BGN", "HRK", "RUB", "TRY", "ILS", "ZAR", "EGP", "NGN",
+    "KES", "MAD", "AED", "SAR", "QAR", "KWD", "BHD", "OMR", "JOD", "CNY", "CNH", "HKD",
+    "SGD", "KRW", "TWD", "INR", "IDR", "MYR", "PHP", "THB", "VND", "PKR", "BDT", "LKR",
+    "MXN", "BRL", "CLP", "COP", "PEN", "ARS", "UYU", "KZT", "UAH", "GEL", "XAU", "XAG"
+)
+CURRENCY_SET = frozenset(CURRENCIES)
+
+# Prefixes by currency and family. Money-market prefixes also cover the
+# {CCY}ON overnight fixings; every ISO code gets a generic money-market entry.
+CURRENCY_GRAMMAR: Dict[str, Dict[str, List[str]]] = {
+    "USD": {OIS: ["USSO", "USOSFR"], IRS: ["USSW", "USSWAP", "USSA"], MONEY_MARKET: ["US"],
+            OVERNIGHT: ["SOFR", "FEDL"], BOND: ["USGG"]},
+    "EUR": {OIS: ["EESWE", "EUSWE", "EESW"], IRS: ["EUSA", "EUSW", "EURSW"], MONEY_MARKET: ["EUR0", "EUDR"],
+            OVERNIGHT: ["ESTR", "EONIA"], BOND: ["GDBR", "GFRN", "GBTPGR"]},
+    "GBP": {OIS: ["BPSO", "BPSWS", "SONIO"], IRS: ["BPSW"], MONEY_MARKET: ["BP"],
+            OVERNIGHT: ["SONIA"], BOND: ["GUKG"]},
+    "JPY": {OIS: ["JYSO"], IRS: ["JYSW"], MONEY_MARKET: ["JY"],
+            OVERNIGHT: ["TONAR", "MUTKCALM"], BOND: ["GJGB"]},
+    "CHF": {OIS: ["SFSO", "SFSNT", "SSARON"], IRS: ["SFSW"], MONEY_MARKET: ["SF"],
+            OVERNIGHT: ["SARON", "SRFXON"], BOND: ["GSWISS"]},
+    "CAD": {OIS: ["CDSO"], IRS: ["CDSW", "CDSWAP"], MONEY_MARKET: ["CD", "CA", "CDOR"],
+            OVERNIGHT: ["CORRA", "CAONREPO"], BOND: ["GCAN"]},
+    "AUD": {OIS: ["ADSO", "RBAO"], IRS: ["ADSW", "ADSWAP"], MONEY_MARKET: ["AD", "ADBB", "BBSW"],
+            OVERNIGHT: ["AONIA", "RBACOR"], BOND: ["GACGB"]},
+    "NZD": {OIS: ["NDSO"], IRS: ["NDSW", "NDSWAP"], MONEY_MARKET: ["ND", "NZ", "NDBB", "NDBK", "NZBK"],
+            OVERNIGHT: ["NZIONA", "NZOCR", "NZOCRS", "OCR"]},
+    "SEK": {OIS: ["SKSO"], IRS: ["SKSW"], MONEY_MARKET: ["STIB"], OVERNIGHT: ["STINA", "SWESTR", "SEONIA"]},
+    "NOK": {OIS: ["NKSO"], IRS: ["NKSW"], MONEY_MARKET: ["NIBOR"], OVERNIGHT: ["NOWA"]},
+    "DKK": {OIS: ["DKSO"], IRS: ["DKSW"], MONEY_MARKET: ["DK", "CIBO", "CIBOR", "DKCIBOR"]},
+    "ISK": {OIS: ["ISSO"], IRS: ["ISSW"], MONEY_MARKET: ["IS", "REIBOR"], BOND: ["GISK", "GICE"]},
+    "SGD": {OIS: ["SDSOA"], IRS: ["SDSW"], MONEY_MARKET: ["SIBOR"], OVERNIGHT: ["SORA"]},
+    "HKD": {IRS: ["HDSW"], MONEY_MARKET: ["HIHD", "HIBOR"], BOND: ["HKGG"]},
+    "CZK": {OIS: ["CKSO"], IRS: ["CKSW"], MONEY_MARKET: ["PRIBOR"], OVERNIGHT: ["CZEONIA"], BOND: ["CZGB"]},
+    "PLN": {IRS: ["PZSW"], MONEY_MARKET: ["WIBOR"], OVERNIGHT: ["POLONIA"]},
+    "HUF": {IRS: ["HFSW"], MONEY_MARKET: ["BUBOR"], BOND: ["GHGB"]},
+    "TRY": {OIS: ["TYSO"], IRS: ["TYSW"], MONEY_MARKET: ["TRLIB"], OVERNIGHT: ["TLREF"]},
+    "ZAR": {IRS: ["SASW"], MONEY_MARKET: ["JIBA"], BOND: ["GSAB"]},
+    "MXN": {IRS: ["MPSW"], OVERNIGHT: ["MXONBR"], BOND: ["GMXN"]},
+    "BRL": {OIS: ["BZDI"], IRS: ["BZSW"], MONEY_MARKET: ["BZ"], OVERNIGHT: ["BZDIOVER", "BZDIOVRA"], BOND: ["BZGV"]},
+    "ILS": {MONEY_MARKET: ["TELBOR"], BOND: ["ILGV"]},
+    "INR": {OIS: ["INSO"], IRS: ["INSW"], MONEY_MARKET: ["MIBOR"], BOND: ["GIND"]},
+    "KRW": {IRS: ["KWSW"], MONEY_MARKET: ["KWCD"], BOND: ["GVSK"]},
+    "TWD": {IRS: ["NTSW"], MONEY_MARKET: ["TAIBOR"], BOND: ["GVTW"]},
+    "MYR": {BOND: ["MASB"]},
+    "THB": {IRS: ["THSW"]},
+    "RUB": {IRS: ["RRSW"], MONEY_MARKET: ["MOSPRIME"]},
+    "SAR": {OIS: ["SASO"]},
+    "AED": {OIS: ["AESO"], MONEY_MARKET: ["EIBOR"]},
+    "CNY": {BOND: ["GCNY"]},
+}
+
+# NDF outright codes (see src/constants/ndfMappings.ts) plus the ND{xx} / {CCY}N
+# variants the discovery scripts probe; NDF{PAIR}{tenor} is parsed separately
+NDF_CODES = {
+    "IRN": "INR", "NTN": "TWD", "IHN": "IDR", "BCN": "BRL", "CHN": "CLP",
+    "KWN": "KRW", "PPN": "PHP", "MRN": "MYR", "CLN": "COP",
+    "NDAR": "ARS", "NDBR": "BRL", "NDID": "IDR", "NDKO": "KRW", "NDPE": "PEN", "NDPH": "PHP",
+    "ARN": "ARS", "BRN": "BRL", "IDN": "IDR", "KRWN": "KRW", "MYRN": "MYR", "PHPN": "PHP"
+}
+
+UNIT_DAYS = {"D": 1, "W": 7, "M": 30, "Y": 365}
+# OIS month codes: USSOA = 1M ... USSOK = 11M, and 1F = 1Y + 6M
+MONTH_CODES = {letter: i + 1 for i, letter in enumerate("ABCDEFGHIJK")}
+
+# Remainder after a rates prefix. Explicit units win over month letters, so 1D is one day.
+TENOR_RE = re.compile(
+    r"(?P<on>ON|O/N|RATE|OVERNIGHT|TN|SN)"
+    r"|0*(?P<n>\d+)(?P<unit>YR|[DWMYZ])"
+    r"|(?P<years>\d+)?(?P<letter>[A-K])"
+    r"|(?P<bare>\d+)"
+)
+# Remainder after an FX pair: spot, outright, ATM vol (V) or {delta}R / {delta}B
+FX_RE = re.compile(
+    r"(?:(?P<vol>V)|(?P<delta>\d+)(?P<kind>[RB]))?"
+    r"(?P<tenor>ON|TN|SN|\d+[DWMY])?"
+)
+# Best effort for prefixes the table does not know yet
+TRAILING_TENOR_RE = re.compile(r"(?:(?P<n>\d+)(?P<unit>YR|[DWMYZ])|(?<=SO)(?P<years>\d+)?(?P<letter>[A-K])|(?P<bare>\d+))$")
+
+
+@dataclass(frozen=True)
+class TickerRecord:
+    """Parsed Bloomberg ticker"""
+    ticker: str
+    root: str                        # ticker without pricing source / yellow key
+    family: str
+    currency: Optional[str] = None   # for FX: the non-USD leg
+    tenor: Optional[str] = None      # normalised label: ON, 1D, 2W, 3M, 18M, 1Y
+    tenor_days: int = 0
+    delta: Optional[int] = None      # risk reversal / butterfly delta
+    pair: Optional[str] = None       # FX pair, e.g. EURUSD
+    source: Optional[str] = None     # pricing source, e.g. BGN
+    yellow_key: Optional[str] = None
+
+    @property
+    def known(self) -> bool:
+        return self.family != UNKNOWN
+
+    @property
+    def years(self) -> float:
+        return self.tenor_days / 365
+
+
+@dataclass(frozen=True)
+class Production:
+    """One prefix of the grammar: the family and currency it implies"""
+    prefix: str
+    family: str
+    currency: Optional[str] = None
+    pair: Optional[str] = None
+
+
+def normalise_tenor(count: int, unit: str) -> Tuple[str, int]:
+    """Label and days for count x unit; 12M -> 1Y, 24M -> 2Y, 1Z -> 1D"""
+    if unit == "Z":
+        unit = "D"
+    elif unit == "YR":
+        unit = "Y"
+    if unit == "M" and count and count % 12 == 0:
+        count, unit = count // 12, "Y"
+    return f"{count}{unit}", count * UNIT_DAYS[unit]
+
+
+def tenor_days(tenor: Optional[str]) -> int:
+    """Days for a tenor label (ON, 1W, 18M, 10Y); 0 when unknown"""
+    if not tenor:
+        return 0
+    tenor = tenor.upper()
+    if tenor in ("ON", "O/N", "TN", "SN"):
+        return 1
+    match = re.fullmatch(r"(\d+)(YR|[DWMYZ])", tenor)
+    if not match:
+        return 0
+    return normalise_tenor(int(match.group(1)), match.group(2))[1]
+
+
+def tenor_label(days: int) -> str:
+    """Inverse of tenor_days: the shortest standard label for a number of days"""
+    if days <= 1:
+        return "ON"
+    if days < 7:
+        return f"{days}D"
+    if days < 30:
+        return f"{max(days // 7, 1)}W"
+    if days < 365 or (days < 730 and days % 365):
+        return f"{round(days / 30)}M"
+    return f"{round(days / 365)}Y"
+
+
+def _tenor_from_match(match, bare_unit: str) -> Optional[Tuple[str, int]]:
+    if match.groupdict().get("on"):
+        return "ON", 1
+    if match.group("n"):
+        return normalise_tenor(int(match.group("n")), match.group("unit"))
+    if match.group("letter"):
+        months = MONTH_CODES[match.group("letter")] + 12 * int(match.group("years") or 0)
+        return normalise_tenor(months, "M")
+    if match.group("bare"):
+        return normalise_tenor(int(match.group("bare")), bare_unit)
+    return None
+
+
+class TickerGrammar:
+    """Prefix trie over CURRENCY_GRAMMAR plus the compiled tenor / FX grammars"""
+
+    def __init__(self, table: Dict[str, Dict[str, List[str]]] = CURRENCY_GRAMMAR,
+                 currencies: Iterable[str] = CURRENCIES, ndf_codes: Dict[str, str] = NDF_CODES,
+                 memo_size: int = 65536):
+        self.currencies = frozenset(currencies)
+        self._trie: Dict = {}
+        for currency in self.currencies:
+            self._add(Production(currency, MONEY_MARKET, currency))
+        for currency, families in table.items():
+            for family, prefixes in families.items():
+                for prefix in prefixes:
+                    self._add(Production(prefix, family, currency))
+        for code, currency in ndf_codes.items():
+            self._add(Production(code, FX_NDF, currency, f"USD{currency}"))
+        self.parse = lru_cache(maxsize=memo_size)(self._parse)
+
+    def _add(self, production: Production):
+        node = self._trie
+        for char in production.prefix:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append(production)
+
+    def _prefixes(self, root: str) -> List[Tuple[int, Production]]:
+        """Every production whose prefix starts `root`, longest first"""
+        found = []
+        node = self._trie
+        for i, char in enumerate(root):
+            node = node.get(char)
+            if node is None:
+                break
+            for production in node.get(None, ()):
+                found.append((i + 1, production))
+        # FX pairs are structural: two ISO codes, optionally behind NDF
+        for offset, family in ((0, FX_FORWARD), (3, FX_NDF)):
+            if offset and not root.startswith("NDF"):
+                continue
+            base, quote = root[offset:offset + 3], root[offset + 3:offset + 6]
+            if base != quote and base in self.currencies and quote in self.currencies:
+                pair = base + quote
+                currency = base if quote == "USD" else quote
+                found.append((offset + 6, Production(root[:offset + 6], family, currency, pair)))
+        found.sort(key=lambda item: -item[0])
+        return found
+
+    def _parse(self, ticker: str) -> TickerRecord:
+        parts = ticker.strip().upper().split()
+        yellow_key = parts.pop() if parts and parts[-1] in YELLOW_KEYS else None
+        source = parts.pop() if len(parts) > 1 and parts[-1] in PRICING_SOURCES else None
+        root = "".join(parts)
+        base = dict(ticker=ticker, root=root, source=source, yellow_key=yellow_key)
+
+        for length, production in self._prefixes(root):
+            record = self._match(production, root[length:], yellow_key, base)
+            if record is not None:
+                return record
+
+        # Unknown prefix - keep the old best-effort tenor so discovery still gets one
+        currency = root[:3] if root[:3] in self.currencies else None
+        tenor = None
+        if "RATE" in root or root.endswith(("ON", "O/N")) or "OVERNIGHT" in root:
+            tenor = ("ON", 1)
+        else:
+            match = TRAILING_TENOR_RE.search(root)
+            if match:
+                tenor = _tenor_from_match(match, "Y")
+        return TickerRecord(family=UNKNOWN, currency=currency, tenor=tenor[0] if tenor else None,
+                            tenor_days=tenor[1] if tenor else 0, **base)
+
+    def _match(self, production: Production, rest: str, yellow_key: Optional[str],
+               base: Dict) -> Optional[TickerRecord]:
+        family = production.family
+        if family in FX_FAMILIES:
+            if yellow_key not in (None, "CURNCY"):
+                return None
+            match = FX_RE.fullmatch(rest)
+            if not match or (match.group("vol") or match.group("kind")) and not match.group("tenor"):
+                return None
+            tenor, days = match.group("tenor"), 0
+            if tenor and tenor[-1] in UNIT_DAYS:
+                tenor, days = normalise_tenor(int(tenor[:-1]), tenor[-1])
+            elif tenor:
+                days = 1
+            delta = None
+            if match.group("vol"):
+                family = FX_VOL
+            elif match.group("kind"):
+                family = FX_RISK_REVERSAL if match.group("kind") == "R" else FX_BUTTERFLY
+                delta = int(match.group("delta"))
+            elif family == FX_FORWARD and tenor is None:
+                family = FX_SPOT
+            elif family == FX_NDF and tenor is None:
+                return None
+            return TickerRecord(family=family, currency=production.currency, tenor=tenor, tenor_days=days,
+                                delta=delta, pair=production.pair, **base)
+
+        keys = FAMILY_KEYS.get(family, ())
+        if yellow_key is not None and keys and yellow_key not in keys:
+            return None
+
+        if not rest:
+            # A bare benchmark name (SONIA Index) is the overnight fixing
+            if family != OVERNIGHT:
+                return None
+            tenor = ("ON", 1)
+        else:
+            match = TENOR_RE.fullmatch(rest)
+            if not match:
+                return None
+            tenor = _tenor_from_match(match, "M" if family == MONEY_MARKET else "Y")
+            if tenor is None:
+                return None
+
+        if tenor[0] == "ON":
+            if family not in (MONEY_MARKET, OVERNIGHT):
+                return None
+            family = OVERNIGHT
+        elif family == OVERNIGHT:
+            # Term points on an overnight benchmark (ESTR10 Index, SONIA2M Index) are OIS rates
+            family = OIS
+        return TickerRecord(family=family, currency=production.currency, tenor=tenor[0],
+                            tenor_days=tenor[1], **base)
+
+
+GRAMMAR = TickerGrammar()
+
+
+def parse_ticker(ticker: str) -> TickerRecord:
+    """Parse a Bloomberg ticker with the shared, memoized grammar"""
+    return GRAMMAR.parse(ticker)
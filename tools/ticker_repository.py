@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Indexed Ticker Repository
+In-memory view of central_bloomberg_ticker_repository_v3.json built for lookups
+
+The gateway used to load the repository JSON as a raw dict and never query
+it, templating candidate tickers for every request instead. TickerRepository
+parses each ticker once with the shared grammar and builds its indexes at
+startup:
+
+- by currency, category (the JSON section the ticker was listed under),
+  FX pair and tenor label
+- by (currency or pair, family), kept sorted by tenor days so a tenor range
+  is a bisect plus a slice
+- a prefix trie over ticker roots, each node holding every ticker below it
+
+so "all EUR OIS pillars", "USDJPY vol tickers up to 1Y" or "prefix EESWE" cost
+time proportional to the result, not to the repository.
+
+Usage:
+    repository = TickerRepository.from_file("central_bloomberg_ticker_repository_v3.json")
+    repository.select(currency="EUR", families=["ois"])
+    repository.select(pair="USDJPY", families=["fx_vol"], max_days=365)
+    repository.with_prefix("EESWE")
+"""
+
+import bisect
+import json
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from ticker_grammar import TickerRecord, parse_ticker, tenor_days
+
+logger = logging.getLogger(__name__)
+
+# Sections that only show example tickers, not repository inventory
+EXAMPLE_SECTIONS = ("usage_examples", "working_patterns")
+
+
+class TickerRepository:
+    """Tickers parsed once and indexed by currency, category, pair, tenor and prefix"""
+
+    def __init__(self, tickers: Iterable[Tuple[str, Optional[str]]] = ()):
+        self.records: Dict[str, TickerRecord] = {}
+        self.categories: Dict[str, Optional[str]] = {}
+        self._by_currency: Dict[str, List[TickerRecord]] = defaultdict(list)
+        self._by_category: Dict[str, List[TickerRecord]] = defaultdict(list)
+        self._by_pair: Dict[str, List[TickerRecord]] = defaultdict(list)
+        self._by_tenor: Dict[int, List[TickerRecord]] = defaultdict(list)
+        # (currency or pair, family) -> parallel lists sorted by tenor days
+        self._ranges: Dict[Tuple[str, str], Tuple[List[int], List[TickerRecord]]] = {}
+        self._trie: Dict = {}
+        for ticker, category in tickers:
+            self.add(ticker, category)
+
+    @classmethod
+    def from_json(cls, repository: Dict[str, Any]) -> "TickerRepository":
+        """Index every ticker string in the repository JSON under the key it was listed in"""
+        found: List[Tuple[str, Optional[str]]] = []
+
+        def walk(node: Any, category: Optional[str]):
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    walk(value, key)
+            elif isinstance(node, list):
+                for value in node:
+                    walk(value, category)
+            elif isinstance(node, str) and parse_ticker(node).yellow_key:
+                found.append((node, category))
+
+        for section, value in repository.items():
+            if section not in EXAMPLE_SECTIONS and section != "metadata":
+                walk(value, section)
+        return cls(found)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "TickerRepository":
+        with open(path) as f:
+            repository = cls.from_json(json.load(f))
+        logger.info(
+            f"Indexed {len(repository)} tickers from {path}: {len(repository._by_currency)} currencies, "
+            f"{len(repository._by_pair)} FX pairs"
+        )
+        return repository
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.records
+
+    def add(self, ticker: str, category: Optional[str] = None) -> TickerRecord:
+        """Index one ticker; re-adding a known ticker is a no-op"""
+        if ticker in self.records:
+            return self.records[ticker]
+        record = parse_ticker(ticker)
+        self.records[ticker] = record
+        self.categories[ticker] = category
+
+        if record.currency:
+            self._by_currency[record.currency].append(record)
+        if category:
+            self._by_category[category].append(record)
+        if record.pair:
+            self._by_pair[record.pair].append(record)
+        if record.tenor:
+            self._by_tenor[record.tenor_days].append(record)
+
+        for key in {record.currency, record.pair} - {None}:
+            days, records = self._ranges.setdefault((key, record.family), ([], []))
+            index = bisect.bisect_right(days, record.tenor_days)
+            days.insert(index, record.tenor_days)
+            records.insert(index, record)
+
+        node = self._trie
+        for char in record.root:
+            node = node.setdefault(char, {})
+            node.setdefault(None, []).append(record)
+        return record
+
+    def get(self, ticker: str) -> Optional[TickerRecord]:
+        return self.records.get(ticker)
+
+    def by_currency(self, currency: str) -> List[TickerRecord]:
+        return list(self._by_currency.get(currency.upper(), ()))
+
+    def by_category(self, category: str) -> List[TickerRecord]:
+        return list(self._by_category.get(category, ()))
+
+    def by_pair(self, pair: str) -> List[TickerRecord]:
+        return list(self._by_pair.get(pair.upper(), ()))
+
+    def by_tenor(self, tenor: str) -> List[TickerRecord]:
+        """Tickers at a tenor label; 12M and 1Y are the same pillar"""
+        return list(self._by_tenor.get(tenor_days(tenor), ()))
+
+    def with_prefix(self, prefix: str) -> List[TickerRecord]:
+        """Tickers whose root starts with `prefix` (EESWE, USDJPYV, ...)"""
+        node = self._trie
+        for char in prefix.upper().replace(" ", ""):
+            node = node.get(char)
+            if node is None:
+                return []
+        return list(node.get(None, ()))
+
+    def select(
+        self,
+        currency: Optional[str] = None,
+        pair: Optional[str] = None,
+        families: Optional[Iterable[str]] = None,
+        min_days: int = 0,
+        max_days: Optional[int] = None
+    ) -> List[TickerRecord]:
+        """
+        Tickers for a currency or FX pair, optionally limited to families and a tenor range
+
+        With families given, each family is one bisect into a tenor-sorted list,
+        so the cost is the size of the result.
+        """
+        key = (pair or currency or "").upper()
+        if not key:
+            raise ValueError("select() needs a currency or a pair")
+
+        if families is None:
+            records = self._by_pair.get(key, ()) if pair else self._by_currency.get(key, ())
+            return [
+                r for r in records
+                if r.tenor_days >= min_days and (max_days is None or r.tenor_days <= max_days)
+            ]
+
+        selected = []
+        for family in families:
+            selected.extend(self._range(key, family, min_days, max_days))
+        return selected
+
+    def find(self, key: str, family: str, tenor: Optional[str], delta: Optional[int] = None) -> List[TickerRecord]:
+        """Tickers for one pillar of a currency or pair, e.g. find("EURUSD", "fx_vol", "1M")"""
+        days = tenor_days(tenor)
+        return [r for r in self._range(key.upper(), family, days, days) if delta is None or r.delta == delta]
+
+    def _range(self, key: str, family: str, min_days: int, max_days: Optional[int]) -> List[TickerRecord]:
+        days, records = self._ranges.get((key, family), ([], []))
+        start = bisect.bisect_left(days, min_days)
+        end = len(days) if max_days is None else bisect.bisect_right(days, max_days)
+        return records[start:end]
+
+    def summary(self) -> Dict[str, Any]:
+        families = defaultdict(int)
+        for record in self.records.values():
+            families[record.family] += 1
+        return {
+            "tickers": len(self.records),
+            "currencies": len(self._by_currency),
+            "pairs": len(self._by_pair),
+            "categories": sorted(self._by_category),
+            "families": dict(families)
+        }
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Learned Ticker Routing
+Remembers which ticker variant actually returns data for each surface pillar
+
+Surface requests used to ask for both `{pair}V{tenor} BGN Curncy` and the
+plain `Curncy` fallback for every ATM / RR / BF point, doubling upstream load.
+A TickerRouter records, per (pair, tenor, kind), which candidate came back
+with data - or that none did - and later requests only ask for that one
+ticker (or skip a dead pillar entirely). Routes older than the re-probe
+interval are re-checked in the background with every variant in one batched
+call, so a pillar that moves from plain to BGN (or comes back to life) is
+picked up without slowing down live requests. The table is persisted so a
+restarted gateway starts with what it already learned.
+
+Usage:
+    router = TickerRouter.load()
+    tickers = router.choose("EURUSD|1M|atm", ["EURUSDV1M BGN Curncy", "EURUSDV1M Curncy"])
+    router.record("EURUSD|1M|atm", candidates, hit="EURUSDV1M BGN Curncy", answered=securities_returned)
+    asyncio.create_task(router.run(fetch_bloomberg_data))    # background re-probing
+    router.save()
+
+Environment Variables:
+- TICKER_ROUTES_FILE: Where learned routes are kept (default: ~/.cache/bloomberg_ticker_routes.json)
+- ROUTE_REPROBE_INTERVAL: Seconds before a learned route is re-probed (default: 21600 - 6 hours)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = Path(os.getenv(
+    "TICKER_ROUTES_FILE",
+    str(Path.home() / ".cache" / "bloomberg_ticker_routes.json")
+))
+REPROBE_INTERVAL = float(os.getenv("ROUTE_REPROBE_INTERVAL", "21600"))
+
+
+def returned_data(security_data: Dict[str, Any]) -> bool:
+    """A variant is good if Bloomberg answered it with at least one populated field"""
+    fields = security_data.get("fields") or {}
+    return bool(security_data.get("success")) and any(v is not None for v in fields.values())
+
+
+def route_key(pair: str, tenor: Optional[str], kind: str) -> str:
+    return f"{pair}|{tenor or '-'}|{kind}"
+
+
+class TickerRouter:
+    """route key -> the candidate that returned data (None = no variant did)"""
+
+    def __init__(self, path: Path = STATE_FILE, reprobe_interval: float = REPROBE_INTERVAL):
+        self.path = Path(path)
+        self.reprobe_interval = reprobe_interval
+        # key -> {"ticker": str | None, "variants": [...], "checked_at": epoch seconds}
+        self.routes: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"routed": 0, "dead": 0, "unrouted": 0, "reprobed": 0, "switched": 0}
+
+    @classmethod
+    def load(cls, path: Path = STATE_FILE, **kwargs) -> "TickerRouter":
+        """Create a router, resuming any persisted routes"""
+        router = cls(path=path, **kwargs)
+        try:
+            router.routes = json.loads(router.path.read_text()).get("routes", {})
+            logger.info(f"Loaded {len(router.routes)} ticker routes from {router.path}")
+        except (OSError, ValueError):
+            pass
+        return router
+
+    def save(self):
+        """Persist the routing table for the next start"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({
+                "routes": self.routes,
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }, indent=2))
+        except OSError as e:
+            logger.warning(f"Could not save ticker routes: {e}")
+
+    def choose(self, key: str, candidates: List[str]) -> List[str]:
+        """Tickers to request for a pillar: the learned one, none if dead, all candidates if unknown"""
+        route = self.routes.get(key)
+        if route is None:
+            self.stats["unrouted"] += 1
+            return list(candidates)
+        if route["ticker"] is None:
+            self.stats["dead"] += 1
+            return []
+        self.stats["routed"] += 1
+        return [route["ticker"]]
+
+    def record(self, key: str, requested: List[str], hit: Optional[str], answered: Optional[Set[str]] = None):
+        """
+        Learn from a fetch of `requested` for this pillar; `hit` is the preferred ticker that returned data
+
+        `answered` is the set of securities the VM returned an entry for. A miss
+        only counts when every requested variant was answered without data -
+        tickers lost with a failed chunk say nothing. None means all were answered.
+        """
+        if not requested:
+            return
+        if hit is None and answered is not None and not all(ticker in answered for ticker in requested):
+            return
+        route = self.routes.get(key)
+        if route is not None:
+            if hit is None:
+                # The learned variant stopped answering - ask every variant again next time
+                logger.info(f"Route {key} lost {route['ticker']}, re-learning")
+                del self.routes[key]
+            # Live hits do not reset the clock, so fallbacks still get re-probed
+            return
+        if hit is None and len(requested) == 1:
+            # A single candidate that failed says nothing about the alternatives
+            return
+        self.routes[key] = {"ticker": hit, "variants": list(requested), "checked_at": time.time()}
+
+    def due(self, now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Routes older than the re-probe interval"""
+        now = now or time.time()
+        return {
+            key: route for key, route in self.routes.items()
+            if now - route.get("checked_at", 0) >= self.reprobe_interval
+        }
+
+    async def reprobe(
+        self,
+        fetch: Callable[[List[str], List[str]], Awaitable[Dict[str, Any]]],
+        fields: Optional[List[str]] = None,
+        limit: int = 500
+    ) -> int:
+        """Re-check every variant of stale routes in one batched call; returns routes re-probed"""
+        due = list(self.due().items())[:limit]
+        if not due:
+            return 0
+        securities = list(dict.fromkeys(t for _, route in due for t in route["variants"]))
+        response = await fetch(securities, fields or ["PX_LAST"])
+        if not isinstance(response, dict) or "error" in response:
+            logger.warning(f"Route re-probe failed: {response.get('error') if isinstance(response, dict) else response}")
+            return 0
+
+        securities_data = (response.get("data") or {}).get("securities_data", [])
+        answered = {sd.get("security") for sd in securities_data}
+        good = {sd.get("security") for sd in securities_data if returned_data(sd)}
+        reprobed = 0
+        for key, route in due:
+            # Variants are kept in preference order (BGN before plain)
+            hit = next((t for t in route["variants"] if t in good), None)
+            if hit is None and not all(t in answered for t in route["variants"]):
+                # Lost with a failed chunk - keep the route and try again next round
+                continue
+            reprobed += 1
+            if hit != route["ticker"]:
+                self.stats["switched"] += 1
+                logger.info(f"Route {key}: {route['ticker']} -> {hit}")
+            self.routes[key] = {"ticker": hit, "variants": route["variants"], "checked_at": time.time()}
+        self.stats["reprobed"] += reprobed
+        self.save()
+        return reprobed
+
+    async def run(
+        self,
+        fetch: Callable[[List[str], List[str]], Awaitable[Dict[str, Any]]],
+        fields: Optional[List[str]] = None,
+        check_every: float = 60.0
+    ):
+        """Background loop: re-probe stale routes until cancelled"""
+        while True:
+            await asyncio.sleep(check_every)
+            try:
+                await self.reprobe(fetch, fields)
+            except Exception as e:
+                logger.warning(f"Route re-probe error: {e}")
+
+    def summary(self) -> Dict[str, Any]:
+        dead = sum(1 for route in self.routes.values() if route["ticker"] is None)
+        return {
+            "routes": len(self.routes),
+            "dead": dead,
+            "due_for_reprobe": len(self.due()),
+            "reprobe_interval": self.reprobe_interval,
+            **self.stats
+        }
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Gateway Request Tracing
+OpenTelemetry spans from the handler through the cache and DB to the Bloomberg VM
+
+/metrics says a route is slow; a trace says why. Every request gets a server
+span named after its route template, and the slow parts of a request open
+child spans on the shared `tracer`:
+
+- cache.get / cache.set          CacheManager (redis or memory, hit/miss/stale)
+- bloomberg.fetch                fetch_bloomberg_data (batched, chunked)
+- bloomberg.reference / .historical  one VM call, with bloomberg.parse for its JSON
+- db.connect / db.query          yield curve config lookups
+- surface.process                building the surface from the VM response
+
+Spans go to the exporter chosen by TRACE_EXPORTER - the console, or a
+JSON-lines file that can be read offline - and are dropped otherwise.
+
+Sending the X-Debug-Timing header (any value) on a request also returns its
+breakdown: a Server-Timing response header covering the whole request, and
+a "timing" entry in the response metadata for handlers that add one via
+add_timing(). Only requests carrying the header are collected.
+
+Usage:
+    trace_requests(app)                      # provider + server spans
+    with tracer.start_as_current_span("cache.get") as span: ...
+    add_timing(metadata)
+
+Environment Variables:
+- TRACE_EXPORTER: none, console or file (default: none)
+- TRACE_FILE: JSON-lines span file for the file exporter (default: ~/.cache/bloomberg_gateway_traces.jsonl)
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import FastAPI
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.trace import SpanKind
+
+from gateway_metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+TRACE_FILE = Path(os.getenv(
+    "TRACE_FILE",
+    str(Path.home() / ".cache" / "bloomberg_gateway_traces.jsonl")
+))
+DEBUG_HEADER = b"x-debug-timing"
+
+tracer = trace.get_tracer("bloomberg-gateway")
+
+
+class TimingCollector(SpanProcessor):
+    """Keeps finished spans of watched traces (debug requests) for their timing breakdown"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._traces: Dict[int, Dict[str, Any]] = {}
+
+    def watch(self, trace_id: int):
+        with self._lock:
+            self._traces[trace_id] = {"started": time.perf_counter(), "spans": []}
+
+    def forget(self, trace_id: int):
+        with self._lock:
+            self._traces.pop(trace_id, None)
+
+    def on_end(self, span: ReadableSpan):
+        with self._lock:
+            watched = self._traces.get(span.context.trace_id)
+            if watched is not None and span.parent is not None:
+                watched["spans"].append((span.name, (span.end_time - span.start_time) / 1e6))
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        # Nothing buffered; the base class returns None, which stops the provider flushing the exporter
+        return True
+
+    def breakdown(self, trace_id: int) -> Optional[Dict[str, Any]]:
+        """{"elapsed_ms", "spans": [{"name", "count", "ms"}]} so far, slowest first"""
+        with self._lock:
+            watched = self._traces.get(trace_id)
+            if watched is None:
+                return None
+            spans = list(watched["spans"])
+            elapsed = (time.perf_counter() - watched["started"]) * 1000
+        totals: Dict[str, Tuple[int, float]] = {}
+        for name, ms in spans:
+            count, total = totals.get(name, (0, 0.0))
+            totals[name] = (count + 1, total + ms)
+        return {
+            "elapsed_ms": round(elapsed, 3),
+            "spans": [
+                {"name": name, "count": count, "ms": round(total, 3)}
+                for name, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1])
+            ]
+        }
+
+
+timings = TimingCollector()
+
+
+def span_exporter():
+    if TRACE_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    if TRACE_EXPORTER == "file":
+        try:
+            TRACE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            out = open(TRACE_FILE, "a", buffering=1)
+        except OSError as e:
+            logger.warning(f"Cannot write traces to {TRACE_FILE}: {e}")
+            return None
+        return ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    return None
+
+
+def configure_tracing(service_name: str = "bloomberg-gateway"):
+    """Install the tracer provider: debug timing collector plus the configured exporter"""
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(timings)
+    exporter = span_exporter()
+    if exporter is not None:
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        logger.info(f"Exporting traces to {TRACE_EXPORTER}")
+    trace.set_tracer_provider(provider)
+
+
+def current_trace_id() -> int:
+    return trace.get_current_span().get_span_context().trace_id
+
+
+def add_timing(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the timing breakdown so far to response metadata, for X-Debug-Timing requests"""
+    breakdown = timings.breakdown(current_trace_id())
+    if breakdown is not None:
+        metadata["timing"] = breakdown
+    return metadata
+
+
+def server_timing(breakdown: Dict[str, Any]) -> str:
+    """Server-Timing header value (span names as metrics, total last)"""
+    entries = [f'{span["name"]};dur={span["ms"]}' for span in breakdown["spans"]]
+    return ", ".join(entries + [f'total;dur={breakdown["elapsed_ms"]}'])
+
+
+class TracingMiddleware:
+    """Server span per request; X-Debug-Timing requests get a Server-Timing header"""
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route = route_template(self.routes, scope)
+        debug = any(name == DEBUG_HEADER for name, _ in scope["headers"])
+        with tracer.start_as_current_span(
+            f'{scope["method"]} {route}',
+            kind=SpanKind.SERVER,
+            attributes={"http.method": scope["method"], "http.route": route, "http.target": scope["path"]}
+        ) as span:
+            trace_id = span.get_span_context().trace_id
+            if debug:
+                timings.watch(trace_id)
+
+            async def send_traced(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    breakdown = timings.breakdown(trace_id) if debug else None
+                    if breakdown is not None:
+                        headers = list(message.get("headers", []))
+                        headers.append((b"server-timing", server_timing(breakdown).encode()))
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                if debug:
+                    timings.forget(trace_id)
+
+
+def trace_requests(app: FastAPI, service_name: str = "bloomberg-gateway"):
+    """Configure tracing and open a server span for every request"""
+    configure_tracing(service_name)
+    app.add_middleware(TracingMiddleware, routes=app.routes)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Persistent Ticker Validation Cache
+Remembers which tickers Bloomberg recognised (and which it did not) across runs
+
+Discovery tools probe the same candidate tickers on every run, including
+patterns that are known to be dead (e.g. NDFUSDINR1M Curncy). The cache keeps
+one row per ticker in a local SQLite file with the outcome of its last
+reference probe. Valid and invalid results expire separately, so dead patterns
+are skipped for longer while live ones are re-confirmed more often.
+
+Validity (Bloomberg recognised the security) is kept apart from the field
+values. Each probe adds the fields it asked for to the row, including ones
+that came back empty, and a lookup for fields a valid row has not seen yet
+is a miss - a SECURITY_NAME probe never answers a later PX_LAST check.
+
+Usage:
+    cache = ValidationCache()
+    known, unknown = cache.split(tickers, fields)          # only probe `unknown`
+    cache.record_response(reference_response, fields)      # after each upstream call
+    response = cache.cached_response(known)                # reference-shaped view of `known`
+
+Environment Variables:
+- VALIDATION_CACHE_FILE: SQLite file (default: ~/.cache/bloomberg_validation_cache.sqlite)
+- VALIDATION_VALID_TTL: Seconds a valid result is trusted (default: 604800 - 7 days)
+- VALIDATION_INVALID_TTL: Seconds an invalid result is trusted (default: 2592000 - 30 days)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = Path(os.getenv(
+    "VALIDATION_CACHE_FILE",
+    str(Path.home() / ".cache" / "bloomberg_validation_cache.sqlite")
+))
+VALID_TTL = int(os.getenv("VALIDATION_VALID_TTL", "604800"))
+INVALID_TTL = int(os.getenv("VALIDATION_INVALID_TTL", "2592000"))
+
+
+def is_valid_security(security_data: Dict[str, Any]) -> bool:
+    """A probed security is valid if Bloomberg returned it with at least one populated field"""
+    fields = security_data.get("fields") or {}
+    return bool(security_data.get("success")) and any(v is not None for v in fields.values())
+
+
+class ValidationCache:
+    """SQLite-backed ticker -> (valid, fields, checked_at) with separate TTLs"""
+
+    def __init__(self, path: Path = CACHE_FILE, valid_ttl: int = VALID_TTL, invalid_ttl: int = INVALID_TTL):
+        self.path = Path(path)
+        self.valid_ttl = valid_ttl
+        self.invalid_ttl = invalid_ttl
+        self.stats = {"hits": 0, "misses": 0, "stored": 0}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS validations (
+                    ticker TEXT PRIMARY KEY,
+                    valid INTEGER NOT NULL,
+                    fields TEXT,
+                    checked_at REAL NOT NULL
+                )
+            """)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            # Without a cache every ticker is simply probed again
+            logger.warning(f"Validation cache unavailable at {self.path}: {e}")
+            self._conn = None
+
+    def lookup(self, tickers: Iterable[str], fields: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Fresh cached results: ticker -> {"valid": bool, "fields": {...}}
+
+        With `fields`, valid rows that have not seen every one of them are left
+        out, and the rest carry only those fields - like a live response would.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if self._conn is None or not tickers:
+            return {}
+
+        now = time.time()
+        known = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(tickers), 500):
+                chunk = tickers[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT ticker, valid, fields, checked_at FROM validations "
+                    f"WHERE ticker IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for ticker, valid, stored, checked_at in rows:
+                    ttl = self.valid_ttl if valid else self.invalid_ttl
+                    if now - checked_at <= ttl:
+                        known[ticker] = {"valid": bool(valid), "fields": json.loads(stored) if stored else {}}
+
+        if fields:
+            for ticker, entry in list(known.items()):
+                if not entry["valid"]:
+                    continue
+                if not all(field in entry["fields"] for field in fields):
+                    del known[ticker]
+                else:
+                    entry["fields"] = {field: entry["fields"][field] for field in fields}
+        return known
+
+    def split(
+        self, tickers: Iterable[str], fields: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Partition tickers into fresh cached results (covering `fields`) and ones that still need probing"""
+        tickers = list(dict.fromkeys(tickers))
+        known = self.lookup(tickers, fields)
+        unknown = [t for t in tickers if t not in known]
+        self.stats["hits"] += len(known)
+        self.stats["misses"] += len(unknown)
+        return known, unknown
+
+    def record(self, results: Dict[str, Optional[Dict[str, Any]]]):
+        """
+        Store probe outcomes: ticker -> fields dict when valid, None when invalid
+
+        Fields are added to those a fresh valid row already has, so probes for
+        different fields build up one entry instead of replacing each other.
+        """
+        results = {ticker: fields for ticker, fields in results.items() if ticker}
+        if self._conn is None or not results:
+            return
+        now = time.time()
+        with self._lock:
+            previous = {}
+            tickers = [ticker for ticker, fields in results.items() if fields is not None]
+            for i in range(0, len(tickers), 500):
+                chunk = tickers[i:i + 500]
+                previous.update(self._conn.execute(
+                    f"SELECT ticker, fields FROM validations "
+                    f"WHERE valid = 1 AND checked_at >= ? AND ticker IN ({','.join('?' * len(chunk))})",
+                    [now - self.valid_ttl, *chunk]
+                ).fetchall())
+            rows = []
+            for ticker, fields in results.items():
+                if fields is None:
+                    rows.append((ticker, 0, None, now))
+                    continue
+                merged = {**json.loads(previous.get(ticker) or "{}"), **fields}
+                rows.append((ticker, 1, json.dumps(merged, default=str), now))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO validations (ticker, valid, fields, checked_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+        self.stats["stored"] += len(rows)
+
+    def record_response(self, response: Dict[str, Any], fields: Optional[List[str]] = None):
+        """
+        Store every security a reference response answered for (failed calls are ignored)
+
+        `fields` are the fields the request asked for; ones missing from an
+        answer are stored as None, so the entry covers them on later lookups.
+        """
+        if not isinstance(response, dict) or "error" in response or not response.get("success"):
+            return
+        results = {}
+        for security_data in (response.get("data") or {}).get("securities_data", []):
+            ticker = security_data.get("security")
+            if security_data.get("success"):
+                results[ticker] = {**dict.fromkeys(fields or []), **(security_data.get("fields") or {})}
+            else:
+                results[ticker] = None
+        self.record(results)
+
+    @staticmethod
+    def cached_response(known: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Reference-response view of cached results so callers can parse them like live data"""
+        return {
+            "success": True,
+            "cached": True,
+            "data": {
+                "securities_data": [
+                    {"security": ticker, "success": entry["valid"], "fields": entry["fields"]}
+                    for ticker, entry in known.items()
+                ]
+            }
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
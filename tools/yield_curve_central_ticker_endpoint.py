@@ -11,6 +11,13 @@ import psycopg2
 import os
 import subprocess
 
+from opentelemetry import trace
+
+from ticker_grammar import parse_ticker
+
+# Spans join the gateway's request trace when it has tracing configured
+tracer = trace.get_tracer(__name__)
+
 # Create router for yield curve endpoints
 yield_curve_router = APIRouter(prefix="/api/yield-curves", tags=["yield-curves"])
 
@@ -71,28 +78,12 @@ def get_database_connection():
     )
 
 def parse_tenor_from_ticker(ticker: str) -> tuple[str, float, int]:
-    """Parse tenor information from ticker symbol"""
-    # Extract tenor from ticker patterns like USSO1, USSO10, etc.
-    ticker_upper = ticker.upper()
-    
-    # Common patterns
-    if 'O/N' in ticker_upper or 'RATE' in ticker_upper:
-        return 'O/N', 1/365, 1
-    
-    # Extract numeric part from patterns like USSO1, USSO10
-    import re
-    match = re.search(r'([A-Z]+)(\d+)', ticker_upper)
-    if match:
-        numeric = int(match.group(2))
-        if numeric <= 11:  # Likely months
-            if numeric == 1:
-                return '1Y', 1.0, 365
-            else:
-                return f'{numeric}M', numeric/12, numeric * 30
-        else:  # Years
-            return f'{numeric}Y', float(numeric), numeric * 365
-    
-    return 'Unknown', 0, 0
+    """Parse tenor label, years and days from ticker symbol (shared ticker grammar)"""
+    record = parse_ticker(ticker)
+    if not record.tenor:
+        return 'Unknown', 0, 0
+    label = 'O/N' if record.tenor == 'ON' else record.tenor
+    return label, record.years, record.tenor_days
 
 @yield_curve_router.get("/available")
 async def get_available_curves():
@@ -139,22 +130,25 @@ async def get_yield_curve_config(request: YieldCurveRequest):
     """Get yield curve configuration from ticker_reference table"""
     conn = None
     try:
-        conn = get_database_connection()
+        with tracer.start_as_current_span("db.connect", attributes={"db.system": "postgresql"}):
+            conn = get_database_connection()
         cursor = conn.cursor()
         
         # Simple query - just get tickers for this currency from ticker_reference
-        cursor.execute("""
-            SELECT 
-                bloomberg_ticker,
-                instrument_type,
-                curve_name
-            FROM ticker_reference
-            WHERE currency_code = %s 
-            AND is_active = true
-            ORDER BY bloomberg_ticker
-        """, (request.currency,))
+        with tracer.start_as_current_span("db.query", attributes={"db.system": "postgresql", "db.sql.table": "ticker_reference"}) as span:
+            cursor.execute("""
+                SELECT 
+                    bloomberg_ticker,
+                    instrument_type,
+                    curve_name
+                FROM ticker_reference
+                WHERE currency_code = %s 
+                AND is_active = true
+                ORDER BY bloomberg_ticker
+            """, (request.currency,))
         
-        ticker_results = cursor.fetchall()
+            ticker_results = cursor.fetchall()
+            span.set_attribute("db.rows", len(ticker_results))
         
         if not ticker_results:
             return YieldCurveResponse(
@@ -13,6 +13,13 @@ import json
 import os
 import subprocess
 
+from opentelemetry import trace
+
+from ticker_grammar import BOND, MONEY_MARKET, OVERNIGHT, UNKNOWN, parse_ticker, tenor_label
+
+# Spans join the gateway's request trace when it has tracing configured
+tracer = trace.get_tracer(__name__)
+
 # Create router for yield curve endpoints
 yield_curve_router = APIRouter(prefix="/api/yield-curves", tags=["yield-curves"])
 
@@ -75,28 +82,20 @@ def get_database_connection():
 
 def tenor_to_label(days: int) -> str:
     """Convert tenor in days to display label"""
-    if days == 1:
-        return "O/N"
-    elif days < 30:
-        weeks = days // 7
-        return f"{weeks}W" if weeks > 1 else "1W"
-    elif days < 365:
-        months = round(days / 30)
-        return f"{months}M"
-    else:
-        years = round(days / 365)
-        return f"{years}Y"
+    label = tenor_label(days)
+    return "O/N" if label == "ON" else label
 
 def get_instrument_type(ticker: str) -> str:
     """Determine instrument type from ticker"""
-    ticker_upper = ticker.upper()
+    family = parse_ticker(ticker).family
     
-    # Money market indicators
-    if any(x in ticker_upper for x in ['RATE', 'LIBOR', 'EURIBOR', 'TIBOR', 'BBSW', 'CDOR', 'PRIBOR', 'WIBOR']):
+    if family in (MONEY_MARKET, OVERNIGHT):
         return 'money_market'
-    # Government bonds
-    elif any(x in ticker_upper for x in ['USGG', 'GDBR', 'GUKG', 'GJGB', 'GSWISS', 'GCAN', 'GACGB']):
+    elif family == BOND:
         return 'bond'
+    # Prefixes the grammar does not know yet - fall back to fixing names
+    elif family == UNKNOWN and any(x in ticker.upper() for x in ['RATE', 'LIBOR', 'IBOR', 'BBSW', 'CDOR']):
+        return 'money_market'
     # Everything else is likely a swap
     else:
         return 'swap'
@@ -152,7 +151,8 @@ async def get_yield_curve_config(request: YieldCurveRequest):
     """Get yield curve configuration from database using actual schema"""
     conn = None
     try:
-        conn = get_database_connection()
+        with tracer.start_as_current_span("db.connect", attributes={"db.system": "postgresql"}):
+            conn = get_database_connection()
         cursor = conn.cursor()
         
         # Get all tickers for this currency through curve mappings
@@ -180,8 +180,10 @@ async def get_yield_curve_config(request: YieldCurveRequest):
                 END
         """
         
-        cursor.execute(ticker_query, (request.currency,))
-        ticker_results = cursor.fetchall()
+        with tracer.start_as_current_span("db.query", attributes={"db.system": "postgresql", "db.sql.table": "rate_curve_mappings"}) as span:
+            cursor.execute(ticker_query, (request.currency,))
+            ticker_results = cursor.fetchall()
+            span.set_attribute("db.rows", len(ticker_results))
         
         if not ticker_results:
             return YieldCurveResponse(